@@ -11,25 +11,56 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QPushButton, QLabel, QFileDialog, 
                              QProgressBar, QTextEdit, QTabWidget, QListWidget,
                              QMessageBox, QGroupBox, QComboBox, QSystemTrayIcon,
-                             QMenu, QAction, QShortcut, QListWidgetItem, QLineEdit, QCheckBox)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QUrl
+                             QMenu, QAction, QShortcut, QListWidgetItem, QLineEdit, QCheckBox,
+                             QSpinBox, QTableView, QHeaderView, QAbstractItemView)
+from PyQt5.QtCore import (Qt, QThread, QObject, pyqtSignal, QTimer, QUrl, QAbstractTableModel,
+                          QAbstractProxyModel, QModelIndex)
 from PyQt5.QtGui import QIcon, QFont, QPalette, QColor, QKeySequence, QPixmap, QDragEnterEvent, QDropEvent
 from src.package_handler import PackageHandler
+from src.verification_pool import VerificationPool, default_worker_count
+from src.install_planner import plan_installation
+from src.privileged_helper import PrivilegedHelper
+from src.inventory_service import InventoryService, package_key
+from src.inventory_table import InventoryTable, COLUMNS, COLUMN_NAME, COLUMN_SIZE, COLUMN_TYPE, TYPES
 from src.logger import InstallLogger
+from src.history_export import export_format
 from src import config
 from src import language
 from src.language import _  # Import translation function
 import json
 import time
 
-class InstallerThread(QThread):
+class ManagerProgressMixin:
+    """
+    Shows package manager ProcessEvents through a thread's progress and step signals
+    
+    Subclasses set the progress bar band the manager's 0-100% is mapped onto.
+    """
+    PROGRESS_START = 0
+    PROGRESS_SPAN = 100
+    last_phase = None
+    
+    def process_event(self, event):
+        """Map manager progress onto the band and announce phase changes"""
+        if event.percent is not None:
+            self.progress.emit(self.PROGRESS_START + int(event.percent * self.PROGRESS_SPAN / 100))
+        phase = (event.phase, event.package)
+        if event.phase and phase != self.last_phase:
+            self.last_phase = phase
+            self.step.emit(f"⚙️ {event.phase} {event.package}".rstrip())
+
+
+class InstallerThread(QThread, ManagerProgressMixin):
     """Thread to handle installation without blocking UI"""
     progress = pyqtSignal(int)
     status = pyqtSignal(str)
-    finished = pyqtSignal(bool, str)
+    finished = pyqtSignal(bool, str, object)  # success, message, step -> seconds
     step = pyqtSignal(str)  # New signal for detailed steps
+    PROGRESS_START = 40  # Package manager progress fills 40-99%
+    PROGRESS_SPAN = 59
     
-    def __init__(self, package_path, package_handler, verify_integrity=True, verify_signature=False, checksum=None, checksum_type='sha256'):
+    def __init__(self, package_path, package_handler, verify_integrity=True, verify_signature=False, checksum=None, checksum_type='sha256',
+                 preverified=None):
         super().__init__()
         self.package_path = package_path
         self.package_handler = package_handler
@@ -37,30 +68,30 @@ class InstallerThread(QThread):
         self.verify_signature = verify_signature
         self.checksum = checksum
         self.checksum_type = checksum_type
+        self.preverified = preverified  # verify_package() result from the verification pool
         
     def run(self):
-        """Run the installation process with detailed progress"""
+        """Run the installation process, reporting only work that actually happens"""
+        self.timings = {}
+        self.mark = time.perf_counter()
         try:
-            # Step 1: Initialization
-            self.step.emit("📋 Initializing installation process...")
-            self.status.emit("Starting installation...")
-            self.progress.emit(5)
-            time.sleep(0.3)
-            
-            # Step 2: Validation
+            # Step 1: Validation
             self.step.emit("🔍 Validating package file...")
             self.status.emit("Checking package type...")
-            self.progress.emit(15)
+            self.progress.emit(5)
             
             if not self.package_handler.validate_package(self.package_path):
-                self.finished.emit(False, "Invalid package file")
+                self.record_timing('validate')
+                self.finished.emit(False, "Invalid package file", self.timings)
                 return
+            self.record_timing('validate')
+            self.progress.emit(15)
             
-            time.sleep(0.2)
-            self.progress.emit(20)
-            
-            # Step 3: Package Verification (if enabled)
-            if self.verify_integrity or self.checksum or self.verify_signature:
+            # Step 2: Package Verification (if enabled)
+            if self.preverified is not None:
+                # Already verified in the background while earlier packages installed
+                self.step.emit("✅ Package verification passed")
+            elif self.verify_integrity or self.checksum or self.verify_signature:
                 self.step.emit("🔐 Verifying package security...")
                 self.status.emit("Checking package integrity and signatures...")
                 self.progress.emit(25)
@@ -71,56 +102,319 @@ class InstallerThread(QThread):
                     checksum_type=self.checksum_type,
                     check_signature=self.verify_signature
                 )
+                self.record_timing('verify')
                 
                 if not success:
-                    self.finished.emit(False, f"❌ Verification Failed:\\n{message}")
+                    self.finished.emit(False, f"❌ Verification Failed:\\n{message}", self.timings)
                     return
                 
                 self.step.emit("✅ Package verification passed")
-                time.sleep(0.2)
-            
-            self.progress.emit(35)
-            
-            # Step 4: Reading package information
-            self.step.emit("📖 Reading package metadata...")
-            self.status.emit("Analyzing package contents...")
-            self.progress.emit(40)
-            time.sleep(0.3)
-            
-            # Step 5: Checking dependencies
-            self.step.emit("🔗 Checking dependencies...")
-            self.status.emit("Verifying system requirements...")
-            self.progress.emit(50)
-            time.sleep(0.3)
             
-            # Step 6: Installing
+            # Step 3: Installing (the package manager resolves dependencies)
             self.step.emit("⚙️ Installing package...")
             self.status.emit("Installing package (this may take a while)...")
-            self.progress.emit(60)
+            self.progress.emit(40)
             
-            success, message = self.package_handler.install_package(self.package_path)
+            self.last_phase = None
+            success, message = self.package_handler.install_package(
+                self.package_path, progress_callback=self.process_event
+            )
+            self.record_timing('install')
             
             if success:
-                # Step 7: Configuring
-                self.step.emit("🔧 Configuring installation...")
-                self.progress.emit(85)
-                time.sleep(0.2)
-                
-                # Step 8: Finalizing
-                self.step.emit("✅ Finalizing installation...")
-                self.progress.emit(95)
-                time.sleep(0.2)
-                
                 self.progress.emit(100)
                 self.step.emit("✅ Installation completed successfully!")
             else:
                 self.step.emit("❌ Installation failed!")
             
-            self.finished.emit(success, message)
+            self.finished.emit(success, message, self.timings)
             
+        except Exception as e:
+            self.record_timing('error')
+            self.step.emit("❌ Error occurred during installation!")
+            self.finished.emit(False, f"Error: {str(e)}", self.timings)
+    
+    def record_timing(self, name):
+        """Record the wall-clock time spent since the previous step"""
+        now = time.perf_counter()
+        self.timings[name] = now - self.mark
+        self.mark = now
+
+
+class TransactionThread(QThread, ManagerProgressMixin):
+    """Thread installing a group of same-format packages in one transaction"""
+    progress = pyqtSignal(int)
+    step = pyqtSignal(str)
+    finished = pyqtSignal(object, str)  # outcomes: path -> (success, message), summary
+    PROGRESS_START = 10  # Transaction progress fills 10-95%
+    PROGRESS_SPAN = 85
+    
+    def __init__(self, package_paths, package_handler):
+        super().__init__()
+        self.package_paths = package_paths
+        self.package_handler = package_handler
+    
+    def run(self):
+        """Run the transaction"""
+        try:
+            self.step.emit(f"⚙️ Installing {len(self.package_paths)} packages in one transaction...")
+            self.progress.emit(10)
+            self.last_phase = None
+            success, message, outcomes = self.package_handler.install_transaction(
+                self.package_paths, progress_callback=self.process_event
+            )
+            self.progress.emit(100)
+            self.step.emit("✅ Transaction completed!" if success else "❌ Transaction finished with failures")
+            self.finished.emit(outcomes, message)
         except Exception as e:
             self.step.emit("❌ Error occurred during installation!")
-            self.finished.emit(False, f"Error: {str(e)}")
+            self.finished.emit({}, f"Error: {str(e)}")
+
+
+class UninstallThread(QThread, ManagerProgressMixin):
+    """Thread removing packages, one transaction per package manager"""
+    progress = pyqtSignal(int)
+    step = pyqtSignal(str)
+    finished = pyqtSignal(object, str)  # outcomes: (name, type) -> (success, message), summary
+    PROGRESS_START = 5  # Removal progress fills 5-95%
+    PROGRESS_SPAN = 90
+    
+    def __init__(self, packages, package_handler):
+        super().__init__()
+        self.packages = packages
+        self.package_handler = package_handler
+    
+    def run(self):
+        """Run the removal"""
+        try:
+            self.step.emit(f"⚙️ Removing {len(self.packages)} package(s)...")
+            self.progress.emit(5)
+            self.last_phase = None
+            success, message, outcomes = self.package_handler.uninstall_transaction(
+                self.packages, progress_callback=self.process_event
+            )
+            self.progress.emit(100)
+            self.step.emit("✅ Removal completed!" if success else "❌ Removal finished with failures")
+            self.finished.emit(outcomes, message)
+        except Exception as e:
+            self.step.emit("❌ Error occurred during removal!")
+            self.finished.emit({}, f"Error: {str(e)}")
+
+
+class ExportThread(QThread):
+    """Thread streaming the installation history into an export file"""
+    progress = pyqtSignal(int, 'qint64')  # entries, bytes written
+    finished = pyqtSignal(bool, int)      # success, entries written
+    
+    def __init__(self, logger, file_path, export_format):
+        super().__init__()
+        self.logger = logger
+        self.file_path = file_path
+        self.export_format = export_format
+        self.rows = 0
+    
+    def run(self):
+        """Run the export"""
+        success = self.logger.export_history(self.file_path, self.export_format, progress_callback=self.report)
+        self.finished.emit(success, self.rows)
+    
+    def report(self, rows, written):
+        self.rows = rows
+        self.progress.emit(rows, written)
+
+
+class VerificationSignals(QObject):
+    """Carries verification pool results from worker threads to the UI thread"""
+    verified = pyqtSignal(str, object)  # package path, (success, message, details)
+
+
+class InventorySignals(QObject):
+    """Carries inventory changes from the inventory service thread to the UI thread"""
+    changed = pyqtSignal(object)  # InventoryDiff
+    failed = pyqtSignal(str)
+
+
+class InstalledPackageModel(QAbstractTableModel):
+    """Table model over an InventoryTable; dead rows stay until compaction"""
+    
+    TYPE_ICONS = {'deb': "📦", 'rpm': "🔴"}
+    
+    def __init__(self, table, parent=None):
+        super().__init__(parent)
+        self.table = table
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.table.row_count
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        table, row, column = self.table, index.row(), index.column()
+        if role == Qt.DisplayRole:
+            if column == COLUMN_NAME:
+                return table.names[row]
+            if column == COLUMN_SIZE:
+                size = table.sizes[row]
+                return f"{size:,} KiB" if size >= 0 else ""
+            if column == COLUMN_TYPE:
+                package_type = TYPES[table.types[row]]
+                return f"{self.TYPE_ICONS[package_type]} {package_type}"
+            return table.versions[row]
+        if role == Qt.TextAlignmentRole and column == COLUMN_SIZE:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role == Qt.ToolTipRole:
+            arch = table.arches[row]
+            details = [f"{table.names[row]} {table.versions[row]}" + (f" ({arch})" if arch else "")]
+            if table.summaries[row]:
+                details.append(table.summaries[row])
+            if table.sizes[row] >= 0:
+                details.append(f"Installed size: {table.sizes[row]} KiB")
+            if table.depends[row]:
+                details.append(f"Depends: {table.depends[row]}")
+            return '\n'.join(details)
+        return None
+    
+    def apply_diff(self, diff):
+        """Apply an InventoryDiff, touching only the rows it names"""
+        table = self.table
+        if table.row_count == 0 or table.needs_compaction():
+            self.beginResetModel()
+            table.compact()
+            for pkg in diff.removed:
+                table.remove(package_key(pkg))
+            table.extend(diff.added + diff.updated)
+            self.endResetModel()
+            return
+        
+        # Removed rows become dead in place, so no other row moves
+        changed = [table.remove(package_key(pkg)) for pkg in diff.removed]
+        for pkg in diff.updated:
+            if table.row_of(package_key(pkg)) is not None:
+                changed.append(table.update(pkg))
+        last_column = len(COLUMNS) - 1
+        for row in changed:
+            if row is not None:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, last_column))
+        
+        added = [pkg for pkg in diff.added + diff.updated if table.row_of(package_key(pkg)) is None]
+        if added:
+            first = table.row_count
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            table.extend(added)
+            self.endInsertRows()
+
+
+class InstalledPackageProxy(QAbstractProxyModel):
+    """
+    Filtered and sorted view of an InstalledPackageModel
+    
+    The visible rows are computed in one pass over the table's columns
+    instead of a filterAcceptsRow()/lessThan() call per row, and selections
+    survive refilters through the persistent indexes.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.query = ''
+        self.package_type = None
+        self.sort_column = COLUMN_NAME
+        self.sort_order = Qt.AscendingOrder
+        self._rows = []          # proxy row -> source row
+        self._positions = None   # source row -> proxy row, built on demand
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(0)
+        self._refresh_timer.timeout.connect(self.refresh)
+    
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        super().setSourceModel(model)
+        # Source edits are coalesced into one refresh per event loop pass
+        model.rowsInserted.connect(self._schedule_refresh)
+        model.dataChanged.connect(self._schedule_refresh)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._source_reset)
+        self._select()
+        self.endResetModel()
+    
+    def _schedule_refresh(self, *args):
+        self._refresh_timer.start()
+    
+    def _select(self):
+        table = self.sourceModel().table
+        self._rows = table.select(self.query, self.package_type, self.sort_column,
+                                  self.sort_order == Qt.DescendingOrder)
+        self._positions = None
+    
+    def _source_reset(self):
+        self._select()
+        self.endResetModel()
+    
+    def refresh(self):
+        """Recompute the visible rows, keeping persistent indexes (the selection) on their packages"""
+        self._refresh_timer.stop()
+        self.layoutAboutToBeChanged.emit()
+        old = self.persistentIndexList()
+        source_rows = [self._rows[index.row()] for index in old]
+        self._select()
+        positions = self._position_map()
+        new = []
+        for index, source_row in zip(old, source_rows):
+            row = positions.get(source_row)
+            new.append(QModelIndex() if row is None else self.index(row, index.column()))
+        self.changePersistentIndexList(old, new)
+        self.layoutChanged.emit()
+    
+    def set_filter(self, query, package_type=None):
+        self.query = query
+        self.package_type = package_type
+        self.refresh()
+    
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = column
+        self.sort_order = order
+        self.refresh()
+    
+    def source_row(self, row):
+        return self._rows[row]
+    
+    def _position_map(self):
+        if self._positions is None:
+            self._positions = {source_row: row for row, source_row in enumerate(self._rows)}
+        return self._positions
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+    
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self._rows) and 0 <= column < len(COLUMNS)):
+            return QModelIndex()
+        return self.createIndex(row, column)
+    
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+    
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self._rows[proxy_index.row()], proxy_index.column())
+    
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        row = self._position_map().get(source_index.row())
+        return QModelIndex() if row is None else self.index(row, source_index.column())
 
 
 class MainWindow(QMainWindow):
@@ -129,10 +423,34 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.package_handler = PackageHandler()
-        self.logger = InstallLogger()
         self.current_package = None
         self.current_theme = "Light"  # Default theme
+        self.verification_workers = default_worker_count()
+        self.verification_pool = None
+        self.verification_results = {}
+        self.awaiting_verification = None
+        self.batch_transactions = False
+        self.animate_progress = False
+        self.use_privileged_helper = config.PRIVILEGED_HELPER_ENABLED
+        self.history_backend = config.HISTORY_BACKEND
+        self.inventory_table = InventoryTable()
+        self.progress_target = 0
+        self.export_thread = None
+        self.transaction_groups = {}    # path -> every queued path sharing its transaction
+        self.transaction_outcomes = {}  # path -> (success, message) once its transaction ran
+        self.verification_signals = VerificationSignals()
+        self.verification_signals.verified.connect(self.package_preverified)
+        self.inventory_signals = InventorySignals()
+        self.inventory_signals.changed.connect(self.apply_inventory_diff)
+        self.inventory_signals.failed.connect(self.inventory_failed)
+        self.inventory_service = InventoryService(
+            self.inventory_signals.changed.emit,
+            on_error=lambda e: self.inventory_signals.failed.emit(str(e))
+        )
         self.load_settings()
+        self.logger = InstallLogger(backend=self.history_backend)
+        if self.use_privileged_helper:
+            self.package_handler.helper = PrivilegedHelper()
         self.init_ui()
         self.setup_shortcuts()
         self.setup_system_tray()
@@ -341,6 +659,11 @@ class MainWindow(QMainWindow):
     
     def quit_application(self):
         """Completely quit the application"""
+        self.stop_preverification()
+        self.inventory_service.stop()
+        self.logger.close()
+        if self.package_handler.helper is not None:
+            self.package_handler.helper.stop()
         self.tray_icon.hide()
         QApplication.quit()
     
@@ -660,6 +983,8 @@ class MainWindow(QMainWindow):
         
         self.progress_bar = QProgressBar()
         self.progress_bar.setToolTip("Current package installation progress")
+        self.progress_timer = QTimer(self)
+        self.progress_timer.timeout.connect(self.animate_progress_step)
         self.progress_bar.setFixedHeight(32)
         self.progress_bar.setStyleSheet("""
             QProgressBar {
@@ -887,7 +1212,12 @@ class MainWindow(QMainWindow):
         
         self.uninstall_search_input = QLineEdit()
         self.uninstall_search_input.setPlaceholderText("Type package name to search...")
-        self.uninstall_search_input.textChanged.connect(self.filter_installed_packages)
+        # Filter once typing pauses rather than on every keystroke
+        self.uninstall_search_timer = QTimer(self)
+        self.uninstall_search_timer.setSingleShot(True)
+        self.uninstall_search_timer.setInterval(config.SEARCH_DEBOUNCE_INTERVAL)
+        self.uninstall_search_timer.timeout.connect(self.filter_installed_packages)
+        self.uninstall_search_input.textChanged.connect(lambda: self.uninstall_search_timer.start())
         self.uninstall_search_input.setToolTip("Search installed packages by name")
         search_layout.addWidget(self.uninstall_search_input)
         
@@ -938,25 +1268,47 @@ class MainWindow(QMainWindow):
         packages_group = QGroupBox("📦 Installed Packages")
         packages_layout = QVBoxLayout()
         
-        self.installed_packages_list = QListWidget()
-        self.installed_packages_list.setSelectionMode(QListWidget.ExtendedSelection)
-        self.installed_packages_list.setToolTip("Select one or more packages to uninstall")
-        self.installed_packages_list.setStyleSheet("""
-            QListWidget {
+        self.installed_package_model = InstalledPackageModel(self.inventory_table, self)
+        self.installed_package_proxy = InstalledPackageProxy(self)
+        self.installed_package_proxy.setSourceModel(self.installed_package_model)
+        self.installed_package_proxy.layoutChanged.connect(self.update_uninstall_count)
+        self.installed_package_proxy.modelReset.connect(self.update_uninstall_count)
+        
+        self.installed_packages_view = QTableView()
+        self.installed_packages_view.setModel(self.installed_package_proxy)
+        self.installed_packages_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.installed_packages_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.installed_packages_view.setSortingEnabled(True)
+        self.installed_packages_view.sortByColumn(COLUMN_NAME, Qt.AscendingOrder)
+        self.installed_packages_view.setWordWrap(False)
+        self.installed_packages_view.setShowGrid(False)
+        self.installed_packages_view.verticalHeader().hide()
+        # Fixed row heights, so the view never measures rows it doesn't show
+        self.installed_packages_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.installed_packages_view.verticalHeader().setDefaultSectionSize(30)
+        header = self.installed_packages_view.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setSectionResizeMode(COLUMN_NAME, QHeaderView.Stretch)
+        header.resizeSection(1, 220)
+        header.resizeSection(COLUMN_SIZE, 110)
+        header.resizeSection(COLUMN_TYPE, 80)
+        self.installed_packages_view.setToolTip("Select one or more packages to uninstall")
+        self.installed_packages_view.setStyleSheet("""
+            QTableView {
                 border: 2px solid #bdc3c7;
                 border-radius: 5px;
                 padding: 5px;
             }
-            QListWidget::item {
-                padding: 8px;
+            QTableView::item {
+                padding: 4px;
                 border-bottom: 1px solid #ecf0f1;
             }
-            QListWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e74c3c;
                 color: white;
             }
         """)
-        packages_layout.addWidget(self.installed_packages_list)
+        packages_layout.addWidget(self.installed_packages_view)
         
         packages_group.setLayout(packages_layout)
         layout.addWidget(packages_group)
@@ -994,16 +1346,27 @@ class MainWindow(QMainWindow):
         button_layout.addStretch()
         layout.addLayout(button_layout)
         
+        # Removal progress, shown while an uninstall job runs
+        self.uninstall_progress_bar = QProgressBar()
+        self.uninstall_progress_bar.setToolTip("Progress of the running removal")
+        self.uninstall_progress_bar.hide()
+        layout.addWidget(self.uninstall_progress_bar)
+        
+        self.uninstall_step_label = QLabel("")
+        self.uninstall_step_label.setStyleSheet("color: #7f8c8d;")
+        self.uninstall_step_label.hide()
+        layout.addWidget(self.uninstall_step_label)
+        
         # Enable uninstall button when selection changes
-        self.installed_packages_list.itemSelectionChanged.connect(
+        self.installed_packages_view.selectionModel().selectionChanged.connect(
             lambda: self.uninstall_btn.setEnabled(
-                len(self.installed_packages_list.selectedItems()) > 0
+                self.installed_packages_view.selectionModel().hasSelection()
             )
         )
         
-        # Load installed packages on tab creation
-        self.all_installed_packages = []
-        QTimer.singleShot(100, self.load_installed_packages)  # Load after UI is ready
+        # Load installed packages in the background and follow later changes
+        self.uninstall_count_label.setText("Loading packages...")
+        self.inventory_service.start()
         
         return tab
     
@@ -1151,10 +1514,10 @@ class MainWindow(QMainWindow):
         button_layout.addSpacing(20)
         
         # Export CSV button
-        export_csv_btn = QPushButton("📊 Export CSV")
-        export_csv_btn.setToolTip("Export history to CSV file for spreadsheet analysis")
-        export_csv_btn.clicked.connect(self.export_csv)
-        export_csv_btn.setStyleSheet("""
+        self.export_csv_btn = QPushButton("📊 Export CSV")
+        self.export_csv_btn.setToolTip("Export history to CSV file for spreadsheet analysis")
+        self.export_csv_btn.clicked.connect(self.export_csv)
+        self.export_csv_btn.setStyleSheet("""
             QPushButton {
                 background-color: #27ae60;
                 color: white;
@@ -1166,13 +1529,13 @@ class MainWindow(QMainWindow):
                 background-color: #229954;
             }
         """)
-        button_layout.addWidget(export_csv_btn)
+        button_layout.addWidget(self.export_csv_btn)
         
         # Export JSON button
-        export_json_btn = QPushButton("📦 Export JSON")
-        export_json_btn.setToolTip("Export history to JSON file with full metadata")
-        export_json_btn.clicked.connect(self.export_json)
-        export_json_btn.setStyleSheet("""
+        self.export_json_btn = QPushButton("📦 Export JSON")
+        self.export_json_btn.setToolTip("Export history to JSON file with full metadata")
+        self.export_json_btn.clicked.connect(self.export_json)
+        self.export_json_btn.setStyleSheet("""
             QPushButton {
                 background-color: #16a085;
                 color: white;
@@ -1184,7 +1547,7 @@ class MainWindow(QMainWindow):
                 background-color: #138d75;
             }
         """)
-        button_layout.addWidget(export_json_btn)
+        button_layout.addWidget(self.export_json_btn)
         
         # Import button
         import_btn = QPushButton("📥 Import")
@@ -1292,6 +1655,13 @@ class MainWindow(QMainWindow):
         theme_row.addStretch()
         theme_layout.addLayout(theme_row)
         
+        # Progress animation (off by default, purely cosmetic)
+        self.animate_progress_checkbox = QCheckBox("  Animate progress bar")
+        self.animate_progress_checkbox.setChecked(self.animate_progress)
+        self.animate_progress_checkbox.setToolTip("Smoothly move the progress bar between steps. Installs are never slowed down.")
+        self.animate_progress_checkbox.toggled.connect(self.change_animate_progress)
+        theme_layout.addWidget(self.animate_progress_checkbox)
+        
         # Language selector
         lang_row = QHBoxLayout()
         lang_label = QLabel("Language:")
@@ -1466,6 +1836,40 @@ class MainWindow(QMainWindow):
         """)
         verify_layout.addWidget(self.verify_signature_checkbox)
         
+        # Parallel verification workers for batch installs
+        workers_row = QHBoxLayout()
+        workers_label = QLabel("Verification workers:")
+        workers_label.setStyleSheet("color: #2c3e50; font-weight: 600; font-size: 11px;")
+        workers_row.addWidget(workers_label)
+        
+        self.verification_workers_spin = QSpinBox()
+        self.verification_workers_spin.setRange(1, max(os.cpu_count() or 1, config.VERIFICATION_MAX_WORKERS))
+        self.verification_workers_spin.setValue(self.verification_workers)
+        self.verification_workers_spin.setToolTip("Packages verified in parallel when a batch starts")
+        self.verification_workers_spin.setFixedHeight(34)
+        self.verification_workers_spin.valueChanged.connect(self.change_verification_workers)
+        workers_row.addWidget(self.verification_workers_spin)
+        workers_row.addStretch()
+        verify_layout.addLayout(workers_row)
+        
+        # Single transaction for same-format batch entries
+        self.batch_transaction_checkbox = QCheckBox("  Install queued .deb/.rpm files in one transaction")
+        self.batch_transaction_checkbox.setChecked(self.batch_transactions)
+        self.batch_transaction_checkbox.setToolTip(
+            "One password prompt and one dependency solve for all queued packages of the same format"
+        )
+        self.batch_transaction_checkbox.toggled.connect(self.change_batch_transactions)
+        verify_layout.addWidget(self.batch_transaction_checkbox)
+        
+        # One authentication per session for installs and uninstalls
+        self.privileged_helper_checkbox = QCheckBox("  Ask for the password once per session")
+        self.privileged_helper_checkbox.setChecked(self.use_privileged_helper)
+        self.privileged_helper_checkbox.setToolTip(
+            "Keep an authenticated helper running that only installs and removes packages"
+        )
+        self.privileged_helper_checkbox.toggled.connect(self.change_privileged_helper)
+        verify_layout.addWidget(self.privileged_helper_checkbox)
+        
         # Separator
         separator = QLabel()
         separator.setFixedHeight(1)
@@ -1634,10 +2038,22 @@ class MainWindow(QMainWindow):
             package_name = os.path.basename(package_path)
             
             # Mark currently installing package
-            if i == self.current_installing_index:
+            if package_path in self.transaction_outcomes:
+                if self.transaction_outcomes[package_path][0]:
+                    item_text = f"✅ {package_name} (Completed)"
+                else:
+                    item_text = f"❌ {package_name} (Failed)"
+            elif i == self.current_installing_index:
                 item_text = f"⏳ {package_name} (Installing...)"
             elif i < self.current_installing_index:
                 item_text = f"✅ {package_name} (Completed)"
+            elif package_path in self.verification_results:
+                if self.verification_results[package_path][0]:
+                    item_text = f"⏸️ {package_name} (Verified, waiting)"
+                else:
+                    item_text = f"❌ {package_name} (Verification failed)"
+            elif self.verification_pool is not None:
+                item_text = f"🔍 {package_name} (Verifying...)"
             else:
                 item_text = f"⏸️ {package_name} (Waiting)"
             
@@ -1711,16 +2127,86 @@ class MainWindow(QMainWindow):
         self.browse_btn.setEnabled(False)
         self.clear_queue_btn.setEnabled(False)
         
+        # Put dependencies between queued packages first
+        self.plan_install_queue()
+        
         # Reset state
         self.current_installing_index = 0
         self.batch_cancelled = False
+        self.transaction_outcomes = {}
+        self.transaction_groups = {}
+        if self.batch_transactions:
+            for group in self.package_handler.transaction_groups(self.install_queue).values():
+                for path in group:
+                    self.transaction_groups[path] = group
         
         # Update overall progress
         self.batch_progress_label.setText(f"Overall: 0 of {len(self.install_queue)} packages")
         
+        # Verify the whole queue in the background
+        if self.verify_integrity_checkbox.isChecked() or self.verify_signature_checkbox.isChecked():
+            self.start_preverification()
+        
         # Start installing first package
         self.install_next_in_queue()
     
+    def plan_install_queue(self):
+        """Reorder the queue so queued dependencies are installed first"""
+        plan = plan_installation(self.install_queue, self.package_handler.get_package_metadata)
+        
+        if plan.order != self.install_queue:
+            self.install_queue[:] = plan.order
+            self.log_output.append("🔀 Queue reordered so dependencies install first")
+            self.update_queue_display()
+        
+        for cycle in plan.cycles:
+            names = ', '.join(os.path.basename(path) for path in cycle)
+            self.log_output.append(f"⚠️ Circular dependency between: {names}")
+        
+        if plan.external:
+            self.log_output.append(
+                f"ℹ️ {len(plan.external)} package(s) need dependencies from outside the queue "
+                f"(the package manager will fetch them)"
+            )
+        return plan
+    
+    def start_preverification(self):
+        """Verify every queued package concurrently"""
+        self.stop_preverification()
+        self.verification_pool = VerificationPool(self.package_handler, workers=self.verification_workers)
+        self.verification_pool.submit_batch(
+            list(self.install_queue),
+            check_signature=self.verify_signature_checkbox.isChecked(),
+            callback=self.verification_signals.verified.emit
+        )
+        self.log_output.append(
+            f"🔍 Verifying {len(self.install_queue)} package(s) with {self.verification_workers} worker(s)..."
+        )
+    
+    def stop_preverification(self):
+        """Drop pending verifications and their results"""
+        if self.verification_pool is not None:
+            self.verification_pool.shutdown(wait=False)
+            self.verification_pool = None
+        self.verification_results.clear()
+        self.awaiting_verification = None
+    
+    def package_preverified(self, package_path, result):
+        """Handle a verification pool result (UI thread)"""
+        if self.verification_pool is None or package_path not in self.install_queue:
+            return
+        
+        self.verification_results[package_path] = result
+        success, message, _ = result
+        if not success:
+            # Surface failures right away, before the package's turn comes
+            self.log_output.append(f"❌ Verification failed: {os.path.basename(package_path)} - {message}")
+        self.update_queue_display()
+        
+        if self.awaiting_verification == package_path:
+            self.awaiting_verification = None
+            self.install_next_in_queue()
+    
     def install_next_in_queue(self):
         """Install the next package in the queue"""
         if self.batch_cancelled:
@@ -1728,6 +2214,11 @@ class MainWindow(QMainWindow):
             self.reset_after_batch()
             return
         
+        # Skip packages a group transaction already took care of
+        while (self.current_installing_index < len(self.install_queue) and
+               self.install_queue[self.current_installing_index] in self.transaction_outcomes):
+            self.current_installing_index += 1
+        
         if self.current_installing_index >= len(self.install_queue):
             # All packages installed
             self.log_output.append(f"\\n{'='*50}")
@@ -1755,6 +2246,9 @@ class MainWindow(QMainWindow):
             f"Overall: {self.current_installing_index} of {len(self.install_queue)} packages"
         )
         
+        if current_package in self.transaction_groups:
+            self.start_group_transaction(self.transaction_groups[current_package])
+            return
         
         # Get verification settings
         verify_integrity = self.verify_integrity_checkbox.isChecked()
@@ -1766,6 +2260,18 @@ class MainWindow(QMainWindow):
         checksum = None 
         checksum_type = "sha256"
 
+        # Only the head of the queue is ever waited on
+        preverified = None
+        if self.verification_pool is not None:
+            preverified = self.verification_results.get(current_package)
+            if preverified is None:
+                self.awaiting_verification = current_package
+                self.steps_label.setText(f"🔐 Verifying {package_name}...")
+                return
+            if not preverified[0]:
+                self.batch_installation_finished(False, f"❌ Verification Failed:\\n{preverified[1]}")
+                return
+        
         self.log_output.append(f"\\n📦 [{self.current_installing_index + 1}/{len(self.install_queue)}] Installing: {package_name}")
         
         # Start installation thread
@@ -1775,7 +2281,8 @@ class MainWindow(QMainWindow):
             verify_integrity=verify_integrity,
             verify_signature=verify_signature,
             checksum=checksum,
-            checksum_type=checksum_type
+            checksum_type=checksum_type,
+            preverified=preverified
         )
         self.installer_thread.progress.connect(self.update_progress)
         self.installer_thread.status.connect(self.update_status)
@@ -1783,10 +2290,58 @@ class MainWindow(QMainWindow):
         self.installer_thread.finished.connect(self.batch_installation_finished)
         self.installer_thread.start()
     
-    def batch_installation_finished(self, success, message):
+    def start_group_transaction(self, group):
+        """Install a group of same-format packages in one transaction"""
+        # Every member has to be verified before the shared transaction runs
+        if self.verification_pool is not None:
+            pending = [path for path in group if path not in self.verification_results]
+            if pending:
+                self.awaiting_verification = pending[0]
+                self.steps_label.setText(f"🔐 Verifying {os.path.basename(pending[0])}...")
+                return
+            for path in group:
+                success, message, _ = self.verification_results[path]
+                if not success and path not in self.transaction_outcomes:
+                    self.record_transaction_outcome(path, False, f"❌ Verification Failed:\\n{message}")
+        
+        paths = [path for path in group if path not in self.transaction_outcomes]
+        if not paths:
+            self.install_next_in_queue()
+            return
+        
+        self.log_output.append(f"\\n📦 Installing {len(paths)} package(s) in one transaction")
+        self.steps_label.setText(f"Installing {len(paths)} packages...")
+        self.transaction_thread = TransactionThread(paths, self.package_handler)
+        self.transaction_thread.progress.connect(self.update_progress)
+        self.transaction_thread.step.connect(self.update_step)
+        self.transaction_thread.finished.connect(
+            lambda outcomes, message: self.group_transaction_finished(paths, outcomes, message)
+        )
+        self.transaction_thread.start()
+    
+    def record_transaction_outcome(self, package_path, success, message):
+        """Log the outcome of one package of a group transaction"""
+        self.transaction_outcomes[package_path] = (success, message)
+        self.logger.log_installation(package_path, success, message)
+        package_name = os.path.basename(package_path)
+        if success:
+            self.log_output.append(f"✅ Completed: {package_name}")
+        else:
+            self.log_output.append(f"❌ Failed: {package_name} - {message}")
+    
+    def group_transaction_finished(self, paths, outcomes, message):
+        """Handle completion of a group transaction"""
+        for path in paths:
+            success, package_message = outcomes.get(path, (False, message))
+            self.record_transaction_outcome(path, success, package_message)
+        self.update_queue_display()
+        self.install_next_in_queue()
+    
+    def batch_installation_finished(self, success, message, timings=None):
         """Handle completion of one package in batch"""
         current_package = self.install_queue[self.current_installing_index]
         package_name = os.path.basename(current_package)
+        self.log_step_timings(timings)
         
         # Log the installation
         self.logger.log_installation(current_package, success, message)
@@ -1848,6 +2403,9 @@ class MainWindow(QMainWindow):
         self.install_btn.setEnabled(len(self.install_queue) > 0)
         
         # Clear the queue
+        self.stop_preverification()
+        self.transaction_groups = {}
+        self.transaction_outcomes = {}
         self.install_queue.clear()
         self.current_installing_index = -1
         self.update_queue_display()
@@ -1862,107 +2420,38 @@ class MainWindow(QMainWindow):
         self.status_label.setText("Ready to install")
     
     def load_installed_packages(self):
-        """Load list of installed packages from the system"""
+        """Re-read the installed packages in the background"""
         self.uninstall_count_label.setText("Loading packages...")
-        self.installed_packages_list.clear()
-        self.all_installed_packages = []
-        
-        try:
-            import subprocess
-            
-            # Try dpkg first (Debian/Ubuntu)
-            try:
-                result = subprocess.run(
-                    ['dpkg', '--get-selections'],
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
-                
-                if result.returncode == 0:
-                    for line in result.stdout.strip().split('\n'):
-                        if line and '\t' in line:
-                            package_name = line.split('\t')[0]
-                            status = line.split('\t')[1] if len(line.split('\t')) > 1 else ''
-                            if 'install' in status.lower():
-                                self.all_installed_packages.append({
-                                    'name': package_name,
-                                    'type': 'deb'
-                                })
-            except (FileNotFoundError, subprocess.TimeoutExpired):
-                pass
-            
-            # Try rpm (Fedora/RHEL/CentOS)
-            try:
-                result = subprocess.run(
-                    ['rpm', '-qa'],
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
-                
-                if result.returncode == 0:
-                    for line in result.stdout.strip().split('\n'):
-                        if line:
-                            self.all_installed_packages.append({
-                                'name': line.strip(),
-                                'type': 'rpm'
-                            })
-            except (FileNotFoundError, subprocess.TimeoutExpired):
-                pass
-            
-            if self.all_installed_packages:
-                self.filter_installed_packages()
-            else:
-                self.uninstall_count_label.setText("No packages found or unsupported system")
-                QMessageBox.warning(
-                    self,
-                    "No Packages Found",
-                    "Could not detect installed packages.\\n\\n"
-                    "This feature requires dpkg (Debian/Ubuntu) or rpm (Fedora/RHEL/CentOS)."
-                )
-        except Exception as e:
-            self.uninstall_count_label.setText(f"Error loading packages")
-            QMessageBox.critical(
-                self,
-                "Error",
-                f"Failed to load installed packages:\\n{str(e)}"
-            )
+        self.inventory_service.request_refresh()
+    
+    def apply_inventory_diff(self, diff):
+        """Apply a change reported by the inventory service"""
+        self.installed_package_model.apply_diff(diff)
+    
+    def inventory_failed(self, message):
+        """Show an inventory reload error"""
+        self.uninstall_count_label.setText("Error loading packages")
+        self.uninstall_count_label.setToolTip(f"Failed to load installed packages:\n{message}")
     
     def filter_installed_packages(self):
         """Filter the installed packages list based on search and type filter"""
-        self.installed_packages_list.clear()
-        
-        search_query = self.uninstall_search_input.text().lower()
+        self.uninstall_search_timer.stop()
         type_filter = self.uninstall_type_filter.currentText()
-        
-        filtered_packages = []
-        
-        for pkg in self.all_installed_packages:
-            # Apply type filter
-            if type_filter == ".deb packages" and pkg['type'] != 'deb':
-                continue
-            elif type_filter == ".rpm packages" and pkg['type'] != 'rpm':
-                continue
-            
-            # Apply search filter
-            if search_query and search_query not in pkg['name'].lower():
-                continue
-            
-            filtered_packages.append(pkg)
-        
-        # Sort alphabetically
-        filtered_packages.sort(key=lambda x: x['name'])
-        
-        # Add to list widget
-        for pkg in filtered_packages:
-            icon = "📦" if pkg['type'] == 'deb' else "🔴"
-            self.installed_packages_list.addItem(f"{icon} {pkg['name']}")
-        
-        # Update count
-        total = len(self.all_installed_packages)
-        showing = len(filtered_packages)
-        
+        package_type = {".deb packages": 'deb', ".rpm packages": 'rpm'}.get(type_filter)
+        self.installed_package_proxy.set_filter(self.uninstall_search_input.text(), package_type)
+    
+    def update_uninstall_count(self):
+        """Show how many installed packages are listed"""
+        total = len(self.inventory_table)
+        showing = self.installed_package_proxy.rowCount()
+        
+        if total == 0:
+            self.uninstall_count_label.setText("No packages found or unsupported system")
+            self.uninstall_count_label.setToolTip(
+                "This feature requires dpkg (Debian/Ubuntu) or rpm (Fedora/RHEL/CentOS)."
+            )
+            return
+        self.uninstall_count_label.setToolTip("")
         if showing < total:
             self.uninstall_count_label.setText(f"Showing {showing} of {total} packages")
         else:
@@ -1970,23 +2459,27 @@ class MainWindow(QMainWindow):
     
     def uninstall_packages(self):
         """Uninstall the selected package(s)"""
-        selected_items = self.installed_packages_list.selectedItems()
+        selected_rows = self.installed_packages_view.selectionModel().selectedRows()
         
-        if not selected_items:
+        if not selected_rows:
             return
         
-        # Extract package names
-        packages_to_uninstall = []
-        for item in selected_items:
-            # Remove icon prefix
-            package_name = item.text().split(' ', 1)[1] if ' ' in item.text() else item.text()
-            packages_to_uninstall.append(package_name)
+        # Selected packages as (removal target, type), read straight from the table;
+        # the target carries the architecture so only the selected one is removed
+        table = self.inventory_table
+        source_rows = (self.installed_package_proxy.source_row(index.row()) for index in selected_rows)
+        packages_to_uninstall = list(dict.fromkeys(
+            (self.package_handler.removal_target(table.names[row], TYPES[table.types[row]], table.arches[row]),
+             TYPES[table.types[row]])
+            for row in source_rows
+        ))
+        package_names = [name for name, _ in packages_to_uninstall]
         
         # Confirm uninstallation
         if len(packages_to_uninstall) == 1:
-            message = f"Are you sure you want to uninstall:\\n\\n{packages_to_uninstall[0]}?\\n\\n⚠️ This action cannot be undone."
+            message = f"Are you sure you want to uninstall:\\n\\n{package_names[0]}?\\n\\n⚠️ This action cannot be undone."
         else:
-            package_list = '\\n'.join(f"  • {pkg}" for pkg in packages_to_uninstall[:5])
+            package_list = '\\n'.join(f"  • {pkg}" for pkg in package_names[:5])
             if len(packages_to_uninstall) > 5:
                 package_list += f"\\n  ... and {len(packages_to_uninstall) - 5} more"
             message = f"Are you sure you want to uninstall {len(packages_to_uninstall)} packages?\\n\\n{package_list}\\n\\n⚠️ This action cannot be undone."
@@ -2002,42 +2495,35 @@ class MainWindow(QMainWindow):
         if reply == QMessageBox.No:
             return
         
-        # Uninstall each package
-        import subprocess
+        # One removal per package manager, off the UI thread
+        self.uninstall_btn.setEnabled(False)
+        self.installed_packages_view.setEnabled(False)
+        self.uninstall_progress_bar.setValue(0)
+        self.uninstall_progress_bar.show()
+        self.uninstall_step_label.show()
+        
+        self.uninstall_thread = UninstallThread(packages_to_uninstall, self.package_handler)
+        self.uninstall_thread.progress.connect(self.uninstall_progress_bar.setValue)
+        self.uninstall_thread.step.connect(self.uninstall_step_label.setText)
+        self.uninstall_thread.finished.connect(self.uninstallation_finished)
+        self.uninstall_thread.start()
+    
+    def uninstallation_finished(self, outcomes, summary):
+        """Log and report the outcome of an uninstall job"""
+        self.installed_packages_view.setEnabled(True)
+        self.uninstall_btn.setEnabled(self.installed_packages_view.selectionModel().hasSelection())
+        self.uninstall_progress_bar.hide()
+        self.uninstall_step_label.hide()
+        
+        if not outcomes:
+            QMessageBox.critical(self, "Uninstallation Failed", summary)
+            return
+        
         success_count = 0
         failed_packages = []
-        
-        for package_name in packages_to_uninstall:
-            try:
-                # Determine package type
-                pkg_info = next((p for p in self.all_installed_packages if p['name'] == package_name), None)
-                
-                if not pkg_info:
-                    failed_packages.append((package_name, "Package not found"))
-                    continue
-                
-                # Run appropriate uninstall command
-                if pkg_info['type'] == 'deb':
-                    # Debian/Ubuntu: sudo apt remove
-                    result = subprocess.run(
-                        ['pkexec', 'apt', 'remove', '-y', package_name],
-                        capture_output=True,
-                        text=True,
-                        timeout=120
-                    )
-                elif pkg_info['type'] == 'rpm':
-                    # Fedora/RHEL: sudo dnf remove
-                    result = subprocess.run(
-                        ['pkexec', 'dnf', 'remove', '-y', package_name],
-                        capture_output=True,
-                        text=True,
-                        timeout=120
-                    )
-                else:
-                    failed_packages.append((package_name, "Unknown package type"))
-                    continue
-                
-                if result.returncode == 0:
+        with self.logger.batch():
+            for (package_name, _), (success, message) in outcomes.items():
+                if success:
                     success_count += 1
                     # Log the uninstallation
                     self.logger.log_installation(
@@ -2046,18 +2532,8 @@ class MainWindow(QMainWindow):
                         f"Package uninstalled successfully"
                     )
                 else:
-                    error_msg = result.stderr if result.stderr else "Unknown error"
-                    failed_packages.append((package_name, error_msg))
-                    self.logger.log_installation(
-                        package_name,
-                        False,
-                        f"Uninstallation failed: {error_msg}"
-                    )
-                    
-            except subprocess.TimeoutExpired:
-                failed_packages.append((package_name, "Operation timed out"))
-            except Exception as e:
-                failed_packages.append((package_name, str(e)))
+                    failed_packages.append((package_name, message))
+                    self.logger.log_installation(package_name, False, message)
         
         # Show results
         if failed_packages:
@@ -2132,7 +2608,27 @@ class MainWindow(QMainWindow):
     
     def update_progress(self, value):
         """Update progress bar"""
-        self.progress_bar.setValue(value)
+        self.progress_target = value
+        if not self.animate_progress or value <= self.progress_bar.value():
+            self.progress_bar.setValue(value)
+            return
+        # The animation only runs on the UI side, the worker never waits for it
+        if not self.progress_timer.isActive():
+            self.progress_timer.start(config.PROGRESS_ANIMATION_INTERVAL)
+    
+    def animate_progress_step(self):
+        """Move the progress bar one animation step towards its target"""
+        current = self.progress_bar.value()
+        if current >= self.progress_target:
+            self.progress_timer.stop()
+            return
+        self.progress_bar.setValue(min(self.progress_target, current + config.PROGRESS_ANIMATION_STEP))
+    
+    def log_step_timings(self, timings):
+        """Append the per-step wall-clock breakdown of an install to the log"""
+        if timings:
+            parts = [f"{name} {seconds:.2f}s" for name, seconds in timings.items()]
+            self.log_output.append(f"⏱️ Timings: {', '.join(parts)}")
     
     def update_status(self, message):
         """Update status label and log"""
@@ -2144,9 +2640,10 @@ class MainWindow(QMainWindow):
         self.steps_label.setText(step_message)
         self.log_output.append(step_message)
     
-    def installation_finished(self, success, message):
+    def installation_finished(self, success, message, timings=None):
         """Handle installation completion"""
         self.browse_btn.setEnabled(True)
+        self.log_step_timings(timings)
         
         if success:
             # Show success notification
@@ -2185,15 +2682,24 @@ class MainWindow(QMainWindow):
         self.steps_label.setText("Ready to install")
         self.log_output.clear()
     
-    def load_history(self, filtered_history=None):
-        """Load installation history with icons and filtering support"""
+    def load_history(self, filtered_history=None, matched=None):
+        """
+        Load installation history with icons and filtering support
+        
+        Args:
+            filtered_history: Most recent matching entries, or None for all history
+            matched: Number of entries matching the filters
+        """
         self.history_list.clear()
         
-        # Use filtered history if provided, otherwise get all history
+        # Use filtered history if provided, otherwise get the most recent entries
+        total = self.logger.count_history()
         if filtered_history is not None:
             history = filtered_history
+            showing = len(history) if matched is None else matched
         else:
-            history = self.logger.get_history()
+            history = self.logger.filter_history(limit=config.HISTORY_DISPLAY_LIMIT)
+            showing = total
         
         if not history:
             self.history_list.addItem("No installation history")
@@ -2201,14 +2707,12 @@ class MainWindow(QMainWindow):
             return
         
         # Update results label
-        total = len(self.logger.get_history())
-        showing = len(history)
         if showing < total:
             self.results_label.setText(f"Showing {showing} of {total} results")
         else:
             self.results_label.setText(f"Showing all {total} results")
         
-        for entry in reversed(history[-50:]):  # Show last 50 entries
+        for entry in reversed(history[-config.HISTORY_DISPLAY_LIMIT:]):  # Show the most recent entries
             success = entry.get('success', False)
             package_name = os.path.basename(entry.get('package', 'Unknown'))
             timestamp = entry.get('timestamp', '')
@@ -2249,20 +2753,12 @@ class MainWindow(QMainWindow):
         elif type_filter == ".rpm":
             type_param = "rpm"
         
-        # Apply filters
-        filtered_history = self.logger.filter_history(
-            status=status_param,
-            package_type=type_param
-        )
-        
-        # Apply search if query exists
-        if search_query:
-            filtered_history = [entry for entry in filtered_history
-                              if search_query.lower() in entry.get('package_name', '').lower() or
-                                 search_query.lower() in entry.get('package', '').lower()]
+        # Apply filters and search together (indexed queries with the sqlite backend)
+        criteria = {'status': status_param, 'package_type': type_param, 'query': search_query or None}
+        filtered_history = self.logger.filter_history(limit=config.HISTORY_DISPLAY_LIMIT, **criteria)
         
         # Reload history with filtered results
-        self.load_history(filtered_history)
+        self.load_history(filtered_history, self.logger.count_history(**criteria))
     
     def clear_filters(self):
         """Clear all filters and show all history"""
@@ -2294,26 +2790,11 @@ class MainWindow(QMainWindow):
                 self,
                 "Export History as CSV",
                 "snapwiz_history.csv",
-                "CSV Files (*.csv);;All Files (*)"
+                "CSV Files (*.csv);;Compressed CSV (*.csv.gz *.csv.xz);;All Files (*)"
             )
             
             if file_path:
-                # Export to CSV
-                success = self.logger.export_history(file_path, format='csv')
-                
-                if success:
-                    QMessageBox.information(
-                        self,
-                        "Export Successful",
-                        f"History exported successfully to:\n{file_path}\n\n"
-                        f"You can now open this file in Excel or any spreadsheet application."
-                    )
-                else:
-                    QMessageBox.critical(
-                        self,
-                        "Export Failed",
-                        "Failed to export history. Please check file permissions."
-                    )
+                self.start_export(file_path, 'csv')
         except Exception as e:
             QMessageBox.critical(
                 self,
@@ -2330,29 +2811,13 @@ class MainWindow(QMainWindow):
                 self,
                 "Export History as JSON",
                 "snapwiz_history.json",
-                "JSON Files (*.json);;All Files (*)"
+                "JSON Files (*.json);;NDJSON Files (*.ndjson);;"
+                "Compressed (*.json.gz *.json.xz *.ndjson.gz *.ndjson.xz);;All Files (*)"
             )
             
             if file_path:
-                # Export to JSON
-                success = self.logger.export_history(file_path, format='json')
-                
-                if success:
-                    history_count = len(self.logger.get_history())
-                    QMessageBox.information(
-                        self,
-                        "Export Successful",
-                        f"History exported successfully!\n\n"
-                        f"File: {file_path}\n"
-                        f"Entries: {history_count}\n\n"
-                        f"This file can be imported later to restore your history."
-                    )
-                else:
-                    QMessageBox.critical(
-                        self,
-                        "Export Failed",
-                        "Failed to export history. Please check file permissions."
-                    )
+                # JSON or NDJSON, picked by the file name
+                self.start_export(file_path, export_format(file_path))
         except Exception as e:
             QMessageBox.critical(
                 self,
@@ -2360,6 +2825,55 @@ class MainWindow(QMainWindow):
                 f"An error occurred while exporting:\n{str(e)}"
             )
     
+    def start_export(self, file_path, export_format):
+        """Stream the history into a file on a worker thread"""
+        if self.export_thread is not None and self.export_thread.isRunning():
+            QMessageBox.information(self, "Export Running", "An export is already in progress.")
+            return
+        
+        self.export_csv_btn.setEnabled(False)
+        self.export_json_btn.setEnabled(False)
+        self.statusBar().showMessage("📤 Exporting history...")
+        
+        self.export_thread = ExportThread(self.logger, file_path, export_format)
+        self.export_thread.progress.connect(self.export_progress)
+        self.export_thread.finished.connect(self.export_finished)
+        self.export_thread.start()
+    
+    def export_progress(self, rows, written):
+        """Show export progress in the status bar"""
+        self.statusBar().showMessage(f"📤 Exporting history... {rows} entries, {written / (1024 * 1024):.1f} MB")
+    
+    def export_finished(self, success, rows):
+        """Report the outcome of an export"""
+        self.export_csv_btn.setEnabled(True)
+        self.export_json_btn.setEnabled(True)
+        self.statusBar().clearMessage()
+        file_path = self.export_thread.file_path
+        
+        if not success:
+            QMessageBox.critical(
+                self,
+                "Export Failed",
+                "Failed to export history. Please check file permissions."
+            )
+        elif self.export_thread.export_format == 'csv':
+            QMessageBox.information(
+                self,
+                "Export Successful",
+                f"History exported successfully to:\n{file_path}\n\n"
+                f"You can now open this file in Excel or any spreadsheet application."
+            )
+        else:
+            QMessageBox.information(
+                self,
+                "Export Successful",
+                f"History exported successfully!\n\n"
+                f"File: {file_path}\n"
+                f"Entries: {rows}\n\n"
+                f"This file can be imported later to restore your history."
+            )
+    
     def import_history(self):
         """Import history from JSON file"""
         try:
@@ -2369,7 +2883,7 @@ class MainWindow(QMainWindow):
                 self,
                 "Import History from JSON",
                 "",
-                "JSON Files (*.json);;All Files (*)"
+                "History Exports (*.json *.ndjson *.gz *.xz);;All Files (*)"
             )
             
             if file_path:
@@ -2393,7 +2907,7 @@ class MainWindow(QMainWindow):
                 
                 if success:
                     self.load_history()  # Refresh the display
-                    history_count = len(self.logger.get_history())
+                    history_count = self.logger.count_history()
                     
                     mode_text = "merged with" if merge else "replaced"
                     QMessageBox.information(
@@ -2423,6 +2937,34 @@ class MainWindow(QMainWindow):
         self.apply_theme(theme)
         self.save_settings()
     
+    def change_animate_progress(self, enabled):
+        """Enable or disable progress bar animation"""
+        self.animate_progress = enabled
+        if not enabled:
+            self.progress_timer.stop()
+            self.progress_bar.setValue(self.progress_target)
+        self.save_settings()
+    
+    def change_privileged_helper(self, enabled):
+        """Enable or disable the session privileged helper"""
+        self.use_privileged_helper = enabled
+        if enabled and self.package_handler.helper is None:
+            self.package_handler.helper = PrivilegedHelper()
+        elif not enabled and self.package_handler.helper is not None:
+            self.package_handler.helper.stop()
+            self.package_handler.helper = None
+        self.save_settings()
+    
+    def change_batch_transactions(self, enabled):
+        """Enable or disable single-transaction batch installs"""
+        self.batch_transactions = enabled
+        self.save_settings()
+    
+    def change_verification_workers(self, workers):
+        """Change the number of parallel verification workers"""
+        self.verification_workers = workers
+        self.save_settings()
+    
     def change_language(self):
         """Change application language"""
         # Get selected language code
@@ -2472,6 +3014,11 @@ class MainWindow(QMainWindow):
                 with open(settings_file, 'r') as f:
                     settings = json.load(f)
                     self.current_theme = settings.get('theme', 'Light')
+                    self.verification_workers = settings.get('verification_workers', self.verification_workers)
+                    self.batch_transactions = settings.get('batch_transactions', self.batch_transactions)
+                    self.animate_progress = settings.get('animate_progress', self.animate_progress)
+                    self.use_privileged_helper = settings.get('privileged_helper', self.use_privileged_helper)
+                    self.history_backend = settings.get('history_backend', self.history_backend)
         except Exception as e:
             print(f"Error loading settings: {e}")
             self.current_theme = "Light"
@@ -2483,7 +3030,12 @@ class MainWindow(QMainWindow):
             settings_file = str(config.SETTINGS_FILE)
             
             settings = {
-                'theme': self.current_theme
+                'theme': self.current_theme,
+                'verification_workers': self.verification_workers,
+                'batch_transactions': self.batch_transactions,
+                'animate_progress': self.animate_progress,
+                'privileged_helper': self.use_privileged_helper,
+                'history_backend': self.history_backend
             }
             
             with open(settings_file, 'w') as f:
@@ -0,0 +1,330 @@
+"""
+Async Package Handler Module
+asyncio front end to PackageHandler. Package manager commands run as asyncio
+subprocesses and hold a semaphore for the lock they need (the dpkg lock, the
+rpm database, snapd, the user or the system flatpak installation), so work in
+independent domains and read-only work overlap on a single event loop.
+"""
+
+import os
+import asyncio
+import functools
+import subprocess
+from . import config
+from .package_handler import (PackageHandler, parse_installed_query, uninstall_groups, uninstall_failures,
+                              uninstall_summary, no_uninstaller_message)
+from .process_runner import run_streaming_async, parser_for_command, StatusParser
+from .verification_pool import default_worker_count
+
+
+# Package manager -> lock domain it takes
+LOCK_DOMAINS = {
+    'apt': 'dpkg',
+    'apt-get': 'dpkg',
+    'dpkg': 'dpkg',
+    'dnf': 'rpm',
+    'yum': 'rpm',
+    'zypper': 'rpm',
+    'rpm': 'rpm',
+    'snap': 'snapd',
+}
+
+# rpm modes that only read the database or a package file
+RPM_READ_ONLY = ('-q', '--query', '-K', '--checksig')
+
+TIMEOUT_MESSAGE = "Installation timed out. The package may be too large or there may be network issues."
+
+
+def lock_domain(command):
+    """
+    Get the lock domain a command needs exclusive use of
+
+    Returns:
+        str: 'dpkg', 'rpm', 'snapd', 'flatpak-user' or 'flatpak-system',
+        or None for commands that only read
+    """
+    argv = list(command[1:] if command and command[0] == 'pkexec' else command)
+    if not argv:
+        return None
+    tool = os.path.basename(argv[0])
+    if tool == 'flatpak':
+        # Without --user flatpak works on the system installation
+        return 'flatpak-user' if '--user' in argv else 'flatpak-system'
+    if tool == 'rpm' and len(argv) > 1 and argv[1] in RPM_READ_ONLY:
+        return None
+    return LOCK_DOMAINS.get(tool)
+
+
+def _outcome(result, success_message):
+    if result.returncode == 0:
+        return True, f"{success_message}\n\n{result.stdout}"
+    error_msg = result.stderr if result.stderr else result.stdout
+    return False, f"Installation failed:\n{error_msg}"
+
+
+class AsyncPackageHandler:
+    """
+    asyncio API over PackageHandler
+
+    Methods return the same results as their synchronous counterparts.
+    Commands sharing a lock domain run one at a time, in the order they were
+    requested; verification is bounded by the number of verification workers
+    and runs in the loop's default executor. With a privileged helper set on
+    the wrapped handler, privileged commands go through it, and it serves one
+    command at a time.
+    """
+
+    def __init__(self, package_handler=None, verification_workers=None, domain_limits=None):
+        """
+        Args:
+            package_handler: PackageHandler providing detection and commands
+            verification_workers: Concurrent verifications (defaults to default_worker_count())
+            domain_limits: Lock domain -> concurrent commands (defaults to config.LOCK_DOMAIN_LIMITS)
+        """
+        self.handler = package_handler or PackageHandler()
+        self.verification_workers = verification_workers or default_worker_count()
+        self.domain_limits = dict(config.LOCK_DOMAIN_LIMITS if domain_limits is None else domain_limits)
+        self._semaphores = {}
+
+    def _semaphore(self, domain):
+        # Created on first use so they belong to the loop driving the handler
+        if domain not in self._semaphores:
+            if domain == 'verify':
+                limit = self.verification_workers
+            else:
+                limit = self.domain_limits.get(domain, 1)
+            self._semaphores[domain] = asyncio.Semaphore(limit)
+        return self._semaphores[domain]
+
+    async def _in_executor(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    # ==================== Commands ====================
+
+    async def _run(self, command, progress_callback=None, timeout=None, package_count=1):
+        parser = parser_for_command(command, package_count)
+        timeout = timeout or config.INSTALLATION_TIMEOUT
+        helper = self.handler.helper
+        if helper is not None and command[0] == 'pkexec':
+            # The helper client blocks on its socket, hand progress back to the loop
+            on_event = None
+            if progress_callback is not None:
+                loop = asyncio.get_running_loop()
+                on_event = lambda event: loop.call_soon_threadsafe(progress_callback, event)
+            return await self._in_executor(helper.run, command, on_event=on_event, parser=parser, timeout=timeout)
+        return await run_streaming_async(command, on_event=progress_callback, parser=parser, timeout=timeout)
+
+    async def run_command(self, command, progress_callback=None, timeout=None, package_count=1):
+        """
+        Run a package manager command while holding its lock domain
+
+        Returns:
+            ProcessResult
+        """
+        domain = lock_domain(command)
+        if domain is None:
+            return await self._run(command, progress_callback, timeout, package_count)
+        async with self._semaphore(domain):
+            return await self._run(command, progress_callback, timeout, package_count)
+
+    async def _run_native(self, command, progress_callback=None, timeout=None, package_count=1):
+        """Run a .deb/.rpm install, repairing dpkg installs under the same lock"""
+        async with self._semaphore(lock_domain(command)):
+            result = await self._run(command, progress_callback, timeout, package_count)
+            # dpkg -i leaves missing dependencies unconfigured, let apt fix them
+            if command[1] == 'dpkg' and result.returncode != 0 and self.handler.capabilities.has('apt-get'):
+                await self._run(['pkexec', 'apt-get', 'install', '-f', '-y'])
+        return result
+
+    # ==================== Inspection and verification ====================
+
+    async def get_package_metadata(self, package_path):
+        """Async get_package_metadata()"""
+        return await self._in_executor(self.handler.get_package_metadata, package_path)
+
+    async def verify_package(self, package_path, checksum=None, checksum_type='sha256', check_signature=False,
+                             algorithms=None):
+        """Async verify_package()"""
+        async with self._semaphore('verify'):
+            return await self._in_executor(
+                self.handler.verify_package, package_path,
+                checksum=checksum, checksum_type=checksum_type,
+                check_signature=check_signature, algorithms=algorithms
+            )
+
+    async def _query_installed(self, package_type, names):
+        if not names:
+            return {}
+        command = self.handler.installed_query_command(package_type, names)
+        try:
+            result = await run_streaming_async(command, parser=StatusParser(), timeout=30)
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return None
+        return parse_installed_query(result.stdout)
+
+    async def _query_remaining(self, package_type, targets):
+        if not targets:
+            return set()
+        # The native architecture is looked up (once) outside the loop
+        await self._in_executor(self.handler.deb_architecture)
+        command = self.handler.remaining_query_command(package_type, targets)
+        try:
+            result = await run_streaming_async(command, parser=StatusParser(), timeout=30)
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return None
+        return self.handler.parse_remaining_query(package_type, result.stdout)
+
+    # ==================== Installation ====================
+
+    async def install_package(self, package_path, progress_callback=None):
+        """
+        Async install_package()
+
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        package_path = os.path.abspath(package_path)
+        package_type = self.handler.get_package_type(package_path)
+        try:
+            if package_type in ('.deb', '.rpm'):
+                command = self.handler.install_command(package_type, [package_path])
+                if command is None:
+                    return False, f"No suitable package manager found for {package_type} files"
+                result = await self._run_native(command, progress_callback)
+                return _outcome(result, "Package installed successfully!")
+
+            if package_type == '.snap':
+                problem = self.handler.snap_precheck()
+                if problem:
+                    return False, problem
+                result = await self.run_command(
+                    ['pkexec', 'snap', 'install', '--dangerous', package_path], progress_callback
+                )
+                return _outcome(result, "Snap package installed successfully!")
+
+            if package_type == '.flatpak':
+                problem = self.handler.flatpak_precheck()
+                if problem:
+                    return False, problem
+                result = await self.run_command(
+                    ['flatpak', 'install', '-y', '--bundle', package_path], progress_callback
+                )
+                # If user installation fails, try system installation
+                if result.returncode != 0:
+                    result = await self.run_command(
+                        ['pkexec', 'flatpak', 'install', '-y', '--system', '--bundle', package_path],
+                        progress_callback
+                    )
+                return _outcome(result, "Flatpak package installed successfully!")
+
+            return False, "Unsupported package format"
+        except subprocess.TimeoutExpired:
+            return False, TIMEOUT_MESSAGE
+        except Exception as e:
+            return False, f"Installation error: {str(e)}"
+
+    async def install_packages(self, package_paths, progress_callback=None):
+        """
+        Install several packages concurrently
+
+        Packages in different lock domains overlap; packages sharing one are
+        installed in the given order.
+
+        Args:
+            package_paths: Package paths
+            progress_callback: Called as progress_callback(package_path, event)
+
+        Returns:
+            dict: package path -> (success, message)
+        """
+        results = await asyncio.gather(*(
+            self.install_package(path, functools.partial(progress_callback, path) if progress_callback else None)
+            for path in package_paths
+        ))
+        return dict(zip(package_paths, results))
+
+    async def install_transaction(self, package_paths, progress_callback=None):
+        """
+        Async install_transaction()
+
+        Returns:
+            tuple: (success: bool, message: str, outcomes: dict path -> (bool, str))
+        """
+        if not package_paths:
+            return True, "Nothing to install", {}
+
+        package_type = self.handler.get_package_type(package_paths[0])
+        if any(self.handler.get_package_type(path) != package_type for path in package_paths):
+            return False, "Transaction packages must all have the same format", {}
+
+        command = self.handler.install_command(package_type, package_paths)
+        if command is None:
+            message = f"No suitable package manager found for {package_type} files"
+            return False, message, {path: (False, message) for path in package_paths}
+
+        # Package metadata is read while nothing holds the lock yet
+        versions = await asyncio.gather(*(
+            self._in_executor(self.handler.expected_installation, path) for path in package_paths
+        ))
+        expected = dict(zip(package_paths, versions))
+
+        try:
+            result = await self._run_native(
+                command,
+                progress_callback,
+                timeout=config.INSTALLATION_TIMEOUT * len(package_paths),
+                package_count=len(package_paths)
+            )
+        except subprocess.TimeoutExpired:
+            return False, TIMEOUT_MESSAGE, {path: (False, TIMEOUT_MESSAGE) for path in package_paths}
+        except Exception as e:
+            message = f"Installation error: {str(e)}"
+            return False, message, {path: (False, message) for path in package_paths}
+
+        installed = await self._query_installed(package_type, [name for name, _ in expected.values() if name])
+        return self.handler.transaction_outcomes(expected, result, installed)
+
+    async def _uninstall_group(self, package_type, names, progress_callback=None):
+        command = self.handler.uninstall_command(package_type)
+        if command is None:
+            return uninstall_failures(package_type, names, no_uninstaller_message(package_type))
+        try:
+            result = await self.run_command(command + names, progress_callback,
+                                            timeout=config.UNINSTALL_TIMEOUT * len(names),
+                                            package_count=len(names))
+        except subprocess.TimeoutExpired:
+            return uninstall_failures(package_type, names, "Operation timed out")
+        except Exception as e:
+            return uninstall_failures(package_type, names, str(e))
+        remaining = await self._query_remaining(package_type, names)
+        return self.handler.uninstall_outcomes(package_type, names, result, remaining)
+
+    async def uninstall_transaction(self, packages, progress_callback=None):
+        """
+        Async uninstall_transaction()
+
+        The deb and rpm removals hold different lock domains and run
+        concurrently.
+
+        Returns:
+            tuple: (success: bool, message: str, outcomes: dict (name, type) -> (bool, str))
+        """
+        groups = await asyncio.gather(*(
+            self._uninstall_group(package_type, names, progress_callback)
+            for package_type, names in uninstall_groups(packages).items()
+        ))
+        outcomes = {}
+        for group in groups:
+            outcomes.update(group)
+        return uninstall_summary(outcomes)
+
+    async def uninstall_package(self, package_name, package_type, progress_callback=None):
+        """
+        Async uninstall_package()
+
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        _, _, outcomes = await self.uninstall_transaction([(package_name, package_type)], progress_callback)
+        return outcomes[(package_name, package_type)]
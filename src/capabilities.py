@@ -0,0 +1,177 @@
+"""
+Capability Probe Module
+Resolves package managers, helper tools and service state once, in-process,
+and persists the result keyed by a PATH / binary mtime fingerprint
+"""
+
+import os
+import json
+import shutil
+from . import config
+
+
+def _all_manager_commands():
+    """Get every package manager command referenced by SUPPORTED_FORMATS"""
+    commands = []
+    for fmt_info in config.SUPPORTED_FORMATS.values():
+        for manager in fmt_info['managers']:
+            if manager not in commands:
+                commands.append(manager)
+    return commands
+
+
+class CapabilitySnapshot:
+    """Immutable view of the tools and services available on this host"""
+
+    def __init__(self, commands, services, fingerprint):
+        """
+        Args:
+            commands: Dict of command name -> absolute path (or None if missing)
+            services: Dict of service name -> bool (active)
+            fingerprint: Fingerprint the command resolution was made against
+        """
+        self.commands = dict(commands)
+        self.services = dict(services)
+        self.fingerprint = fingerprint
+
+    def has(self, command):
+        """Check if a command is available"""
+        if command not in self.commands:
+            # Not part of the probed vocabulary, resolve it on demand
+            self.commands[command] = shutil.which(command)
+        return self.commands[command] is not None
+
+    def path_of(self, command):
+        """Get the absolute path of a command, or None"""
+        if self.has(command):
+            return self.commands[command]
+        return None
+
+    def service_active(self, service):
+        """Check if a system service is active"""
+        return self.services.get(service, False)
+
+    def available_managers(self):
+        """Get available package managers grouped by package format"""
+        available = {}
+        for fmt_name, fmt_info in config.SUPPORTED_FORMATS.items():
+            for manager in fmt_info['managers']:
+                if self.has(manager):
+                    available.setdefault(fmt_name, []).append(manager)
+        return available
+
+    def to_dict(self):
+        """Serialize the persistent part of the snapshot"""
+        return {
+            'version': 1,
+            'fingerprint': self.fingerprint,
+            'commands': self.commands,
+        }
+
+
+class CapabilityProbe:
+    """
+    Resolve and cache host capabilities without forking
+
+    Command lookups are done with an in-process PATH scan. The result is
+    stored in CAPABILITIES_CACHE_FILE together with a fingerprint made of
+    PATH, the mtime of every PATH directory (which changes when a binary
+    is added or removed) and the mtime of every resolved binary. The cache
+    is only rebuilt when that fingerprint changes. Service state is cheap
+    to check (a socket stat) and is always read fresh.
+    """
+
+    def __init__(self, cache_file=None, search_path=None, commands=None):
+        self.cache_file = str(cache_file or config.CAPABILITIES_CACHE_FILE)
+        self.search_path = search_path if search_path is not None else os.environ.get('PATH', os.defpath)
+        self.commands = list(commands) if commands else _all_manager_commands() + list(config.HELPER_COMMANDS)
+        self._snapshot = None
+
+    def snapshot(self, refresh=False):
+        """Get the capability snapshot, loading or rebuilding it as needed"""
+        if self._snapshot is not None and not refresh:
+            return self._snapshot
+
+        commands = None if refresh else self._load_cached_commands()
+        if commands is None:
+            commands = self._resolve_commands()
+            fingerprint = self._fingerprint(commands)
+            self._save(commands, fingerprint)
+        else:
+            fingerprint = self._fingerprint(commands)
+
+        self._snapshot = CapabilitySnapshot(commands, self._probe_services(), fingerprint)
+        return self._snapshot
+
+    def _path_dirs(self):
+        """Get the directories listed in the search path"""
+        return [d for d in self.search_path.split(os.pathsep) if d]
+
+    def _resolve_commands(self):
+        """Resolve every probed command against the search path"""
+        return {cmd: shutil.which(cmd, path=self.search_path) for cmd in self.commands}
+
+    def _fingerprint(self, commands):
+        """Build the fingerprint for a set of resolved commands"""
+        def mtime(path):
+            try:
+                return os.stat(path).st_mtime_ns
+            except OSError:
+                return None
+
+        return {
+            'path': self.search_path,
+            'dirs': [[d, mtime(d)] for d in self._path_dirs()],
+            'binaries': {cmd: mtime(path) for cmd, path in sorted(commands.items()) if path},
+        }
+
+    def _load_cached_commands(self):
+        """Load cached command resolution if its fingerprint still matches"""
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get('version') != 1:
+            return None
+
+        commands = data.get('commands', {})
+        if sorted(commands) != sorted(self.commands):
+            return None
+
+        if data.get('fingerprint') != self._fingerprint(commands):
+            return None
+
+        return commands
+
+    def _save(self, commands, fingerprint):
+        """Persist command resolution (best effort)"""
+        data = CapabilitySnapshot(commands, {}, fingerprint).to_dict()
+        tmp_file = self.cache_file + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            print(f"Warning: Could not save capability cache: {e}")
+
+    def _probe_services(self):
+        """Check service state by looking for their control sockets"""
+        services = {}
+        for service, sockets in config.SERVICE_SOCKETS.items():
+            services[service] = any(os.path.exists(sock) for sock in sockets)
+        return services
+
+
+# Shared probe so every PackageHandler in the process reuses one snapshot
+_default_probe = None
+
+
+def get_capabilities(refresh=False):
+    """Get the process-wide capability snapshot"""
+    global _default_probe
+    if _default_probe is None:
+        _default_probe = CapabilityProbe()
+    return _default_probe.snapshot(refresh=refresh)
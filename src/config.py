@@ -77,6 +77,23 @@ FILE_FILTER = "Package Files (*.deb *.rpm *.snap *.flatpak);;Debian Packages (*.
 
 # ==================== INSTALLATION SETTINGS ====================
 INSTALLATION_TIMEOUT = 300  # seconds
+PROCESS_OUTPUT_LIMIT = 256 * 1024  # bytes of stdout/stderr kept per package manager run
+PROCESS_KILL_WAIT = 5  # seconds to wait for a killed command to exit
+UNINSTALL_TIMEOUT = 120  # seconds
+
+# Privileged helper: one pkexec authentication per session instead of one per command
+PRIVILEGED_HELPER_ENABLED = False
+PRIVILEGED_HELPER_IDLE_TIMEOUT = 600  # seconds without a request before the helper exits
+PRIVILEGED_HELPER_START_TIMEOUT = 120  # seconds allowed for authentication
+
+# Package manager commands allowed at once per lock domain (AsyncPackageHandler)
+LOCK_DOMAIN_LIMITS = {
+    'dpkg': 1,            # apt, apt-get, dpkg
+    'rpm': 1,             # dnf, yum, zypper, rpm
+    'snapd': 1,
+    'flatpak-user': 1,
+    'flatpak-system': 1,
+}
 INTEGRITY_CHECK_MIN_SIZE = 1024  # bytes (minimum file size)
 DEFAULT_VERIFY_INTEGRITY = True
 DEFAULT_VERIFY_SIGNATURE = False
@@ -94,6 +111,28 @@ INSTALLATION_STEPS = [
     {"name": "Finalizing", "progress": 95, "icon": "✅"},
 ]
 
+# ==================== INSTALLED PACKAGE INVENTORY ====================
+DPKG_STATUS_FILE = '/var/lib/dpkg/status'
+# rpmdb.sqlite locations (rpm >= 4.16); older BDB/NDB databases are listed with rpm -qa
+RPMDB_SQLITE_PATHS = ['/var/lib/rpm/rpmdb.sqlite', '/usr/lib/sysimage/rpm/rpmdb.sqlite']
+# Legacy (BDB/NDB) RPM database files, watched when there is no rpmdb.sqlite
+RPMDB_LEGACY_FILES = ['/var/lib/rpm/Packages', '/var/lib/rpm/Packages.db']
+# Seconds between checks when inotify is unavailable
+INVENTORY_POLL_INTERVAL = 2.0
+# A transaction writes the databases several times: wait until they have been
+# quiet this long (but no longer than the limit) before re-reading them
+INVENTORY_SETTLE_TIME = 0.5
+INVENTORY_SETTLE_LIMIT = 5.0
+
+# ==================== CAPABILITY PROBE ====================
+# Helper tools resolved once at startup alongside the package managers
+HELPER_COMMANDS = ['pkexec', 'sudo', 'gpg', 'unsquashfs', 'dpkg-deb', 'systemctl']
+
+# Services are considered active when one of their control sockets exists
+SERVICE_SOCKETS = {
+    'snapd': ['/run/snapd.socket', '/var/run/snapd.socket'],
+}
+
 # ==================== UI SETTINGS ====================
 # Themes
 THEMES = {
@@ -137,6 +176,11 @@ BUTTON_WIDTH_SMALL = 130
 # Progress bar
 PROGRESS_BAR_HEIGHT = 25
 PROGRESS_BAR_UPDATE_INTERVAL = 200  # milliseconds
+PROGRESS_ANIMATION_INTERVAL = 15  # milliseconds between animation frames (opt-in setting)
+PROGRESS_ANIMATION_STEP = 1  # percent moved per animation frame
+
+# Installed packages list
+SEARCH_DEBOUNCE_INTERVAL = 150  # milliseconds after the last keystroke before filtering
 
 # ==================== KEYBOARD SHORTCUTS ====================
 SHORTCUTS = {
@@ -152,15 +196,21 @@ SHORTCUTS_DISPLAY = "💡 Shortcuts: Ctrl+O (Open) | Ctrl+I (Install) | F5 (Refr
 # ==================== DIRECTORY PATHS ====================
 # User configuration directory
 USER_CONFIG_DIR = Path.home() / f".{APP_NAME.lower()}"
-HISTORY_FILE = USER_CONFIG_DIR / "installation_history.json"
+HISTORY_FILE = USER_CONFIG_DIR / "installation_history.json"  # Legacy JSON array, migrated to the journal
+HISTORY_JOURNAL_FILE = USER_CONFIG_DIR / "installation_history.jsonl"
+HISTORY_DATABASE_FILE = USER_CONFIG_DIR / "installation_history.db"
 SETTINGS_FILE = USER_CONFIG_DIR / "settings.json"
 INSTALL_PATH_FILE = USER_CONFIG_DIR / "install_path.txt"
+CAPABILITIES_CACHE_FILE = USER_CONFIG_DIR / "capabilities.json"
+DIGEST_CACHE_FILE = USER_CONFIG_DIR / "digest_cache.db"
 
 # Desktop integration
 DESKTOP_ENTRY_DIR = Path.home() / ".local" / "share" / "applications"
 BIN_DIR = Path.home() / ".local" / "bin"
 
 # ==================== LOGGING SETTINGS ====================
+# The history journal is archived (gzip) once it reaches LOG_MAX_SIZE or
+# HISTORY_MAX_ENTRIES, and LOG_BACKUP_COUNT archived segments are kept
 LOG_MAX_SIZE = 10 * 1024 * 1024  # 10 MB
 LOG_BACKUP_COUNT = 5
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -175,18 +225,29 @@ BATCH_MAX_RECOMMENDED = 20
 BATCH_PROGRESS_UPDATE_DELAY = 100  # milliseconds
 
 # IMPORTANT LIMITATIONS:
-# 1. Dependency Resolution: Dependencies between queued packages are NOT automatically resolved.
-#    Packages should be ordered manually with dependencies installed first.
+# 1. Dependency Resolution: The queue is reordered so that queued packages come after the queued
+#    packages they depend on (see install_planner). Dependencies outside the queue are left to the
+#    package manager, and circular dependencies are only reported.
 #
 # 2. Password Prompts: Root password may be requested multiple times during batch installation
 #    due to Linux security policies (pkexec/sudo timeout between packages).
-#    This is an OS limitation, not a SnapWiz issue.
+#    This is an OS limitation, not a SnapWiz issue. Enabling single-transaction batch installs
+#    (Settings) installs all queued .deb or .rpm files with one prompt and one dependency solve,
+#    and the privileged helper setting asks once per session for every install and uninstall.
 #
 # 3. Batch Size: While the app can handle more than 20 packages, it's not recommended.
 #    Large batches may require multiple password entries and longer installation times.
 
 # ==================== HISTORY SETTINGS ====================
-HISTORY_MAX_ENTRIES = 1000  # Maximum history entries before warning
+HISTORY_MAX_ENTRIES = 1000  # Entries in the active history segment before it is archived
+HISTORY_DISPLAY_LIMIT = 50  # Most recent matching entries listed in the History tab
+# 'journal' (JSON lines) or 'sqlite' (indexed database for very large histories,
+# imports the journal the first time it is used)
+HISTORY_BACKEND = 'journal'
+# The history journal is flushed on every entry but only fsynced once this many
+# entries or seconds have accumulated (and when the application quits)
+HISTORY_FSYNC_BATCH = 32
+HISTORY_FSYNC_INTERVAL = 2.0  # seconds
 EXPORT_FORMATS = ['json', 'csv']
 
 # ==================== NOTIFICATIONS ====================
@@ -198,7 +259,14 @@ NOTIFICATION_MINIMIZED_MESSAGE = "Application minimized to tray. Double-click to
 
 # ==================== VALIDATOR SETTINGS ====================
 CHECKSUM_ALGORITHMS = ['sha256', 'md5', 'sha1', 'sha512']
-CHUNK_SIZE_FOR_CHECKSUM = 8192  # bytes
+CHUNK_SIZE_FOR_CHECKSUM = 1024 * 1024  # bytes, read buffer of the verification engine
+DIGEST_CACHE_MAX_ENTRIES = 5000  # Least recently used entries are evicted beyond this
+DIGEST_CACHE_USE_XATTR = True    # Mirror digests into user.snapwiz.* extended attributes
+
+# Batch pre-verification: every queued package is verified as soon as the batch starts
+VERIFICATION_MAX_WORKERS = 4        # Upper bound for the default worker count (CPU count otherwise)
+VERIFICATION_USE_PROCESSES = True   # Hash in worker processes, structure checks in threads
+PREVERIFY_ALGORITHMS = ['sha256']   # Digests computed (and cached) for every queued package
 
 # ==================== DRAG AND DROP ====================
 DRAG_DROP_ENABLED = True
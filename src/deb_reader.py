@@ -0,0 +1,312 @@
+"""
+Debian Package Reader
+Pure-Python reader for .deb files: parses the ar container, decompresses
+control.tar.{gz,xz,zst} straight from a memory map and returns the control
+stanza. The structural integrity check is done in the same pass.
+"""
+
+import io
+import os
+import mmap
+import zlib
+import lzma
+import tarfile
+from .exceptions import InvalidPackageError, UnsupportedCompressionError
+
+try:
+    import zstandard
+except ImportError:  # Optional, only needed for zstd-compressed control archives
+    zstandard = None
+
+
+AR_MAGIC = b'!<arch>\n'
+AR_HEADER_SIZE = 60
+AR_HEADER_END = b'`\n'
+
+# Fields shown in the package info panel, in display order
+DISPLAY_FIELDS = [
+    'Package', 'Version', 'Architecture', 'Maintainer',
+    'Installed-Size', 'Depends', 'Description',
+]
+
+
+class ArMember:
+    """A member of an ar archive"""
+
+    __slots__ = ('name', 'offset', 'size')
+
+    def __init__(self, name, offset, size):
+        self.name = name
+        self.offset = offset
+        self.size = size
+
+    def __repr__(self):
+        return f"ArMember({self.name!r}, offset={self.offset}, size={self.size})"
+
+
+class DebPackageInfo:
+    """Structured result of reading a .deb package"""
+
+    def __init__(self, path, control, members, format_version):
+        self.path = path
+        self.control = control
+        self.members = members
+        self.format_version = format_version
+
+    @property
+    def name(self):
+        return self.control.get('Package', '')
+
+    @property
+    def version(self):
+        return self.control.get('Version', '')
+
+    @property
+    def architecture(self):
+        return self.control.get('Architecture', '')
+
+    @property
+    def installed_size(self):
+        """Installed size in KiB, or None if not declared"""
+        try:
+            return int(self.control.get('Installed-Size', ''))
+        except ValueError:
+            return None
+
+    @property
+    def summary(self):
+        return self.control.get('Description', '').split('\n', 1)[0]
+
+    def to_dict(self):
+        """Get a JSON-serializable view of the package info"""
+        return {
+            'format': 'deb',
+            'format_version': self.format_version,
+            'control': dict(self.control),
+            'members': [[m.name, m.offset, m.size] for m in self.members],
+        }
+
+    @classmethod
+    def from_dict(cls, path, data):
+        """Rebuild package info from to_dict() output"""
+        members = [ArMember(name, offset, size) for name, offset, size in data['members']]
+        return cls(path, data['control'], members, data['format_version'])
+
+
+def parse_ar_members(buf, package_path=''):
+    """
+    Walk the headers of an ar archive
+
+    Args:
+        buf: Buffer (bytes, mmap or memoryview) holding the whole archive
+        package_path: Path used in error messages
+
+    Returns:
+        list of ArMember
+
+    Raises:
+        InvalidPackageError: If the archive structure is broken
+    """
+    total = len(buf)
+    if total < len(AR_MAGIC) or buf[:len(AR_MAGIC)] != AR_MAGIC:
+        raise InvalidPackageError(package_path, "Not an ar archive (bad magic)")
+
+    members = []
+    pos = len(AR_MAGIC)
+    while pos < total:
+        if pos + AR_HEADER_SIZE > total:
+            raise InvalidPackageError(package_path, "Truncated ar member header")
+
+        header = bytes(buf[pos:pos + AR_HEADER_SIZE])
+        if header[58:60] != AR_HEADER_END:
+            raise InvalidPackageError(package_path, f"Corrupted ar member header at offset {pos}")
+
+        name = header[0:16].decode('ascii', 'replace').rstrip()
+        if name.endswith('/'):
+            name = name[:-1]
+        try:
+            size = int(header[48:58].decode('ascii').strip())
+        except ValueError:
+            raise InvalidPackageError(package_path, f"Invalid size in ar member '{name}'")
+
+        data_offset = pos + AR_HEADER_SIZE
+        if data_offset + size > total:
+            raise InvalidPackageError(package_path, f"Member '{name}' extends past end of file (truncated download?)")
+
+        members.append(ArMember(name, data_offset, size))
+        # Members are aligned to even offsets
+        pos = data_offset + size + (size & 1)
+
+    return members
+
+
+def parse_control(text):
+    """
+    Parse a deb822 control stanza
+
+    Continuation lines are joined with newlines and a lone '.' becomes an
+    empty line, so multi-line fields such as Description keep their layout.
+
+    Returns:
+        dict of field name -> value
+    """
+    fields = {}
+    current = None
+    for line in text.splitlines():
+        if not line.strip() and current is None:
+            continue
+        if line[:1] in (' ', '\t'):
+            if current is None:
+                continue
+            value = line[1:]
+            fields[current] += '\n' + ('' if value.strip() == '.' else value)
+        elif ':' in line:
+            current, value = line.split(':', 1)
+            current = current.strip()
+            fields[current] = value.strip()
+        elif not line.strip():
+            # Blank line ends the first stanza
+            break
+    return fields
+
+
+def parse_relationships(value):
+    """
+    Parse a Depends-style field into alternatives
+
+    Example:
+        'libc6 (>= 2.17), foo | bar:any' -> [['libc6'], ['foo', 'bar']]
+    """
+    groups = []
+    for group in value.split(','):
+        alternatives = []
+        for alt in group.split('|'):
+            name = alt.strip().split(' ', 1)[0].split('(', 1)[0].split('[', 1)[0]
+            name = name.split(':', 1)[0].strip()
+            if name:
+                alternatives.append(name)
+        if alternatives:
+            groups.append(alternatives)
+    return groups
+
+
+def decompress_member(data, member_name, package_path=''):
+    """Decompress an ar member based on its file extension"""
+    try:
+        if member_name.endswith('.gz'):
+            return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+        elif member_name.endswith('.xz') or member_name.endswith('.lzma'):
+            return lzma.decompress(data)
+        elif member_name.endswith('.zst'):
+            if zstandard is None:
+                raise UnsupportedCompressionError(package_path, 'zstd')
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+        elif member_name.endswith('.tar'):
+            return bytes(data)
+    except (zlib.error, lzma.LZMAError) as e:
+        raise InvalidPackageError(package_path, f"Corrupted {member_name}: {e}")
+    raise UnsupportedCompressionError(package_path, os.path.splitext(member_name)[1].lstrip('.') or member_name)
+
+
+def _read_control_file(tar_bytes, package_path):
+    """Extract the 'control' file from an uncompressed control.tar"""
+    try:
+        with tarfile.open(fileobj=io.BytesIO(tar_bytes), mode='r:') as tar:
+            for info in tar:
+                if os.path.normpath(info.name) == 'control' and info.isfile():
+                    return tar.extractfile(info).read().decode('utf-8', 'replace')
+    except tarfile.TarError as e:
+        raise InvalidPackageError(package_path, f"Corrupted control archive: {e}")
+    raise InvalidPackageError(package_path, "control.tar has no 'control' file")
+
+
+def build_deb_info(package_path, members, member_data):
+    """
+    Validate ar members and parse the control archive
+
+    Args:
+        package_path: Path used in error messages
+        members: List of ArMember in archive order
+        member_data: Dict of member name -> bytes, must hold 'debian-binary'
+                     and the control.tar member
+
+    Raises:
+        InvalidPackageError: If the package is structurally invalid
+        UnsupportedCompressionError: If the control archive cannot be decompressed natively
+    """
+    if not members or members[0].name != 'debian-binary':
+        raise InvalidPackageError(package_path, "First member is not 'debian-binary'")
+
+    format_version = bytes(member_data.get('debian-binary', b'')).decode('ascii', 'replace').strip()
+    if not format_version.startswith('2.'):
+        raise InvalidPackageError(package_path, f"Unsupported deb format version '{format_version}'")
+
+    control_member = next((m for m in members if m.name.startswith('control.tar')), None)
+    if control_member is None:
+        raise InvalidPackageError(package_path, "Missing control.tar member")
+    if not any(m.name.startswith('data.tar') for m in members):
+        raise InvalidPackageError(package_path, "Missing data.tar member")
+
+    tar_bytes = decompress_member(member_data[control_member.name], control_member.name, package_path)
+    control = parse_control(_read_control_file(tar_bytes, package_path))
+    if 'Package' not in control:
+        raise InvalidPackageError(package_path, "control file has no Package field")
+
+    return DebPackageInfo(package_path, control, members, format_version)
+
+
+def is_captured_member(name):
+    """Check if build_deb_info needs the contents of an ar member"""
+    return name == 'debian-binary' or name.startswith('control.tar')
+
+
+def read_deb_buffer(buf, package_path=''):
+    """
+    Read a .deb held in a buffer and validate its structure
+
+    Raises:
+        InvalidPackageError: If the package is structurally invalid
+        UnsupportedCompressionError: If the control archive cannot be decompressed natively
+    """
+    members = parse_ar_members(buf, package_path)
+    views = {}
+    try:
+        for member in members:
+            if is_captured_member(member.name) and member.name not in views:
+                views[member.name] = memoryview(buf)[member.offset:member.offset + member.size]
+        return build_deb_info(package_path, members, views)
+    finally:
+        for view in views.values():
+            view.release()
+
+
+def read_deb(package_path):
+    """
+    Read a .deb package from disk
+
+    Only the ar headers and the control archive are touched, so the cost is
+    independent of the size of data.tar.
+
+    Returns:
+        DebPackageInfo
+
+    Raises:
+        InvalidPackageError: If the package is structurally invalid
+        UnsupportedCompressionError: If the control archive cannot be decompressed natively
+        OSError: If the file cannot be opened
+    """
+    with open(package_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise InvalidPackageError(package_path, "File is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return read_deb_buffer(mapped, package_path)
+
+
+def format_deb_info(info):
+    """Format DebPackageInfo for the package info panel"""
+    lines = ["Package Type: Debian (.deb)", ""]
+    for field in DISPLAY_FIELDS:
+        if field in info.control:
+            value = info.control[field].replace('\n', '\n  ')
+            lines.append(f"{field}: {value}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,231 @@
+"""
+Digest Cache Module
+Persistent cache of package digests and parsed metadata, keyed by the
+identity of the file on disk: (st_dev, st_ino, size, mtime_ns). Any rewrite
+of the file changes the key, so stale entries are never returned.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from . import config
+
+
+XATTR_PREFIX = 'user.snapwiz.'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (dev, ino, size, mtime_ns)
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+"""
+
+
+def file_key(path_or_stat):
+    """
+    Get the cache key of a file
+
+    Args:
+        path_or_stat: Path, or an os.stat_result already obtained by the caller
+
+    Returns:
+        tuple: (st_dev, st_ino, st_size, st_mtime_ns)
+    """
+    st = path_or_stat if isinstance(path_or_stat, os.stat_result) else os.stat(path_or_stat)
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class DigestCache:
+    """
+    SQLite-backed digest/metadata cache with LRU eviction
+
+    The database runs in WAL mode with a busy timeout so several SnapWiz
+    processes can share it. Each thread gets its own connection. Cache
+    failures are never fatal: a broken or locked database behaves as a miss.
+    """
+
+    def __init__(self, db_path=None, max_entries=None, use_xattr=None):
+        self.db_path = str(db_path or config.DIGEST_CACHE_FILE)
+        self.max_entries = max_entries if max_entries is not None else config.DIGEST_CACHE_MAX_ENTRIES
+        self.use_xattr = config.DIGEST_CACHE_USE_XATTR if use_xattr is None else use_xattr
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+
+    # ==================== Storage ====================
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close this thread's database connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _count(self, hit):
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key, path=None):
+        """
+        Get the cached entry for a file key
+
+        Args:
+            key: Key from file_key()
+            path: Path of the file, used for the xattr mirror
+
+        Returns:
+            dict with 'digests', and optionally 'structure' and 'metadata',
+            or None on a miss
+        """
+        entry = None
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT data FROM entries WHERE dev=? AND ino=? AND size=? AND mtime_ns=?', key
+            ).fetchone()
+            if row is not None:
+                entry = json.loads(row[0])
+                conn.execute(
+                    'UPDATE entries SET last_used=? WHERE dev=? AND ino=? AND size=? AND mtime_ns=?',
+                    (time.time(),) + tuple(key)
+                )
+        except (sqlite3.Error, ValueError):
+            entry = None
+
+        if entry is None and path is not None and self.use_xattr:
+            digests = self._read_xattrs(path, key)
+            if digests:
+                entry = {'digests': digests}
+
+        self._count(entry is not None)
+        return entry
+
+    def update(self, key, path=None, digests=None, structure=None, metadata=None):
+        """
+        Merge new results into the entry for a file key
+
+        Args:
+            key: Key from file_key(), taken before the file was read
+            path: Path of the file, used for the xattr mirror
+            digests: Dict of algorithm -> hex digest
+            structure: (ok, message) of the structural check
+            metadata: JSON-serializable package metadata
+        """
+        try:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    'SELECT data FROM entries WHERE dev=? AND ino=? AND size=? AND mtime_ns=?', key
+                ).fetchone()
+                entry = json.loads(row[0]) if row is not None else {'digests': {}}
+                if digests:
+                    entry['digests'].update(digests)
+                if structure is not None:
+                    entry['structure'] = list(structure)
+                if metadata is not None:
+                    entry['metadata'] = metadata
+                conn.execute(
+                    'INSERT OR REPLACE INTO entries (dev, ino, size, mtime_ns, data, last_used) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    tuple(key) + (json.dumps(entry), time.time())
+                )
+                self._evict(conn)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        except (sqlite3.Error, ValueError, TypeError):
+            pass
+
+        if digests and path is not None and self.use_xattr:
+            self._write_xattrs(path, key, digests)
+
+    def _evict(self, conn):
+        """Drop least recently used entries beyond max_entries"""
+        count = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                'DELETE FROM entries WHERE rowid IN '
+                '(SELECT rowid FROM entries ORDER BY last_used LIMIT ?)',
+                (excess,)
+            )
+
+    def clear(self):
+        """Remove every entry"""
+        try:
+            self._connect().execute('DELETE FROM entries')
+        except sqlite3.Error:
+            pass
+
+    def stats(self):
+        """Get hit/miss counters and the number of stored entries"""
+        try:
+            entries = self._connect().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        except sqlite3.Error:
+            entries = 0
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+    # ==================== Extended attributes ====================
+
+    def _read_xattrs(self, path, key):
+        """Read digests mirrored into user.snapwiz.<algorithm> xattrs"""
+        if not hasattr(os, 'getxattr'):
+            return {}
+        digests = {}
+        stamp = f"{key[2]}:{key[3]}:"
+        for algorithm in config.CHECKSUM_ALGORITHMS:
+            try:
+                value = os.getxattr(path, XATTR_PREFIX + algorithm).decode('ascii')
+            except (OSError, UnicodeDecodeError):
+                continue
+            # The value carries size and mtime so a modified file never matches
+            if value.startswith(stamp):
+                digests[algorithm] = value[len(stamp):]
+        return digests
+
+    def _write_xattrs(self, path, key, digests):
+        if not hasattr(os, 'setxattr'):
+            return
+        stamp = f"{key[2]}:{key[3]}:"
+        for algorithm, digest in digests.items():
+            try:
+                os.setxattr(path, XATTR_PREFIX + algorithm, (stamp + digest).encode('ascii'))
+            except OSError:
+                # Read-only media, foreign owner or no user xattr support
+                return
+
+
+_shared_cache = None
+
+
+def get_digest_cache():
+    """Get the digest cache shared by this process"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = DigestCache()
+    return _shared_cache
@@ -65,6 +65,18 @@ class UnsupportedPackageFormatError(PackageError):
         self.detected_format = detected_format
 
 
+class UnsupportedCompressionError(PackageError):
+    """Package member uses a compression format that cannot be read natively"""
+    def __init__(self, package_path, compression):
+        super().__init__(
+            message=f"Unsupported compression '{compression}' in package: {package_path}",
+            details=f"Reading {compression}-compressed members needs an optional Python module or system tool.",
+            suggestion="Install the matching Python module, or the package tools for this format."
+        )
+        self.package_path = package_path
+        self.compression = compression
+
+
 class PackageVerificationError(PackageError):
     """Package verification failed (checksum, signature, etc.)"""
     def __init__(self, package_path, verification_type, expected=None, actual=None):
@@ -162,6 +174,18 @@ class InsufficientPrivilegesError(PermissionError):
         self.operation = operation
 
 
+class CommandNotAllowedError(PermissionError):
+    """Command rejected by the privileged helper"""
+    def __init__(self, command, reason):
+        super().__init__(
+            message=f"Command not allowed: {' '.join(command)}",
+            details=reason,
+            suggestion="Only package install, remove and verify commands run with elevated privileges."
+        )
+        self.command = command
+        self.reason = reason
+
+
 # ==================== Network Errors ====================
 
 class NetworkError(SnapWizError):
@@ -0,0 +1,344 @@
+"""
+Flatpak Bundle Reader
+Reads the metadata of a single-file .flatpak bundle in-process. A bundle is
+an OSTree static delta superblock serialized as a GVariant; its a{sv}
+metadata dictionary carries the ref, the application metadata keyfile and
+the sizes. The payload parts are skipped, never decoded.
+"""
+
+import os
+import mmap
+import struct
+import configparser
+from .exceptions import InvalidPackageError
+
+
+# (a{sv}tayay(commit)aya(uayttay)a(yaytt)): alignment of each child and
+# whether it is fixed-size (only 't' is)
+SUPERBLOCK_CHILDREN = [
+    (8, False),  # a{sv} metadata
+    (8, True),   # t timestamp
+    (1, False),  # ay from checksum
+    (1, False),  # ay to checksum
+    (8, False),  # commit
+    (1, False),  # ay prerequisites
+    (8, False),  # a(uayttay) meta entries
+    (8, False),  # a(yaytt) fallback objects
+]
+FIXED_CHILD_SIZE = 8
+
+
+def _align(offset, alignment):
+    return offset + (-offset % alignment)
+
+
+def _offset_size(container_size):
+    """Size of GVariant framing offsets for a container of the given size"""
+    if container_size == 0:
+        return 0
+    if container_size <= 0xFF:
+        return 1
+    if container_size <= 0xFFFF:
+        return 2
+    if container_size <= 0xFFFFFFFF:
+        return 4
+    return 8
+
+
+class GVariantReader:
+    """Minimal reader for the GVariant serialization format"""
+
+    def __init__(self, buf, package_path=''):
+        self.buf = buf
+        self.package_path = package_path
+
+    def _error(self, reason):
+        return InvalidPackageError(self.package_path, f"Invalid flatpak bundle: {reason}")
+
+    def _read_offset(self, position, size):
+        if size == 0:
+            return 0
+        return int.from_bytes(self.buf[position:position + size], 'little')
+
+    def tuple_children(self, start, end, children):
+        """
+        Get (start, end) of every child of a tuple
+
+        Args:
+            start, end: Byte range of the tuple
+            children: List of (alignment, is_fixed) per child
+        """
+        osz = _offset_size(end - start)
+        frame_pos = end
+        ranges = []
+        pos = start
+        for index, (alignment, is_fixed) in enumerate(children):
+            pos = _align(pos - start, alignment) + start
+            if is_fixed:
+                child_end = pos + FIXED_CHILD_SIZE
+            elif index == len(children) - 1:
+                child_end = frame_pos
+            else:
+                frame_pos -= osz
+                child_end = start + self._read_offset(frame_pos, osz)
+            if child_end < pos or child_end > end:
+                raise self._error("framing offset out of range")
+            ranges.append((pos, child_end))
+            pos = child_end
+        return ranges
+
+    def array_elements(self, start, end, alignment):
+        """Get (start, end) of every element of an array of variable-size elements"""
+        if start == end:
+            return []
+        osz = _offset_size(end - start)
+        last_end = self._read_offset(end - osz, osz)
+        table_size = (end - start) - last_end
+        if last_end > end - start or table_size % osz:
+            raise self._error("corrupted array framing")
+        count = table_size // osz
+
+        elements = []
+        pos = start
+        for i in range(count):
+            element_end = start + self._read_offset(start + last_end + i * osz, osz)
+            pos = _align(pos - start, alignment) + start
+            if element_end < pos or element_end > end:
+                raise self._error("array element out of range")
+            elements.append((pos, element_end))
+            pos = element_end
+        return elements
+
+    def string(self, start, end):
+        """Decode a string (nul terminated)"""
+        data = bytes(self.buf[start:end])
+        if data.endswith(b'\0'):
+            data = data[:-1]
+        return data.decode('utf-8', 'replace')
+
+    def dict_sv(self, start, end):
+        """
+        Decode an a{sv} dictionary into key -> (type, start, end)
+
+        Values are returned as byte ranges so large entries (inline delta
+        parts) are never copied.
+        """
+        entries = {}
+        for entry_start, entry_end in self.array_elements(start, end, 8):
+            osz = _offset_size(entry_end - entry_start)
+            key_end = entry_start + self._read_offset(entry_end - osz, osz)
+            key = self.string(entry_start, key_end)
+
+            value_start = _align(key_end - entry_start, 8) + entry_start
+            value_end = entry_end - osz
+            # A variant is the value followed by a nul and its type string
+            tail = bytes(self.buf[max(value_start, value_end - 64):value_end])
+            separator = tail.rfind(b'\0')
+            if separator < 0:
+                raise self._error(f"corrupted variant for key '{key}'")
+            type_string = tail[separator + 1:].decode('ascii', 'replace')
+            data_end = value_end - (len(tail) - separator)
+            entries[key] = (type_string, value_start, data_end)
+        return entries
+
+    def value(self, type_string, start, end):
+        """Decode a basic value"""
+        if type_string in ('s', 'o', 'g'):
+            return self.string(start, end)
+        if type_string == 'ay':
+            return bytes(self.buf[start:end])
+        if type_string in ('t', 'x', 'u', 'i', 'q', 'n', 'y', 'b'):
+            formats = {'t': '<Q', 'x': '<q', 'u': '<I', 'i': '<i', 'q': '<H', 'n': '<h', 'y': '<B', 'b': '<?'}
+            fmt = formats[type_string]
+            size = struct.calcsize(fmt)
+            if end - start != size:
+                raise self._error(f"bad size for '{type_string}' value")
+            return struct.unpack(fmt, self.buf[start:end])[0]
+        return None
+
+
+class FlatpakBundleInfo:
+    """Metadata from a .flatpak bundle"""
+
+    def __init__(self, path, ref, commit, metadata_text, installed_size, download_size, origin, runtime_repo):
+        self.path = path
+        self.ref = ref
+        self.commit = commit
+        self.metadata_text = metadata_text
+        self.installed_size = installed_size
+        self.download_size = download_size
+        self.origin = origin
+        self.runtime_repo = runtime_repo
+        self.keyfile = _parse_keyfile(metadata_text)
+
+    @property
+    def kind(self):
+        return 'runtime' if self.ref.startswith('runtime/') else 'app'
+
+    @property
+    def name(self):
+        parts = self.ref.split('/')
+        return parts[1] if len(parts) > 1 else self._group().get('name', '')
+
+    @property
+    def arch(self):
+        parts = self.ref.split('/')
+        return parts[2] if len(parts) > 2 else ''
+
+    @property
+    def branch(self):
+        parts = self.ref.split('/')
+        return parts[3] if len(parts) > 3 else ''
+
+    def _group(self):
+        section = 'Runtime' if self.kind == 'runtime' else 'Application'
+        return self.keyfile.get(section, {})
+
+    @property
+    def runtime(self):
+        return self._group().get('runtime', '')
+
+    @property
+    def sdk(self):
+        return self._group().get('sdk', '')
+
+    @property
+    def command(self):
+        return self._group().get('command', '')
+
+    @property
+    def permissions(self):
+        """Sandbox permissions from the [Context] group, as lists"""
+        context = self.keyfile.get('Context', {})
+        return {key: [v for v in value.split(';') if v] for key, value in context.items()}
+
+    def to_dict(self):
+        """Get a JSON-serializable view of the bundle info"""
+        return {
+            'format': 'flatpak',
+            'ref': self.ref,
+            'kind': self.kind,
+            'name': self.name,
+            'arch': self.arch,
+            'branch': self.branch,
+            'commit': self.commit,
+            'runtime': self.runtime,
+            'sdk': self.sdk,
+            'command': self.command,
+            'permissions': self.permissions,
+            'installed_size': self.installed_size,
+            'download_size': self.download_size,
+            'origin': self.origin,
+            'runtime_repo': self.runtime_repo,
+        }
+
+
+def _parse_keyfile(text):
+    """Parse a GKeyFile into a dict of group -> dict"""
+    parser = configparser.ConfigParser(interpolation=None, strict=False, delimiters=('=',))
+    parser.optionxform = str
+    try:
+        parser.read_string(text or '')
+    except configparser.Error:
+        return {}
+    return {section: dict(parser.items(section)) for section in parser.sections()}
+
+
+def read_flatpak_bundle_buffer(buf, package_path=''):
+    """
+    Read bundle metadata from a buffer holding the whole bundle
+
+    Raises:
+        InvalidPackageError: If the bundle is malformed or has no ref
+    """
+    reader = GVariantReader(buf, package_path)
+    children = reader.tuple_children(0, len(buf), SUPERBLOCK_CHILDREN)
+    metadata = reader.dict_sv(*children[0])
+
+    def lookup(key, expected_type):
+        if key not in metadata:
+            return None
+        type_string, start, end = metadata[key]
+        if type_string != expected_type:
+            return None
+        return reader.value(type_string, start, end)
+
+    def lookup_size(key):
+        # flatpak stores sizes big-endian regardless of host byte order
+        if key not in metadata or metadata[key][0] != 't':
+            return None
+        _, start, end = metadata[key]
+        return int.from_bytes(buf[start:end], 'big')
+
+    ref = lookup('ref', 's')
+    if not ref:
+        raise InvalidPackageError(package_path, "Invalid flatpak bundle: no ref in metadata")
+
+    to_checksum = reader.value('ay', *children[3])
+
+    return FlatpakBundleInfo(
+        package_path,
+        ref=ref,
+        commit=to_checksum.hex() if to_checksum else '',
+        metadata_text=lookup('metadata', 's') or '',
+        installed_size=lookup_size('installed-size'),
+        download_size=lookup_size('download-size'),
+        origin=lookup('origin', 's'),
+        runtime_repo=lookup('runtime-repo', 's'),
+    )
+
+
+def read_flatpak_bundle(package_path):
+    """
+    Read metadata from a .flatpak bundle without the flatpak CLI
+
+    Returns:
+        FlatpakBundleInfo
+
+    Raises:
+        InvalidPackageError: If the bundle is malformed
+        OSError: If the file cannot be opened
+    """
+    with open(package_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise InvalidPackageError(package_path, "File is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return read_flatpak_bundle_buffer(mapped, package_path)
+
+
+def _format_size(size_bytes):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size_bytes < 1024.0:
+            return f"{size_bytes:.2f} {unit}"
+        size_bytes /= 1024.0
+    return f"{size_bytes:.2f} TB"
+
+
+def format_flatpak_info(info, file_name, file_size):
+    """Format FlatpakBundleInfo for the package info panel"""
+    lines = [
+        "Package Type: Flatpak Package 📱",
+        "",
+        f"Filename: {file_name}",
+        f"Size: {file_size}",
+        "",
+        f"Ref: {info.ref}",
+        f"name={info.name}",
+    ]
+    if info.runtime:
+        lines.append(f"runtime={info.runtime}")
+    if info.sdk:
+        lines.append(f"sdk={info.sdk}")
+    if info.command:
+        lines.append(f"command={info.command}")
+    if info.installed_size is not None:
+        lines.append(f"Installed size: {_format_size(info.installed_size)}")
+    if info.download_size is not None:
+        lines.append(f"Download size: {_format_size(info.download_size)}")
+    permissions = info.permissions
+    if permissions:
+        lines.append("")
+        lines.append("Permissions:")
+        for key, values in sorted(permissions.items()):
+            lines.append(f"  {key}: {', '.join(values)}")
+    return '\n'.join(lines) + '\n'
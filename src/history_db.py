@@ -0,0 +1,349 @@
+"""
+History Database Module
+Optional SQLite store for the installation history. Entries live in one
+table with indexes on timestamp, status, package type and package name,
+and an FTS5 index over names, paths and messages, so filtering, searching
+and statistics stay fast with millions of entries.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from . import config
+from .history_journal import HistoryJournal, TIMESTAMP_PATTERN, entry_format
+
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+DATE_FORMAT = '%Y-%m-%d'
+
+# Rows inserted or fetched per statement
+BATCH_ROWS = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT,
+    success INTEGER NOT NULL,
+    package_type TEXT NOT NULL,
+    package_name TEXT NOT NULL,
+    package TEXT NOT NULL,
+    message TEXT NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp);
+CREATE INDEX IF NOT EXISTS history_success ON history (success);
+CREATE INDEX IF NOT EXISTS history_success_type ON history (success, package_type);
+CREATE INDEX IF NOT EXISTS history_type ON history (package_type);
+CREATE INDEX IF NOT EXISTS history_name ON history (package_name COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS history_daily (
+    day TEXT NOT NULL,
+    package_type TEXT NOT NULL,
+    successful INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    PRIMARY KEY (day, package_type)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS history_daily_insert AFTER INSERT ON history BEGIN
+    INSERT INTO history_daily (day, package_type, successful, failed)
+    VALUES (COALESCE(substr(new.timestamp, 1, 10), ''), new.package_type, new.success, 1 - new.success)
+    ON CONFLICT (day, package_type) DO UPDATE SET
+        successful = successful + excluded.successful, failed = failed + excluded.failed;
+END;
+"""
+# Every index ends with the implicit rowid, so equality filters list the most
+# recent matches by walking an index backwards instead of sorting. The
+# history_daily counters are kept by a trigger, so statistics never scan.
+
+# Fills history_daily for a database created before it existed
+DAILY_BACKFILL = """
+INSERT INTO history_daily (day, package_type, successful, failed)
+SELECT COALESCE(substr(timestamp, 1, 10), ''), package_type, SUM(success), COUNT(*) - SUM(success)
+FROM history GROUP BY 1, 2
+"""
+
+# The history is append-only (replace() rebuilds the index wholesale), so
+# only inserts need to be mirrored into the full-text index
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+    package_name, package, message, content='history', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts (rowid, package_name, package, message)
+    VALUES (new.id, new.package_name, new.package, new.message);
+END;
+"""
+
+# The trigram tokenizer only indexes substrings of three characters or more
+FTS_MIN_QUERY = 3
+
+
+def _row(entry):
+    """Get the column values of a history entry"""
+    timestamp = entry.get('timestamp')
+    if not isinstance(timestamp, str) or not TIMESTAMP_PATTERN.fullmatch(timestamp):
+        # Unparseable timestamps never match a date filter
+        timestamp = None
+    return (
+        timestamp,
+        1 if entry.get('success', False) else 0,
+        entry_format(entry),
+        str(entry.get('package_name', '')),
+        str(entry.get('package', '')),
+        str(entry.get('message', '')),
+        json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+    )
+
+
+def _date_bound(date):
+    # Dates are compared as midnight, like InstallLogger.filter_history
+    return datetime.strptime(date, DATE_FORMAT).strftime(TIMESTAMP_FORMAT)
+
+
+def _phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _like(text):
+    return '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+class HistoryDatabase:
+    """
+    SQLite installation history with the same interface as HistoryJournal
+
+    The database runs in WAL mode with synchronous=NORMAL, so a commit
+    doesn't wait for an fsync. A new database imports the journal (and a
+    legacy JSON history) on first use; the journal itself is left alone.
+    """
+
+    def __init__(self, path=None, journal_path=None, legacy_path=None):
+        """
+        Args:
+            path: Database file (defaults to config.HISTORY_DATABASE_FILE)
+            journal_path: Journal imported into a new database
+            legacy_path: JSON array history imported into a new database
+        """
+        self.path = str(path or config.HISTORY_DATABASE_FILE)
+        self.journal_path = journal_path
+        self.legacy_path = legacy_path
+        self.fts = False
+        self._batch_depth = 0
+        self._lock = threading.RLock()
+        self._conn = None
+        self._connect()
+
+    # ==================== Storage ====================
+
+    def _connect(self):
+        created = not os.path.exists(self.path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        has_daily = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'history_daily'").fetchone()
+        conn.executescript(SCHEMA)
+        if not has_daily:
+            conn.execute(DAILY_BACKFILL)
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite without FTS5 or the trigram tokenizer: searches scan instead
+            self.fts = False
+        self._conn = conn
+        if created:
+            self._import_journal()
+
+    def _import_journal(self):
+        if self.journal_path is None and self.legacy_path is None:
+            return
+        journal = HistoryJournal(self.journal_path, self.legacy_path)
+        try:
+            with self.batch():
+                self.extend(journal)
+        finally:
+            journal.close()
+        self._conn.execute('ANALYZE')
+
+    @contextmanager
+    def batch(self):
+        """Write a group of entries in one transaction"""
+        with self._lock:
+            if self._batch_depth == 0:
+                self._conn.execute('BEGIN')
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._conn.execute('ROLLBACK')
+                raise
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._conn.execute('COMMIT')
+
+    # ==================== Writing ====================
+
+    def append(self, entry):
+        """Append one entry"""
+        self.extend([entry])
+
+    def extend(self, entries):
+        """Append entries"""
+        insert = 'INSERT INTO history (timestamp, success, package_type, package_name, package, message, entry) ' \
+                 'VALUES (?, ?, ?, ?, ?, ?, ?)'
+        with self.batch():
+            rows = []
+            for entry in entries:
+                rows.append(_row(entry))
+                if len(rows) >= BATCH_ROWS:
+                    self._conn.executemany(insert, rows)
+                    rows = []
+            if rows:
+                self._conn.executemany(insert, rows)
+
+    def sync(self):
+        """Nothing to do: every write is committed when its batch ends"""
+
+    def replace(self, entries):
+        """Replace the whole history"""
+        with self.batch():
+            self._conn.execute('DELETE FROM history')
+            self._conn.execute('DELETE FROM history_daily')
+            if self.fts:
+                self._conn.execute("INSERT INTO history_fts (history_fts) VALUES ('delete-all')")
+            self.extend(entries)
+
+    def clear(self):
+        """Remove every entry"""
+        self.replace([])
+
+    def close(self):
+        """Close the database"""
+        with self._lock:
+            if self._conn is not None:
+                # Refresh the planner statistics the indexes are chosen by
+                self._conn.execute('PRAGMA optimize')
+                self._conn.close()
+                self._conn = None
+
+    # ==================== Reading ====================
+
+    def __iter__(self):
+        """Iterate over the entries, oldest first, a page at a time"""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT id, entry FROM history WHERE id > ? ORDER BY id LIMIT ?', (last_id, BATCH_ROWS)
+                ).fetchall()
+            if not rows:
+                return
+            for _, entry in rows:
+                yield json.loads(entry)
+            last_id = rows[-1][0]
+
+    def read(self):
+        """Get every entry, oldest first"""
+        return list(self)
+
+    def _where(self, status=None, package_type=None, date_from=None, date_to=None, query=None, messages=False):
+        clauses = []
+        params = []
+        if status == 'success':
+            clauses.append('success = 1')
+        elif status == 'failed':
+            clauses.append('success = 0')
+        if package_type:
+            clauses.append('package_type = ?')
+            params.append(package_type)
+        if date_from:
+            clauses.append('timestamp >= ?')
+            params.append(_date_bound(date_from))
+        if date_to:
+            clauses.append('timestamp <= ?')
+            params.append(_date_bound(date_to))
+        if query:
+            columns = ('package_name', 'package', 'message') if messages else ('package_name', 'package')
+            if self.fts and len(query) >= FTS_MIN_QUERY:
+                clauses.append('id IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?)')
+                params.append('{%s} : %s' % (' '.join(columns), _phrase(query)))
+            else:
+                clauses.append('(' + ' OR '.join(f"{column} LIKE ? ESCAPE '\\'" for column in columns) + ')')
+                params.extend([_like(query)] * len(columns))
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def query(self, limit=None, **criteria):
+        """
+        Get the entries matching a filter, oldest first
+
+        Args:
+            limit: Only return the most recent entries up to this many
+            status: 'success' or 'failed'
+            package_type: Extension of the package file ('deb', 'rpm')
+            date_from: 'YYYY-MM-DD', inclusive
+            date_to: 'YYYY-MM-DD', compared as midnight
+            query: Case-insensitive substring of the package name or path
+            messages: Also match query against the messages
+
+        Returns:
+            list of history entries
+        """
+        where, params = self._where(**criteria)
+        sql = 'SELECT entry FROM history' + where + ' ORDER BY id DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(entry) for (entry,) in reversed(rows)]
+
+    def iter_query(self, **criteria):
+        """Iterate over the entries matching a filter (see query()), oldest first, a page at a time"""
+        where, params = self._where(**criteria)
+        sql = 'SELECT id, entry FROM history' + (where + ' AND' if where else ' WHERE') + ' id > ? ORDER BY id LIMIT ?'
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(sql, params + [last_id, BATCH_ROWS]).fetchall()
+            if not rows:
+                return
+            for _, entry in rows:
+                yield json.loads(entry)
+            last_id = rows[-1][0]
+
+    def count(self, **criteria):
+        """Get the number of entries matching a filter (see query())"""
+        where, params = self._where(**criteria)
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM history' + where, params).fetchone()[0]
+
+    def stats(self):
+        """
+        Get the number of entries by outcome
+
+        Returns:
+            tuple: (total, successful)
+        """
+        with self._lock:
+            total, successful = self._conn.execute(
+                'SELECT COALESCE(SUM(successful + failed), 0), COALESCE(SUM(successful), 0) FROM history_daily'
+            ).fetchone()
+        return total, successful
+
+    def daily(self):
+        """
+        Get the number of entries by day and package format
+
+        Returns:
+            list of (day, package format, successful, failed), in order; day is
+            '' for entries without a valid timestamp
+        """
+        with self._lock:
+            return self._conn.execute(
+                'SELECT day, package_type, successful, failed FROM history_daily ORDER BY day, package_type'
+            ).fetchall()
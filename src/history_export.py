@@ -0,0 +1,159 @@
+"""
+History Export Module
+Streams history entries into CSV, JSON or NDJSON files, optionally gzip or
+xz compressed, one entry at a time so memory use doesn't grow with the
+history.
+"""
+
+import os
+import csv
+import gzip
+import lzma
+import json
+from datetime import datetime
+
+
+# Compressed by the suffix of the file name
+COMPRESSORS = {'.gz': gzip.open, '.xz': lzma.open}
+
+CSV_FIELDS = ['timestamp', 'package_name', 'success', 'message']
+
+# Progress is reported every this many entries
+PROGRESS_INTERVAL = 1000
+
+
+def _split_compression(path):
+    base, suffix = os.path.splitext(path)
+    if suffix.lower() in COMPRESSORS:
+        return base, COMPRESSORS[suffix.lower()]
+    return path, open
+
+
+def export_format(path):
+    """Get the export format implied by a file name ('csv', 'ndjson' or 'json')"""
+    base, _ = _split_compression(path)
+    suffix = os.path.splitext(base)[1].lower()
+    if suffix == '.csv':
+        return 'csv'
+    if suffix in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    return 'json'
+
+
+class _Target:
+    """Text sink over a binary, possibly compressed file, counting the bytes written"""
+
+    def __init__(self, path, temp_path):
+        # Compressed according to the final name, written under the temporary one
+        _, opener = _split_compression(path)
+        self._file = opener(temp_path, 'wb')
+        self.bytes = 0  # Before compression
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self._file.write(data)
+        self.bytes += len(data)
+
+    def close(self):
+        self._file.close()
+
+
+def _write_json(entries, target, report):
+    export_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    target.write('{\n  "export_date": "%s",\n  "entries": [' % export_date)
+    rows = 0
+    for entry in entries:
+        target.write((',\n    ' if rows else '\n    ') + json.dumps(entry))
+        rows += 1
+        report(rows)
+    # The count is only known at the end; readers look entries up by key
+    target.write(('\n  ' if rows else '') + '],\n  "total_entries": %d\n}\n' % rows)
+    return rows
+
+
+def _write_ndjson(entries, target, report):
+    rows = 0
+    for entry in entries:
+        target.write(json.dumps(entry) + '\n')
+        rows += 1
+        report(rows)
+    return rows
+
+
+def _write_csv(entries, target, report):
+    writer = None
+    rows = 0
+    for entry in entries:
+        if writer is None:
+            # No header for an empty history
+            writer = csv.DictWriter(target, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+        writer.writerow({
+            'timestamp': entry.get('timestamp', ''),
+            'package_name': entry.get('package_name', ''),
+            'success': 'Success' if entry.get('success') else 'Failed',
+            'message': entry.get('message', '')
+        })
+        rows += 1
+        report(rows)
+    return rows
+
+
+WRITERS = {'json': _write_json, 'ndjson': _write_ndjson, 'csv': _write_csv}
+
+
+def export_entries(entries, path, format='json', progress_callback=None):
+    """
+    Write history entries to a file
+
+    The file is written under a temporary name and renamed when complete,
+    so a failed export never leaves a truncated file behind.
+
+    Args:
+        entries: Iterable of history entries, consumed once
+        path: Destination file; a .gz or .xz suffix compresses it
+        format: 'json' (an object with an entries array), 'ndjson' or 'csv'
+        progress_callback: Called with (entries written, bytes written before compression)
+
+    Returns:
+        int: Number of entries written
+    """
+    writer = WRITERS[format.lower()]
+    temp_path = path + '.part'
+    target = _Target(path, temp_path)
+
+    def report(rows):
+        if progress_callback and rows % PROGRESS_INTERVAL == 0:
+            progress_callback(rows, target.bytes)
+
+    try:
+        rows = writer(entries, target, report)
+        target.close()
+    except BaseException:
+        target.close()
+        os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+    if progress_callback:
+        progress_callback(rows, target.bytes)
+    return rows
+
+
+def load_entries(path):
+    """
+    Read history entries from an export (JSON, NDJSON, optionally compressed)
+
+    Returns:
+        list of entries, or None if the file isn't a history export
+    """
+    _, opener = _split_compression(path)
+    with opener(path, 'rt', encoding='utf-8') as f:
+        if export_format(path) == 'ndjson':
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    # Both the old format (array) and the current one (object with metadata)
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and 'entries' in data:
+        return data['entries']
+    return None
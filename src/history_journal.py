@@ -0,0 +1,513 @@
+"""
+History Journal Module
+Append-only store for the installation history: one compact JSON object per
+line. Logging an event appends one line instead of rewriting the history,
+and fsyncs are batched. A legacy JSON array history is migrated on first use.
+
+The journal is the active segment. Once it reaches config.LOG_MAX_SIZE
+bytes or config.HISTORY_MAX_ENTRIES entries it is archived as a gzip
+segment and recorded in a small manifest with its time range and counts;
+config.LOG_BACKUP_COUNT archived segments are kept.
+
+Several processes may share a journal: appends and rotations hold an
+exclusive lock on a lock file next to it, and a writer whose segment was
+rotated away by another process reopens the new active segment.
+"""
+
+import os
+import re
+import gzip
+import json
+import time
+import fcntl
+import threading
+from contextlib import contextmanager
+from . import config
+
+
+# Shape of the logged timestamps ('%Y-%m-%d %H:%M:%S'), checked without the cost of strptime
+TIMESTAMP_PATTERN = re.compile(r'\d{4}-\d\d-\d\d \d\d:\d\d:\d\d')
+
+
+def entry_day(entry):
+    """Get the 'YYYY-MM-DD' day of an entry, or '' if its timestamp isn't in the logged format"""
+    timestamp = entry.get('timestamp')
+    if isinstance(timestamp, str) and TIMESTAMP_PATTERN.fullmatch(timestamp):
+        return timestamp[:10]
+    return ''
+
+
+def entry_format(entry):
+    """Get the package format of an entry: the extension of its package file ('deb', 'rpm'), or ''"""
+    package_name = str(entry.get('package_name', ''))
+    return package_name.rsplit('.', 1)[1] if '.' in package_name else ''
+
+
+class HistoryCounters:
+    """
+    Running totals of the history by outcome, day and package format
+
+    Built in one pass over the entries and then updated as entries are
+    logged, so statistics never rescan the history.
+    """
+
+    def __init__(self, entries=()):
+        self.total = 0
+        self.successful = 0
+        self.daily = {}  # (day, package format) -> [successful, failed]
+        for entry in entries:
+            self.add(entry)
+
+    @property
+    def failed(self):
+        return self.total - self.successful
+
+    def add(self, entry):
+        """Count one more entry"""
+        success = bool(entry.get('success', False))
+        self.total += 1
+        self.successful += success
+        key = (entry_day(entry), entry_format(entry))
+        counts = self.daily.get(key)
+        if counts is None:
+            counts = self.daily[key] = [0, 0]
+        counts[0 if success else 1] += 1
+
+    def add_rows(self, rows):
+        """Add counts in the form returned by rows()"""
+        for day, package_format, successful, failed in rows:
+            self.total += successful + failed
+            self.successful += successful
+            counts = self.daily.setdefault((day, package_format), [0, 0])
+            counts[0] += successful
+            counts[1] += failed
+
+    def rows(self):
+        """Get (day, package format, successful, failed) tuples in order"""
+        return sorted((day, package_format, successful, failed)
+                      for (day, package_format), (successful, failed) in self.daily.items())
+
+
+def _encode(entry):
+    return json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def _parse(lines):
+    """Parse journal lines, skipping any torn by a crash mid-write"""
+    lines = [line for line in lines if line.strip()]
+    try:
+        # One parse of the whole segment is much faster than one per line
+        return json.loads('[' + ','.join(lines) + ']')
+    except ValueError:
+        # Every line is a whole object, so a torn one can't merge with the next
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return entries
+
+
+def _file_key(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _fsync_directory(path):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path, data, compress=False):
+    """Durably replace a file with data (bytes), optionally gzip-compressed"""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        if compress:
+            with gzip.GzipFile(fileobj=f, mode='wb') as gz:
+                gz.write(data)
+        else:
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    _fsync_directory(path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class HistoryJournal:
+    """
+    Segmented JSON-lines history
+
+    Every entry is written and flushed as soon as it is logged, so it
+    survives the application crashing. It is fsynced once
+    config.HISTORY_FSYNC_BATCH entries or config.HISTORY_FSYNC_INTERVAL
+    seconds have accumulated, at the end of a batch() and on close().
+
+    Appends only touch the active segment. Archived segments never change,
+    and a rotation interrupted by a crash is completed on the next start.
+    """
+
+    def __init__(self, path=None, legacy_path=None, fsync_batch=None, fsync_interval=None,
+                 max_bytes=None, max_entries=None, backup_count=None):
+        """
+        Args:
+            path: Journal file (defaults to config.HISTORY_JOURNAL_FILE)
+            legacy_path: JSON array history to migrate (defaults to config.HISTORY_FILE)
+            fsync_batch: Entries written before an fsync is forced
+            fsync_interval: Seconds after which pending entries are fsynced
+            max_bytes: Size at which the active segment is archived (defaults to config.LOG_MAX_SIZE)
+            max_entries: Entries at which the active segment is archived (defaults to config.HISTORY_MAX_ENTRIES)
+            backup_count: Archived segments kept (defaults to config.LOG_BACKUP_COUNT)
+        """
+        self.path = str(path or config.HISTORY_JOURNAL_FILE)
+        self.legacy_path = str(legacy_path or config.HISTORY_FILE)
+        self.fsync_batch = fsync_batch or config.HISTORY_FSYNC_BATCH
+        self.fsync_interval = config.HISTORY_FSYNC_INTERVAL if fsync_interval is None else fsync_interval
+        self.max_bytes = max_bytes or config.LOG_MAX_SIZE
+        self.max_entries = max_entries or config.HISTORY_MAX_ENTRIES
+        self.backup_count = config.LOG_BACKUP_COUNT if backup_count is None else backup_count
+        self.directory = os.path.dirname(os.path.abspath(self.path))
+        # installation_history.jsonl -> installation_history.000001.jsonl.gz, installation_history.manifest.json
+        stem = os.path.basename(self.path)
+        stem = stem[:-len('.jsonl')] if stem.endswith('.jsonl') else stem
+        self._segment_pattern = re.compile(re.escape(stem) + r'\.(\d+)\.jsonl(\.gz)?')
+        self._stem = stem
+        self.manifest_path = os.path.join(self.directory, stem + '.manifest.json')
+        self.lock_path = os.path.join(self.directory, stem + '.lock')
+        self._segments = []        # Manifest records of the archived segments, oldest first
+        self._manifest_key = None
+        self._file = None
+        self._lock_file = None
+        self._lock_depth = 0
+        self._active_entries = None
+        self._pending = 0          # Entries written since the last fsync
+        self._last_sync = time.monotonic()
+        self._batch_depth = 0
+        self._lock = threading.RLock()
+        self._migrate()
+        self._load_manifest()
+        self._recover()
+
+    # ==================== Files ====================
+
+    def _migrate(self):
+        """Convert a legacy JSON array history into the journal"""
+        if os.path.exists(self.path) or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(entries, list):
+            return
+        _write_atomic(self.path, ''.join(map(_encode, entries)).encode('utf-8'))
+        # Keep the old file around, renamed so it isn't migrated again
+        os.replace(self.legacy_path, self.legacy_path + '.migrated')
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the journal lock, shared with other processes, for a write"""
+        with self._lock:
+            if self._lock_depth == 0:
+                if self._lock_file is None:
+                    os.makedirs(self.directory, exist_ok=True)
+                    self._lock_file = open(self.lock_path, 'ab')
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _handle(self):
+        if self._file is not None and not self._is_active():
+            # Rotated or replaced by another process: move to the new active segment
+            self.sync()
+            self._close_handle()
+            self._active_entries = None
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+            if self._file.tell():
+                # Terminate a line torn by a crash so the next entry starts cleanly
+                with open(self.path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        self._file.write(b'\n')
+        if self._active_entries is None:
+            with open(self.path, 'rb') as f:
+                self._active_entries = sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 16), b''))
+        return self._file
+
+    def _is_active(self):
+        """Tell if the open handle is still the file at self.path"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        handle = os.fstat(self._file.fileno())
+        return (st.st_ino, st.st_dev) == (handle.st_ino, handle.st_dev)
+
+    def _close_handle(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ==================== Segments ====================
+
+    def _segment_files(self, compressed):
+        """Get the archived (or, uncompressed, pending) segment files in sequence order"""
+        found = []
+        for name in os.listdir(self.directory):
+            match = self._segment_pattern.fullmatch(name)
+            if match and bool(match.group(2)) == compressed:
+                found.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return [path for _, path in sorted(found)]
+
+    def _load_manifest(self):
+        """Read the manifest if it changed since it was last read (by a rotation in another process)"""
+        key = _file_key(self.manifest_path)
+        if key == self._manifest_key:
+            return
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                segments = json.load(f)['segments']
+        except FileNotFoundError:
+            segments = []
+        except (OSError, ValueError, KeyError, TypeError):
+            # Unreadable manifest: rebuild it from the archives themselves
+            segments = []
+            for path in self._segment_files(compressed=True):
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    segments.append(self._record(os.path.basename(path), _parse(f)))
+        self._segments = segments
+        self._manifest_key = key
+
+    def _write_manifest(self):
+        data = json.dumps({'segments': self._segments}, separators=(',', ':')).encode('utf-8')
+        _write_atomic(self.manifest_path, data)
+        self._manifest_key = _file_key(self.manifest_path)
+
+    @staticmethod
+    def _record(name, entries):
+        """Get the manifest record of a segment"""
+        timestamps = [entry['timestamp'] for entry in entries if entry_day(entry)]
+        counters = HistoryCounters(entries)
+        return {
+            'file': name,
+            'earliest': min(timestamps) if timestamps else None,
+            'latest': max(timestamps) if timestamps else None,
+            'entries': counters.total,
+            'daily': counters.rows(),
+        }
+
+    def _next_segment(self):
+        names = [record['file'] for record in self._segments]
+        names += [os.path.basename(path) for path in self._segment_files(compressed=False)]
+        sequence = max((int(self._segment_pattern.fullmatch(name).group(1)) for name in names), default=0) + 1
+        return os.path.join(self.directory, f'{self._stem}.{sequence:06d}.jsonl')
+
+    def _rotate(self):
+        """Archive the active segment and start an empty one"""
+        self.sync()
+        self._close_handle()
+        # Archives recorded by other processes are kept and numbered after
+        self._load_manifest()
+        pending = self._next_segment()
+        # The rename is the commit point: a crash after it is finished by _recover()
+        os.replace(self.path, pending)
+        self._active_entries = 0
+        self._archive(pending)
+
+    def _archive(self, pending):
+        """Compress a pending segment, record it in the manifest and expire the oldest"""
+        with open(pending, 'rb') as f:
+            data = f.read()
+        name = os.path.basename(pending) + '.gz'
+        _write_atomic(pending + '.gz', data, compress=True)
+        self._segments = [record for record in self._segments if record['file'] != name]
+        self._segments.append(self._record(name, _parse(data.decode('utf-8', 'replace').splitlines())))
+        expired = []
+        while len(self._segments) > self.backup_count:
+            expired.append(self._segments.pop(0))
+        self._write_manifest()
+        os.remove(pending)
+        for record in expired:
+            _remove(os.path.join(self.directory, record['file']))
+
+    def _recover(self):
+        """Finish rotations interrupted by a crash"""
+        with self._exclusive():
+            for pending in self._segment_files(compressed=False):
+                self._archive(pending)
+
+    def archived(self, date_from=None, date_to=None):
+        """
+        Get the manifest records of the archived segments, oldest first
+
+        Args:
+            date_from: Skip segments with no entry at or after this 'YYYY-MM-DD'
+            date_to: Skip segments with no entry at or before this 'YYYY-MM-DD' (midnight)
+
+        Returns:
+            list of dicts with 'file', 'earliest', 'latest', 'entries' and
+            'daily' (counts in the form of HistoryCounters.rows())
+        """
+        with self._lock:
+            self._load_manifest()
+            segments = list(self._segments)
+        if date_from or date_to:
+            low = f'{date_from} 00:00:00' if date_from else None
+            high = f'{date_to} 00:00:00' if date_to else None
+            # Entries without a valid timestamp never match a date filter
+            segments = [record for record in segments if record['latest'] is not None
+                        and (low is None or record['latest'] >= low)
+                        and (high is None or record['earliest'] <= high)]
+        return segments
+
+    def read_segment(self, record):
+        """Get the entries of an archived segment, oldest first"""
+        try:
+            with gzip.open(os.path.join(self.directory, record['file']), 'rt', encoding='utf-8') as f:
+                return _parse(f)
+        except FileNotFoundError:
+            # Expired by a rotation since the manifest was read
+            return []
+
+    # ==================== Writing ====================
+
+    def append(self, entry):
+        """Append one entry"""
+        self.extend([entry])
+
+    def extend(self, entries):
+        """Append entries, rotating the active segment whenever it fills up"""
+        entries = list(entries)
+        if not entries:
+            return
+        with self._exclusive():
+            start = 0
+            while start < len(entries):
+                f = self._handle()
+                room = max(self.max_entries - self._active_entries, 1)
+                chunk = entries[start:start + room]
+                start += len(chunk)
+                f.write(''.join(map(_encode, chunk)).encode('utf-8'))
+                f.flush()
+                self._pending += len(chunk)
+                self._active_entries += len(chunk)
+                if self._active_entries >= self.max_entries or f.tell() >= self.max_bytes:
+                    self._rotate()
+            if self._batch_depth == 0 and (
+                self._pending >= self.fsync_batch or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self.sync()
+
+    def sync(self):
+        """fsync entries written so far"""
+        with self._lock:
+            if self._file is not None and self._pending:
+                os.fsync(self._file.fileno())
+            self._pending = 0
+            self._last_sync = time.monotonic()
+
+    @contextmanager
+    def batch(self):
+        """Defer fsyncs until a group of entries has been written"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.sync()
+
+    def replace(self, entries):
+        """Replace the whole history"""
+        with self._exclusive():
+            self._close_handle()
+            _write_atomic(self.path, b'')
+            self._active_entries = 0
+            self._pending = 0
+            expired, self._segments = self._segments, []
+            self._write_manifest()
+            for record in expired:
+                _remove(os.path.join(self.directory, record['file']))
+            with self.batch():
+                self.extend(entries)
+
+    def clear(self):
+        """Remove every entry"""
+        self.replace([])
+
+    def close(self):
+        """fsync pending entries and close the files"""
+        with self._lock:
+            self.sync()
+            self._close_handle()
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    # ==================== Reading ====================
+
+    def version(self):
+        """
+        Get the identity of the journal's current contents
+
+        Returns:
+            tuple: (active segment, manifest), each (st_mtime_ns, st_size,
+            st_ino) or None; any write or rotation, by this or another
+            process, changes it
+        """
+        return (_file_key(self.path), _file_key(self.manifest_path))
+
+    def read_active(self):
+        """Get the entries of the active segment, oldest first"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return _parse(f.read().splitlines())
+        except FileNotFoundError:
+            return []
+
+    def __iter__(self):
+        """Iterate over every entry, oldest first, a segment at a time"""
+        for record in self.archived():
+            yield from self.read_segment(record)
+        yield from self.read_active()
+
+    def read(self, date_from=None, date_to=None):
+        """
+        Get the entries, oldest first
+
+        Args:
+            date_from, date_to: Leave out archived segments outside this
+                range (see archived()); entries themselves aren't filtered
+        """
+        entries = []
+        for record in self.archived(date_from, date_to):
+            entries.extend(self.read_segment(record))
+        entries.extend(self.read_active())
+        return entries
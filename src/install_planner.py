@@ -0,0 +1,244 @@
+"""
+Install Planner Module
+Orders a batch queue so that every package comes after the queued packages
+it depends on. Dependencies are taken from the parsed package metadata:
+Depends/Pre-Depends/Provides for .deb, Requires/Provides for .rpm, the base
+snap for .snap and the runtime for .flatpak.
+"""
+
+import heapq
+from .deb_reader import parse_relationships
+
+
+class PlanEntry:
+    """A queued package as seen by the planner"""
+
+    __slots__ = ('path', 'index', 'name', 'provides', 'requires')
+
+    def __init__(self, path, index, name='', provides=(), requires=()):
+        """
+        Args:
+            path: Package file path
+            index: Position in the original queue
+            name: Package name ('' if the package couldn't be read)
+            provides: Capabilities the package provides (its own name included)
+            requires: List of requirement groups, each a list of alternatives
+        """
+        self.path = path
+        self.index = index
+        self.name = name
+        self.provides = set(provides)
+        self.requires = [list(group) for group in requires]
+
+
+class InstallPlan:
+    """Result of planning a batch"""
+
+    def __init__(self, order, cycles, external, unreadable, edges):
+        self.order = order            # Package paths in install order
+        self.cycles = cycles          # Lists of paths that depend on each other
+        self.external = external      # path -> requirements no queued package satisfies
+        self.unreadable = unreadable  # Paths whose metadata couldn't be read
+        self.edges = edges            # path -> paths that must be installed first
+
+    @property
+    def has_cycles(self):
+        return bool(self.cycles)
+
+    def to_dict(self):
+        """Get a JSON-serializable view of the plan"""
+        return {
+            'order': list(self.order),
+            'cycles': [list(cycle) for cycle in self.cycles],
+            'external': {path: list(reqs) for path, reqs in self.external.items()},
+            'unreadable': list(self.unreadable),
+            'edges': {path: list(deps) for path, deps in self.edges.items()},
+        }
+
+
+def entry_from_metadata(path, index, metadata):
+    """Build a PlanEntry from get_package_metadata() output (or None)"""
+    if not metadata:
+        return PlanEntry(path, index)
+
+    fmt = metadata.get('format')
+    if fmt == 'deb':
+        control = metadata.get('control', {})
+        name = control.get('Package', '')
+        provides = [name] + [alt for group in parse_relationships(control.get('Provides', '')) for alt in group]
+        requires = parse_relationships(control.get('Pre-Depends', '')) + parse_relationships(control.get('Depends', ''))
+        return PlanEntry(path, index, name, provides, requires)
+
+    if fmt == 'rpm':
+        name = metadata.get('name', '')
+        provides = [name] + list(metadata.get('provides', []))
+        requires = [[req] for req in metadata.get('requires', [])]
+        return PlanEntry(path, index, name, provides, requires)
+
+    if fmt == 'snap':
+        name = metadata.get('name', '')
+        base = metadata.get('base')
+        return PlanEntry(path, index, name, [name], [[base]] if base else [])
+
+    if fmt == 'flatpak':
+        name = metadata.get('name', '')
+        provides = [name]
+        if metadata.get('kind') == 'runtime':
+            provides.append(f"{name}/{metadata.get('arch', '')}/{metadata.get('branch', '')}")
+        runtime = metadata.get('runtime')
+        return PlanEntry(path, index, name, provides, [[runtime]] if runtime else [])
+
+    return PlanEntry(path, index)
+
+
+def _strongly_connected(nodes, successors):
+    """Tarjan's algorithm (iterative). Returns components with more than one node."""
+    index_of = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in nodes:
+        if root in index_of:
+            continue
+        work = [(root, iter(successors[root]))]
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index_of:
+                    index_of[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors[child])))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1:
+                    components.append(sorted(component))
+    return components
+
+
+def plan_entries(entries):
+    """
+    Order PlanEntry objects so dependencies come first
+
+    Kahn's algorithm with a min-heap on the original queue position, so
+    independent packages keep the order the user gave them. A cycle is
+    broken at its earliest queued member once nothing outside it is pending.
+
+    Returns:
+        InstallPlan
+    """
+    providers = {}
+    for entry in entries:
+        for capability in entry.provides:
+            providers.setdefault(capability, []).append(entry.index)
+
+    count = len(entries)
+    successors = [set() for _ in range(count)]
+    predecessors = [set() for _ in range(count)]
+    external = {}
+
+    for entry in entries:
+        for group in entry.requires:
+            queued = None
+            for alternative in group:
+                candidates = [i for i in providers.get(alternative, ()) if i != entry.index]
+                if candidates:
+                    queued = candidates
+                    break
+                if entry.index in providers.get(alternative, ()):
+                    # Satisfied by the package itself
+                    queued = []
+                    break
+            if queued is None:
+                external.setdefault(entry.path, []).append(' | '.join(group))
+                continue
+            for provider in queued:
+                successors[provider].add(entry.index)
+                predecessors[entry.index].add(provider)
+
+    components = _strongly_connected(range(count), successors)
+    cycles = [[entries[i].path for i in component] for component in components]
+    component_of = {i: number for number, component in enumerate(components) for i in component}
+
+    in_degree = [len(preds) for preds in predecessors]
+    ready = [i for i in range(count) if in_degree[i] == 0]
+    heapq.heapify(ready)
+    done = [False] * count
+    order = []
+    remaining = count
+
+    while remaining:
+        if not ready:
+            # Only cycles and what waits on them are left: release the earliest
+            # queued member of a cycle that waits on nothing outside itself
+            breaker = min(
+                i for i in component_of
+                if not done[i] and all(
+                    done[p] or component_of.get(p) == component_of[i] for p in predecessors[i]
+                )
+            )
+            in_degree[breaker] = 0
+            ready.append(breaker)
+        node = heapq.heappop(ready)
+        if done[node]:
+            continue
+        done[node] = True
+        remaining -= 1
+        order.append(entries[node].path)
+        for successor in successors[node]:
+            if done[successor]:
+                continue
+            in_degree[successor] -= 1
+            if in_degree[successor] == 0:
+                heapq.heappush(ready, successor)
+
+    edges = {
+        entries[i].path: [entries[p].path for p in sorted(predecessors[i])]
+        for i in range(count) if predecessors[i]
+    }
+    unreadable = [entry.path for entry in entries if not entry.name]
+    return InstallPlan(order, cycles, external, unreadable, edges)
+
+
+def plan_installation(package_paths, read_metadata):
+    """
+    Plan the install order of a batch
+
+    Args:
+        package_paths: Queued package paths, in user order
+        read_metadata: Callable path -> metadata dict or None
+                       (PackageHandler.get_package_metadata)
+
+    Returns:
+        InstallPlan
+    """
+    entries = [
+        entry_from_metadata(path, index, read_metadata(path))
+        for index, path in enumerate(package_paths)
+    ]
+    return plan_entries(entries)
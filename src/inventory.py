@@ -0,0 +1,398 @@
+"""
+Inventory Module
+Reads the installed package inventory straight from the package databases.
+The dpkg status file is parsed into compact records and indexed by byte
+offset, so re-reading it after a change only parses the stanzas that moved.
+The RPM database is read from rpmdb.sqlite, decoding the stored headers.
+"""
+
+import os
+import re
+import sqlite3
+import subprocess
+from . import config
+from . import rpm_reader
+from .exceptions import InvalidPackageError
+
+
+# Top-level fields kept from each stanza; continuation lines start with a space and never match
+STATUS_FIELD = re.compile(
+    rb'^(Package|Status|Architecture|Version|Installed-Size|Depends|Pre-Depends|Description):[ \t]*(.*?)[ \t]*$',
+    re.MULTILINE
+)
+STANZA_SEPARATOR = re.compile(rb'\n(?:[ \t]*\n)+')
+
+# Status states of packages that are not (or no longer) installed
+NOT_INSTALLED_STATES = ('not-installed', 'config-files')
+
+COMPARE_CHUNK = 64 * 1024
+
+
+class InstalledPackage:
+    """One installed package"""
+
+    __slots__ = ('name', 'type', 'arch', 'version', 'status', 'installed_size', 'depends', 'summary')
+
+    def __init__(self, name, type, arch='', version='', status='installed', installed_size=None,
+                 depends='', summary=''):
+        """
+        Args:
+            name: Package name
+            type: 'deb' or 'rpm'
+            arch: Architecture
+            version: Installed version
+            status: Package state ('installed', 'half-configured', ...)
+            installed_size: Installed size in KiB, or None if unknown
+            depends: Raw dependency field
+            summary: First line of the description
+        """
+        self.name = name
+        self.type = type
+        self.arch = arch
+        self.version = version
+        self.status = status
+        self.installed_size = installed_size
+        self.depends = depends
+        self.summary = summary
+
+    @property
+    def installed(self):
+        return self.status not in NOT_INSTALLED_STATES
+
+    def to_dict(self):
+        """Get a JSON-serializable view of the record"""
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self):
+        return f"InstalledPackage({self.name!r}, {self.type!r}, {self.version!r})"
+
+
+def parse_status_stanza(data):
+    """
+    Parse one stanza of the dpkg status file
+
+    Args:
+        data: Stanza bytes
+
+    Returns:
+        InstalledPackage, or None if the stanza has no Package field
+    """
+    fields = {key: value for key, value in STATUS_FIELD.findall(data)}
+    name = fields.get(b'Package')
+    if not name:
+        return None
+
+    # "install ok installed" -> the last word is the package state
+    status = fields.get(b'Status', b'').rsplit(b' ', 1)[-1].decode('ascii', 'replace') or 'not-installed'
+    size = fields.get(b'Installed-Size', b'')
+    depends = fields.get(b'Depends', b'')
+    if fields.get(b'Pre-Depends'):
+        depends = fields[b'Pre-Depends'] + (b', ' + depends if depends else b'')
+
+    return InstalledPackage(
+        name.decode('utf-8', 'replace'),
+        'deb',
+        arch=fields.get(b'Architecture', b'').decode('utf-8', 'replace'),
+        version=fields.get(b'Version', b'').decode('utf-8', 'replace'),
+        status=status,
+        installed_size=int(size) if size.isdigit() else None,
+        depends=depends.decode('utf-8', 'replace'),
+        summary=fields.get(b'Description', b'').decode('utf-8', 'replace')
+    )
+
+
+def _common_prefix(old, new):
+    """Length of the common prefix of two byte strings"""
+    limit = min(len(old), len(new))
+    pos = 0
+    while pos < limit:
+        end = min(pos + COMPARE_CHUNK, limit)
+        if old[pos:end] == new[pos:end]:
+            pos = end
+            continue
+        # Narrow down the first differing chunk
+        low, high = pos, end
+        while high - low > 1:
+            middle = (low + high) // 2
+            if old[low:middle] == new[low:middle]:
+                low = middle
+            else:
+                high = middle
+        return low
+    return limit
+
+
+def _common_suffix(old, new, limit):
+    """Length of the common suffix of two byte strings, at most limit"""
+    length = 0
+    while length < limit:
+        step = min(COMPARE_CHUNK, limit - length)
+        old_part = old[len(old) - length - step:len(old) - length]
+        new_part = new[len(new) - length - step:len(new) - length]
+        if old_part == new_part:
+            length += step
+            continue
+        # Narrow down from the end of the differing chunk
+        low, high = 0, step
+        while high - low > 1:
+            middle = (low + high) // 2
+            if old_part[step - middle:] == new_part[step - middle:]:
+                low = middle
+            else:
+                high = middle
+        return length + low
+    return length
+
+
+class DpkgStatusDatabase:
+    """
+    Incrementally parsed view of /var/lib/dpkg/status
+
+    The file is kept in memory with an index of stanza spans. When dpkg
+    rewrites it, stanzas that lie entirely in the unchanged head or tail of
+    the file are carried over from the index by offset, and the ones in
+    between are matched by content, so only edited stanzas are parsed again.
+    """
+
+    def __init__(self, path=None):
+        self.path = str(path or config.DPKG_STATUS_FILE)
+        self._data = b''
+        self._spans = []    # (start, end) of each stanza, end includes the separator
+        self._records = []  # InstalledPackage or None, parallel to _spans
+        self._identity = None
+        self.last_parsed = 0   # Stanzas parsed by the last load()
+        self.last_reused = 0   # Stanzas carried over by the last load()
+
+    def exists(self):
+        return os.path.isfile(self.path)
+
+    def load(self):
+        """
+        Get the installed packages, re-reading the file only if it changed
+
+        Returns:
+            list of InstalledPackage (packages that are not installed are skipped)
+
+        Raises:
+            OSError: If the status file can't be read
+        """
+        st = os.stat(self.path)
+        identity = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        if identity != self._identity:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            self._update(data)
+            self._identity = identity
+        else:
+            self.last_parsed = self.last_reused = 0
+        return [record for record in self._records if record is not None and record.installed]
+
+    def _update(self, data):
+        old_data, old_spans, old_records = self._data, self._spans, self._records
+        prefix = _common_prefix(old_data, data)
+        suffix = _common_suffix(old_data, data, min(len(old_data), len(data)) - prefix)
+        delta = len(data) - len(old_data)
+
+        spans, records = [], []
+        # Head: stanzas whose bytes are all unchanged keep their offset
+        index = 0
+        while index < len(old_spans) and old_spans[index][1] <= prefix:
+            spans.append(old_spans[index])
+            records.append(old_records[index])
+            index += 1
+        head_end = spans[-1][1] if spans else 0
+        reused = index
+
+        # Tail: stanzas inside the unchanged tail move by delta
+        tail_start = len(old_data) - suffix
+        tail = len(old_spans)
+        while tail > index and old_spans[tail - 1][0] >= tail_start and old_spans[tail - 1][0] + delta >= head_end:
+            tail -= 1
+        middle_end = old_spans[tail][0] + delta if tail < len(old_spans) else len(data)
+
+        # Middle: stanzas moved around by the change are found by content
+        moved = {
+            old_data[start:end]: record
+            for (start, end), record in zip(old_spans[index:tail], old_records[index:tail])
+        }
+        parsed = 0
+        for start, end in self._split(data, head_end, middle_end):
+            stanza = data[start:end]
+            spans.append((start, end))
+            if stanza in moved:
+                records.append(moved[stanza])
+                reused += 1
+            else:
+                records.append(parse_status_stanza(stanza))
+                parsed += 1
+
+        for position in range(tail, len(old_spans)):
+            start, end = old_spans[position]
+            spans.append((start + delta, end + delta))
+            records.append(old_records[position])
+        reused += len(old_spans) - tail
+
+        self._data, self._spans, self._records = data, spans, records
+        self.last_parsed, self.last_reused = parsed, reused
+
+    @staticmethod
+    def _split(data, start, end):
+        """Yield (start, end) spans of the stanzas in data[start:end]"""
+        position = start
+        for separator in STANZA_SEPARATOR.finditer(data, start, end):
+            if separator.start() > position:
+                yield position, separator.end()
+            position = separator.end()
+        if position < end and data[position:end].strip():
+            yield position, end
+
+
+# Header tags needed for an inventory record
+RPMDB_TAGS = frozenset((
+    rpm_reader.RPMTAG_NAME, rpm_reader.RPMTAG_VERSION, rpm_reader.RPMTAG_RELEASE,
+    rpm_reader.RPMTAG_EPOCH, rpm_reader.RPMTAG_ARCH, rpm_reader.RPMTAG_SUMMARY,
+    rpm_reader.RPMTAG_SIZE, rpm_reader.RPMTAG_LONGSIZE,
+    rpm_reader.RPMTAG_REQUIRENAME, rpm_reader.RPMTAG_REQUIREFLAGS,
+))
+
+
+def find_rpmdb_sqlite():
+    """Get the path of the host's rpmdb.sqlite, or None (no RPM, or a legacy BDB/NDB database)"""
+    for path in config.RPMDB_SQLITE_PATHS:
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def rpm_record_from_header(blob, db_path=''):
+    """
+    Build an inventory record from a header blob of rpmdb.sqlite
+
+    Returns:
+        InstalledPackage, or None for gpg-pubkey entries (imported keys, not packages)
+    """
+    header, _ = rpm_reader.parse_header(blob, package_path=db_path, with_magic=False, tags=RPMDB_TAGS)
+    name = header.get(rpm_reader.RPMTAG_NAME, '')
+    if not name or name == 'gpg-pubkey':
+        return None
+    epoch = header.get(rpm_reader.RPMTAG_EPOCH)
+    version = f"{header.get(rpm_reader.RPMTAG_VERSION, '')}-{header.get(rpm_reader.RPMTAG_RELEASE, '')}"
+    size = header.get(rpm_reader.RPMTAG_LONGSIZE, header.get(rpm_reader.RPMTAG_SIZE))
+    return InstalledPackage(
+        name,
+        'rpm',
+        arch=header.get(rpm_reader.RPMTAG_ARCH, ''),
+        version=f"{epoch}:{version}" if epoch else version,
+        installed_size=size // 1024 if isinstance(size, int) else None,
+        depends=', '.join(rpm_reader.header_requires(header)),
+        summary=header.get(rpm_reader.RPMTAG_SUMMARY, '')
+    )
+
+
+class RpmSqliteDatabase:
+    """
+    Incrementally read view of rpmdb.sqlite
+
+    rpm stores every installed header under a new header number (hnum), so
+    a reload only lists the numbers and decodes the headers it hasn't seen.
+    The database is opened read-only and never locked for writing, so it can
+    be read while rpm or dnf run.
+    """
+
+    # Header numbers per SELECT ... IN (...) query
+    FETCH_BATCH = 500
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._records = {}  # hnum -> InstalledPackage or None
+        self.last_parsed = 0
+
+    def load(self):
+        """
+        Get the installed packages
+
+        Returns:
+            list of InstalledPackage
+
+        Raises:
+            sqlite3.Error: If the database can't be read
+        """
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=5.0)
+        try:
+            conn.execute('BEGIN')  # One consistent snapshot for both queries
+            current = [row[0] for row in conn.execute('SELECT hnum FROM Packages')]
+            known = self._records
+            records = {hnum: known[hnum] for hnum in current if hnum in known}
+            missing = [hnum for hnum in current if hnum not in known]
+            for i in range(0, len(missing), self.FETCH_BATCH):
+                batch = missing[i:i + self.FETCH_BATCH]
+                placeholders = ','.join('?' * len(batch))
+                for hnum, blob in conn.execute(
+                    f'SELECT hnum, blob FROM Packages WHERE hnum IN ({placeholders})', batch
+                ):
+                    try:
+                        records[hnum] = rpm_record_from_header(blob, self.path)
+                    except InvalidPackageError:
+                        # A damaged header shouldn't hide the rest of the inventory
+                        records[hnum] = None
+        finally:
+            conn.close()
+
+        self._records = records
+        self.last_parsed = len(missing)
+        return [records[hnum] for hnum in current if records.get(hnum) is not None]
+
+
+def read_rpmdb_sqlite(db_path):
+    """Read installed packages from an rpmdb.sqlite database (see RpmSqliteDatabase)"""
+    return RpmSqliteDatabase(db_path).load()
+
+
+def read_rpm_inventory(db_path=None):
+    """
+    List installed RPM packages
+
+    Reads rpmdb.sqlite directly; only legacy (BDB/NDB) databases or an
+    unreadable database fall back to rpm -qa.
+
+    Args:
+        db_path: rpmdb.sqlite to read (defaults to the host's)
+
+    Returns:
+        list of InstalledPackage, empty if there is no RPM database
+    """
+    db_path = db_path or find_rpmdb_sqlite()
+    if db_path is not None:
+        try:
+            return read_rpmdb_sqlite(db_path)
+        except sqlite3.Error:
+            pass
+    return read_rpm_query()
+
+
+def read_rpm_query():
+    """List installed RPM packages with rpm -qa"""
+    try:
+        result = subprocess.run(
+            ['rpm', '-qa', '--qf', '%{NAME}\t%{ARCH}\t%|EPOCH?{%{EPOCH}:}:{}|%{VERSION}-%{RELEASE}\t%{SIZE}\t%{SUMMARY}\n'],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return []
+    if result.returncode != 0:
+        return []
+
+    packages = []
+    for line in result.stdout.splitlines():
+        parts = line.split('\t')
+        if len(parts) < 5 or not parts[0] or parts[0] == 'gpg-pubkey':
+            continue
+        name, arch, version, size, summary = parts[:5]
+        packages.append(InstalledPackage(
+            name, 'rpm', arch=arch, version=version,
+            installed_size=int(size) // 1024 if size.isdigit() else None,
+            summary=summary
+        ))
+    return packages
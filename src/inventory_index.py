@@ -0,0 +1,82 @@
+"""
+Inventory Index Module
+Name index over the installed package inventory: a bigram and trigram
+table for substring queries that follows the inventory incrementally.
+"""
+
+
+def trigrams(text):
+    """Get the set of three-character substrings of a string"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def ngrams(text):
+    """Get the set of two- and three-character substrings of a string"""
+    return {text[i:i + 2] for i in range(len(text) - 1)} | trigrams(text)
+
+
+class InventoryIndex:
+    """
+    Index of lowercase package names to table rows
+
+    Rows are opaque integers; several rows may share a name (one per
+    architecture or package type).
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._grams = {}      # bigram or trigram -> set of rows
+
+    def add(self, row, name):
+        """Index a row under a lowercase name"""
+        grams = self._grams
+        for gram in ngrams(name):
+            rows = grams.get(gram)
+            if rows is None:
+                grams[gram] = {row}
+            else:
+                rows.add(row)
+
+    def build(self, entries):
+        """
+        Index many rows at once
+
+        Args:
+            entries: Iterable of (row, lowercase name)
+        """
+        for row, name in entries:
+            self.add(row, name)
+
+    def remove(self, row, name):
+        """Drop a row indexed under a lowercase name"""
+        for gram in ngrams(name):
+            rows = self._grams.get(gram)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self._grams[gram]
+
+    def candidates(self, query):
+        """
+        Get the rows whose name may contain a substring
+
+        Args:
+            query: Lowercase substring of at least two characters
+
+        Returns:
+            set of rows whose name has every n-gram of the query (exact for
+            two characters, otherwise a superset the caller checks)
+        """
+        if len(query) == 2:
+            return set(self._grams.get(query, ()))
+        postings = []
+        for gram in trigrams(query):
+            rows = self._grams.get(gram)
+            if rows is None:
+                return set()
+            postings.append(rows)
+        # Intersect starting from the rarest trigram
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
@@ -0,0 +1,377 @@
+"""
+Inventory Service Module
+Keeps the installed package inventory current on a background thread. The
+package databases are watched with inotify (or polled where inotify is not
+available); after a change only the changed records are re-read and the
+difference to the previous inventory is reported.
+"""
+
+import os
+import time
+import errno
+import select
+import sqlite3
+import shutil
+import struct
+import threading
+import ctypes
+import ctypes.util
+from . import config
+from .inventory import DpkgStatusDatabase, RpmSqliteDatabase, find_rpmdb_sqlite, read_rpm_query
+
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# struct inotify_event header: wd, mask, cookie, len (the name follows)
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def package_key(package):
+    """Identity of an installed package across inventory reloads"""
+    return (package.type, package.name, package.arch)
+
+
+def _same_record(a, b):
+    return a is b or all(getattr(a, slot) == getattr(b, slot) for slot in a.__slots__)
+
+
+class InventoryDiff:
+    """Difference between two inventories"""
+
+    __slots__ = ('added', 'removed', 'updated')
+
+    def __init__(self, added=(), removed=(), updated=()):
+        """
+        Args:
+            added: Newly installed packages
+            removed: Packages that are no longer installed
+            updated: New records of packages whose version or state changed
+        """
+        self.added = list(added)
+        self.removed = list(removed)
+        self.updated = list(updated)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.updated)
+
+    def __repr__(self):
+        return f"InventoryDiff(+{len(self.added)} -{len(self.removed)} ~{len(self.updated)})"
+
+
+def diff_inventory(old, new):
+    """
+    Compare two inventories
+
+    Records reused by the incremental readers are the same objects, so only
+    changed records are compared field by field.
+
+    Args:
+        old: package_key -> InstalledPackage
+        new: package_key -> InstalledPackage
+
+    Returns:
+        InventoryDiff
+    """
+    added = [package for key, package in new.items() if key not in old]
+    removed = [package for key, package in old.items() if key not in new]
+    updated = [
+        package for key, package in new.items()
+        if key in old and not _same_record(old[key], package)
+    ]
+    return InventoryDiff(added, removed, updated)
+
+
+# ==================== Watchers ====================
+
+class PollingWatcher:
+    """Detects changes to files by comparing their stat identity"""
+
+    def __init__(self, paths, interval=None):
+        """
+        Args:
+            paths: Files to watch (they don't need to exist yet)
+            interval: Seconds between checks (defaults to config.INVENTORY_POLL_INTERVAL)
+        """
+        self.paths = list(paths)
+        self.interval = interval or config.INVENTORY_POLL_INTERVAL
+        self._wake = threading.Event()
+        self._signature = self._stat()
+
+    def _stat(self):
+        signature = []
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+                signature.append((st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return signature
+
+    def wait(self, timeout=None):
+        """
+        Wait for a change
+
+        Args:
+            timeout: Seconds to wait, None to wait until a change or wake()
+
+        Returns:
+            bool: True if a watched file changed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            if self._wake.wait(delay):
+                self._wake.clear()
+                return False
+            signature = self._stat()
+            if signature != self._signature:
+                self._signature = signature
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def wake(self):
+        """Make a pending wait() return"""
+        self._wake.set()
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Detects changes to files with inotify
+
+    The parent directories are watched rather than the files, because dpkg
+    and rpm replace their databases by renaming new files over them.
+    """
+
+    def __init__(self, paths):
+        """
+        Args:
+            paths: Files to watch; their directories must exist
+
+        Raises:
+            OSError: If inotify is unavailable or no directory could be watched
+        """
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            inotify_init1 = libc.inotify_init1
+            inotify_add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+
+        inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        directories = {}
+        for path in paths:
+            directory, name = os.path.split(os.path.abspath(path))
+            directories.setdefault(directory, set()).add(os.fsencode(name))
+
+        self._names = {}  # watch descriptor -> file names of interest
+        for directory, names in directories.items():
+            wd = inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                self._names[wd] = names
+        if not self._names:
+            os.close(self.fd)
+            raise OSError(errno.ENOENT, "No watchable directory")
+
+        self._wake_read, self._wake_write = os.pipe()
+
+    def wait(self, timeout=None):
+        """
+        Wait for a change
+
+        Args:
+            timeout: Seconds to wait, None to wait until a change or wake()
+
+        Returns:
+            bool: True if a watched file changed
+        """
+        readable, _, _ = select.select([self.fd, self._wake_read], [], [], timeout)
+        if self._wake_read in readable:
+            os.read(self._wake_read, 4096)
+        return self.fd in readable and self._read_events()
+
+    def _read_events(self):
+        changed = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset + INOTIFY_EVENT.size <= len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & IN_Q_OVERFLOW or name in self._names.get(wd, ()):
+                    changed = True
+
+    def wake(self):
+        """Make a pending wait() return"""
+        os.write(self._wake_write, b'\0')
+
+    def close(self):
+        for fd in (self.fd, self._wake_read, self._wake_write):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def create_watcher(paths, poll_interval=None):
+    """Get an InotifyWatcher for the paths, or a PollingWatcher without inotify"""
+    try:
+        return InotifyWatcher(paths)
+    except OSError:
+        return PollingWatcher(paths, poll_interval)
+
+
+# ==================== Service ====================
+
+class InventoryService:
+    """
+    Background inventory of installed packages
+
+    The inventory is loaded on a worker thread when the service starts and
+    re-read whenever a package database changes. Every change is reported as
+    an InventoryDiff; the first report adds every installed package.
+    Callbacks run on the worker thread.
+    """
+
+    def __init__(self, on_change, on_error=None, dpkg_status_file=None, rpmdb_path=None,
+                 poll_interval=None, settle_time=None):
+        """
+        Args:
+            on_change: Called as on_change(InventoryDiff) after each change
+            on_error: Called as on_error(exception) if a reload fails
+            dpkg_status_file: dpkg status file (defaults to config.DPKG_STATUS_FILE)
+            rpmdb_path: rpmdb.sqlite (defaults to the host's, if any)
+            poll_interval: Seconds between checks without inotify
+            settle_time: Seconds the databases must be quiet before a reload
+        """
+        self.on_change = on_change
+        self.on_error = on_error
+        self.dpkg_status = DpkgStatusDatabase(dpkg_status_file)
+        rpmdb_path = rpmdb_path or find_rpmdb_sqlite()
+        self.rpmdb = RpmSqliteDatabase(rpmdb_path) if rpmdb_path else None
+        self.legacy_rpm = self.rpmdb is None and shutil.which('rpm') is not None
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time or config.INVENTORY_SETTLE_TIME
+        self.packages = {}  # package_key -> InstalledPackage
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._refresh_requested = threading.Event()
+        self._watcher = None
+        self._thread = None
+
+    def watched_paths(self):
+        """Get the files whose changes trigger a reload"""
+        paths = [self.dpkg_status.path]
+        if self.rpmdb is not None:
+            # rpm writes through the write-ahead log before checkpointing
+            paths += [self.rpmdb.path, self.rpmdb.path + '-wal']
+        elif self.legacy_rpm:
+            paths += config.RPMDB_LEGACY_FILES
+        return paths
+
+    def snapshot(self):
+        """Get a copy of the current inventory (package_key -> InstalledPackage)"""
+        with self._lock:
+            return dict(self.packages)
+
+    def refresh(self):
+        """
+        Re-read the package databases
+
+        Returns:
+            InventoryDiff against the previous inventory
+        """
+        loaded = []
+        if self.dpkg_status.exists():
+            loaded.extend(self.dpkg_status.load())
+        if self.rpmdb is not None:
+            try:
+                loaded.extend(self.rpmdb.load())
+            except sqlite3.Error:
+                loaded.extend(read_rpm_query())
+        elif self.legacy_rpm:
+            loaded.extend(read_rpm_query())
+
+        packages = {package_key(package): package for package in loaded}
+        with self._lock:
+            diff = diff_inventory(self.packages, packages)
+            self.packages = packages
+        return diff
+
+    def _reload(self, report_empty=False):
+        try:
+            diff = self.refresh()
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+            return
+        if diff or report_empty:
+            self.on_change(diff)
+
+    def start(self):
+        """Load the inventory and start watching on a worker thread"""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._watcher = create_watcher(self.watched_paths(), self.poll_interval)
+        self._thread = threading.Thread(target=self._run, name='inventory', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        # The first report is sent even when nothing is installed, so the view can say so
+        self._reload(report_empty=True)
+        settle_limit = config.INVENTORY_SETTLE_LIMIT
+        while not self._stopping.is_set():
+            changed = self._watcher.wait()
+            if self._stopping.is_set():
+                break
+            if changed:
+                # Let the package manager finish writing
+                deadline = time.monotonic() + settle_limit
+                while (not self._stopping.is_set() and time.monotonic() < deadline
+                       and self._watcher.wait(self.settle_time)):
+                    pass
+            requested = self._refresh_requested.is_set()
+            if changed or requested:
+                self._refresh_requested.clear()
+                # A requested reload is answered even if nothing changed
+                self._reload(report_empty=requested)
+        self._watcher.close()
+
+    def request_refresh(self):
+        """Re-read the databases now instead of waiting for a change notification"""
+        self._refresh_requested.set()
+        if self._watcher is not None:
+            self._watcher.wake()
+
+    def stop(self, timeout=5.0):
+        """Stop watching and wait for the worker thread"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._watcher.wake()
+        self._thread.join(timeout)
+        self._thread = None
+        self._watcher = None
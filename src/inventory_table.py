@@ -0,0 +1,252 @@
+"""
+Inventory Table Module
+Column-oriented store of the installed package inventory behind the
+uninstall list. Each field is one list or array indexed by row, repeated
+strings (versions, architectures) are interned, and removed packages leave
+a tombstone so row numbers stay stable between compactions. Live names
+are indexed for substring searches.
+"""
+
+import sys
+from array import array
+from .inventory import InstalledPackage
+from .inventory_index import InventoryIndex
+
+
+# Package types, stored as an index into this tuple
+TYPES = ('deb', 'rpm')
+
+# Columns
+COLUMN_NAME = 0
+COLUMN_VERSION = 1
+COLUMN_SIZE = 2
+COLUMN_TYPE = 3
+COLUMNS = ('Name', 'Version', 'Size', 'Type')
+
+# Compact once this many rows are tombstones (and they outnumber live rows)
+COMPACT_THRESHOLD = 1024
+
+# Single characters aren't indexed and are matched with a scan of the names
+INDEXED_QUERY_LENGTH = 2
+
+
+def _key(name, package_type, arch):
+    return (package_type, name, arch)
+
+
+class InventoryTable:
+    """
+    Installed packages in columns
+
+    Rows are appended as packages are added; removing a package marks its
+    row dead until compact() renumbers the rows.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Remove every row"""
+        self.names = []
+        self.folded = []    # Lowercase names for searching and sorting
+        self.versions = []
+        self.arches = []
+        self.summaries = []
+        self.depends = []
+        self.types = array('B')
+        self.sizes = array('q')  # KiB, -1 if unknown
+        self.alive = bytearray()
+        self.rows = {}      # package_key -> row
+        self.index = InventoryIndex()
+        self._orders = {}   # column -> (rows, lowercase names, row -> position) sorted ascending
+        self._listings = {} # (column, package type) -> live rows in ascending order
+
+    def __len__(self):
+        """Number of installed packages (live rows)"""
+        return len(self.rows)
+
+    @property
+    def row_count(self):
+        """Number of rows, dead ones included"""
+        return len(self.names)
+
+    @property
+    def dead_count(self):
+        return len(self.names) - len(self.rows)
+
+    def row_of(self, key):
+        """Get the row of a package_key, or None"""
+        return self.rows.get(key)
+
+    def key(self, row):
+        """Get the package_key of a row"""
+        return _key(self.names[row], TYPES[self.types[row]], self.arches[row])
+
+    def package(self, row):
+        """Get the InstalledPackage of a row"""
+        size = self.sizes[row]
+        return InstalledPackage(
+            self.names[row], TYPES[self.types[row]], self.arches[row], self.versions[row],
+            installed_size=None if size < 0 else size,
+            depends=self.depends[row], summary=self.summaries[row]
+        )
+
+    # ==================== Changes ====================
+
+    def add(self, package):
+        """
+        Add a package, replacing the record of an already listed one
+
+        Returns:
+            int: Row of the package
+        """
+        row = self._append(package)
+        if row is not None:
+            self.index.add(row, self.folded[row])
+            return row
+        return self.rows[_key(package.name, package.type, package.arch)]
+
+    def extend(self, packages):
+        """Add many packages, indexing them in one pass"""
+        added = [row for row in map(self._append, packages) if row is not None]
+        self.index.build((row, self.folded[row]) for row in added)
+
+    def _append(self, package):
+        # Returns the new row, or None if an existing row was updated instead
+        key = _key(package.name, package.type, package.arch)
+        row = self.rows.get(key)
+        if row is not None:
+            self._set(row, package)
+            return None
+        row = len(self.names)
+        self.names.append(sys.intern(package.name))
+        self.folded.append(package.name.lower())
+        self.versions.append(sys.intern(package.version))
+        self.arches.append(sys.intern(package.arch))
+        self.summaries.append(package.summary)
+        self.depends.append(package.depends)
+        self.types.append(TYPES.index(package.type))
+        self.sizes.append(-1 if package.installed_size is None else package.installed_size)
+        self.alive.append(1)
+        self.rows[key] = row
+        self._orders.clear()
+        self._listings.clear()
+        return row
+
+    def update(self, package):
+        """
+        Replace the record of a package (adding it if it isn't listed)
+
+        Returns:
+            int: Row of the package
+        """
+        return self.add(package)
+
+    def _set(self, row, package):
+        self.versions[row] = sys.intern(package.version)
+        self.summaries[row] = package.summary
+        self.depends[row] = package.depends
+        self.sizes[row] = -1 if package.installed_size is None else package.installed_size
+        self._orders.pop(COLUMN_VERSION, None)
+        self._orders.pop(COLUMN_SIZE, None)
+        self._listings.clear()
+
+    def remove(self, key):
+        """
+        Remove a package
+
+        Returns:
+            int: Row that is now dead, or None if the package wasn't listed
+        """
+        row = self.rows.pop(key, None)
+        if row is not None:
+            self.alive[row] = 0
+            self._listings.clear()
+            self.index.remove(row, self.folded[row])
+            # Only the name stays, for the row's place in the sort orders
+            self.summaries[row] = self.depends[row] = ''
+        return row
+
+    def needs_compaction(self):
+        dead = self.dead_count
+        return dead >= COMPACT_THRESHOLD and dead > len(self.rows)
+
+    def compact(self):
+        """Drop dead rows, renumbering the live ones"""
+        packages = [self.package(row) for row in range(self.row_count) if self.alive[row]]
+        self.clear()
+        self.extend(packages)
+
+    # ==================== Queries ====================
+
+    def order(self, column):
+        """Get every row sorted ascending by a column (cached until the rows change)"""
+        return self._order(column)[0]
+
+    def _order(self, column):
+        # (rows, their lowercase names, row -> position) in ascending order of the column
+        cached = self._orders.get(column)
+        if cached is None:
+            folded = self.folded
+            if column == COLUMN_VERSION:
+                sort_key = lambda row: (self.versions[row], folded[row])
+            elif column == COLUMN_SIZE:
+                sort_key = lambda row: (self.sizes[row], folded[row])
+            elif column == COLUMN_TYPE:
+                sort_key = lambda row: (self.types[row], folded[row])
+            else:
+                sort_key = folded.__getitem__
+            rows = sorted(range(self.row_count), key=sort_key)
+            position = array('l', bytes(array('l').itemsize * len(rows)))
+            for i, row in enumerate(rows):
+                position[row] = i
+            cached = (rows, [folded[row] for row in rows], position)
+            self._orders[column] = cached
+        return cached
+
+    def select(self, query='', package_type=None, column=COLUMN_NAME, descending=False):
+        """
+        Get the live rows matching a search, in display order
+
+        Args:
+            query: Case-insensitive substring of the name
+            package_type: 'deb' or 'rpm' to keep only that type
+            column: Column to sort by
+            descending: Sort in descending order
+
+        Returns:
+            list of rows
+        """
+        rows, names, position = self._order(column)
+        query = query.lower()
+        if len(query) >= INDEXED_QUERY_LENGTH:
+            # Only rows sharing every n-gram with the query are checked and sorted
+            folded = self.folded
+            rows = [row for row in self.index.candidates(query) if query in folded[row]]
+            if package_type is not None:
+                types, wanted = self.types, TYPES.index(package_type)
+                rows = [row for row in rows if types[row] == wanted]
+            rows.sort(key=position.__getitem__, reverse=descending)
+            return rows
+        if query:
+            # A single character: scan the names in sort order
+            rows = self._live([row for row, name in zip(rows, names) if query in name], package_type)
+        else:
+            rows = self._listing(column, package_type)
+        return rows[::-1] if descending else list(rows)
+
+    def _listing(self, column, package_type):
+        # Unfiltered live rows are cached until the table changes
+        key = (column, package_type)
+        rows = self._listings.get(key)
+        if rows is None:
+            rows = self._live(self._order(column)[0], package_type)
+            self._listings[key] = rows
+        return rows
+
+    def _live(self, rows, package_type):
+        alive = self.alive
+        if package_type is None:
+            return [row for row in rows if alive[row]]
+        types, wanted = self.types, TYPES.index(package_type)
+        return [row for row in rows if alive[row] and types[row] == wanted]
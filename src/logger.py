@@ -4,42 +4,102 @@ Handles logging of installation activities and history tracking
 """
 
 import os
-import json
 from datetime import datetime
 from . import config
+from .history_journal import HistoryJournal, HistoryCounters, entry_format
+from .history_db import HistoryDatabase
+from .history_export import export_entries, load_entries
 
 
 class InstallLogger:
     """Log installation activities and maintain history"""
     
-    def __init__(self, log_dir=None):
-        """Initialize logger with log directory"""
+    def __init__(self, log_dir=None, backend=None):
+        """
+        Initialize logger with log directory
+        
+        Args:
+            log_dir: Directory of the history files (defaults to the user config directory)
+            backend: 'journal' or 'sqlite' (defaults to config.HISTORY_BACKEND)
+        """
         if log_dir is None:
             # Use user's home directory for logs
             log_dir = str(config.USER_CONFIG_DIR)
         
         self.log_dir = log_dir
-        self.log_file = str(config.HISTORY_FILE)
+        paths = [config.HISTORY_JOURNAL_FILE, config.HISTORY_FILE, config.HISTORY_DATABASE_FILE]
+        if log_dir != str(config.USER_CONFIG_DIR):
+            paths = [os.path.join(log_dir, path.name) for path in paths]
+        journal_file, legacy_file, database_file = map(str, paths)
         
         # Create log directory if it doesn't exist
         os.makedirs(log_dir, exist_ok=True)
         
-        # Initialize log file if it doesn't exist
-        if not os.path.exists(self.log_file):
-            self._init_log_file()
+        self.backend = backend or config.HISTORY_BACKEND
+        if self.backend == 'sqlite':
+            # Indexed database; imports the journal when it is first created
+            self.log_file = database_file
+            self.store = HistoryDatabase(database_file, journal_file, legacy_file)
+        else:
+            # Append-only journal; a legacy JSON history is migrated on first use
+            self.log_file = journal_file
+            self.store = HistoryJournal(journal_file, legacy_file)
+        
+        # Parsed active segment and its counters, valid while the journal's version
+        # is unchanged; archived segments never change and are parsed once
+        self._active = None
+        self._counters = None
+        self._version = None
+        self._archives = {}
+    
+    @property
+    def indexed(self):
+        """True if filters, searches and statistics run as database queries"""
+        return isinstance(self.store, HistoryDatabase)
+    
+    def _load(self):
+        """Get the parsed active segment, reading it again only if the journal has changed"""
+        version = self.store.version()
+        if self._active is None or version != self._version:
+            active = self.store.read_active()
+            self._active, self._counters, self._version = active, HistoryCounters(active), version
+            # Forget archives expired by a rotation
+            current = {record['file'] for record in self.store.archived()}
+            self._archives = {name: entries for name, entries in self._archives.items() if name in current}
+        return self._active
+    
+    def _invalidate(self):
+        self._active = self._counters = self._version = None
+        self._archives = {}
     
-    def _init_log_file(self):
-        """Initialize empty log file"""
-        with open(self.log_file, 'w') as f:
-            json.dump([], f)
+    def _segments(self, date_from=None, date_to=None, newest_first=False):
+        """Iterate over the entry lists of the segments that may hold entries in a date range"""
+        active = self._load()
+        records = self.store.archived(date_from, date_to)
+        if newest_first:
+            yield active
+            records.reverse()
+        for record in records:
+            # Archived segments are only parsed when reached
+            entries = self._archives.get(record['file'])
+            if entries is None:
+                entries = self._archives[record['file']] = self.store.read_segment(record)
+            yield entries
+        if not newest_first:
+            yield active
+    
+    def _totals(self):
+        """Get HistoryCounters for the whole journal, from the manifest and the active segment"""
+        self._load()
+        counters = HistoryCounters()
+        for record in self.store.archived():
+            counters.add_rows(record['daily'])
+        counters.add_rows(self._counters.rows())
+        return counters
     
     def log_installation(self, package_path, success, message):
         """Log an installation attempt"""
         try:
-            # Read existing history
-            history = self.get_history()
-            
-            # Create new log entry
             entry = {
                 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                 'package': package_path,
@@ -47,26 +107,38 @@ class InstallLogger:
                 'success': success,
                 'message': message
             }
-            
-            # Append to history
-            history.append(entry)
-            
-            # Write back to file
-            with open(self.log_file, 'w') as f:
-                json.dump(history, f, indent=2)
-            
+            if self.indexed:
+                self.store.append(entry)
+                return True
+            before = self.store.version()
+            self.store.append(entry)
+            after = self.store.version()
+            if self._active is not None and before == self._version and after[1] == before[1]:
+                # Not rotated: keep the cache instead of reading the journal again
+                self._active.append(entry)
+                self._counters.add(entry)
+                self._version = after
+            else:
+                self._active = None
             return True
         except Exception as e:
             print(f"Error logging installation: {e}")
             return False
     
+    def batch(self):
+        """Context manager writing several log_installation() calls in one fsync or transaction"""
+        return self.store.batch()
+    
+    def close(self):
+        """Flush the history to disk"""
+        self.store.close()
+    
     def get_history(self):
         """Get installation history"""
         try:
-            if os.path.exists(self.log_file):
-                with open(self.log_file, 'r') as f:
-                    return json.load(f)
-            return []
+            if self.indexed:
+                return self.store.read()
+            return [entry for entries in self._segments() for entry in entries]
         except Exception as e:
             print(f"Error reading history: {e}")
             return []
@@ -74,7 +146,8 @@ class InstallLogger:
     def clear_history(self):
         """Clear installation history"""
         try:
-            self._init_log_file()
+            self.store.clear()
+            self._invalidate()
             return True
         except Exception as e:
             print(f"Error clearing history: {e}")
@@ -82,20 +155,20 @@ class InstallLogger:
     
     def get_successful_installations(self):
         """Get only successful installations"""
-        history = self.get_history()
-        return [entry for entry in history if entry.get('success', False)]
+        return self.filter_history(status='success')
     
     def get_failed_installations(self):
         """Get only failed installations"""
-        history = self.get_history()
-        return [entry for entry in history if not entry.get('success', False)]
+        return self.filter_history(status='failed')
     
     def get_stats(self):
         """Get installation statistics"""
-        history = self.get_history()
-        total = len(history)
-        successful = len(self.get_successful_installations())
-        failed = len(self.get_failed_installations())
+        if self.indexed:
+            total, successful = self.store.stats()
+        else:
+            counters = self._totals()
+            total, successful = counters.total, counters.successful
+        failed = total - successful
         
         return {
             'total': total,
@@ -104,100 +177,117 @@ class InstallLogger:
             'success_rate': (successful / total * 100) if total > 0 else 0
         }
     
-    def export_history(self, export_path, format='json'):
-        """Export history to a file in JSON or CSV format"""
+    def get_daily_stats(self):
+        """
+        Get installation statistics by day and package format
+        
+        Returns:
+            list of (day, package format, successful, failed) tuples in order;
+            day is '' for entries without a valid timestamp
+        """
+        if self.indexed:
+            return self.store.daily()
+        return self._totals().rows()
+    
+    def export_history(self, export_path, format='json', progress_callback=None, **criteria):
+        """
+        Export history to a file, streamed from the store
+        
+        Args:
+            export_path: Destination file; a .gz or .xz suffix compresses it
+            format: 'json', 'ndjson' or 'csv'
+            progress_callback: Called with (entries written, bytes written)
+            **criteria: filter_history() criteria selecting the entries (status, date_from, ...)
+        
+        Returns:
+            bool: True if the export was written
+        """
         try:
-            history = self.get_history()
-            
-            if format.lower() == 'csv':
-                import csv
-                with open(export_path, 'w', newline='', encoding='utf-8') as f:
-                    if history:
-                        fieldnames = ['timestamp', 'package_name', 'success', 'message']
-                        writer = csv.DictWriter(f, fieldnames=fieldnames)
-                        writer.writeheader()
-                        for entry in history:
-                            writer.writerow({
-                                'timestamp': entry.get('timestamp', ''),
-                                'package_name': entry.get('package_name', ''),
-                                'success': 'Success' if entry.get('success') else 'Failed',
-                                'message': entry.get('message', '')
-                            })
-            else:  # JSON
-                export_data = {
-                    'export_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'total_entries': len(history),
-                    'entries': history
-                }
-                with open(export_path, 'w', encoding='utf-8') as f:
-                    json.dump(export_data,f, indent=2)
-            
+            export_entries(self.iter_history(**criteria), export_path, format, progress_callback)
             return True
         except Exception as e:
             print(f"Error exporting history: {e}")
             return False
     
     def import_history(self, import_path, merge=True):
-        """Import history from a JSON file"""
+        """Import history from a JSON or NDJSON export (optionally .gz or .xz compressed)"""
         try:
-            with open(import_path, 'r', encoding='utf-8') as f:
-                imported_data = json.load(f)
-            
-            # Handle both old format (array) and new format (object with metadata)
-            if isinstance(imported_data, list):
-                imported_entries = imported_data
-            elif isinstance(imported_data, dict) and 'entries' in imported_data:
-                imported_entries = imported_data['entries']
-            else:
+            imported_entries = load_entries(import_path)
+            if imported_entries is None:
                 return False
             
             if merge:
                 # Merge with existing history
-                current_history = self.get_history()
-                current_history.extend(imported_entries)
-                final_history = current_history
+                with self.store.batch():
+                    self.store.extend(imported_entries)
             else:
                 # Replace existing history
-                final_history = imported_entries
-            
-            # Write to file
-            with open(self.log_file, 'w', encoding='utf-8') as f:
-                json.dump(final_history, f, indent=2)
+                self.store.replace(imported_entries)
             
+            self._invalidate()
             return True
         except Exception as e:
             print(f"Error importing history: {e}")
             return False
     
-    def search_history(self, query):
-        """Search history by package name"""
+    def search_history(self, query, messages=False):
+        """Search history by package name (and optionally by message)"""
         if not query:
             return self.get_history()
+        return self.filter_history(query=query, messages=messages)
+    
+    def filter_history(self, status=None, package_type=None, date_from=None, date_to=None,
+                       query=None, messages=False, limit=None):
+        """
+        Filter history by various criteria
         
-        history = self.get_history()
-        query_lower = query.lower()
+        Args:
+            status: 'success' or 'failed'
+            package_type: Extension of the package file ('deb', 'rpm', 'snap', ...)
+            date_from: 'YYYY-MM-DD'
+            date_to: 'YYYY-MM-DD'
+            query: Case-insensitive substring of the package name or path
+            messages: Also match query against the messages
+            limit: Only return the most recent matching entries up to this many
         
-        return [entry for entry in history 
-                if query_lower in entry.get('package_name', '').lower() or
-                   query_lower in entry.get('package', '').lower()]
-    
-    def filter_history(self, status=None, package_type=None, date_from=None, date_to=None):
-        """Filter history by various criteria"""
-        history = self.get_history()
-        filtered = history
+        Returns:
+            list of entries, oldest first
+        """
+        if self.indexed:
+            return self.store.query(
+                status=status, package_type=package_type, date_from=date_from, date_to=date_to,
+                query=query, messages=messages, limit=limit
+            )
+        
+        criteria = (status, package_type, date_from, date_to, query, messages)
+        if limit is None:
+            return [entry for entries in self._segments(date_from, date_to)
+                    for entry in self._filter(entries, *criteria)]
         
+        # Only read back through older segments until enough entries match
+        matched = []
+        found = 0
+        for entries in self._segments(date_from, date_to, newest_first=True):
+            matches = self._filter(entries, *criteria)
+            matched.append(matches)
+            found += len(matches)
+            if found >= limit:
+                break
+        filtered = [entry for matches in reversed(matched) for entry in matches]
+        return filtered[-limit:] if limit else []
+    
+    @staticmethod
+    def _filter(filtered, status, package_type, date_from, date_to, query, messages):
+        """Filter a list of entries"""
         # Filter by status
         if status == 'success':
             filtered = [e for e in filtered if e.get('success', False)]
         elif status == 'failed':
             filtered = [e for e in filtered if not e.get('success', False)]
         
-        # Filter by package type
+        # Filter by package type (the package file's extension, like the SQLite backend)
         if package_type:
-            if package_type == 'deb':
-                filtered = [e for e in filtered if e.get('package_name', '').endswith('.deb')]
-            elif package_type == 'rpm':
-                filtered = [e for e in filtered if e.get('package_name', '').endswith('.rpm')]
+            filtered = [e for e in filtered if entry_format(e) == package_type]
         
         # Filter by date range
         if date_from or date_to:
@@ -207,17 +297,65 @@ class InstallLogger:
                 except:
                     return None
             
-            if date_from:
-                from_dt = datetime.strptime(date_from, '%Y-%m-%d')
-                filtered = [e for e in filtered 
-                           if parse_date(e.get('timestamp', '')) and 
-                              parse_date(e.get('timestamp', '')) >= from_dt]
-            
-            if date_to:
-                to_dt = datetime.strptime(date_to, '%Y-%m-%d')
-                filtered = [e for e in filtered 
-                           if parse_date(e.get('timestamp', '')) and 
-                              parse_date(e.get('timestamp', '')) <= to_dt]
+            from_dt = datetime.strptime(date_from, '%Y-%m-%d') if date_from else None
+            to_dt = datetime.strptime(date_to, '%Y-%m-%d') if date_to else None
+            dated = []
+            for e in filtered:
+                # Each timestamp is parsed once for both bounds
+                timestamp = parse_date(e.get('timestamp', ''))
+                if timestamp and (from_dt is None or timestamp >= from_dt) and (to_dt is None or timestamp <= to_dt):
+                    dated.append(e)
+            filtered = dated
+        
+        # Filter by search query
+        if query:
+            query_lower = query.lower()
+            fields = ('package_name', 'package', 'message') if messages else ('package_name', 'package')
+            filtered = [e for e in filtered
+                        if any(query_lower in str(e.get(field, '')).lower() for field in fields)]
         
         return filtered
+    
+    def iter_history(self, status=None, package_type=None, date_from=None, date_to=None,
+                     query=None, messages=False):
+        """
+        Iterate over the entries matching filter_history() criteria, oldest first
+        
+        Entries are read a page or a segment at a time and archived segments
+        aren't cached, so memory use doesn't grow with the history.
+        """
+        if self.indexed:
+            yield from self.store.iter_query(
+                status=status, package_type=package_type, date_from=date_from, date_to=date_to,
+                query=query, messages=messages
+            )
+            return
+        criteria = (status, package_type, date_from, date_to, query, messages)
+        for record in self.store.archived(date_from, date_to):
+            entries = self._archives.get(record['file']) or self.store.read_segment(record)
+            yield from self._filter(entries, *criteria)
+        yield from self._filter(list(self._load()), *criteria)
+    
+    def count_history(self, **criteria):
+        """Get the number of entries matching filter_history() criteria"""
+        criteria = {key: value for key, value in criteria.items() if value is not None}
+        if self.indexed:
+            return self.store.count(**criteria)
+        if criteria.get('query') or criteria.get('date_from') or criteria.get('date_to'):
+            return len(self.filter_history(**criteria))
+        
+        # Status and package type are answered from the manifest and active counters
+        status = criteria.get('status')
+        package_type = criteria.get('package_type')
+        count = 0
+        for _, package_format, successful, failed in self._totals().rows():
+            if package_type and package_format != package_type:
+                continue
+            if status == 'success':
+                count += successful
+            elif status == 'failed':
+                count += failed
+            else:
+                count += successful + failed
+        return count
 
@@ -8,13 +8,33 @@ import os
 import subprocess
 import platform
 from . import config
+from .capabilities import get_capabilities
+from .digest_cache import get_digest_cache, file_key
+from .verification import VerificationEngine
+from .process_runner import run_streaming, parser_for_command
+from .exceptions import InvalidPackageError, UnsupportedCompressionError
+from . import deb_reader
+from . import rpm_reader
+from . import squashfs_reader
+from . import flatpak_reader
 
 
 class PackageHandler:
     """Handle package operations for .deb, .rpm, .snap, and .flatpak files"""
     
-    def __init__(self):
+    def __init__(self, capabilities=None, digest_cache=None, helper=None):
         self.supported_formats = config.get_supported_extensions()
+        self.capabilities = capabilities if capabilities is not None else get_capabilities()
+        self.digest_cache = digest_cache if digest_cache is not None else get_digest_cache()
+        self.verification_engine = VerificationEngine(cache=self.digest_cache)
+        self.helper = helper  # PrivilegedHelper for 'pkexec' commands, or None for plain pkexec
+        self._deb_architecture = None  # dpkg's native architecture, looked up once
+        self.package_manager = self.detect_package_manager()
+        self.available_managers = self._detect_all_managers()
+    
+    def refresh_capabilities(self):
+        """Re-probe the host after tools were installed or removed"""
+        self.capabilities = get_capabilities(refresh=True)
         self.package_manager = self.detect_package_manager()
         self.available_managers = self._detect_all_managers()
     
@@ -38,28 +58,12 @@ class PackageHandler:
             return 'unknown'
     
     def _command_exists(self, command):
-        """Check if a command exists on the system"""
-        try:
-            subprocess.run(
-                ['which', command],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True
-            )
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+        """Check if a command exists on the system (uses the cached capability snapshot)"""
+        return self.capabilities.has(command)
     
     def _detect_all_managers(self):
         """Detect all available package managers on the system"""
-        available = {}
-        for fmt_name, fmt_info in config.SUPPORTED_FORMATS.items():
-            for manager in fmt_info['managers']:
-                if self._command_exists(manager):
-                    if fmt_name not in available:
-                        available[fmt_name] = []
-                    available[fmt_name].append(manager)
-        return available
+        return self.capabilities.available_managers()
     
     def validate_package(self, package_path):
         """Validate if the package file is supported and exists"""
@@ -94,6 +98,19 @@ class PackageHandler:
     
     def _get_deb_info(self, package_path):
         """Get information from .deb package"""
+        try:
+            metadata = self._read_metadata(package_path, deb_reader.read_deb)
+            return deb_reader.format_deb_info(deb_reader.DebPackageInfo.from_dict(package_path, metadata))
+        except UnsupportedCompressionError:
+            # Control archive we can't decompress natively, ask dpkg-deb
+            return self._get_deb_info_dpkg(package_path)
+        except InvalidPackageError as e:
+            return f"Package Type: Debian (.deb)\n\nFilename: {os.path.basename(package_path)}\nSize: {self._get_file_size(package_path)}\n\nWarning: {e.details}"
+        except Exception as e:
+            return f"Package Type: Debian (.deb)\n\nError: {str(e)}"
+    
+    def _get_deb_info_dpkg(self, package_path):
+        """Get information from .deb package using dpkg-deb"""
         try:
             result = subprocess.run(
                 ['dpkg-deb', '-I', package_path],
@@ -126,38 +143,45 @@ class PackageHandler:
         except Exception as e:
             return f"Package Type: Debian (.deb)\n\nError: {str(e)}"
     
+    def get_package_metadata(self, package_path):
+        """
+        Get structured package metadata
+        
+        Returns:
+            dict with 'format' and format-specific fields, or None if the
+            package can't be read natively
+        """
+        package_type = self.get_package_type(package_path)
+        
+        try:
+            if package_type == '.deb':
+                return self._read_metadata(package_path, deb_reader.read_deb)
+            elif package_type == '.rpm':
+                return self._read_metadata(package_path, rpm_reader.read_rpm)
+            elif package_type == '.snap':
+                return self._read_metadata(package_path, squashfs_reader.read_snap)
+            elif package_type == '.flatpak':
+                return self._read_metadata(package_path, flatpak_reader.read_flatpak_bundle)
+        except (InvalidPackageError, UnsupportedCompressionError, OSError):
+            return None
+        return None
+    
+    def _read_metadata(self, package_path, reader):
+        """Read structured metadata, consulting the digest cache first"""
+        key = file_key(package_path)
+        entry = self.digest_cache.get(key)
+        if entry is not None and entry.get('metadata'):
+            return entry['metadata']
+        metadata = reader(package_path).to_dict()
+        self.digest_cache.update(key, metadata=metadata)
+        return metadata
+    
     def _get_rpm_info(self, package_path):
         """Get information from .rpm package"""
         try:
-            result = subprocess.run(
-                ['rpm', '-qip', package_path],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0:
-                # Parse and format the output
-                info = result.stdout
-                lines = info.split('\n')
-                
-                # Extract key information
-                formatted_info = "Package Type: RPM\n\n"
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith('Name') or \
-                       line.startswith('Version') or \
-                       line.startswith('Release') or \
-                       line.startswith('Architecture') or \
-                       line.startswith('Summary') or \
-                       line.startswith('Description'):
-                        formatted_info += line + '\n'
-                
-                return formatted_info if formatted_info else info
-            else:
-                return f"Package Type: RPM\n\nFilename: {os.path.basename(package_path)}\nSize: {self._get_file_size(package_path)}"
-        except FileNotFoundError:
-            return f"Package Type: RPM\n\nFilename: {os.path.basename(package_path)}\nSize: {self._get_file_size(package_path)}\n\nNote: rpm not found. Install rpm for detailed info."
+            return rpm_reader.format_rpm_info(rpm_reader.read_rpm(package_path))
+        except InvalidPackageError as e:
+            return f"Package Type: RPM\n\nFilename: {os.path.basename(package_path)}\nSize: {self._get_file_size(package_path)}\n\nWarning: {e.details}"
         except Exception as e:
             return f"Package Type: RPM\n\nError: {str(e)}"
     
@@ -173,158 +197,184 @@ class PackageHandler:
         return f"{size_bytes:.2f} TB"
     
     def _get_snap_info(self, package_path):
-        """Get information from .snap package"""
+        """Get information from .snap package (reads meta/snap.yaml from the squashfs image)"""
+        file_name = os.path.basename(package_path)
         try:
-            # Snap packages need to be examined differently
-            # Try to read metadata from the package
-            result = subprocess.run(
-                ['unsquashfs', '-ll', package_path, 'meta/snap.yaml'],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0:
-                formatted_info = "Package Type: Snap Package 📸\n\n"
-                formatted_info += f"Filename: {os.path.basename(package_path)}\n"
-                formatted_info += f"Size: {self._get_file_size(package_path)}\n\n"
-                formatted_info += "Note: Install snapd to view detailed metadata.\n"
-                formatted_info += "After installation, use: snap info <package-name>\n"
-                return formatted_info
-            else:
-                return f"Package Type: Snap Package 📸\n\nFilename: {os.path.basename(package_path)}\nSize: {self._get_file_size(package_path)}\n\nNote: Detailed info will be available after installation."
-        except FileNotFoundError:
-            return f"Package Type: Snap Package 📸\n\nFilename: {os.path.basename(package_path)}\nSize: {self._get_file_size(package_path)}\n\nNote: Install snapd and unsquashfs for detailed package info."
+            info = squashfs_reader.read_snap(package_path)
+            return squashfs_reader.format_snap_info(info, file_name, self._get_file_size(package_path))
+        except UnsupportedCompressionError as e:
+            return f"Package Type: Snap Package 📸\n\nFilename: {file_name}\nSize: {self._get_file_size(package_path)}\n\nNote: {e.details} Detailed info will be available after installation."
+        except InvalidPackageError as e:
+            return f"Package Type: Snap Package 📸\n\nFilename: {file_name}\nSize: {self._get_file_size(package_path)}\n\nWarning: {e.details}"
         except Exception as e:
-            return f"Package Type: Snap Package 📸\n\nFilename: {os.path.basename(package_path)}\nSize: {self._get_file_size(package_path)}\n\nNote: {str(e)}"
+            return f"Package Type: Snap Package 📸\n\nFilename: {file_name}\nSize: {self._get_file_size(package_path)}\n\nNote: {str(e)}"
     
     def _get_flatpak_info(self, package_path):
-        """Get information from .flatpak package"""
+        """Get information from .flatpak bundle (reads the bundle header in-process)"""
+        file_name = os.path.basename(package_path)
         try:
-            # Flatpak bundles can be inspected
-            result = subprocess.run(
-                ['flatpak', 'info', '--show-metadata', package_path],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0:
-                info = result.stdout
-                formatted_info = "Package Type: Flatpak Package 📱\n\n"
-                formatted_info += f"Filename: {os.path.basename(package_path)}\n"
-                formatted_info += f"Size: {self._get_file_size(package_path)}\n\n"
-                
-                # Parse metadata
-                lines = info.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith('[Application]') or \
-                       line.startswith('name=') or \
-                       line.startswith('runtime=') or \
-                       line.startswith('sdk=') or \
-                       line.startswith('command='):
-                        formatted_info += line + '\n'
-                
-                return formatted_info if formatted_info else info
-            else:
-                return f"Package Type: Flatpak Package 📱\n\nFilename: {os.path.basename(package_path)}\nSize: {self._get_file_size(package_path)}\n\nNote: Detailed info will be available after installation."
-        except FileNotFoundError:
-            return f"Package Type: Flatpak Package 📱\n\nFilename: {os.path.basename(package_path)}\nSize: {self._get_file_size(package_path)}\n\nNote: Install flatpak for detailed package info."
+            info = flatpak_reader.read_flatpak_bundle(package_path)
+            return flatpak_reader.format_flatpak_info(info, file_name, self._get_file_size(package_path))
+        except InvalidPackageError as e:
+            return f"Package Type: Flatpak Package 📱\n\nFilename: {file_name}\nSize: {self._get_file_size(package_path)}\n\nWarning: {e.details}"
         except Exception as e:
-            return f"Package Type: Flatpak Package 📱\n\nFilename: {os.path.basename(package_path)}\nSize: {self._get_file_size(package_path)}\n\nNote: {str(e)}"
+            return f"Package Type: Flatpak Package 📱\n\nFilename: {file_name}\nSize: {self._get_file_size(package_path)}\n\nNote: {str(e)}"
     
-    def verify_package(self, package_path, checksum=None, checksum_type='sha256', check_signature=False):
+    def verify_package(self, package_path, checksum=None, checksum_type='sha256', check_signature=False,
+                       algorithms=None):
         """
         Comprehensive package verification
         
+        The file is read once: digests, the structural check and (for .deb
+        detached signatures) gpg are all fed from the same pass.
+        
         Args:
             package_path: Path to the package file
             checksum: Expected checksum value (optional)
-            checksum_type: Type of checksum ('sha256' or 'md5')
+            checksum_type: Type of checksum (one of config.CHECKSUM_ALGORITHMS)
             check_signature: Whether to verify GPG signature
+            algorithms: Extra digests to compute in the same pass (optional)
         
         Returns:
             tuple: (success: bool, message: str, details: dict)
         """
-        verification_results = {
+        verification_results = self.new_verification_results()
+        
+        try:
+            # 1-2. File exists and isn't suspiciously small
+            failure = self.precheck_package_file(package_path, verification_results)
+            if failure is not None:
+                return failure
+            
+            # 3. Single pass: digests, structure and streamed gpg signature
+            signature_path = None
+            if check_signature and self.get_package_type(package_path) == '.deb':
+                signature_path = self._find_signature_file(package_path)
+                if signature_path is None:
+                    verification_results['signature_valid'] = False
+                    return False, "GPG signature verification failed: No signature file found (.asc or .sig required)", verification_results
+            
+            report = self.verification_engine.scan(
+                package_path,
+                self.verification_algorithms(checksum, checksum_type, algorithms),
+                signature_path=signature_path
+            )
+            return self.evaluate_verification(report, checksum, checksum_type, check_signature, verification_results)
+            
+        except Exception as e:
+            return False, f"Verification error: {str(e)}", verification_results
+    
+    def new_verification_results(self):
+        """Get an empty details dict as returned by verify_package"""
+        return {
             'file_exists': False,
             'file_size': 0,
             'checksum_match': None,
             'signature_valid': None,
-            'integrity_ok': False
+            'integrity_ok': False,
+            'checksums': {},
+            'report': None
         }
+    
+    def verification_algorithms(self, checksum=None, checksum_type='sha256', algorithms=None):
+        """Get the digests a verification has to compute"""
+        wanted = [name.lower() for name in algorithms or []]
+        if checksum and checksum_type.lower() not in wanted:
+            wanted.append(checksum_type.lower())
+        return wanted
+    
+    def precheck_package_file(self, package_path, verification_results):
+        """
+        Cheap checks done before reading the package
         
-        try:
-            # 1. Check if file exists
-            if not os.path.exists(package_path):
-                return False, "Package file not found", verification_results
-            
-            verification_results['file_exists'] = True
-            
-            # 2. Get file size
-            file_size = os.path.getsize(package_path)
-            verification_results['file_size'] = file_size
-            
-            # Check if file is suspiciously small (< 1KB)
-            if file_size < 1024:
-                return False, f"Package file too small ({file_size} bytes). May be corrupted.", verification_results
-            
-            # 3. Verify checksum if provided
-            if checksum:
-                calculated_checksum = self._calculate_checksum(package_path, checksum_type)
-                
-                if calculated_checksum.lower() == checksum.lower():
-                    verification_results['checksum_match'] = True
-                else:
-                    verification_results['checksum_match'] = False
-                    return False, f"{checksum_type.upper()} checksum mismatch!\\nExpected: {checksum}\\nGot: {calculated_checksum}", verification_results
+        Returns:
+            verify_package() style failure tuple, or None if the file may be read
+        """
+        if not os.path.exists(package_path):
+            return False, "Package file not found", verification_results
+        
+        verification_results['file_exists'] = True
+        
+        file_size = os.path.getsize(package_path)
+        verification_results['file_size'] = file_size
+        
+        # Check if file is suspiciously small (< 1KB)
+        if file_size < config.INTEGRITY_CHECK_MIN_SIZE:
+            return False, f"Package file too small ({file_size} bytes). May be corrupted.", verification_results
+        
+        return None
+    
+    def evaluate_verification(self, report, checksum=None, checksum_type='sha256', check_signature=False,
+                              verification_results=None):
+        """
+        Turn a VerificationReport into a verify_package() result
+        
+        Signatures that were not streamed during the scan and structure
+        checks that were skipped are completed here.
+        
+        Returns:
+            tuple: (success: bool, message: str, details: dict)
+        """
+        if verification_results is None:
+            verification_results = self.new_verification_results()
+        package_path = report.package_path
+        verification_results['file_exists'] = True
+        verification_results['file_size'] = report.file_size
+        verification_results['report'] = report.to_dict()
+        verification_results['checksums'] = dict(report.digests)
+        
+        # Compare checksum
+        if checksum:
+            calculated_checksum = report.digests[checksum_type.lower()]
             
-            # 4. Verify GPG signature if requested
-            if check_signature:
+            if calculated_checksum.lower() == checksum.lower():
+                verification_results['checksum_match'] = True
+            else:
+                verification_results['checksum_match'] = False
+                return False, f"{checksum_type.upper()} checksum mismatch!\\nExpected: {checksum}\\nGot: {calculated_checksum}", verification_results
+        
+        # GPG signature (.deb may have been streamed, .rpm uses rpm --checksig)
+        if check_signature:
+            if report.signature_valid is not None:
+                sig_valid, sig_msg = report.signature_valid, report.signature_message
+            else:
                 sig_valid, sig_msg = self._verify_gpg_signature(package_path)
-                verification_results['signature_valid'] = sig_valid
-                
-                if not sig_valid:
-                    return False, f"GPG signature verification failed: {sig_msg}", verification_results
-            
-            # 5. Basic integrity check (try to read package metadata)
-            integrity_ok, integrity_msg = self._check_package_integrity(package_path)
-            verification_results['integrity_ok'] = integrity_ok
+            verification_results['signature_valid'] = sig_valid
             
-            if not integrity_ok:
-                return False, f"Package integrity check failed: {integrity_msg}", verification_results
-            
-            # All checks passed
-            success_msg = "✅ Package verification successful\\n"
-            if checksum:
-                success_msg += f"✓ {checksum_type.upper()} checksum verified\\n"
-            if check_signature:
-                success_msg += "✓ GPG signature valid\\n"
-            success_msg += "✓ Package integrity OK"
-            
-            return True, success_msg, verification_results
-            
-        except Exception as e:
-            return False, f"Verification error: {str(e)}", verification_results
-    
-    def _calculate_checksum(self, file_path, checksum_type='sha256'):
-        """Calculate file checksum"""
-        import hashlib
+            if not sig_valid:
+                return False, f"GPG signature verification failed: {sig_msg}", verification_results
         
-        if checksum_type.lower() == 'sha256':
-            hasher = hashlib.sha256()
-        elif checksum_type.lower() == 'md5':
-            hasher = hashlib.md5()
+        # Structural integrity, from the scan where possible
+        if report.structure_ok is None:
+            integrity_ok, integrity_msg = self._check_package_integrity(package_path)
         else:
-            raise ValueError(f"Unsupported checksum type: {checksum_type}")
+            integrity_ok, integrity_msg = report.structure_ok, report.structure_message
+        verification_results['integrity_ok'] = integrity_ok
+        
+        if not integrity_ok:
+            return False, f"Package integrity check failed: {integrity_msg}", verification_results
         
-        with open(file_path, 'rb') as f:
-            # Read in chunks to handle large files
-            while chunk := f.read(8192):
-                hasher.update(chunk)
+        # All checks passed
+        success_msg = "✅ Package verification successful\\n"
+        if checksum:
+            success_msg += f"✓ {checksum_type.upper()} checksum verified\\n"
+        if check_signature:
+            success_msg += "✓ GPG signature valid\\n"
+        success_msg += "✓ Package integrity OK"
         
-        return hasher.hexdigest()
+        return True, success_msg, verification_results
+    
+    def _calculate_checksum(self, file_path, checksum_type='sha256'):
+        """Calculate file checksum"""
+        return self.verification_engine.hash_file(file_path, [checksum_type])[checksum_type.lower()]
+    
+    def _find_signature_file(self, package_path):
+        """Get the detached .asc or .sig signature next to a package, if any"""
+        for suffix in ('.asc', '.sig'):
+            sig_path = package_path + suffix
+            if os.path.exists(sig_path):
+                return sig_path
+        return None
     
     def _verify_gpg_signature(self, package_path):
         """Verify GPG signature of package"""
@@ -333,11 +383,8 @@ class PackageHandler:
         try:
             if package_type == '.deb':
                 # For .deb packages, check if there's a .asc or .sig file
-                sig_path = package_path + '.asc'
-                if not os.path.exists(sig_path):
-                    sig_path = package_path + '.sig'
-                
-                if not os.path.exists(sig_path):
+                sig_path = self._find_signature_file(package_path)
+                if sig_path is None:
                     return False, "No signature file found (.asc or .sig required)"
                 
                 # Verify using gpg
@@ -383,32 +430,32 @@ class PackageHandler:
         
         try:
             if package_type == '.deb':
-                # Try to read package metadata
-                result = subprocess.run(
-                    ['dpkg-deb', '--info', package_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
-                
-                if result.returncode == 0:
+                # Walk the ar container and read the control archive in-process
+                try:
+                    deb_reader.read_deb(package_path)
                     return True, "Package structure valid"
-                else:
-                    return False, "Package appears to be corrupted or invalid"
+                except InvalidPackageError as e:
+                    return False, f"Package appears to be corrupted or invalid: {e.details}"
+                except UnsupportedCompressionError:
+                    result = subprocess.run(
+                        ['dpkg-deb', '--info', package_path],
+                        capture_output=True,
+                        text=True,
+                        timeout=10
+                    )
+                    
+                    if result.returncode == 0:
+                        return True, "Package structure valid"
+                    else:
+                        return False, "Package appears to be corrupted or invalid"
                     
             elif package_type == '.rpm':
-                # Try to query package
-                result = subprocess.run(
-                    ['rpm', '-qp', package_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
-                
-                if result.returncode == 0:
+                # Decode lead, signature and main header in-process
+                try:
+                    rpm_reader.read_rpm(package_path)
                     return True, "Package structure valid"
-                else:
-                    return False, "Package appears to be corrupted or invalid"
+                except InvalidPackageError as e:
+                    return False, f"Package appears to be corrupted or invalid: {e.details}"
             
             return True, "Basic checks passed"
             
@@ -442,50 +489,69 @@ class PackageHandler:
                 'error': str(e)
             }
     
-    def install_package(self, package_path):
-        """Install the package using appropriate package manager"""
+    def install_package(self, package_path, progress_callback=None):
+        """
+        Install the package using appropriate package manager
+        
+        Args:
+            package_path: Path to the package file
+            progress_callback: Called with a ProcessEvent for every progress or
+                               phase change reported by the package manager
+        """
+        # apt needs a path with a slash, the privileged helper an absolute one
+        package_path = os.path.abspath(package_path)
         package_type = self.get_package_type(package_path)
         
         try:
             if package_type == '.deb':
-                return self._install_deb(package_path)
+                return self._install_deb(package_path, progress_callback)
             elif package_type == '.rpm':
-                return self._install_rpm(package_path)
+                return self._install_rpm(package_path, progress_callback)
             elif package_type == '.snap':
-                return self._install_snap(package_path)
+                return self._install_snap(package_path, progress_callback)
             elif package_type == '.flatpak':
-                return self._install_flatpak(package_path)
+                return self._install_flatpak(package_path, progress_callback)
             else:
                 return False, "Unsupported package format"
         except Exception as e:
             return False, f"Installation failed: {str(e)}"
     
-    def _install_deb(self, package_path):
+    def _run_manager(self, command, progress_callback=None, timeout=None, package_count=1):
+        """
+        Run a package manager command, streaming its progress
+        
+        Privileged commands go through the session helper when one is set.
+        
+        Returns:
+            ProcessResult (returncode, stdout, stderr like subprocess.run)
+        """
+        run = self.helper.run if self.helper is not None else run_streaming
+        return run(
+            command,
+            on_event=progress_callback,
+            parser=parser_for_command(command, package_count),
+            timeout=timeout or config.INSTALLATION_TIMEOUT
+        )
+    
+    def _install_deb(self, package_path, progress_callback=None):
         """Install .deb package"""
         try:
             # Try using apt first (handles dependencies better)
             if self._command_exists('apt'):
-                result = subprocess.run(
-                    ['pkexec', 'apt', 'install', '-y', package_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=300
+                result = self._run_manager(
+                    ['pkexec', 'apt', '-o', 'APT::Status-Fd=1', 'install', '-y', package_path],
+                    progress_callback
                 )
             # Fallback to dpkg
             elif self._command_exists('dpkg'):
-                result = subprocess.run(
-                    ['pkexec', 'dpkg', '-i', package_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=300
+                result = self._run_manager(
+                    ['pkexec', 'dpkg', '--status-fd', '1', '-i', package_path],
+                    progress_callback
                 )
                 
                 # Fix dependencies if needed
                 if result.returncode != 0:
-                    subprocess.run(
-                        ['pkexec', 'apt-get', 'install', '-f', '-y'],
-                        timeout=300
-                    )
+                    self._run_manager(['pkexec', 'apt-get', 'install', '-f', '-y'])
             else:
                 return False, "No suitable package manager found for .deb files"
             
@@ -500,40 +566,32 @@ class PackageHandler:
         except Exception as e:
             return False, f"Installation error: {str(e)}"
     
-    def _install_rpm(self, package_path):
+    def _install_rpm(self, package_path, progress_callback=None):
         """Install .rpm package"""
         try:
             # Try DNF first (Fedora)
             if self._command_exists('dnf'):
-                result = subprocess.run(
+                result = self._run_manager(
                     ['pkexec', 'dnf', 'install', '-y', package_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=300
+                    progress_callback
                 )
             # Try YUM (RHEL/CentOS)
             elif self._command_exists('yum'):
-                result = subprocess.run(
+                result = self._run_manager(
                     ['pkexec', 'yum', 'install', '-y', package_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=300
+                    progress_callback
                 )
             # Try Zypper (openSUSE)
             elif self._command_exists('zypper'):
-                result = subprocess.run(
+                result = self._run_manager(
                     ['pkexec', 'zypper', 'install', '-y', package_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=300
+                    progress_callback
                 )
             # Fallback to rpm
             elif self._command_exists('rpm'):
-                result = subprocess.run(
-                    ['pkexec', 'rpm', '-ivh', package_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=300
+                result = self._run_manager(
+                    ['pkexec', 'rpm', '-ivh', '--percent', package_path],
+                    progress_callback
                 )
             else:
                 return False, "No suitable package manager found for .rpm files"
@@ -549,29 +607,254 @@ class PackageHandler:
         except Exception as e:
             return False, f"Installation error: {str(e)}"
     
-    def _install_snap(self, package_path):
-        """Install .snap package"""
+    # ==================== Batch transactions ====================
+    
+    def transaction_groups(self, package_paths):
+        """
+        Group queued packages that can share one package manager transaction
+        
+        Only .deb and .rpm files are grouped, and only when at least two of
+        the same format are queued and a suitable manager is available.
+        
+        Returns:
+            dict: package type ('.deb' / '.rpm') -> list of paths in queue order
+        """
+        groups = {}
+        for path in package_paths:
+            package_type = self.get_package_type(path)
+            if package_type in ('.deb', '.rpm'):
+                groups.setdefault(package_type, []).append(path)
+        return {
+            package_type: paths for package_type, paths in groups.items()
+            if len(paths) > 1 and self.install_command(package_type, paths) is not None
+        }
+    
+    def install_command(self, package_type, package_paths):
+        """Get the single command installing all package_paths, or None"""
+        # apt only treats arguments as files when they contain a slash
+        paths = [os.path.abspath(path) for path in package_paths]
+        if package_type == '.deb':
+            if self._command_exists('apt'):
+                return ['pkexec', 'apt', '-o', 'APT::Status-Fd=1', 'install', '-y'] + paths
+            if self._command_exists('dpkg'):
+                return ['pkexec', 'dpkg', '--status-fd', '1', '-i'] + paths
+        elif package_type == '.rpm':
+            for manager in ('dnf', 'yum', 'zypper'):
+                if self._command_exists(manager):
+                    return ['pkexec', manager, 'install', '-y'] + paths
+            if self._command_exists('rpm'):
+                return ['pkexec', 'rpm', '-Uvh', '--percent'] + paths
+        return None
+    
+    def install_transaction(self, package_paths, progress_callback=None):
+        """
+        Install several packages of the same format in one transaction
+        
+        One authentication prompt, one lock acquisition and one dependency
+        solve for the whole group. Per-package outcomes are recovered by
+        querying the package database for the expected name and version.
+        
+        Args:
+            package_paths: .deb paths or .rpm paths (not mixed)
+            progress_callback: Called with a ProcessEvent for every progress report
+        
+        Returns:
+            tuple: (success: bool, message: str, outcomes: dict path -> (bool, str))
+        """
+        if not package_paths:
+            return True, "Nothing to install", {}
+        
+        package_type = self.get_package_type(package_paths[0])
+        if any(self.get_package_type(path) != package_type for path in package_paths):
+            return False, "Transaction packages must all have the same format", {}
+        
+        command = self.install_command(package_type, package_paths)
+        if command is None:
+            message = f"No suitable package manager found for {package_type} files"
+            return False, message, {path: (False, message) for path in package_paths}
+        
+        expected = {path: self.expected_installation(path) for path in package_paths}
+        
         try:
-            # Check if snapd is running
-            if not self._command_exists('snap'):
-                return False, "Snap is not installed. Please install snapd:\n  sudo apt install snapd  # Debian/Ubuntu\n  sudo dnf install snapd  # Fedora"
-            
-            # Check if snapd service is running
-            check_service = subprocess.run(
-                ['systemctl', 'is-active', 'snapd'],
-                capture_output=True,
-                text=True
+            result = self._run_manager(
+                command,
+                progress_callback,
+                timeout=config.INSTALLATION_TIMEOUT * len(package_paths),
+                package_count=len(package_paths)
             )
             
-            if check_service.returncode != 0:
-                return False, "snapd service is not running. Please start it:\n  sudo systemctl start snapd\n  sudo systemctl enable snapd"
+            # dpkg -i leaves missing dependencies unconfigured, let apt fix them
+            if command[1] == 'dpkg' and result.returncode != 0 and self._command_exists('apt-get'):
+                self._run_manager(['pkexec', 'apt-get', 'install', '-f', '-y'])
+        except subprocess.TimeoutExpired:
+            message = "Installation timed out. The package may be too large or there may be network issues."
+            return False, message, {path: (False, message) for path in package_paths}
+        except Exception as e:
+            message = f"Installation error: {str(e)}"
+            return False, message, {path: (False, message) for path in package_paths}
+        
+        installed = self._query_installed(package_type, [name for name, _ in expected.values() if name])
+        return self.transaction_outcomes(expected, result, installed)
+    
+    def transaction_outcomes(self, expected, result, installed):
+        """
+        Work out per-package outcomes of a finished transaction
+        
+        Args:
+            expected: dict path -> (name, version) from expected_installation()
+            result: ProcessResult of the transaction
+            installed: dict name -> installed version from the package database,
+                or None if it couldn't be queried
+        
+        Returns:
+            tuple: (success: bool, message: str, outcomes: dict path -> (bool, str))
+        """
+        output = result.stdout + result.stderr
+        outcomes = {}
+        for path, (name, version) in expected.items():
+            if name and installed is not None and installed.get(name) == version:
+                outcomes[path] = (True, f"Package installed successfully!\n\n{name} {version}")
+            elif (name is None or installed is None) and result.returncode == 0:
+                # Couldn't read the package or the database ourselves, trust the transaction
+                outcomes[path] = (True, "Package installed successfully!")
+            else:
+                details = self._package_error_lines(output, path, name) or output.strip()
+                outcomes[path] = (False, f"Installation failed:\n{details}")
+        
+        succeeded = sum(1 for ok, _ in outcomes.values() if ok)
+        message = f"Transaction installed {succeeded} of {len(expected)} package(s)\n\n{result.stdout}"
+        return succeeded == len(expected), message, outcomes
+    
+    def expected_installation(self, package_path):
+        """Get (name, version) the package database will report after install"""
+        metadata = self.get_package_metadata(package_path)
+        if metadata is None:
+            return None, None
+        if metadata['format'] == 'deb':
+            control = metadata['control']
+            return control.get('Package'), control.get('Version')
+        if metadata['format'] == 'rpm':
+            return metadata['name'], f"{metadata['version']}-{metadata['release']}"
+        return None, None
+    
+    def _query_installed(self, package_type, names):
+        """
+        Get installed versions for package names with a single query
+        
+        Returns:
+            dict: name -> installed version (only installed packages), or
+            None if the package database couldn't be queried
+        """
+        if not names:
+            return {}
+        command = self.installed_query_command(package_type, names)
+        try:
+            # Non-zero exit only means some names aren't installed
+            result = subprocess.run(command, capture_output=True, text=True, timeout=30)
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return None
+        return parse_installed_query(result.stdout)
+    
+    def deb_architecture(self):
+        """Get dpkg's native architecture ('amd64', ...), or '' if unknown"""
+        if self._deb_architecture is None:
+            self._deb_architecture = ''
+            if self._command_exists('dpkg'):
+                try:
+                    result = subprocess.run(['dpkg', '--print-architecture'],
+                                            capture_output=True, text=True, timeout=10)
+                    if result.returncode == 0:
+                        self._deb_architecture = result.stdout.strip()
+                except (FileNotFoundError, subprocess.TimeoutExpired):
+                    pass
+        return self._deb_architecture
+    
+    def removal_target(self, name, package_type, arch):
+        """Get the argument naming exactly this installed package to its package manager"""
+        return removal_target(name, package_type, arch, self.deb_architecture() if package_type == 'deb' else '')
+    
+    def _query_remaining(self, package_type, targets):
+        """
+        Get which removal targets are still installed with a single query
+        
+        Returns:
+            set of removal targets, or None if the package database couldn't be queried
+        """
+        if not targets:
+            return set()
+        command = self.remaining_query_command(package_type, targets)
+        try:
+            # Non-zero exit only means some targets aren't installed
+            result = subprocess.run(command, capture_output=True, text=True, timeout=30)
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return None
+        return self.parse_remaining_query(package_type, result.stdout)
+    
+    def remaining_query_command(self, package_type, targets):
+        """Get the read-only command whose output parse_remaining_query() reads"""
+        if package_type == 'deb':
+            return ['dpkg-query', '-W', '-f', '${Package}\t${Architecture}\t${db:Status-Abbrev}\n'] + targets
+        return ['rpm', '-q', '--qf', '%{NAME}\t%{ARCH}\tii\n'] + targets
+    
+    def parse_remaining_query(self, package_type, output):
+        """
+        Parse 'name<TAB>arch<TAB>status' lines into the removal targets still installed
+        
+        Packages left with only their configuration files count as removed.
+        """
+        remaining = set()
+        for line in output.splitlines():
+            parts = line.split('\t')
+            if len(parts) == 3 and parts[2][1:2] not in ('n', 'c'):
+                remaining.add(self.removal_target(parts[0], package_type, parts[1]))
+        return remaining
+    
+    def installed_query_command(self, package_type, names):
+        """Get the read-only command whose output parse_installed_query() reads"""
+        if package_type == '.deb':
+            return ['dpkg-query', '-W', '-f', '${Package}\t${Version}\t${db:Status-Abbrev}\n'] + names
+        return ['rpm', '-q', '--qf', '%{NAME}\t%{VERSION}-%{RELEASE}\tii\n'] + names
+    
+    def _package_error_lines(self, output, package_path, name):
+        """Get the lines of transaction output that concern one package"""
+        needles = [package_path, os.path.basename(package_path)]
+        if name:
+            needles.append(name)
+        lines = [
+            line.strip() for line in output.splitlines()
+            if any(needle in line for needle in needles)
+            and any(word in line.lower() for word in ('error', 'fail', 'conflict', 'depends', 'broken', 'nothing provides'))
+        ]
+        return '\n'.join(lines)
+    
+    def snap_precheck(self):
+        """Get the reason snaps can't be installed right now, or None"""
+        # Check if snapd is installed
+        if not self._command_exists('snap'):
+            return "Snap is not installed. Please install snapd:\n  sudo apt install snapd  # Debian/Ubuntu\n  sudo dnf install snapd  # Fedora"
+        
+        # Check if snapd service is running
+        if not self.capabilities.service_active('snapd'):
+            return "snapd service is not running. Please start it:\n  sudo systemctl start snapd\n  sudo systemctl enable snapd"
+        return None
+    
+    def flatpak_precheck(self):
+        """Get the reason flatpaks can't be installed right now, or None"""
+        if not self._command_exists('flatpak'):
+            return "Flatpak is not installed. Please install it:\n  sudo apt install flatpak  # Debian/Ubuntu\n  sudo dnf install flatpak  # Fedora"
+        return None
+    
+    def _install_snap(self, package_path, progress_callback=None):
+        """Install .snap package"""
+        try:
+            problem = self.snap_precheck()
+            if problem:
+                return False, problem
             
             # Install snap package with dangerous flag (for local files)
-            result = subprocess.run(
+            result = self._run_manager(
                 ['pkexec', 'snap', 'install', '--dangerous', package_path],
-                capture_output=True,
-                text=True,
-                timeout=config.INSTALLATION_TIMEOUT
+                progress_callback
             )
             
             if result.returncode == 0:
@@ -585,30 +868,26 @@ class PackageHandler:
         except Exception as e:
             return False, f"Installation error: {str(e)}"
     
-    def _install_flatpak(self, package_path):
+    def _install_flatpak(self, package_path, progress_callback=None):
         """Install .flatpak package"""
         try:
-            # Check if flatpak is installed
-            if not self._command_exists('flatpak'):
-                return False, "Flatpak is not installed. Please install it:\n  sudo apt install flatpak  # Debian/Ubuntu\n  sudo dnf install flatpak  # Fedora"
+            problem = self.flatpak_precheck()
+            if problem:
+                return False, problem
             
             # Install flatpak bundle
             # Flatpak handles permissions internally, no need for pkexec usually
             # However, system-wide installation might require it
-            result = subprocess.run(
+            result = self._run_manager(
                 ['flatpak', 'install', '-y', '--bundle', package_path],
-                capture_output=True,
-                text=True,
-                timeout=config.INSTALLATION_TIMEOUT
+                progress_callback
             )
             
             # If user installation fails, try system installation
             if result.returncode != 0:
-                result = subprocess.run(
+                result = self._run_manager(
                     ['pkexec', 'flatpak', 'install', '-y', '--system', '--bundle', package_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=config.INSTALLATION_TIMEOUT
+                    progress_callback
                 )
             
             if result.returncode == 0:
@@ -622,6 +901,108 @@ class PackageHandler:
         except Exception as e:
             return False, f"Installation error: {str(e)}"
     
+    # ==================== Removal ====================
+    
+    def uninstall_command(self, package_type):
+        """Get the command removing packages of a type ('deb', 'rpm') once names are appended, or None"""
+        if package_type == 'deb':
+            if self._command_exists('apt'):
+                return ['pkexec', 'apt', '-o', 'APT::Status-Fd=1', 'remove', '-y']
+            if self._command_exists('dpkg'):
+                return ['pkexec', 'dpkg', '--status-fd', '1', '-r']
+        elif package_type == 'rpm':
+            for manager in ('dnf', 'yum', 'zypper'):
+                if self._command_exists(manager):
+                    return ['pkexec', manager, 'remove', '-y']
+            if self._command_exists('rpm'):
+                return ['pkexec', 'rpm', '-e']
+        return None
+    
+    def uninstall_transaction(self, packages, progress_callback=None):
+        """
+        Remove several installed packages, one transaction per package type
+        
+        Each package manager is run once for all of its packages: one
+        authentication prompt and one dependency solve. Per-package outcomes
+        are recovered by querying the package database afterwards.
+        
+        Args:
+            packages: (removal target, package_type) pairs, package_type 'deb' or 'rpm';
+                see removal_target() for architecture-qualified names
+            progress_callback: Called with a ProcessEvent for every progress report
+        
+        Returns:
+            tuple: (success: bool, message: str, outcomes: dict (target, type) -> (bool, str))
+        """
+        outcomes = {}
+        for package_type, names in uninstall_groups(packages).items():
+            command = self.uninstall_command(package_type)
+            if command is None:
+                outcomes.update(uninstall_failures(package_type, names, no_uninstaller_message(package_type)))
+                continue
+            try:
+                result = self._run_manager(
+                    command + names,
+                    progress_callback,
+                    timeout=config.UNINSTALL_TIMEOUT * len(names),
+                    package_count=len(names)
+                )
+            except subprocess.TimeoutExpired:
+                outcomes.update(uninstall_failures(package_type, names, "Operation timed out"))
+                continue
+            except Exception as e:
+                outcomes.update(uninstall_failures(package_type, names, str(e)))
+                continue
+            
+            remaining = self._query_remaining(package_type, names)
+            outcomes.update(self.uninstall_outcomes(package_type, names, result, remaining))
+        
+        return uninstall_summary(outcomes)
+    
+    def uninstall_outcomes(self, package_type, names, result, remaining):
+        """
+        Work out per-package outcomes of a finished removal
+        
+        Args:
+            package_type: 'deb' or 'rpm'
+            names: Removal targets of the transaction
+            result: ProcessResult of the transaction
+            remaining: Removal targets still installed afterwards (parse_remaining_query()),
+                or None if the package database couldn't be queried
+        
+        Returns:
+            dict: (name, package_type) -> (success, message)
+        """
+        output = result.stdout + result.stderr
+        outcomes = {}
+        for name in names:
+            if remaining is None:
+                # Without the database only the exit status tells what happened
+                removed = result.returncode == 0
+            else:
+                removed = name not in remaining
+            if removed:
+                outcomes[(name, package_type)] = (True, "Package uninstalled successfully")
+            else:
+                details = self._package_error_lines(output, name, name) or output.strip() or "Unknown error"
+                outcomes[(name, package_type)] = (False, f"Uninstallation failed:\n{details}")
+        return outcomes
+    
+    def uninstall_package(self, package_name, package_type, progress_callback=None):
+        """
+        Uninstall an installed package
+        
+        Args:
+            package_name: Installed package name, architecture-qualified as by removal_target()
+            package_type: 'deb' or 'rpm'
+            progress_callback: Called with a ProcessEvent for every progress report
+        
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        _, _, outcomes = self.uninstall_transaction([(package_name, package_type)], progress_callback)
+        return outcomes[(package_name, package_type)]
+    
     def check_permissions(self):
         """Check if the user has necessary permissions"""
         # Check if running as root (Unix/Linux only)
@@ -637,3 +1018,77 @@ class PackageHandler:
             return True
         
         return False
+
+
+def removal_target(name, package_type, arch, native_arch=''):
+    """
+    Get the argument naming exactly one installed package to its package manager
+    
+    Several architectures of a package can be installed side by side, so
+    foreign deb architectures are qualified as name:arch and rpm packages
+    as name.arch; a bare name would remove the native one, or every one.
+    
+    Args:
+        name: Package name
+        package_type: 'deb' or 'rpm'
+        arch: Package architecture
+        native_arch: dpkg's native architecture ('' if unknown: every deb arch but 'all' is qualified)
+    """
+    if package_type == 'deb':
+        return name if arch in ('', 'all', native_arch) else f'{name}:{arch}'
+    if package_type == 'rpm' and arch and arch != '(none)':
+        return f'{name}.{arch}'
+    return name
+
+
+def uninstall_groups(packages):
+    """
+    Group (removal target, package_type) pairs by package type, dropping duplicates
+    
+    Returns:
+        dict: package_type -> removal targets in selection order
+    """
+    groups = {}
+    for name, package_type in packages:
+        groups.setdefault(package_type, {})[name] = None
+    return {package_type: list(names) for package_type, names in groups.items()}
+
+
+def no_uninstaller_message(package_type):
+    """Get the failure message for a package type nothing here can remove"""
+    if package_type in ('deb', 'rpm'):
+        return f"No suitable package manager found for {package_type} packages"
+    return "Unknown package type"
+
+
+def uninstall_failures(package_type, names, message):
+    """Get the same failed outcome for every package of a group"""
+    return {(name, package_type): (False, message) for name in names}
+
+
+def uninstall_summary(outcomes):
+    """
+    Summarize per-package removal outcomes
+    
+    Returns:
+        tuple: (success: bool, message: str, outcomes)
+    """
+    succeeded = sum(1 for ok, _ in outcomes.values() if ok)
+    return succeeded == len(outcomes), f"Removed {succeeded} of {len(outcomes)} package(s)", outcomes
+
+
+def parse_installed_query(output):
+    """
+    Parse 'name<TAB>version<TAB>status' lines from dpkg-query / rpm -q
+    
+    Packages whose dpkg status isn't fully installed ('ii') are left out.
+    
+    Returns:
+        dict: name -> version
+    """
+    installed = {}
+    for line in output.splitlines():
+        parts = line.split('\t')
+        if len(parts) == 3 and parts[2].strip() == 'ii':
+            installed[parts[0]] = parts[1]
+    return installed
@@ -0,0 +1,423 @@
+"""
+Privileged Helper Module
+Keeps one authenticated root process alive for a session so installs,
+fallbacks and uninstalls don't each go through pkexec. The helper listens on
+a Unix socket, only talks to the user who started it (SO_PEERCRED) and only
+runs commands from a fixed vocabulary. It exits after an idle timeout.
+"""
+
+import os
+import re
+import sys
+import json
+import stat
+import time
+import socket
+import struct
+import argparse
+import tempfile
+import threading
+import subprocess
+from . import config
+from .exceptions import CommandNotAllowedError
+from .process_runner import run_streaming, parser_for_command, StatusParser, StreamCollector
+
+
+# Command vocabulary: argv prefix -> what may follow it
+#   install: absolute paths of existing package files
+#   remove: package names
+#   fix: nothing
+COMMAND_TEMPLATES = [
+    (('apt', '-o', 'APT::Status-Fd=1', 'install', '-y'), 'install'),
+    (('dpkg', '--status-fd', '1', '-i'), 'install'),
+    (('dnf', 'install', '-y'), 'install'),
+    (('yum', 'install', '-y'), 'install'),
+    (('zypper', 'install', '-y'), 'install'),
+    (('rpm', '-ivh', '--percent'), 'install'),
+    (('rpm', '-Uvh', '--percent'), 'install'),
+    (('snap', 'install', '--dangerous'), 'install'),
+    (('flatpak', 'install', '-y', '--system', '--bundle'), 'install'),
+    (('apt-get', 'install', '-f', '-y'), 'fix'),
+    (('apt', 'remove', '-y'), 'remove'),
+    (('apt', '-o', 'APT::Status-Fd=1', 'remove', '-y'), 'remove'),
+    (('dpkg', '--status-fd', '1', '-r'), 'remove'),
+    (('dnf', 'remove', '-y'), 'remove'),
+    (('yum', 'remove', '-y'), 'remove'),
+    (('zypper', 'remove', '-y'), 'remove'),
+    (('rpm', '-e'), 'remove'),
+    (('snap', 'remove'), 'remove'),
+    (('flatpak', 'uninstall', '-y', '--system'), 'remove'),
+]
+
+PACKAGE_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9.+_:@~-]*$')
+
+# Environment of every command the helper runs
+HELPER_ENV = {
+    'PATH': '/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin',
+    'LC_ALL': 'C',
+    'DEBIAN_FRONTEND': 'noninteractive',
+}
+
+MAX_REQUEST_SIZE = 64 * 1024
+REQUEST_READ_TIMEOUT = 10  # seconds
+REPLY_SEND_TIMEOUT = 30  # seconds
+TIMEOUT_GRACE = 10  # seconds the client waits past the command timeout
+
+
+def validate_command(argv):
+    """
+    Check a command against the helper vocabulary
+
+    Args:
+        argv: Command without the leading 'pkexec'
+
+    Returns:
+        list: The command to run
+
+    Raises:
+        CommandNotAllowedError: If the command isn't part of the vocabulary
+    """
+    argv = list(argv)
+    for template, kind in sorted(COMMAND_TEMPLATES, key=lambda item: -len(item[0])):
+        if tuple(argv[:len(template)]) == template:
+            targets = argv[len(template):]
+            break
+    else:
+        raise CommandNotAllowedError(argv, "Not a package manager command SnapWiz runs")
+
+    if kind == 'fix':
+        if targets:
+            raise CommandNotAllowedError(argv, "This command takes no arguments")
+        return argv
+    if not targets:
+        raise CommandNotAllowedError(argv, "No packages given")
+
+    for target in targets:
+        if not isinstance(target, str) or target.startswith('-'):
+            raise CommandNotAllowedError(argv, "Options can't be passed as package arguments")
+        if kind == 'install':
+            if not os.path.isabs(target) or not config.is_supported_package(target):
+                raise CommandNotAllowedError(argv, f"Not an absolute package path: {target}")
+            if not os.path.isfile(target):
+                raise CommandNotAllowedError(argv, f"Package file not found: {target}")
+        elif not PACKAGE_NAME.match(target):
+            raise CommandNotAllowedError(argv, f"Invalid package name: {target}")
+    return argv
+
+
+def peer_credentials(conn):
+    """Get (pid, uid, gid) of the process on the other end of a Unix socket"""
+    data = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    return struct.unpack('3i', data)
+
+
+def _encode(message):
+    return json.dumps(message).encode('utf-8') + b'\n'
+
+
+# ==================== Server (runs as root) ====================
+
+class HelperServer:
+    """Serves privileged commands, one connection and one command at a time"""
+
+    def __init__(self, socket_path, allowed_uid, idle_timeout=None, executor=None):
+        """
+        Args:
+            socket_path: Path of the listening socket
+            allowed_uid: User allowed to connect (root is always allowed)
+            idle_timeout: Seconds without a request before the helper exits
+            executor: Function running a validated command (run_streaming
+                      signature), replaceable in tests
+        """
+        self.socket_path = socket_path
+        self.allowed_uids = {allowed_uid, 0}
+        self.allowed_uid = allowed_uid
+        self.idle_timeout = idle_timeout if idle_timeout is not None else config.PRIVILEGED_HELPER_IDLE_TIMEOUT
+        self.executor = executor or run_streaming
+
+    def _bind(self):
+        try:
+            if stat.S_ISSOCK(os.lstat(self.socket_path).st_mode):
+                os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Created 0600 from the start, then handed to the user
+        old_umask = os.umask(0o177)
+        try:
+            listener.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        if os.geteuid() == 0 and self.allowed_uid != 0:
+            os.chown(self.socket_path, self.allowed_uid, -1, follow_symlinks=False)
+        listener.listen(1)
+        return listener
+
+    def serve(self):
+        """Accept requests until shutdown or the idle timeout"""
+        listener = self._bind()
+        listener.settimeout(self.idle_timeout)
+        try:
+            while True:
+                try:
+                    conn, _ = listener.accept()
+                except socket.timeout:
+                    break
+                with conn:
+                    if not self.handle(conn):
+                        break
+        finally:
+            listener.close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    def handle(self, conn):
+        """Handle one connection. Returns False when the helper should exit."""
+        try:
+            _, uid, _ = peer_credentials(conn)
+        except OSError:
+            return True
+        if uid not in self.allowed_uids:
+            return True
+
+        conn.settimeout(REQUEST_READ_TIMEOUT)
+        try:
+            with conn.makefile('rb') as reader:
+                request = json.loads(reader.readline(MAX_REQUEST_SIZE))
+        except (OSError, ValueError):
+            return True
+        if not isinstance(request, dict):
+            return True
+
+        conn.settimeout(REPLY_SEND_TIMEOUT)
+        client = {'connected': True}
+
+        def send(message):
+            if not client['connected']:
+                return
+            try:
+                conn.sendall(_encode(message))
+            except OSError:
+                # The client went away; let the package manager finish anyway,
+                # killing it mid-transaction would leave the database broken
+                client['connected'] = False
+
+        op = request.get('op')
+        if op == 'ping':
+            send({'ok': True, 'pid': os.getpid()})
+            return True
+        if op == 'shutdown':
+            send({'ok': True})
+            return False
+
+        try:
+            argv = validate_command(request.get('argv') or [])
+        except CommandNotAllowedError as e:
+            send({'error': e.reason, 'kind': 'rejected'})
+            return True
+
+        timeout = request.get('timeout')
+        try:
+            result = self.executor(
+                argv,
+                on_line=lambda stream, line: send({'stream': stream, 'line': line}),
+                parser=StatusParser(),
+                timeout=timeout if isinstance(timeout, (int, float)) else config.INSTALLATION_TIMEOUT,
+                env=HELPER_ENV
+            )
+        except subprocess.TimeoutExpired:
+            send({'error': 'Command timed out', 'kind': 'timeout'})
+            return True
+        except FileNotFoundError as e:
+            send({'error': str(e), 'kind': 'missing'})
+            return True
+        except Exception as e:
+            send({'error': str(e), 'kind': 'failed'})
+            return True
+        send({'exit': result.returncode})
+        return True
+
+
+def main(argv=None):
+    """Entry point of the helper process (started through pkexec)"""
+    parser = argparse.ArgumentParser(description="SnapWiz privileged helper")
+    parser.add_argument('--socket', required=True)
+    parser.add_argument('--uid', type=int)
+    parser.add_argument('--idle-timeout', type=float, default=config.PRIVILEGED_HELPER_IDLE_TIMEOUT)
+    args = parser.parse_args(argv)
+
+    # pkexec records who authenticated, prefer that over the command line
+    uid = int(os.environ['PKEXEC_UID']) if 'PKEXEC_UID' in os.environ else args.uid
+    if uid is None:
+        parser.error("--uid is required outside pkexec")
+    HelperServer(args.socket, uid, args.idle_timeout).serve()
+    return 0
+
+
+# ==================== Client ====================
+
+def default_socket_path():
+    """Get a per-process socket path in the user's runtime directory"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"snapwiz-helper-{os.getuid()}-{os.getpid()}.sock")
+
+
+def helper_command(socket_path, uid, idle_timeout):
+    """Get the pkexec command line starting the helper"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    bootstrap = (
+        f"import sys; sys.path.insert(0, {root!r}); "
+        "from src.privileged_helper import main; sys.exit(main())"
+    )
+    return [
+        'pkexec', sys.executable, '-I', '-c', bootstrap,
+        '--socket', socket_path, '--uid', str(uid), '--idle-timeout', str(idle_timeout)
+    ]
+
+
+class PrivilegedHelper:
+    """
+    Client side of the privileged helper
+
+    run() takes the same 'pkexec ...' commands PackageHandler would run
+    directly. The helper is started (and authenticated) on first use; if
+    authentication is dismissed, commands fall back to plain pkexec.
+    """
+
+    def __init__(self, socket_path=None, idle_timeout=None, start_timeout=None):
+        self.socket_path = socket_path or default_socket_path()
+        self.idle_timeout = idle_timeout if idle_timeout is not None else config.PRIVILEGED_HELPER_IDLE_TIMEOUT
+        self.start_timeout = start_timeout if start_timeout is not None else config.PRIVILEGED_HELPER_START_TIMEOUT
+        self.process = None
+        self.unavailable = False  # Authentication refused or the helper failed to start
+        self._lock = threading.Lock()
+
+    def _connect(self, timeout):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def ping(self):
+        """Check whether a helper is answering on the socket"""
+        try:
+            with self._connect(2) as sock, sock.makefile('rb') as replies:
+                sock.sendall(_encode({'op': 'ping'}))
+                return bool(json.loads(replies.readline()).get('ok'))
+        except (OSError, ValueError, AttributeError):
+            return False
+
+    def start(self):
+        """Start the helper unless one is already running. Returns True if it answers."""
+        if self.ping():
+            return True
+        if self.unavailable:
+            return False
+        try:
+            self.process = subprocess.Popen(
+                helper_command(self.socket_path, os.getuid(), self.idle_timeout),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError:
+            self.unavailable = True
+            return False
+
+        # The user may need a while to type the password
+        deadline = time.monotonic() + self.start_timeout
+        while time.monotonic() < deadline:
+            if self.ping():
+                return True
+            if self.process.poll() is not None:
+                break
+            time.sleep(0.05)
+
+        self.unavailable = True
+        if self.process.poll() is None:
+            try:
+                self.process.kill()
+            except OSError:
+                pass
+        self.process = None
+        return False
+
+    def run(self, command, on_event=None, parser=None, timeout=None, capture_limit=None):
+        """
+        Run a command, through the helper when it needs privileges
+
+        Args:
+            command: Command line; commands starting with 'pkexec' go to the helper
+            on_event, parser, timeout, capture_limit: As for run_streaming
+
+        Returns:
+            ProcessResult
+
+        Raises:
+            subprocess.TimeoutExpired: If the command didn't finish in time
+            CommandNotAllowedError: If the helper rejected the command
+        """
+        if not command or command[0] != 'pkexec':
+            return run_streaming(command, on_event, parser, timeout, capture_limit)
+        if parser is None:
+            parser = parser_for_command(command)
+
+        with self._lock:
+            wait = None if timeout is None else timeout + TIMEOUT_GRACE
+            sock = None
+            if self.start():
+                try:
+                    sock = self._connect(wait)
+                except OSError:
+                    # The helper hit its idle timeout in between, authenticate again
+                    if self.start():
+                        sock = self._connect(wait)
+            if sock is None:
+                return run_streaming(command, on_event, parser, timeout, capture_limit)
+            return self._run_remote(sock, command, on_event, parser, timeout, capture_limit)
+
+    def _run_remote(self, sock, command, on_event, parser, timeout, capture_limit):
+        start = time.monotonic()
+        argv = command[1:]
+        collector = StreamCollector(parser, on_event, capture_limit)
+        with sock, sock.makefile('rb') as replies:
+            try:
+                sock.sendall(_encode({'argv': argv, 'timeout': timeout}))
+                for raw in replies:
+                    reply = json.loads(raw)
+                    if 'line' in reply:
+                        collector.line(reply.get('stream'), reply['line'])
+                    elif 'exit' in reply:
+                        return collector.result(command, reply['exit'], time.monotonic() - start)
+                    elif reply.get('kind') == 'timeout':
+                        raise subprocess.TimeoutExpired(command, timeout)
+                    elif reply.get('kind') == 'rejected':
+                        raise CommandNotAllowedError(argv, reply.get('error', ''))
+                    elif reply.get('kind') == 'missing':
+                        raise FileNotFoundError(reply.get('error', ''))
+                    else:
+                        raise OSError(reply.get('error', 'Privileged helper failed'))
+            except socket.timeout:
+                raise subprocess.TimeoutExpired(command, timeout)
+        raise ConnectionError("Privileged helper closed the connection")
+
+    def stop(self):
+        """Ask the helper to exit"""
+        try:
+            with self._connect(2) as sock, sock.makefile('rb') as replies:
+                sock.sendall(_encode({'op': 'shutdown'}))
+                replies.readline()
+        except OSError:
+            pass
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+            self.process = None
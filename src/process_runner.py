@@ -0,0 +1,480 @@
+"""
+Process Runner Module
+Runs package manager commands with non-blocking pipe reads, turning their
+status channels into progress events as they arrive and keeping only a
+bounded amount of output in memory.
+"""
+
+import os
+import re
+import time
+import asyncio
+import selectors
+import subprocess
+from collections import deque
+from . import config
+
+
+class ProcessEvent:
+    """Progress or phase change reported by a running command"""
+
+    __slots__ = ('percent', 'phase', 'package', 'message')
+
+    def __init__(self, percent=None, phase='', package='', message=''):
+        """
+        Args:
+            percent: Overall progress 0-100, or None if unknown
+            phase: Short phase name ('Unpacking', 'Installing', ...)
+            package: Package the event is about, if known
+            message: Human readable description
+        """
+        self.percent = percent
+        self.phase = phase
+        self.package = package
+        self.message = message
+
+    def __repr__(self):
+        return f"ProcessEvent({self.percent!r}, {self.phase!r}, {self.package!r})"
+
+
+class UnstoppedTimeout(subprocess.TimeoutExpired):
+    """
+    A command timed out and could not be stopped
+
+    Usually a pkexec child running as root, which the unprivileged caller
+    isn't allowed to signal. The process may still be running.
+    """
+
+    def __init__(self, cmd, timeout, pid, reason):
+        super().__init__(cmd, timeout)
+        self.pid = pid
+        self.reason = reason
+
+    def __str__(self):
+        return f"{super().__str__()} It could not be stopped ({self.reason}); process {self.pid} may still be running."
+
+
+class BoundedCapture:
+    """
+    Keeps the beginning and the end of a stream within a byte budget
+
+    The head usually holds the resolver summary and the tail the error,
+    so only the middle of very long outputs is dropped.
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit if limit is not None else config.PROCESS_OUTPUT_LIMIT
+        self.head_limit = self.limit // 4
+        self.head = []
+        self.head_size = 0
+        self.tail = deque()
+        self.tail_size = 0
+        self.dropped = 0
+
+    def append(self, line):
+        size = len(line)
+        if self.head_size + size <= self.head_limit and not self.tail:
+            self.head.append(line)
+            self.head_size += size
+            return
+        self.tail.append(line)
+        self.tail_size += size
+        while self.tail_size > self.limit - self.head_size and len(self.tail) > 1:
+            removed = self.tail.popleft()
+            self.tail_size -= len(removed)
+            self.dropped += len(removed)
+
+    def text(self):
+        parts = self.head
+        if self.dropped:
+            parts = parts + [f"... [{self.dropped} bytes of output omitted] ...\n"]
+        return ''.join(parts) + ''.join(self.tail)
+
+
+class ProcessResult:
+    """Outcome of run_streaming, shaped like subprocess.CompletedProcess"""
+
+    def __init__(self, args, returncode, stdout, stderr, duration):
+        self.args = args
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.duration = duration
+
+
+# ==================== Status parsers ====================
+
+class StatusParser:
+    """Base parser: turns output lines into ProcessEvents"""
+
+    def feed(self, line):
+        """
+        Parse one line of stdout
+
+        Returns:
+            tuple: (list of ProcessEvent, keep: bool) where keep tells if the
+            line belongs in the captured output
+        """
+        return [], True
+
+
+# apt: "pmstatus:libc6:amd64:42.8571:Unpacking libc6:amd64 (2.35)". Both the
+# package (multi-arch) and the description may contain ':', the percentage is
+# the first numeric field after the package.
+APT_STATUS_LINE = re.compile(r'^(pmstatus|dlstatus|pmerror):(.*?):([\d.]+):(.*)$')
+
+
+class AptStatusParser(StatusParser):
+    """Parses apt's APT::Status-Fd lines (pmstatus/dlstatus/pmerror)"""
+
+    def feed(self, line):
+        for prefix in ('pmstatus:', 'dlstatus:', 'pmerror:', 'pmconffile:', 'media-change:'):
+            if line.startswith(prefix):
+                break
+        else:
+            return [], True
+
+        match = APT_STATUS_LINE.match(line.rstrip('\n'))
+        kind = match.group(1) if match else prefix[:-1]
+        if kind == 'pmstatus' and match:
+            _, package, percent, description = match.groups()
+            try:
+                value = float(percent)
+            except ValueError:
+                value = None
+            return [ProcessEvent(value, description.split(' ', 1)[0], package, description)], False
+        if kind == 'dlstatus' and match:
+            # Download progress runs before dpkg starts, report it as a phase only
+            return [ProcessEvent(None, 'Downloading', match.group(2), match.group(4))], False
+        if kind == 'pmerror':
+            # Keep errors in the output as well
+            return [ProcessEvent(None, 'Error', match.group(2) if match else '', line.strip())], True
+        return [], False
+
+
+class DpkgStatusParser(StatusParser):
+    """
+    Parses dpkg --status-fd lines
+
+    dpkg doesn't report a percentage, so progress is derived from the number
+    of unpack and configure steps expected for the given package count.
+    """
+
+    STEPS = ('unpacked', 'installed')
+
+    def __init__(self, package_count=1):
+        self.total = max(1, package_count) * len(self.STEPS)
+        self.done = 0
+        self.seen = set()
+
+    def feed(self, line):
+        # Package names may carry an architecture ("libc6:amd64"), so only
+        # the fixed fields are split off
+        if line.startswith('processing:'):
+            parts = [p.strip() for p in line.split(':', 2)]
+            if len(parts) == 3:
+                return [ProcessEvent(None, parts[1].capitalize(), parts[2], line.strip())], False
+            return [], False
+        if not line.startswith('status:'):
+            return [], True
+
+        parts = [p.strip() for p in line[len('status:'):].rsplit(':', 1)]
+        if len(parts) < 2:
+            return [], False
+        package, state = parts
+        if state in self.STEPS and (package, state) not in self.seen:
+            self.seen.add((package, state))
+            self.done = min(self.total, self.done + 1)
+        percent = self.done * 100.0 / self.total
+        return [ProcessEvent(percent, state.capitalize(), package, f"{package}: {state}")], False
+
+
+# dnf/yum:    "  Installing       : foo-1.0-1.x86_64            1/4"
+DNF_LINE = re.compile(
+    r'^\s*(Preparing|Installing|Upgrading|Updating|Reinstalling|Downgrading|Cleanup|Erasing|Removing|'
+    r'Obsoleting|Running scriptlet|Verifying)\s*:\s*(\S+).*?(\d+)\s*/\s*(\d+)\s*$'
+)
+# zypper:     "(1/3) Installing: foo-1.0-1.x86_64 ...[done]"
+ZYPPER_LINE = re.compile(r'^\((\d+)/(\d+)\)\s+(Installing|Removing)[:]?\s+(\S+)')
+# rpm --percent: "%% 45.000000"
+RPM_PERCENT_LINE = re.compile(r'^%%\s*([\d.]+)')
+GENERIC_PERCENT = re.compile(r'(\d{1,3}(?:\.\d+)?)\s*%')
+
+
+class DnfProgressParser(StatusParser):
+    """Parses the RPM transaction lines of dnf/yum and zypper"""
+
+    # Share of the overall progress for the transaction and verify passes
+    TRANSACTION_SHARE = 80.0
+
+    def feed(self, line):
+        match = DNF_LINE.match(line)
+        if match:
+            phase, package, step, total = match.group(1), match.group(2), int(match.group(3)), int(match.group(4))
+            fraction = step / total if total else 0
+            if phase == 'Verifying':
+                percent = self.TRANSACTION_SHARE + fraction * (100 - self.TRANSACTION_SHARE)
+            elif phase == 'Running scriptlet':
+                percent = None
+            else:
+                percent = fraction * self.TRANSACTION_SHARE
+            return [ProcessEvent(percent, phase, package, line.strip())], True
+
+        match = ZYPPER_LINE.match(line)
+        if match:
+            step, total = int(match.group(1)), int(match.group(2))
+            percent = step * 100.0 / total if total else None
+            return [ProcessEvent(percent, match.group(3), match.group(4), line.strip())], True
+
+        return [], True
+
+
+class RpmPercentParser(StatusParser):
+    """Parses rpm --percent output"""
+
+    def feed(self, line):
+        match = RPM_PERCENT_LINE.match(line)
+        if match:
+            return [ProcessEvent(min(100.0, float(match.group(1))), 'Installing')], False
+        if line.strip() and not line.startswith('#'):
+            return [ProcessEvent(None, 'Installing', line.strip(), line.strip())], True
+        return [], True
+
+
+class PercentParser(StatusParser):
+    """Fallback for tools that print 'NN%' progress (snap, flatpak)"""
+
+    def feed(self, line):
+        matches = GENERIC_PERCENT.findall(line)
+        if matches:
+            return [ProcessEvent(min(100.0, float(matches[-1])), '', '', line.strip())], False
+        return [], True
+
+
+def parser_for_command(args, package_count=1):
+    """Pick the status parser matching a package manager command line"""
+    words = [os.path.basename(arg) for arg in args[:2]]
+    if 'apt' in words or 'apt-get' in words:
+        return AptStatusParser()
+    if 'dpkg' in words:
+        return DpkgStatusParser(package_count)
+    if any(word in ('dnf', 'yum', 'zypper') for word in words):
+        return DnfProgressParser()
+    if 'rpm' in words:
+        return RpmPercentParser()
+    return PercentParser()
+
+
+# ==================== Runner ====================
+
+LINE_END = re.compile(rb'(?<=[\r\n])')
+
+
+def _split_lines(pending, data):
+    """Split buffered bytes into complete lines ('\\n' or '\\r' terminated)"""
+    pieces = LINE_END.split(pending + data)
+    return pieces[:-1], pieces[-1]
+
+
+def _decode_line(raw):
+    line = raw.decode('utf-8', 'replace')
+    if line.endswith('\r'):
+        line = line[:-1] + '\n'
+    return line
+
+
+class StreamCollector:
+    """
+    Parses and captures the lines of a running command
+
+    Shared by run_streaming and the privileged helper client, which receives
+    the same lines over its socket instead of from pipes.
+    """
+
+    def __init__(self, parser, on_event=None, capture_limit=None):
+        self.parser = parser
+        self.on_event = on_event
+        self.captures = {
+            'stdout': BoundedCapture(capture_limit),
+            'stderr': BoundedCapture(capture_limit),
+        }
+
+    def line(self, stream, line):
+        """Handle one line of 'stdout' or 'stderr'"""
+        keep = True
+        if stream == 'stdout':
+            events, keep = self.parser.feed(line)
+            if self.on_event is not None:
+                for event in events:
+                    self.on_event(event)
+        if keep and line.strip():
+            self.captures[stream].append(line)
+
+    def result(self, args, returncode, duration):
+        return ProcessResult(
+            args,
+            returncode,
+            self.captures['stdout'].text(),
+            self.captures['stderr'].text(),
+            duration
+        )
+
+
+def run_streaming(args, on_event=None, parser=None, timeout=None, capture_limit=None, env=None, on_line=None):
+    """
+    Run a command, reporting progress while it runs
+
+    Args:
+        args: Command line
+        on_event: Called with each ProcessEvent, from the calling thread
+        parser: StatusParser for stdout (defaults to parser_for_command(args))
+        timeout: Seconds before the command is killed
+        capture_limit: Bytes of stdout and of stderr kept in memory
+        env: Environment for the child
+        on_line: Called as on_line(stream, line) for every raw line, before parsing
+
+    Returns:
+        ProcessResult
+
+    Raises:
+        subprocess.TimeoutExpired: If the command didn't finish in time
+            (UnstoppedTimeout if it couldn't be killed and reaped)
+        FileNotFoundError: If the command doesn't exist
+    """
+    if parser is None:
+        parser = parser_for_command(args)
+    start = time.monotonic()
+    deadline = start + timeout if timeout else None
+
+    process = subprocess.Popen(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env
+    )
+    collector = StreamCollector(parser, on_event, capture_limit)
+    streams = {process.stdout.fileno(): 'stdout', process.stderr.fileno(): 'stderr'}
+    pending = {fd: b'' for fd in streams}
+
+    def handle_line(fd, raw):
+        line = _decode_line(raw)
+        if on_line is not None:
+            on_line(streams[fd], line)
+        collector.line(streams[fd], line)
+
+    with selectors.DefaultSelector() as selector:
+        for pipe in (process.stdout, process.stderr):
+            os.set_blocking(pipe.fileno(), False)
+            selector.register(pipe, selectors.EVENT_READ)
+
+        try:
+            while selector.get_map():
+                wait = None
+                if deadline is not None:
+                    wait = deadline - time.monotonic()
+                    if wait <= 0:
+                        raise subprocess.TimeoutExpired(args, timeout)
+                for key, _ in selector.select(wait):
+                    fd = key.fileobj.fileno()
+                    try:
+                        data = os.read(fd, 65536)
+                    except BlockingIOError:
+                        continue
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        if pending[fd]:
+                            handle_line(fd, pending[fd])
+                            pending[fd] = b''
+                        continue
+                    lines, pending[fd] = _split_lines(pending[fd], data)
+                    for raw in lines:
+                        handle_line(fd, raw)
+
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            returncode = process.wait(timeout=remaining)
+        except subprocess.TimeoutExpired:
+            reason = _kill(process)
+            if reason is None:
+                try:
+                    process.wait(timeout=config.PROCESS_KILL_WAIT)
+                except subprocess.TimeoutExpired:
+                    reason = "it did not exit after being killed"
+            if reason is not None:
+                raise UnstoppedTimeout(args, timeout, process.pid, reason) from None
+            raise
+        finally:
+            process.stdout.close()
+            process.stderr.close()
+
+    return collector.result(args, returncode, time.monotonic() - start)
+
+
+async def run_streaming_async(args, on_event=None, parser=None, timeout=None, capture_limit=None, env=None):
+    """
+    asyncio version of run_streaming
+
+    Same arguments and result; on_event is called from the event loop. The
+    child is killed if the command times out or the awaiting task is cancelled.
+
+    Raises:
+        subprocess.TimeoutExpired: If the command didn't finish in time
+            (UnstoppedTimeout if it couldn't be killed and reaped)
+        FileNotFoundError: If the command doesn't exist
+    """
+    if parser is None:
+        parser = parser_for_command(args)
+    start = time.monotonic()
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env
+    )
+    collector = StreamCollector(parser, on_event, capture_limit)
+
+    async def pump(stream, name):
+        pending = b''
+        while True:
+            data = await stream.read(65536)
+            if not data:
+                break
+            lines, pending = _split_lines(pending, data)
+            for raw in lines:
+                collector.line(name, _decode_line(raw))
+        if pending:
+            collector.line(name, _decode_line(pending))
+
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(pump(process.stdout, 'stdout'), pump(process.stderr, 'stderr'), process.wait()),
+            timeout
+        )
+    except asyncio.TimeoutError:
+        reason = _kill(process)
+        if reason is None:
+            try:
+                await asyncio.wait_for(process.wait(), config.PROCESS_KILL_WAIT)
+            except asyncio.TimeoutError:
+                reason = "it did not exit after being killed"
+        if reason is not None:
+            raise UnstoppedTimeout(args, timeout, process.pid, reason) from None
+        raise subprocess.TimeoutExpired(args, timeout)
+    except asyncio.CancelledError:
+        _kill(process)
+        raise
+
+    return collector.result(args, process.returncode, time.monotonic() - start)
+
+
+def _kill(process):
+    """Kill a child, returning why it couldn't be signalled or None"""
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass        # Already gone
+    except OSError as e:
+        # A privileged child isn't ours to signal
+        return e.strerror or str(e)
+    return None
@@ -0,0 +1,406 @@
+"""
+RPM Package Reader
+Pure-Python decoder for the RPM lead, signature header and main header.
+Only the header region of the file is touched (through a memory map), the
+compressed payload is never read.
+"""
+
+import os
+import mmap
+import struct
+from .exceptions import InvalidPackageError
+
+
+LEAD_MAGIC = b'\xed\xab\xee\xdb'
+LEAD_SIZE = 96
+HEADER_MAGIC = b'\x8e\xad\xe8\x01'
+HEADER_INTRO_SIZE = 16  # magic (4) + reserved (4) + index count (4) + store size (4)
+INDEX_ENTRY_SIZE = 16
+
+# Tag data types
+RPM_NULL_TYPE = 0
+RPM_CHAR_TYPE = 1
+RPM_INT8_TYPE = 2
+RPM_INT16_TYPE = 3
+RPM_INT32_TYPE = 4
+RPM_INT64_TYPE = 5
+RPM_STRING_TYPE = 6
+RPM_BIN_TYPE = 7
+RPM_STRING_ARRAY_TYPE = 8
+RPM_I18NSTRING_TYPE = 9
+
+_INT_FORMATS = {
+    RPM_CHAR_TYPE: ('B', 1),
+    RPM_INT8_TYPE: ('B', 1),
+    RPM_INT16_TYPE: ('H', 2),
+    RPM_INT32_TYPE: ('I', 4),
+    RPM_INT64_TYPE: ('Q', 8),
+}
+
+# Main header tags
+RPMTAG_NAME = 1000
+RPMTAG_VERSION = 1001
+RPMTAG_RELEASE = 1002
+RPMTAG_EPOCH = 1003
+RPMTAG_SUMMARY = 1004
+RPMTAG_DESCRIPTION = 1005
+RPMTAG_SIZE = 1009
+RPMTAG_LICENSE = 1014
+RPMTAG_URL = 1020
+RPMTAG_ARCH = 1022
+RPMTAG_ARCHIVESIZE = 1046
+RPMTAG_PROVIDENAME = 1047
+RPMTAG_REQUIREFLAGS = 1048
+RPMTAG_REQUIRENAME = 1049
+RPMTAG_PAYLOADFORMAT = 1124
+RPMTAG_PAYLOADCOMPRESSOR = 1125
+RPMTAG_LONGSIZE = 5009
+RPMTAG_PAYLOADDIGEST = 5092
+RPMTAG_PAYLOADDIGESTALGO = 5093
+
+# Signature header tags
+RPMSIGTAG_SIZE = 1000
+RPMSIGTAG_MD5 = 1004
+RPMSIGTAG_PAYLOADSIZE = 1007
+RPMSIGTAG_SHA1 = 269
+RPMSIGTAG_LONGSIZE = 270
+RPMSIGTAG_LONGARCHIVESIZE = 271
+RPMSIGTAG_SHA256 = 273
+
+# Requires flagged with RPMSENSE_RPMLIB are rpm feature checks, not packages
+RPMSENSE_RPMLIB = 1 << 24
+
+# PGP hash algorithm ids used by RPMTAG_PAYLOADDIGESTALGO
+DIGEST_ALGOS = {1: 'md5', 2: 'sha1', 8: 'sha256', 9: 'sha384', 10: 'sha512'}
+
+
+class RpmHeader:
+    """
+    An RPM header structure (signature or main header)
+
+    Tag values are decoded lazily from the data store on lookup.
+    """
+
+    def __init__(self, entries, store, package_path=''):
+        """
+        Args:
+            entries: Dict of tag -> (type, offset, count)
+            store: Bytes of the header data store
+            package_path: Path used in error messages
+        """
+        self.entries = entries
+        self.store = store
+        self.package_path = package_path
+
+    def __contains__(self, tag):
+        return tag in self.entries
+
+    def get(self, tag, default=None):
+        """Decode a tag value; scalars for count 1 ints and strings, lists otherwise"""
+        if tag not in self.entries:
+            return default
+
+        data_type, offset, count = self.entries[tag]
+        store = self.store
+
+        if data_type in _INT_FORMATS:
+            fmt, size = _INT_FORMATS[data_type]
+            end = offset + size * count
+            if end > len(store):
+                raise InvalidPackageError(self.package_path, f"Tag {tag} points outside the header store")
+            values = list(struct.unpack(f'>{count}{fmt}', store[offset:end]))
+            return values[0] if count == 1 else values
+
+        if data_type == RPM_BIN_TYPE:
+            if offset + count > len(store):
+                raise InvalidPackageError(self.package_path, f"Tag {tag} points outside the header store")
+            return bytes(store[offset:offset + count])
+
+        if data_type in (RPM_STRING_TYPE, RPM_STRING_ARRAY_TYPE, RPM_I18NSTRING_TYPE):
+            strings = []
+            pos = offset
+            for _ in range(count):
+                end = store.find(b'\0', pos)
+                if end < 0:
+                    raise InvalidPackageError(self.package_path, f"Unterminated string in tag {tag}")
+                strings.append(bytes(store[pos:end]).decode('utf-8', 'replace'))
+                pos = end + 1
+            if data_type == RPM_STRING_TYPE:
+                return strings[0] if strings else ''
+            if data_type == RPM_I18NSTRING_TYPE:
+                # First entry is the C locale
+                return strings[0] if strings else ''
+            return strings
+
+        return default
+
+    def get_list(self, tag):
+        """Decode a tag value and always return a list"""
+        value = self.get(tag)
+        if value is None:
+            return []
+        return value if isinstance(value, list) else [value]
+
+
+def parse_header(buf, offset=0, package_path='', with_magic=True, tags=None):
+    """
+    Parse a header structure
+
+    Args:
+        buf: Buffer holding the header
+        offset: Offset of the header in buf
+        package_path: Path used in error messages
+        with_magic: False for headers stored without the 8 byte magic/reserved
+                    preamble (e.g. blobs in rpmdb.sqlite)
+        tags: Only index these tags (all tags if None)
+
+    Returns:
+        tuple: (RpmHeader, offset just past the header)
+    """
+    pos = offset
+    if with_magic:
+        if bytes(buf[pos:pos + 4]) != HEADER_MAGIC:
+            raise InvalidPackageError(package_path, f"Bad RPM header magic at offset {pos}")
+        pos += 8
+
+    if pos + 8 > len(buf):
+        raise InvalidPackageError(package_path, "Truncated RPM header")
+    index_count, store_size = struct.unpack('>II', buf[pos:pos + 8])
+    pos += 8
+
+    index_end = pos + index_count * INDEX_ENTRY_SIZE
+    store_end = index_end + store_size
+    if store_end > len(buf):
+        raise InvalidPackageError(package_path, "RPM header extends past end of file (truncated download?)")
+
+    entries = {}
+    for tag, data_type, data_offset, count in struct.iter_unpack('>IIiI', buf[pos:index_end]):
+        if tags is not None and tag not in tags:
+            continue
+        if data_offset < 0 or data_offset > store_size:
+            raise InvalidPackageError(package_path, f"Tag {tag} has an invalid data offset")
+        entries[tag] = (data_type, data_offset, count)
+
+    store = bytes(buf[index_end:store_end])
+    return RpmHeader(entries, store, package_path), store_end
+
+
+def header_requires(header):
+    """Get the required capabilities of a header, without rpmlib() feature checks"""
+    names = header.get_list(RPMTAG_REQUIRENAME)
+    flags = header.get_list(RPMTAG_REQUIREFLAGS)
+    if len(flags) != len(names):
+        flags = [0] * len(names)
+    seen = []
+    for name, flag in zip(names, flags):
+        if flag & RPMSENSE_RPMLIB or name.startswith('rpmlib('):
+            continue
+        if name not in seen:
+            seen.append(name)
+    return seen
+
+
+class RpmPackageInfo:
+    """Structured result of reading an .rpm package"""
+
+    def __init__(self, path, header, signature, header_end, file_size):
+        self.path = path
+        self.header = header
+        self.signature = signature
+        self.header_end = header_end
+        self.file_size = file_size
+
+    @property
+    def name(self):
+        return self.header.get(RPMTAG_NAME, '')
+
+    @property
+    def version(self):
+        return self.header.get(RPMTAG_VERSION, '')
+
+    @property
+    def release(self):
+        return self.header.get(RPMTAG_RELEASE, '')
+
+    @property
+    def epoch(self):
+        return self.header.get(RPMTAG_EPOCH)
+
+    @property
+    def arch(self):
+        return self.header.get(RPMTAG_ARCH, '')
+
+    @property
+    def summary(self):
+        return self.header.get(RPMTAG_SUMMARY, '')
+
+    @property
+    def description(self):
+        return self.header.get(RPMTAG_DESCRIPTION, '')
+
+    @property
+    def nevra(self):
+        epoch = f"{self.epoch}:" if self.epoch else ''
+        return f"{self.name}-{epoch}{self.version}-{self.release}.{self.arch}"
+
+    @property
+    def installed_size(self):
+        """Installed size in bytes"""
+        return self.header.get(RPMTAG_LONGSIZE, self.header.get(RPMTAG_SIZE))
+
+    @property
+    def payload_size(self):
+        """Size of the (compressed) header + payload section, from the signature"""
+        return self.signature.get(RPMSIGTAG_LONGSIZE, self.signature.get(RPMSIGTAG_SIZE))
+
+    @property
+    def requires(self):
+        """Required capabilities, without rpmlib() feature checks"""
+        return header_requires(self.header)
+
+    @property
+    def provides(self):
+        return self.header.get_list(RPMTAG_PROVIDENAME)
+
+    @property
+    def digests(self):
+        """Digests recorded in the signature and main header"""
+        digests = {}
+        md5 = self.signature.get(RPMSIGTAG_MD5)
+        if md5:
+            digests['header+payload md5'] = md5.hex()
+        sha1 = self.signature.get(RPMSIGTAG_SHA1)
+        if sha1:
+            digests['header sha1'] = sha1
+        sha256 = self.signature.get(RPMSIGTAG_SHA256)
+        if sha256:
+            digests['header sha256'] = sha256
+        payload = self.header.get_list(RPMTAG_PAYLOADDIGEST)
+        if payload:
+            algo = DIGEST_ALGOS.get(self.header.get(RPMTAG_PAYLOADDIGESTALGO), 'unknown')
+            digests[f'payload {algo}'] = payload[0]
+        return digests
+
+    def to_dict(self):
+        """Get a JSON-serializable view of the package info"""
+        return {
+            'format': 'rpm',
+            'name': self.name,
+            'epoch': self.epoch,
+            'version': self.version,
+            'release': self.release,
+            'arch': self.arch,
+            'summary': self.summary,
+            'description': self.description,
+            'license': self.header.get(RPMTAG_LICENSE, ''),
+            'url': self.header.get(RPMTAG_URL, ''),
+            'installed_size': self.installed_size,
+            'payload_size': self.payload_size,
+            'payload_format': self.header.get(RPMTAG_PAYLOADFORMAT, ''),
+            'payload_compressor': self.header.get(RPMTAG_PAYLOADCOMPRESSOR, ''),
+            'requires': self.requires,
+            'provides': self.provides,
+            'digests': self.digests,
+        }
+
+
+def header_region_end(prefix):
+    """
+    Work out where the main header ends from the start of a file
+
+    Args:
+        prefix: The first bytes of the file
+
+    Returns:
+        int end offset, or None if prefix is too short to tell yet
+    """
+    def header_end(pos):
+        if len(prefix) < pos + HEADER_INTRO_SIZE:
+            return None
+        index_count, store_size = struct.unpack('>II', prefix[pos + 8:pos + 16])
+        return pos + HEADER_INTRO_SIZE + index_count * INDEX_ENTRY_SIZE + store_size
+
+    signature_end = header_end(LEAD_SIZE)
+    if signature_end is None:
+        return None
+    # The main header is aligned to 8 bytes after the signature
+    return header_end(signature_end + (8 - signature_end % 8) % 8)
+
+
+def read_rpm_buffer(buf, package_path='', file_size=None):
+    """
+    Read an .rpm held in a buffer and validate its structure
+
+    Args:
+        buf: Buffer holding the file, or at least its header region
+        package_path: Path used in error messages
+        file_size: Real file size when buf only holds the header region
+
+    Raises:
+        InvalidPackageError: If the package is structurally invalid
+    """
+    if file_size is None:
+        file_size = len(buf)
+    if len(buf) < LEAD_SIZE or bytes(buf[:4]) != LEAD_MAGIC:
+        raise InvalidPackageError(package_path, "Not an RPM package (bad lead magic)")
+
+    major = buf[4]
+    if major not in (3, 4):
+        raise InvalidPackageError(package_path, f"Unsupported RPM format version {major}")
+
+    signature, pos = parse_header(buf, LEAD_SIZE, package_path)
+    # The main header is aligned to 8 bytes after the signature
+    pos += (8 - pos % 8) % 8
+    header, header_end = parse_header(buf, pos, package_path)
+
+    if RPMTAG_NAME not in header:
+        raise InvalidPackageError(package_path, "RPM header has no package name")
+
+    info = RpmPackageInfo(package_path, header, signature, header_end, file_size)
+
+    # Signature size covers main header + payload, so it tells us about truncation
+    expected = info.payload_size
+    if expected is not None and pos + expected != file_size:
+        raise InvalidPackageError(
+            package_path,
+            f"Size mismatch: header declares {pos + expected} bytes, file has {file_size} (truncated or padded?)"
+        )
+
+    return info
+
+
+def read_rpm(package_path):
+    """
+    Read an .rpm package from disk
+
+    Returns:
+        RpmPackageInfo
+
+    Raises:
+        InvalidPackageError: If the package is structurally invalid
+        OSError: If the file cannot be opened
+    """
+    with open(package_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise InvalidPackageError(package_path, "File is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return read_rpm_buffer(mapped, package_path)
+
+
+def format_rpm_info(info):
+    """Format RpmPackageInfo for the package info panel"""
+    lines = [
+        "Package Type: RPM",
+        "",
+        f"Name        : {info.name}",
+        f"Version     : {info.version}",
+        f"Release     : {info.release}",
+        f"Architecture: {info.arch}",
+    ]
+    if info.installed_size:
+        lines.append(f"Size        : {info.installed_size}")
+    if info.summary:
+        lines.append(f"Summary     : {info.summary}")
+    if info.description:
+        lines.append(f"Description :\n{info.description}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,450 @@
+"""
+SquashFS Reader for Snap Packages
+Parses the squashfs superblock, inode table and directory table to find a
+single file (meta/snap.yaml) and decompresses only that file, so previewing
+a large .snap costs a few metadata blocks of I/O.
+"""
+
+import os
+import mmap
+import zlib
+import lzma
+import struct
+from .exceptions import InvalidPackageError, UnsupportedCompressionError
+
+try:
+    import lzo
+except ImportError:  # Optional, only needed for lzo-compressed images
+    lzo = None
+
+try:
+    import zstandard
+except ImportError:  # Optional, only needed for zstd-compressed images
+    zstandard = None
+
+try:
+    import yaml
+except ImportError:  # Optional, a minimal parser is used for snap.yaml otherwise
+    yaml = None
+
+
+SQUASHFS_MAGIC = 0x73717368
+SUPERBLOCK_FORMAT = '<IIIIIHHHHHHQQQQQQQQ'
+SUPERBLOCK_SIZE = struct.calcsize(SUPERBLOCK_FORMAT)
+
+COMPRESSION_GZIP = 1
+COMPRESSION_LZMA = 2
+COMPRESSION_LZO = 3
+COMPRESSION_XZ = 4
+COMPRESSION_LZ4 = 5
+COMPRESSION_ZSTD = 6
+
+COMPRESSION_NAMES = {
+    COMPRESSION_GZIP: 'gzip',
+    COMPRESSION_LZMA: 'lzma',
+    COMPRESSION_LZO: 'lzo',
+    COMPRESSION_XZ: 'xz',
+    COMPRESSION_LZ4: 'lz4',
+    COMPRESSION_ZSTD: 'zstd',
+}
+
+# Inode types
+INODE_BASIC_DIR = 1
+INODE_BASIC_FILE = 2
+INODE_EXT_DIR = 8
+INODE_EXT_FILE = 9
+
+METADATA_UNCOMPRESSED = 0x8000
+METADATA_MAX_SIZE = 8192
+DATA_UNCOMPRESSED = 1 << 24
+NO_FRAGMENT = 0xFFFFFFFF
+FRAGMENT_ENTRY_SIZE = 16
+FRAGMENTS_PER_BLOCK = METADATA_MAX_SIZE // FRAGMENT_ENTRY_SIZE
+
+# Refuse to decompress suspiciously large metadata files
+MAX_FILE_SIZE = 1024 * 1024
+
+SNAP_YAML_PATH = 'meta/snap.yaml'
+
+
+class Superblock:
+    """Parsed squashfs 4.0 superblock"""
+
+    def __init__(self, fields):
+        (self.magic, self.inode_count, self.mod_time, self.block_size,
+         self.fragment_count, self.compression, self.block_log, self.flags,
+         self.id_count, self.version_major, self.version_minor,
+         self.root_inode_ref, self.bytes_used, self.id_table_start,
+         self.xattr_table_start, self.inode_table_start,
+         self.directory_table_start, self.fragment_table_start,
+         self.export_table_start) = fields
+
+
+class SquashfsImage:
+    """Read-only access to files inside a squashfs image held in a buffer"""
+
+    def __init__(self, buf, package_path=''):
+        self.buf = buf
+        self.package_path = package_path
+        self._metadata_cache = {}
+
+        if len(buf) < SUPERBLOCK_SIZE:
+            raise InvalidPackageError(package_path, "File too small for a squashfs image")
+        self.superblock = Superblock(struct.unpack(SUPERBLOCK_FORMAT, buf[:SUPERBLOCK_SIZE]))
+        sb = self.superblock
+
+        if sb.magic != SQUASHFS_MAGIC:
+            raise InvalidPackageError(package_path, "Not a squashfs image (bad magic)")
+        if sb.version_major != 4:
+            raise InvalidPackageError(package_path, f"Unsupported squashfs version {sb.version_major}.{sb.version_minor}")
+        if sb.bytes_used > len(buf):
+            raise InvalidPackageError(package_path, "Image is truncated (bytes_used exceeds file size)")
+        if sb.block_size != 1 << sb.block_log:
+            raise InvalidPackageError(package_path, "Inconsistent block size in superblock")
+
+    # ---------- decompression ----------
+
+    def _decompress(self, data, max_size):
+        """Decompress a block with the image's compressor"""
+        compression = self.superblock.compression
+        try:
+            if compression == COMPRESSION_GZIP:
+                return zlib.decompress(data)
+            elif compression == COMPRESSION_XZ:
+                return lzma.decompress(data)
+            elif compression == COMPRESSION_LZMA:
+                return lzma.decompress(data, format=lzma.FORMAT_ALONE)
+            elif compression == COMPRESSION_LZO and lzo is not None:
+                return lzo.decompress(bytes(data), False, max_size)
+            elif compression == COMPRESSION_ZSTD and zstandard is not None:
+                return zstandard.ZstdDecompressor().decompress(bytes(data), max_output_size=max_size)
+        except (zlib.error, lzma.LZMAError) as e:
+            raise InvalidPackageError(self.package_path, f"Corrupted compressed block: {e}")
+        raise UnsupportedCompressionError(self.package_path, COMPRESSION_NAMES.get(compression, str(compression)))
+
+    def _metadata_block(self, position):
+        """Read and decompress the metadata block at an absolute position"""
+        if position in self._metadata_cache:
+            return self._metadata_cache[position]
+
+        if position + 2 > len(self.buf):
+            raise InvalidPackageError(self.package_path, "Metadata block outside image")
+        header, = struct.unpack('<H', self.buf[position:position + 2])
+        size = header & ~METADATA_UNCOMPRESSED & 0xFFFF
+        raw = self.buf[position + 2:position + 2 + size]
+        if len(raw) != size:
+            raise InvalidPackageError(self.package_path, "Truncated metadata block")
+
+        data = bytes(raw) if header & METADATA_UNCOMPRESSED else self._decompress(raw, METADATA_MAX_SIZE)
+        block = (data, position + 2 + size)
+        self._metadata_cache[position] = block
+        return block
+
+    def _read_metadata(self, table_start, block, offset, length):
+        """Read length bytes of a metadata stream starting at (block, offset)"""
+        position = table_start + block
+        chunks = []
+        remaining = length
+        while remaining > 0:
+            data, next_position = self._metadata_block(position)
+            chunk = data[offset:offset + remaining]
+            if not chunk:
+                raise InvalidPackageError(self.package_path, "Metadata read past end of block")
+            chunks.append(chunk)
+            remaining -= len(chunk)
+            position = next_position
+            offset = 0
+        return b''.join(chunks)
+
+    # ---------- inodes and directories ----------
+
+    def _read_inode(self, inode_ref):
+        """Decode the inode referenced by inode_ref"""
+        block = inode_ref >> 16
+        offset = inode_ref & 0xFFFF
+        start = self.superblock.inode_table_start
+        inode_type, = struct.unpack('<H', self._read_metadata(start, block, offset, 2))
+
+        if inode_type == INODE_BASIC_DIR:
+            data = self._read_metadata(start, block, offset, 32)
+            dir_block, _, file_size, dir_offset, _ = struct.unpack('<IIHHI', data[16:32])
+            return {'type': 'dir', 'block': dir_block, 'offset': dir_offset, 'size': file_size}
+
+        if inode_type == INODE_EXT_DIR:
+            data = self._read_metadata(start, block, offset, 40)
+            _, file_size, dir_block, _, _, dir_offset, _ = struct.unpack('<IIIIHHI', data[16:40])
+            return {'type': 'dir', 'block': dir_block, 'offset': dir_offset, 'size': file_size}
+
+        if inode_type in (INODE_BASIC_FILE, INODE_EXT_FILE):
+            if inode_type == INODE_BASIC_FILE:
+                header_size = 32
+                data = self._read_metadata(start, block, offset, header_size)
+                blocks_start, fragment, frag_offset, file_size = struct.unpack('<IIII', data[16:32])
+            else:
+                header_size = 56
+                data = self._read_metadata(start, block, offset, header_size)
+                blocks_start, file_size, _, _, fragment, frag_offset, _ = struct.unpack('<QQQIIII', data[16:56])
+
+            block_size = self.superblock.block_size
+            if fragment == NO_FRAGMENT:
+                block_count = (file_size + block_size - 1) // block_size
+            else:
+                block_count = file_size // block_size
+
+            sizes_data = self._read_metadata(start, block, offset, header_size + 4 * block_count)[header_size:]
+            block_sizes = struct.unpack(f'<{block_count}I', sizes_data) if block_count else ()
+            return {
+                'type': 'file',
+                'blocks_start': blocks_start,
+                'block_sizes': block_sizes,
+                'fragment': fragment,
+                'fragment_offset': frag_offset,
+                'size': file_size,
+            }
+
+        return {'type': 'other', 'inode_type': inode_type}
+
+    def _list_directory(self, inode):
+        """Get a dict of name -> inode_ref for a directory inode"""
+        entries = {}
+        # file_size counts the implicit '.' and '..' entries (3 bytes)
+        length = inode['size'] - 3
+        if length <= 0:
+            return entries
+
+        data = self._read_metadata(self.superblock.directory_table_start, inode['block'], inode['offset'], length)
+        pos = 0
+        while pos + 12 <= len(data):
+            count, start_block, _ = struct.unpack('<III', data[pos:pos + 12])
+            pos += 12
+            for _ in range(count + 1):
+                entry_offset, _, _, name_size = struct.unpack('<HhHH', data[pos:pos + 8])
+                pos += 8
+                name = data[pos:pos + name_size + 1].decode('utf-8', 'replace')
+                pos += name_size + 1
+                entries[name] = (start_block << 16) | entry_offset
+        return entries
+
+    def lookup(self, path):
+        """Find the inode for a path inside the image"""
+        inode = self._read_inode(self.superblock.root_inode_ref)
+        for part in [p for p in path.split('/') if p]:
+            if inode['type'] != 'dir':
+                return None
+            inode_ref = self._list_directory(inode).get(part)
+            if inode_ref is None:
+                return None
+            inode = self._read_inode(inode_ref)
+        return inode
+
+    # ---------- file data ----------
+
+    def _read_data_block(self, position, size_field):
+        """Read one data (or fragment) block"""
+        block_size = self.superblock.block_size
+        size = size_field & ~DATA_UNCOMPRESSED
+        if size == 0:
+            return b'\0' * block_size
+        raw = self.buf[position:position + size]
+        if len(raw) != size:
+            raise InvalidPackageError(self.package_path, "Truncated data block")
+        if size_field & DATA_UNCOMPRESSED:
+            return bytes(raw)
+        return self._decompress(raw, block_size)
+
+    def _fragment_entry(self, index):
+        """Get (start, size) for a fragment table entry"""
+        sb = self.superblock
+        if index >= sb.fragment_count:
+            raise InvalidPackageError(self.package_path, "Fragment index out of range")
+        pointer_pos = sb.fragment_table_start + 8 * (index // FRAGMENTS_PER_BLOCK)
+        block_position, = struct.unpack('<Q', self.buf[pointer_pos:pointer_pos + 8])
+        entry = self._read_metadata(block_position, 0, (index % FRAGMENTS_PER_BLOCK) * FRAGMENT_ENTRY_SIZE, FRAGMENT_ENTRY_SIZE)
+        start, size, _ = struct.unpack('<QII', entry)
+        return start, size
+
+    def read_file(self, path):
+        """Read a regular file from the image, or None if it doesn't exist"""
+        inode = self.lookup(path)
+        if inode is None or inode['type'] != 'file':
+            return None
+        if inode['size'] > MAX_FILE_SIZE:
+            raise InvalidPackageError(self.package_path, f"{path} is unexpectedly large ({inode['size']} bytes)")
+
+        chunks = []
+        position = inode['blocks_start']
+        for size_field in inode['block_sizes']:
+            chunks.append(self._read_data_block(position, size_field))
+            position += size_field & ~DATA_UNCOMPRESSED
+
+        if inode['fragment'] != NO_FRAGMENT:
+            start, size_field = self._fragment_entry(inode['fragment'])
+            fragment = self._read_data_block(start, size_field)
+            tail = inode['size'] % self.superblock.block_size
+            chunks.append(fragment[inode['fragment_offset']:inode['fragment_offset'] + tail])
+
+        return b''.join(chunks)[:inode['size']]
+
+
+class SnapInfo:
+    """Metadata from a snap's meta/snap.yaml"""
+
+    def __init__(self, path, metadata, compression):
+        self.path = path
+        self.metadata = metadata
+        self.compression = compression
+
+    @property
+    def name(self):
+        return self.metadata.get('name', '')
+
+    @property
+    def version(self):
+        return str(self.metadata.get('version', ''))
+
+    @property
+    def base(self):
+        return self.metadata.get('base', '')
+
+    @property
+    def confinement(self):
+        return self.metadata.get('confinement', 'strict')
+
+    @property
+    def grade(self):
+        return self.metadata.get('grade', '')
+
+    @property
+    def summary(self):
+        return self.metadata.get('summary', '')
+
+    @property
+    def apps(self):
+        apps = self.metadata.get('apps') or {}
+        return sorted(apps) if isinstance(apps, dict) else []
+
+    def to_dict(self):
+        """Get a JSON-serializable view of the snap info"""
+        return {
+            'format': 'snap',
+            'name': self.name,
+            'version': self.version,
+            'base': self.base,
+            'confinement': self.confinement,
+            'grade': self.grade,
+            'summary': self.summary,
+            'apps': self.apps,
+            'compression': self.compression,
+        }
+
+
+def _unquote(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'"):
+        return value[1:-1]
+    return value
+
+
+def parse_snap_yaml(text):
+    """
+    Parse snap.yaml
+
+    Uses PyYAML when installed. Otherwise a minimal parser reads top-level
+    scalars (including | and > blocks) and the names under 'apps:', which
+    is all the info panel needs.
+    """
+    if yaml is not None:
+        data = yaml.safe_load(text)
+        return data if isinstance(data, dict) else {}
+
+    data = {}
+    current_key = None
+    block_lines = None
+    apps_indent = None
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            if block_lines is not None:
+                block_lines.append('')
+            continue
+
+        indent = len(line) - len(line.lstrip(' '))
+
+        if indent == 0:
+            if block_lines is not None:
+                data[current_key] = '\n'.join(block_lines).strip()
+                block_lines = None
+            apps_indent = None
+            key, _, value = stripped.partition(':')
+            current_key = key.strip()
+            value = value.strip()
+            if value in ('|', '>', '|-', '>-'):
+                block_lines = []
+            elif value:
+                data[current_key] = _unquote(value)
+            else:
+                data[current_key] = {}
+            continue
+
+        if block_lines is not None:
+            block_lines.append(stripped)
+        elif current_key == 'apps' and ':' in stripped:
+            if apps_indent is None:
+                apps_indent = indent
+            if indent == apps_indent:
+                data['apps'][stripped.split(':', 1)[0].strip()] = {}
+
+    if block_lines is not None:
+        data[current_key] = '\n'.join(block_lines).strip()
+
+    return data
+
+
+def read_snap(package_path):
+    """
+    Read snap metadata straight from the squashfs image
+
+    Returns:
+        SnapInfo
+
+    Raises:
+        InvalidPackageError: If the image is invalid or has no meta/snap.yaml
+        UnsupportedCompressionError: If the image compressor isn't available
+        OSError: If the file cannot be opened
+    """
+    with open(package_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise InvalidPackageError(package_path, "File is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            image = SquashfsImage(mapped, package_path)
+            data = image.read_file(SNAP_YAML_PATH)
+            compression = COMPRESSION_NAMES.get(image.superblock.compression, 'unknown')
+
+    if data is None:
+        raise InvalidPackageError(package_path, f"Image has no {SNAP_YAML_PATH}")
+
+    return SnapInfo(package_path, parse_snap_yaml(data.decode('utf-8', 'replace')), compression)
+
+
+def format_snap_info(info, file_name, file_size):
+    """Format SnapInfo for the package info panel"""
+    lines = [
+        "Package Type: Snap Package 📸",
+        "",
+        f"Filename: {file_name}",
+        f"Size: {file_size}",
+        "",
+        f"Name: {info.name}",
+        f"Version: {info.version}",
+    ]
+    if info.summary:
+        lines.append(f"Summary: {info.summary}")
+    if info.base:
+        lines.append(f"Base: {info.base}")
+    lines.append(f"Confinement: {info.confinement}")
+    if info.grade:
+        lines.append(f"Grade: {info.grade}")
+    if info.apps:
+        lines.append(f"Apps: {', '.join(info.apps)}")
+    return '\n'.join(lines) + '\n'
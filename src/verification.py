@@ -0,0 +1,443 @@
+"""
+Verification Engine
+Single-pass package verification: the file is streamed once through a large
+reusable buffer that feeds every requested digest, the structural checker
+and (for detached signatures) gpg at the same time.
+"""
+
+import os
+import time
+import hashlib
+import threading
+import subprocess
+from . import config
+from . import deb_reader
+from . import rpm_reader
+from . import squashfs_reader
+from . import flatpak_reader
+from .digest_cache import file_key
+from .exceptions import InvalidPackageError, UnsupportedCompressionError
+
+
+# Don't buffer more than this for a single structural member (control.tar, RPM headers)
+MAX_CAPTURE_SIZE = 64 * 1024 * 1024
+
+
+class VerificationReport:
+    """Result of a verification pass with per-stage timings"""
+
+    def __init__(self, package_path):
+        self.package_path = package_path
+        self.file_size = 0
+        self.bytes_read = 0
+        self.digests = {}
+        self.structure_ok = None      # None = not checked / skipped
+        self.structure_message = ''
+        self.metadata = None
+        self.signature_valid = None   # None = not checked
+        self.signature_message = ''
+        self.cached = False           # True when answered from the digest cache
+        self.timings = {}
+
+    def add_timing(self, stage, seconds):
+        """Record wall-clock time spent in a stage"""
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    @property
+    def total_time(self):
+        return sum(seconds for stage, seconds in self.timings.items() if stage != 'total')
+
+    def format_timings(self):
+        """Get a short human-readable timing breakdown"""
+        parts = [f"{stage} {seconds * 1000:.1f} ms" for stage, seconds in self.timings.items()]
+        return ', '.join(parts)
+
+    def to_dict(self):
+        """Get a JSON-serializable view of the report"""
+        return {
+            'package_path': self.package_path,
+            'file_size': self.file_size,
+            'bytes_read': self.bytes_read,
+            'digests': dict(self.digests),
+            'structure_ok': self.structure_ok,
+            'structure_message': self.structure_message,
+            'metadata': self.metadata,
+            'signature_valid': self.signature_valid,
+            'signature_message': self.signature_message,
+            'cached': self.cached,
+            'timings': dict(self.timings),
+        }
+
+
+# ==================== Structural checkers ====================
+
+class _NullChecker:
+    """Checker for formats without a structural parser"""
+
+    def feed(self, chunk):
+        pass
+
+    def finish(self):
+        return True, "Basic checks passed", None
+
+
+class _DebStreamChecker:
+    """Incrementally walks the ar container while the file streams past"""
+
+    def __init__(self, package_path, file_size):
+        self.package_path = package_path
+        self.file_size = file_size
+        self.pos = 0
+        self.header = bytearray()
+        self.members = []
+        self.member_data = {}
+        self.remaining = 0       # bytes left in the current member
+        self.padding = 0         # alignment byte after an odd-sized member
+        self.capture = None
+        self.error = None
+
+    def _start_member(self):
+        header = bytes(self.header)
+        self.header = bytearray()
+        if header[58:60] != deb_reader.AR_HEADER_END:
+            raise InvalidPackageError(self.package_path, f"Corrupted ar member header at offset {self.pos - 60}")
+
+        name = header[0:16].decode('ascii', 'replace').rstrip()
+        if name.endswith('/'):
+            name = name[:-1]
+        try:
+            size = int(header[48:58].decode('ascii').strip())
+        except ValueError:
+            raise InvalidPackageError(self.package_path, f"Invalid size in ar member '{name}'")
+        if self.pos + size > self.file_size:
+            raise InvalidPackageError(self.package_path, f"Member '{name}' extends past end of file (truncated download?)")
+
+        self.members.append(deb_reader.ArMember(name, self.pos, size))
+        self.remaining = size
+        self.padding = size & 1
+        if deb_reader.is_captured_member(name) and name not in self.member_data:
+            if size > MAX_CAPTURE_SIZE:
+                raise InvalidPackageError(self.package_path, f"Member '{name}' is unreasonably large")
+            self.capture = bytearray()
+            self.member_data[name] = self.capture
+        else:
+            self.capture = None
+
+    def feed(self, chunk):
+        if self.error is not None:
+            return
+        try:
+            self._feed(chunk)
+        except InvalidPackageError as e:
+            self.error = e
+
+    def _feed(self, chunk):
+        i = 0
+        length = len(chunk)
+        while i < length:
+            if self.pos < len(deb_reader.AR_MAGIC):
+                take = min(len(deb_reader.AR_MAGIC) - self.pos, length - i)
+                self.header += chunk[i:i + take]
+                i += take
+                self.pos += take
+                if self.pos == len(deb_reader.AR_MAGIC):
+                    if bytes(self.header) != deb_reader.AR_MAGIC:
+                        raise InvalidPackageError(self.package_path, "Not an ar archive (bad magic)")
+                    self.header = bytearray()
+            elif self.remaining:
+                take = min(self.remaining, length - i)
+                if self.capture is not None:
+                    self.capture += chunk[i:i + take]
+                i += take
+                self.pos += take
+                self.remaining -= take
+            elif self.padding:
+                i += 1
+                self.pos += 1
+                self.padding = 0
+            else:
+                take = min(deb_reader.AR_HEADER_SIZE - len(self.header), length - i)
+                self.header += chunk[i:i + take]
+                i += take
+                self.pos += take
+                if len(self.header) == deb_reader.AR_HEADER_SIZE:
+                    self._start_member()
+
+    def finish(self):
+        try:
+            if self.error is not None:
+                raise self.error
+            if self.pos < len(deb_reader.AR_MAGIC):
+                raise InvalidPackageError(self.package_path, "Not an ar archive (bad magic)")
+            if self.header or self.remaining:
+                raise InvalidPackageError(self.package_path, "Truncated ar archive")
+            info = deb_reader.build_deb_info(self.package_path, self.members, self.member_data)
+            return True, "Package structure valid", info.to_dict()
+        except UnsupportedCompressionError as e:
+            return None, f"Integrity check skipped ({e.compression} not readable in-process)", None
+        except InvalidPackageError as e:
+            return False, f"Package appears to be corrupted or invalid: {e.details}", None
+
+
+class _RpmStreamChecker:
+    """Captures the RPM header region while the file streams past"""
+
+    def __init__(self, package_path, file_size):
+        self.package_path = package_path
+        self.file_size = file_size
+        self.prefix = bytearray()
+        self.needed = None
+
+    def feed(self, chunk):
+        if self.needed is not None and len(self.prefix) >= self.needed:
+            return
+        if len(self.prefix) >= MAX_CAPTURE_SIZE:
+            return
+        self.prefix += chunk[:MAX_CAPTURE_SIZE - len(self.prefix)]
+        if self.needed is None:
+            self.needed = rpm_reader.header_region_end(self.prefix)
+        if self.needed is not None and len(self.prefix) > self.needed:
+            del self.prefix[self.needed:]
+
+    def finish(self):
+        try:
+            info = rpm_reader.read_rpm_buffer(bytes(self.prefix), self.package_path, file_size=self.file_size)
+            return True, "Package structure valid", info.to_dict()
+        except InvalidPackageError as e:
+            return False, f"Package appears to be corrupted or invalid: {e.details}", None
+
+
+class _RandomAccessChecker:
+    """
+    Checker that parses through a memory map instead of the stream. Used
+    for formats whose metadata lives at scattered offsets (squashfs,
+    GVariant); it runs after the scan so the pages it touches are cached.
+    """
+
+    def __init__(self, package_path, reader):
+        self.package_path = package_path
+        self.reader = reader
+
+    def feed(self, chunk):
+        pass
+
+    def finish(self):
+        try:
+            return True, "Package structure valid", self.reader(self.package_path).to_dict()
+        except UnsupportedCompressionError as e:
+            return None, f"Integrity check skipped ({e.compression} not readable in-process)", None
+        except InvalidPackageError as e:
+            return False, f"Package appears to be corrupted or invalid: {e.details}", None
+
+
+# Readers that only touch the metadata regions of a package
+RANDOM_ACCESS_READERS = {
+    '.deb': deb_reader.read_deb,
+    '.rpm': rpm_reader.read_rpm,
+    '.snap': squashfs_reader.read_snap,
+    '.flatpak': flatpak_reader.read_flatpak_bundle,
+}
+
+
+def structure_checker_for(package_path, file_size):
+    """Get the streaming structural checker for a package file"""
+    ext = os.path.splitext(package_path)[1].lower()
+    if ext == '.deb':
+        return _DebStreamChecker(package_path, file_size)
+    elif ext == '.rpm':
+        return _RpmStreamChecker(package_path, file_size)
+    elif ext in RANDOM_ACCESS_READERS:
+        return _RandomAccessChecker(package_path, RANDOM_ACCESS_READERS[ext])
+    return _NullChecker()
+
+
+def check_structure(package_path):
+    """
+    Check package structure without streaming the whole file
+
+    Returns:
+        tuple: (ok: bool or None if skipped, message: str, metadata: dict or None)
+    """
+    reader = RANDOM_ACCESS_READERS.get(os.path.splitext(package_path)[1].lower())
+    if reader is None:
+        return _NullChecker().finish()
+    return _RandomAccessChecker(package_path, reader).finish()
+
+
+# ==================== Signature streaming ====================
+
+class _GpgStreamVerifier:
+    """Feeds the package to 'gpg --verify <sig> -' while it is being hashed"""
+
+    def __init__(self, signature_path):
+        self.signature_path = signature_path
+        self.closed = False
+        self.process = subprocess.Popen(
+            ['gpg', '--batch', '--verify', signature_path, '-'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+
+    def feed(self, chunk):
+        if self.closed:
+            return
+        try:
+            self.process.stdin.write(chunk)
+        except (BrokenPipeError, OSError):
+            # gpg gave up early (bad signature file); its exit code tells why
+            self.closed = True
+
+    def finish(self):
+        try:
+            self.process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        try:
+            stderr = self.process.stderr.read()
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            return False, "Signature verification timed out"
+        if self.process.returncode == 0:
+            return True, "Signature valid"
+        return False, stderr.decode('utf-8', 'replace')
+
+
+# ==================== Engine ====================
+
+class VerificationEngine:
+    """
+    Stream a package once and compute everything verification needs
+
+    The read buffer is allocated once per thread and reused for every file.
+    With a DigestCache, unchanged files are answered without being read.
+    """
+
+    def __init__(self, buffer_size=None, cache=None):
+        self.buffer_size = buffer_size or config.CHUNK_SIZE_FOR_CHECKSUM
+        self.cache = cache
+        self._local = threading.local()
+
+    def _buffer(self):
+        buf = getattr(self._local, 'buffer', None)
+        if buf is None:
+            buf = bytearray(self.buffer_size)
+            self._local.buffer = buf
+        return buf
+
+    @staticmethod
+    def new_hasher(algorithm):
+        """Create a hashlib object for one of config.CHECKSUM_ALGORITHMS"""
+        algorithm = algorithm.lower()
+        if algorithm not in config.CHECKSUM_ALGORITHMS:
+            raise ValueError(f"Unsupported checksum type: {algorithm}")
+        return hashlib.new(algorithm)
+
+    @staticmethod
+    def _answers(entry, algorithms, check_structure):
+        """Check if a cache entry holds everything a scan would produce"""
+        if entry is None:
+            return False
+        if any(name not in entry.get('digests', {}) for name in algorithms):
+            return False
+        return not check_structure or 'structure' in entry
+
+    def scan(self, package_path, algorithms=(), check_structure=True, signature_path=None):
+        """
+        Read package_path once, feeding digests, the structural checker and gpg
+
+        Args:
+            package_path: Path to the package file
+            algorithms: Checksum algorithms to compute
+            check_structure: Run the structural parser for the package format
+            signature_path: Detached signature to verify with gpg while streaming
+
+        Returns:
+            VerificationReport
+        """
+        report = VerificationReport(package_path)
+        total_start = time.perf_counter()
+
+        start = time.perf_counter()
+        hashers = {name.lower(): self.new_hasher(name) for name in algorithms}
+        fd = os.open(package_path, os.O_RDONLY)
+        try:
+            st = os.fstat(fd)
+            report.file_size = st.st_size
+            key = file_key(st) if self.cache is not None else None
+
+            # The signature has to be checked against the bytes, so gpg always reads
+            if key is not None and signature_path is None:
+                entry = self.cache.get(key, package_path)
+                if self._answers(entry, hashers, check_structure):
+                    report.cached = True
+                    report.digests = {name: entry['digests'][name] for name in hashers}
+                    if check_structure:
+                        report.structure_ok, report.structure_message = entry['structure']
+                        report.metadata = entry.get('metadata')
+                    report.add_timing('cache', time.perf_counter() - start)
+                    report.add_timing('total', time.perf_counter() - total_start)
+                    return report
+
+            checker = structure_checker_for(package_path, report.file_size) if check_structure else None
+            gpg = None
+            if signature_path:
+                try:
+                    gpg = _GpgStreamVerifier(signature_path)
+                except FileNotFoundError:
+                    report.signature_valid = False
+                    report.signature_message = "GPG or RPM tools not installed"
+            report.add_timing('open', time.perf_counter() - start)
+
+            start = time.perf_counter()
+            buf = self._buffer()
+            view = memoryview(buf)
+            try:
+                while True:
+                    count = os.readv(fd, [buf])
+                    if count == 0:
+                        break
+                    chunk = view[:count]
+                    for hasher in hashers.values():
+                        hasher.update(chunk)
+                    if checker is not None:
+                        checker.feed(chunk)
+                    if gpg is not None:
+                        gpg.feed(chunk)
+                    report.bytes_read += count
+            finally:
+                view.release()
+            report.add_timing('scan', time.perf_counter() - start)
+
+            # Only cache results for a file that didn't change while we read it
+            if key is not None and file_key(os.fstat(fd)) != key:
+                key = None
+        finally:
+            os.close(fd)
+
+        report.digests = {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+        if checker is not None:
+            start = time.perf_counter()
+            report.structure_ok, report.structure_message, report.metadata = checker.finish()
+            report.add_timing('structure', time.perf_counter() - start)
+
+        if gpg is not None:
+            start = time.perf_counter()
+            report.signature_valid, report.signature_message = gpg.finish()
+            report.add_timing('signature', time.perf_counter() - start)
+
+        if key is not None:
+            structure = None
+            if report.structure_ok is not None:
+                structure = (report.structure_ok, report.structure_message)
+            self.cache.update(key, package_path, digests=report.digests,
+                              structure=structure, metadata=report.metadata)
+
+        report.add_timing('total', time.perf_counter() - total_start)
+        return report
+
+    def hash_file(self, package_path, algorithms):
+        """Compute digests for a file in one pass"""
+        return self.scan(package_path, algorithms, check_structure=False).digests
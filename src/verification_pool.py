@@ -0,0 +1,193 @@
+"""
+Verification Pool Module
+Verifies a whole batch of packages concurrently as soon as it is queued.
+Hashing runs in a process pool, structural and signature checks in threads,
+so installs only ever wait on the package at the head of the queue.
+"""
+
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from . import config
+from .digest_cache import file_key
+from .verification import VerificationEngine, VerificationReport, check_structure
+
+
+def hash_package(package_path, algorithms, buffer_size=None):
+    """Compute digests of a package (runs in a worker process)"""
+    return VerificationEngine(buffer_size).hash_file(package_path, algorithms)
+
+
+def default_worker_count():
+    """Get the default number of verification workers for this host"""
+    return max(1, min(config.VERIFICATION_MAX_WORKERS, os.cpu_count() or 1))
+
+
+class VerificationPool:
+    """
+    Verify queued packages in parallel
+
+    Every submitted package gets a Future resolving to the same
+    (success, message, details) tuple verify_package returns.
+    """
+
+    def __init__(self, package_handler, workers=None, use_processes=None, algorithms=None):
+        """
+        Args:
+            package_handler: PackageHandler used for cache, signatures and evaluation
+            workers: Number of workers (defaults to default_worker_count())
+            use_processes: Hash in worker processes (defaults to config.VERIFICATION_USE_PROCESSES)
+            algorithms: Digests computed for every package (defaults to config.PREVERIFY_ALGORITHMS)
+        """
+        self.package_handler = package_handler
+        self.algorithms = list(config.PREVERIFY_ALGORITHMS if algorithms is None else algorithms)
+        self.workers = workers or default_worker_count()
+        self.use_processes = config.VERIFICATION_USE_PROCESSES if use_processes is None else use_processes
+        self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='snapwiz-verify')
+        self._processes = None
+        self._queued = set()  # Verification futures not finished yet, cancelled by shutdown()
+        self._queued_lock = threading.Lock()
+
+    def _process_pool(self):
+        """Start the hashing processes on first use, or None if unavailable"""
+        if not self.use_processes:
+            return None
+        if self._processes is None:
+            try:
+                # spawn: forking a process that runs Qt and worker threads is unsafe
+                context = multiprocessing.get_context('spawn')
+                self._processes = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            except (OSError, ValueError, NotImplementedError, ImportError):
+                # No working semaphores/shared memory here, hash in threads instead
+                self.use_processes = False
+                return None
+        return self._processes
+
+    def submit(self, package_path, checksum=None, checksum_type='sha256', check_signature=False, callback=None):
+        """
+        Queue a package for verification
+
+        Args:
+            package_path: Path to the package file
+            checksum: Expected checksum value (optional)
+            checksum_type: Type of checksum
+            check_signature: Whether to verify GPG signature
+            callback: Called as callback(package_path, result) from a worker thread
+
+        Returns:
+            Future resolving to (success, message, details)
+        """
+        future = self._threads.submit(
+            self._verify, package_path, checksum, checksum_type, check_signature
+        )
+        with self._queued_lock:
+            self._queued.add(future)
+        future.add_done_callback(self._finished)
+        if callback is not None:
+            future.add_done_callback(lambda f: callback(package_path, self._result_of(f)))
+        return future
+
+    def submit_batch(self, package_paths, checksum=None, checksum_type='sha256', check_signature=False,
+                     callback=None):
+        """Queue several packages, returning a dict of package path -> Future"""
+        return {
+            path: self.submit(path, checksum, checksum_type, check_signature, callback)
+            for path in package_paths
+        }
+
+    def _finished(self, future):
+        with self._queued_lock:
+            self._queued.discard(future)
+
+    def _result_of(self, future):
+        if future.cancelled():
+            return False, "Verification cancelled", self.package_handler.new_verification_results()
+        error = future.exception()
+        if error is not None:
+            return False, f"Verification error: {str(error)}", self.package_handler.new_verification_results()
+        return future.result()
+
+    def _submit_hash(self, package_path, algorithms):
+        """Start hashing in a worker process, or return None to hash in-thread"""
+        pool = self._process_pool()
+        if pool is None:
+            return None
+        try:
+            return pool.submit(hash_package, package_path, algorithms, config.CHUNK_SIZE_FOR_CHECKSUM)
+        except (BrokenProcessPool, RuntimeError):
+            self.use_processes = False
+            return None
+
+    def _wait_hash(self, future, package_path, algorithms):
+        if future is not None:
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                self.use_processes = False
+        # hashlib releases the GIL on large updates, so threads still overlap
+        return self.package_handler.verification_engine.hash_file(package_path, algorithms)
+
+    def _verify(self, package_path, checksum, checksum_type, check_signature):
+        handler = self.package_handler
+        results = handler.new_verification_results()
+        failure = handler.precheck_package_file(package_path, results)
+        if failure is not None:
+            return failure
+
+        algorithms = handler.verification_algorithms(checksum, checksum_type, self.algorithms)
+        report = VerificationReport(package_path)
+        total_start = time.perf_counter()
+
+        key = file_key(package_path)
+        report.file_size = key[2]
+        cache = handler.digest_cache
+        entry = cache.get(key, package_path) or {}
+        cached_digests = entry.get('digests', {})
+        missing = [name for name in algorithms if name not in cached_digests]
+
+        # Hashing is submitted first so it overlaps with the structure check
+        hash_future = self._submit_hash(package_path, missing) if missing else None
+
+        start = time.perf_counter()
+        if 'structure' in entry:
+            report.structure_ok, report.structure_message = entry['structure']
+            report.metadata = entry.get('metadata')
+        else:
+            report.structure_ok, report.structure_message, report.metadata = check_structure(package_path)
+        report.add_timing('structure', time.perf_counter() - start)
+
+        start = time.perf_counter()
+        digests = {}
+        if missing:
+            digests = self._wait_hash(hash_future, package_path, missing)
+            report.bytes_read = key[2]
+        report.add_timing('hash', time.perf_counter() - start)
+        report.digests = {name: digests.get(name, cached_digests.get(name)) for name in algorithms}
+        report.cached = not missing and 'structure' in entry
+
+        if file_key(package_path) == key:
+            structure = None
+            if report.structure_ok is not None:
+                structure = (report.structure_ok, report.structure_message)
+            cache.update(key, package_path, digests=digests or None, structure=structure,
+                         metadata=report.metadata)
+
+        report.add_timing('total', time.perf_counter() - total_start)
+        return handler.evaluate_verification(report, checksum, checksum_type, check_signature, results)
+
+    def shutdown(self, wait=False):
+        """Stop the workers, dropping verifications that haven't started"""
+        # Executor.shutdown(cancel_futures=True) needs Python 3.9; cancel() only
+        # succeeds for futures still waiting for a worker
+        with self._queued_lock:
+            queued = list(self._queued)
+        for future in queued:
+            future.cancel()
+        self._threads.shutdown(wait=wait)
+        if self._processes is not None:
+            # Only running verifications have hashes queued here, let them finish
+            self._processes.shutdown(wait=wait)
+            self._processes = None
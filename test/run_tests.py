@@ -51,6 +51,26 @@ def main():
         test_modules = [
             'test_config',
             'test_exceptions',
+            'test_capabilities',
+            'test_deb_reader',
+            'test_rpm_reader',
+            'test_squashfs_reader',
+            'test_flatpak_reader',
+            'test_verification',
+            'test_digest_cache',
+            'test_verification_pool',
+            'test_batch_transaction',
+            'test_install_planner',
+            'test_process_runner',
+            'test_privileged_helper',
+            'test_async_package_handler',
+            'test_inventory',
+            'test_inventory_service',
+            'test_inventory_table',
+            'test_inventory_index',
+            'test_history_journal',
+            'test_history_db',
+            'test_history_export',
             # Add more test modules here as they're created
         ]
     
@@ -0,0 +1,145 @@
+"""
+Unit Tests for Async Package Handler
+Tests lock domains, overlap between independent domains and the async runner
+"""
+
+import unittest
+import asyncio
+import subprocess
+import sys
+import os
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.async_package_handler import AsyncPackageHandler, lock_domain
+from src.capabilities import CapabilitySnapshot
+from src.digest_cache import DigestCache
+from src.package_handler import PackageHandler
+from src.process_runner import ProcessResult, run_streaming_async
+from test.test_utils import TestEnvironment, create_test_deb
+
+
+class TestLockDomain(unittest.TestCase):
+    """Test command -> lock domain mapping"""
+
+    def test_domains(self):
+        """Test managers sharing a lock share a domain"""
+        self.assertEqual(lock_domain(['pkexec', 'apt', 'install', '-y', '/x.deb']), 'dpkg')
+        self.assertEqual(lock_domain(['pkexec', 'dpkg', '-i', '/x.deb']), 'dpkg')
+        self.assertEqual(lock_domain(['pkexec', 'zypper', 'install', '-y', '/x.rpm']), 'rpm')
+        self.assertEqual(lock_domain(['pkexec', 'snap', 'install', '--dangerous', '/x.snap']), 'snapd')
+        self.assertEqual(lock_domain(['flatpak', 'install', '-y', '--bundle', '/x.flatpak']), 'flatpak-system')
+        self.assertEqual(lock_domain(['flatpak', 'install', '-y', '--user', '--bundle', '/x.flatpak']), 'flatpak-user')
+        self.assertEqual(
+            lock_domain(['pkexec', 'flatpak', 'install', '-y', '--system', '--bundle', '/x.flatpak']),
+            'flatpak-system'
+        )
+
+    def test_reads_take_no_lock(self):
+        """Test queries and signature checks run without a domain"""
+        self.assertIsNone(lock_domain(['rpm', '-q', 'bash']))
+        self.assertIsNone(lock_domain(['rpm', '--checksig', '/x.rpm']))
+        self.assertIsNone(lock_domain(['dpkg-query', '-W', 'bash']))
+
+
+class TestAsyncInstalls(unittest.IsolatedAsyncioTestCase):
+    """Test scheduling with a fake package manager"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        capabilities = CapabilitySnapshot(
+            {'apt': '/usr/bin/apt', 'dpkg': '/usr/bin/dpkg', 'flatpak': '/usr/bin/flatpak'}, {}, ''
+        )
+        cache = DigestCache(os.path.join(self.temp_dir, 'cache.db'), use_xattr=False)
+        self.handler = AsyncPackageHandler(PackageHandler(capabilities=capabilities, digest_cache=cache))
+        self.debs = [
+            create_test_deb(self.temp_dir, {'Package': f'pkg{i}', 'Version': '1.0'}, data_size=4096)
+            for i in range(2)
+        ]
+        self.flatpak = self.env.create_test_file('app.flatpak', size_bytes=2048)
+        self.log = []
+        self.running = set()
+        self.installed_after = True  # What the fake dpkg-query reports
+
+    def tearDown(self):
+        self.env.teardown()
+
+    async def fake_run(self, command, on_event=None, parser=None, timeout=None, capture_limit=None, env=None):
+        """Pretend to run a command for a short while"""
+        domain = lock_domain(command)
+        self.running.add(domain)
+        self.log.append(('start', command[-1], tuple(sorted(self.running, key=str))))
+        await asyncio.sleep(0.05)
+        self.running.discard(domain)
+        self.log.append(('end', command[-1]))
+        stdout = ''
+        if command[0] == 'dpkg-query' and self.installed_after:
+            stdout = ''.join(f"{name}\t1.0\tii \n" for name in command[4:])
+        return ProcessResult(command, 0, stdout, '', 0.05)
+
+    async def test_independent_domains_overlap(self):
+        """Test a flatpak installs while debs install one after another"""
+        with mock.patch('src.async_package_handler.run_streaming_async', self.fake_run):
+            results = await self.handler.install_packages(self.debs + [self.flatpak])
+
+        self.assertTrue(all(success for success, _ in results.values()))
+        starts = [entry for entry in self.log if entry[0] == 'start']
+        # Both debs never run together, in queue order
+        deb_events = [entry[:2] for entry in self.log if entry[1] in self.debs]
+        self.assertEqual(deb_events, [
+            ('start', self.debs[0]), ('end', self.debs[0]), ('start', self.debs[1]), ('end', self.debs[1])
+        ])
+        # The flatpak ran alongside the first deb
+        self.assertIn(('dpkg', 'flatpak-system'), [entry[2] for entry in starts])
+
+    async def test_transaction_outcomes(self):
+        """Test the async transaction reuses the synchronous outcome logic"""
+        with mock.patch('src.async_package_handler.run_streaming_async', self.fake_run):
+            success, message, outcomes = await self.handler.install_transaction(self.debs)
+        self.assertTrue(success)
+        self.assertEqual(set(outcomes), set(self.debs))
+        self.assertIn('2 of 2', message)
+
+    async def test_uninstall_transaction(self):
+        """Test a removal runs once for all packages of a type"""
+        self.installed_after = False
+        with mock.patch('src.async_package_handler.run_streaming_async', self.fake_run):
+            success, message, outcomes = await self.handler.uninstall_transaction(
+                [('pkg0', 'deb'), ('pkg1', 'deb')]
+            )
+        self.assertTrue(success)
+        self.assertEqual(set(outcomes), {('pkg0', 'deb'), ('pkg1', 'deb')})
+        self.assertEqual([entry[1] for entry in self.log if entry[0] == 'start'], ['pkg1', 'pkg1'])
+        self.assertIn('2 of 2', message)
+
+    async def test_verify(self):
+        """Test verification runs in the executor"""
+        success, _, details = await self.handler.verify_package(self.debs[0])
+        self.assertTrue(success)
+        self.assertTrue(details['integrity_ok'])
+
+
+class TestRunStreamingAsync(unittest.IsolatedAsyncioTestCase):
+    """Test the asyncio runner"""
+
+    async def test_output_and_events(self):
+        """Test '\\r' progress and stderr capture"""
+        code = "import sys\nsys.stdout.write('10%\\r50%\\rdone\\n')\nsys.stderr.write('oops\\n')\n"
+        events = []
+        result = await run_streaming_async([sys.executable, '-c', code], on_event=events.append)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual([e.percent for e in events], [10.0, 50.0])
+        self.assertEqual(result.stdout, 'done\n')
+        self.assertEqual(result.stderr, 'oops\n')
+
+    async def test_timeout(self):
+        """Test slow commands are killed"""
+        with self.assertRaises(subprocess.TimeoutExpired):
+            await run_streaming_async([sys.executable, '-c', 'import time; time.sleep(10)'], timeout=0.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
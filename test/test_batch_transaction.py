@@ -0,0 +1,198 @@
+"""
+Unit Tests for Batch Transactions
+Tests grouping of queued packages and per-package outcome recovery
+"""
+
+import unittest
+import subprocess
+import sys
+import os
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.capabilities import CapabilitySnapshot
+from src.digest_cache import DigestCache
+from src.package_handler import PackageHandler, parse_installed_query, removal_target
+from src.process_runner import ProcessResult
+from test.test_utils import TestEnvironment, create_test_deb
+
+
+def completed(args, returncode=0, stdout='', stderr=''):
+    return subprocess.CompletedProcess(args, returncode, stdout, stderr)
+
+
+class TestParseInstalledQuery(unittest.TestCase):
+    """Test parsing of dpkg-query / rpm -q output"""
+
+    def test_only_installed(self):
+        """Test half-installed packages are not reported"""
+        output = "foo\t1.0-1\tii \nbar\t2.0\tiU \nbaz\t1:3\tii \n"
+        self.assertEqual(parse_installed_query(output), {'foo': '1.0-1', 'baz': '1:3'})
+
+
+class TestInstallTransaction(unittest.TestCase):
+    """Test single-transaction installs with a mocked package manager"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        capabilities = CapabilitySnapshot({'apt': '/usr/bin/apt', 'dpkg': '/usr/bin/dpkg'}, {}, '')
+        cache = DigestCache(os.path.join(self.temp_dir, 'cache.db'), use_xattr=False)
+        self.handler = PackageHandler(capabilities=capabilities, digest_cache=cache)
+        self.debs = [
+            create_test_deb(self.temp_dir, {'Package': f'pkg{i}', 'Version': f'1.{i}'})
+            for i in range(3)
+        ]
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_groups(self):
+        """Test only formats with several queued packages are grouped"""
+        snap = self.env.create_test_file('x.snap', size_bytes=2048)
+        groups = self.handler.transaction_groups(self.debs + [snap])
+        self.assertEqual(groups, {'.deb': self.debs})
+        self.assertEqual(self.handler.transaction_groups(self.debs[:1]), {})
+
+    def test_single_apt_invocation(self):
+        """Test one apt call installs the whole group"""
+        query = completed([], stdout="pkg0\t1.0\tii \npkg1\t1.1\tii \npkg2\t1.2\tii \n")
+
+        with mock.patch('src.package_handler.subprocess.run', return_value=query), \
+                mock.patch('src.package_handler.run_streaming',
+                           side_effect=lambda args, **kw: ProcessResult(args, 0, "Setting up pkg0 ...\n", '', 1.0)) as run:
+            success, _, outcomes = self.handler.install_transaction(self.debs)
+
+        self.assertEqual(run.call_count, 1)
+        command = run.call_args.args[0]
+        self.assertEqual(command[:6], ['pkexec', 'apt', '-o', 'APT::Status-Fd=1', 'install', '-y'])
+        self.assertEqual(command[6:], [os.path.abspath(p) for p in self.debs])
+        self.assertTrue(success)
+        self.assertTrue(all(ok for ok, _ in outcomes.values()))
+
+    def test_partial_failure(self):
+        """Test a package missing from the database afterwards is reported as failed"""
+        query = completed([], returncode=1, stdout="pkg0\t1.0\tii \npkg2\t1.2\tii \n")
+        failed = ProcessResult([], 100, '', "E: pkg1 : Depends: libmissing but it is not installable\n", 1.0)
+
+        with mock.patch('src.package_handler.subprocess.run', return_value=query), \
+                mock.patch('src.package_handler.run_streaming', return_value=failed):
+            success, _, outcomes = self.handler.install_transaction(self.debs)
+
+        self.assertFalse(success)
+        self.assertTrue(outcomes[self.debs[0]][0])
+        self.assertFalse(outcomes[self.debs[1]][0])
+        self.assertIn('libmissing', outcomes[self.debs[1]][1])
+        self.assertTrue(outcomes[self.debs[2]][0])
+
+    def test_mixed_formats_rejected(self):
+        """Test a transaction refuses mixed formats"""
+        rpm = self.env.create_test_file('x.rpm', size_bytes=2048)
+        success, message, _ = self.handler.install_transaction([self.debs[0], rpm])
+        self.assertFalse(success)
+        self.assertIn('same format', message)
+
+
+
+class TestUninstallTransaction(unittest.TestCase):
+    """Test batched removals with a mocked package manager"""
+
+    def handler(self, *managers):
+        capabilities = CapabilitySnapshot({name: f'/usr/bin/{name}' for name in managers}, {}, '')
+        return PackageHandler(capabilities=capabilities)
+
+    def test_one_transaction_per_manager(self):
+        """Test each package type is removed with a single command"""
+        handler = self.handler('apt', 'dpkg', 'yum', 'rpm')
+        packages = [('vim', 'deb'), ('curl', 'deb'), ('htop', 'rpm'), ('vim', 'deb')]
+
+        with mock.patch('src.package_handler.subprocess.run', return_value=completed([], returncode=1)) as query, \
+                mock.patch('src.package_handler.run_streaming',
+                           side_effect=lambda args, **kw: ProcessResult(args, 0, '', '', 1.0)) as run:
+            success, message, outcomes = handler.uninstall_transaction(packages)
+
+        self.assertEqual([call.args[0] for call in run.call_args_list], [
+            ['pkexec', 'apt', '-o', 'APT::Status-Fd=1', 'remove', '-y', 'vim', 'curl'],
+            ['pkexec', 'yum', 'remove', '-y', 'htop'],
+        ])
+        self.assertEqual(query.call_count, 2)
+        self.assertTrue(success)
+        self.assertEqual(message, "Removed 3 of 3 package(s)")
+        self.assertEqual(set(outcomes), {('vim', 'deb'), ('curl', 'deb'), ('htop', 'rpm')})
+
+    def test_partial_failure(self):
+        """Test a package still installed afterwards is reported as failed"""
+        handler = self.handler('apt')
+        query = completed([], stdout="curl\tamd64\tii \nvim\tamd64\trc \n")
+        failed = ProcessResult([], 100, '', "E: curl is essential, refusing to remove\n", 1.0)
+
+        with mock.patch.object(PackageHandler, 'deb_architecture', return_value='amd64'), \
+                mock.patch('src.package_handler.subprocess.run', return_value=query), \
+                mock.patch('src.package_handler.run_streaming', return_value=failed):
+            success, _, outcomes = handler.uninstall_transaction([('vim', 'deb'), ('curl', 'deb'), ('x', 'snap')])
+
+        self.assertFalse(success)
+        self.assertTrue(outcomes[('vim', 'deb')][0])
+        self.assertFalse(outcomes[('curl', 'deb')][0])
+        self.assertIn('essential', outcomes[('curl', 'deb')][1])
+        self.assertEqual(outcomes[('x', 'snap')], (False, "Unknown package type"))
+
+    def test_removal_targets(self):
+        """Test foreign deb architectures and every rpm are named with their architecture"""
+        self.assertEqual(removal_target('libfoo', 'deb', 'amd64', 'amd64'), 'libfoo')
+        self.assertEqual(removal_target('libfoo', 'deb', 'i386', 'amd64'), 'libfoo:i386')
+        self.assertEqual(removal_target('tzdata', 'deb', 'all', 'amd64'), 'tzdata')
+        self.assertEqual(removal_target('libfoo', 'deb', 'amd64'), 'libfoo:amd64')
+        self.assertEqual(removal_target('glibc', 'rpm', 'i686'), 'glibc.i686')
+        self.assertEqual(removal_target('gpg-pubkey', 'rpm', '(none)'), 'gpg-pubkey')
+
+    def test_multiarch_removal(self):
+        """Test removing one architecture leaves the other alone and counts as removed"""
+        handler = self.handler('apt', 'dpkg', 'dnf')
+        query_outputs = {
+            'dpkg-query': "libfoo\tamd64\tii \n",        # The native libfoo stays installed
+            'rpm': "glibc\tx86_64\tii \n",
+        }
+
+        with mock.patch.object(PackageHandler, 'deb_architecture', return_value='amd64'), \
+                mock.patch('src.package_handler.subprocess.run',
+                           side_effect=lambda args, **kw: completed(args, stdout=query_outputs[args[0]])) as query, \
+                mock.patch('src.package_handler.run_streaming',
+                           side_effect=lambda args, **kw: ProcessResult(args, 0, '', '', 1.0)) as run:
+            targets = [(handler.removal_target('libfoo', 'deb', 'i386'), 'deb'),
+                       (handler.removal_target('glibc', 'rpm', 'i686'), 'rpm')]
+            success, _, outcomes = handler.uninstall_transaction(targets)
+
+        self.assertEqual([call.args[0][-1] for call in run.call_args_list], ['libfoo:i386', 'glibc.i686'])
+        self.assertEqual([call.args[0][-1] for call in query.call_args_list], ['libfoo:i386', 'glibc.i686'])
+        self.assertTrue(success)
+        self.assertEqual(set(outcomes), {('libfoo:i386', 'deb'), ('glibc.i686', 'rpm')})
+
+    def test_failed_query(self):
+        """Test a failed removal isn't reported as removed when the database can't be queried"""
+        handler = self.handler('apt')
+        dismissed = ProcessResult([], 126, '', "Request dismissed\n", 1.0)
+
+        with mock.patch('src.package_handler.subprocess.run',
+                        side_effect=subprocess.TimeoutExpired('dpkg-query', 30)), \
+                mock.patch('src.package_handler.run_streaming', return_value=dismissed):
+            success, message, outcomes = handler.uninstall_transaction([('vim', 'deb'), ('curl', 'deb')])
+
+        self.assertFalse(success)
+        self.assertEqual(message, "Removed 0 of 2 package(s)")
+        self.assertIn('Request dismissed', outcomes[('vim', 'deb')][1])
+        self.assertFalse(outcomes[('curl', 'deb')][0])
+
+    def test_no_manager(self):
+        """Test packages without a usable manager fail without running anything"""
+        with mock.patch('src.package_handler.run_streaming') as run:
+            success, _, outcomes = self.handler('apt').uninstall_transaction([('htop', 'rpm')])
+        run.assert_not_called()
+        self.assertFalse(success)
+        self.assertIn('No suitable package manager', outcomes[('htop', 'rpm')][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
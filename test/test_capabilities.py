@@ -0,0 +1,85 @@
+"""
+Unit Tests for Capability Probe
+Tests in-process command resolution and fingerprint-based caching
+"""
+
+import unittest
+import sys
+import os
+import stat
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.capabilities import CapabilityProbe
+from test.test_utils import TestEnvironment
+
+
+class TestCapabilityProbe(unittest.TestCase):
+    """Test CapabilityProbe resolution and caching"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        self.bin_dir = os.path.join(self.temp_dir, 'bin')
+        os.makedirs(self.bin_dir)
+        self.cache_file = os.path.join(self.temp_dir, 'capabilities.json')
+        self._make_executable('apt')
+        self._make_executable('pkexec')
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def _make_executable(self, name):
+        """Create a fake executable in the test bin directory"""
+        path = os.path.join(self.bin_dir, name)
+        with open(path, 'w') as f:
+            f.write('#!/bin/sh\n')
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+        return path
+
+    def _probe(self):
+        return CapabilityProbe(
+            cache_file=self.cache_file,
+            search_path=self.bin_dir,
+            commands=['apt', 'dnf', 'pkexec']
+        )
+
+    def test_resolves_commands(self):
+        """Test commands are resolved against the search path"""
+        snapshot = self._probe().snapshot()
+        self.assertTrue(snapshot.has('apt'))
+        self.assertTrue(snapshot.has('pkexec'))
+        self.assertFalse(snapshot.has('dnf'))
+        self.assertEqual(snapshot.path_of('apt'), os.path.join(self.bin_dir, 'apt'))
+
+    def test_cache_persisted(self):
+        """Test the snapshot is written to the cache file"""
+        self._probe().snapshot()
+        self.assertTrue(os.path.exists(self.cache_file))
+
+    def test_cache_reused_when_fingerprint_matches(self):
+        """Test a second probe reuses the cached resolution"""
+        self._probe().snapshot()
+        probe = self._probe()
+        probe._resolve_commands = lambda: self.fail("cache should have been used")
+        self.assertTrue(probe.snapshot().has('apt'))
+
+    def test_cache_invalidated_on_new_binary(self):
+        """Test adding a binary to PATH invalidates the cache"""
+        self.assertFalse(self._probe().snapshot().has('dnf'))
+        self._make_executable('dnf')
+        # Make sure the directory mtime moves even on coarse filesystems
+        st = os.stat(self.bin_dir)
+        os.utime(self.bin_dir, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000))
+        self.assertTrue(self._probe().snapshot().has('dnf'))
+
+    def test_available_managers(self):
+        """Test managers are grouped by package format"""
+        managers = self._probe().snapshot().available_managers()
+        self.assertIn('apt', managers.get('deb', []))
+        self.assertNotIn('rpm', managers)
+
+
+if __name__ == '__main__':
+    unittest.main()
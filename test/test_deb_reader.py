@@ -0,0 +1,117 @@
+"""
+Unit Tests for Debian Package Reader
+Tests ar parsing, control stanza extraction and structural checks
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import deb_reader
+from src.exceptions import InvalidPackageError
+from test.test_utils import TestEnvironment, create_test_deb
+
+
+SAMPLE_CONTROL = {
+    'Package': 'hello-test',
+    'Version': '1.2-3',
+    'Architecture': 'amd64',
+    'Maintainer': 'Test <test@example.com>',
+    'Installed-Size': '42',
+    'Depends': 'libc6 (>= 2.17), foo | bar:any',
+    'Description': 'short summary\nLong line one.\n\nLine after blank.',
+}
+
+
+class TestReadDeb(unittest.TestCase):
+    """Test reading valid .deb packages"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        self.deb_path = create_test_deb(self.temp_dir, SAMPLE_CONTROL, data_size=4096)
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_control_fields(self):
+        """Test control fields are returned"""
+        info = deb_reader.read_deb(self.deb_path)
+        self.assertEqual(info.name, 'hello-test')
+        self.assertEqual(info.version, '1.2-3')
+        self.assertEqual(info.architecture, 'amd64')
+        self.assertEqual(info.installed_size, 42)
+        self.assertEqual(info.format_version, '2.0')
+
+    def test_multiline_description(self):
+        """Test multi-line Description keeps its layout"""
+        info = deb_reader.read_deb(self.deb_path)
+        self.assertEqual(info.control['Description'], SAMPLE_CONTROL['Description'])
+        self.assertEqual(info.summary, 'short summary')
+
+    def test_members(self):
+        """Test ar members are listed"""
+        info = deb_reader.read_deb(self.deb_path)
+        names = [m.name for m in info.members]
+        self.assertEqual(names, ['debian-binary', 'control.tar.gz', 'data.tar.gz'])
+
+    def test_dict_roundtrip(self):
+        """Test to_dict/from_dict preserve the package info"""
+        info = deb_reader.read_deb(self.deb_path)
+        restored = deb_reader.DebPackageInfo.from_dict(self.deb_path, info.to_dict())
+        self.assertEqual(restored.control, info.control)
+        self.assertEqual(len(restored.members), 3)
+
+    def test_format_info(self):
+        """Test formatted info contains key fields"""
+        text = deb_reader.format_deb_info(deb_reader.read_deb(self.deb_path))
+        self.assertIn('Package: hello-test', text)
+        self.assertIn('Installed-Size: 42', text)
+
+
+class TestInvalidDeb(unittest.TestCase):
+    """Test structural checks on broken packages"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_bad_magic(self):
+        """Test non-ar file is rejected"""
+        path = self.env.create_test_file('bad.deb', content=b'not a deb' * 200)
+        with self.assertRaises(InvalidPackageError):
+            deb_reader.read_deb(path)
+
+    def test_truncated(self):
+        """Test truncated package is rejected"""
+        path = create_test_deb(self.temp_dir, SAMPLE_CONTROL, data_size=8192)
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(path, 'wb') as f:
+            f.write(data[:len(data) - 100])
+        with self.assertRaises(InvalidPackageError):
+            deb_reader.read_deb(path)
+
+
+class TestParsers(unittest.TestCase):
+    """Test control and relationship parsers"""
+
+    def test_parse_relationships(self):
+        """Test Depends parsing with versions, alternatives and arch qualifiers"""
+        groups = deb_reader.parse_relationships(SAMPLE_CONTROL['Depends'])
+        self.assertEqual(groups, [['libc6'], ['foo', 'bar']])
+
+    def test_parse_control_continuation(self):
+        """Test continuation lines are joined"""
+        fields = deb_reader.parse_control("Package: a\nDescription: x\n y\n .\n z\n")
+        self.assertEqual(fields['Description'], 'x\ny\n\nz')
+
+
+if __name__ == '__main__':
+    unittest.main()
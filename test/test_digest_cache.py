@@ -0,0 +1,123 @@
+"""
+Unit Tests for Digest Cache
+Tests keying, invalidation, LRU eviction and the verification engine hook
+"""
+
+import unittest
+import hashlib
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.digest_cache import DigestCache, file_key
+from src.verification import VerificationEngine
+from test.test_utils import TestEnvironment, create_test_deb
+
+
+class TestDigestCache(unittest.TestCase):
+    """Test the SQLite cache directly"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        self.cache = DigestCache(os.path.join(self.temp_dir, 'cache.db'), max_entries=3, use_xattr=False)
+        self.path = self.env.create_test_file('a.bin', size_bytes=2048)
+
+    def tearDown(self):
+        self.cache.close()
+        self.env.teardown()
+
+    def test_miss_then_hit(self):
+        """Test counters and merged digests"""
+        key = file_key(self.path)
+        self.assertIsNone(self.cache.get(key))
+        self.cache.update(key, digests={'sha256': 'aa'})
+        self.cache.update(key, digests={'md5': 'bb'}, structure=(True, 'ok'), metadata={'format': 'deb'})
+        entry = self.cache.get(key)
+        self.assertEqual(entry['digests'], {'sha256': 'aa', 'md5': 'bb'})
+        self.assertEqual(entry['structure'], [True, 'ok'])
+        self.assertEqual(entry['metadata'], {'format': 'deb'})
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_modified_file_misses(self):
+        """Test a rewrite changes the key"""
+        key = file_key(self.path)
+        self.cache.update(key, digests={'sha256': 'aa'})
+        st = os.stat(self.path)
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+        self.assertIsNone(self.cache.get(file_key(self.path)))
+
+    def test_lru_eviction(self):
+        """Test least recently used entries go first"""
+        keys = [(1, ino, 10, 10) for ino in range(4)]
+        for key in keys[:3]:
+            self.cache.update(key, digests={'sha256': str(key[1])})
+        self.cache.get(keys[0])  # Make entry 0 recently used
+        self.cache.update(keys[3], digests={'sha256': '3'})
+        self.assertEqual(self.cache.stats()['entries'], 3)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+
+    def test_shared_between_instances(self):
+        """Test a second cache on the same database sees the entries"""
+        key = file_key(self.path)
+        self.cache.update(key, digests={'sha1': 'cc'})
+        other = DigestCache(self.cache.db_path, use_xattr=False)
+        self.assertEqual(other.get(key)['digests']['sha1'], 'cc')
+        other.close()
+
+
+class TestEngineCache(unittest.TestCase):
+    """Test the verification engine consults the cache"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        self.cache = DigestCache(os.path.join(self.temp_dir, 'cache.db'), use_xattr=False)
+        self.engine = VerificationEngine(cache=self.cache)
+        self.path = create_test_deb(self.temp_dir, {'Package': 'cached', 'Version': '1'}, data_size=4096)
+
+    def tearDown(self):
+        self.cache.close()
+        self.env.teardown()
+
+    def test_second_scan_is_cached(self):
+        """Test an unchanged file is not read again"""
+        first = self.engine.scan(self.path, ['sha256'])
+        second = self.engine.scan(self.path, ['sha256'])
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertEqual(second.bytes_read, 0)
+        self.assertEqual(second.digests, first.digests)
+        self.assertEqual(second.metadata['control']['Package'], 'cached')
+
+    def test_new_algorithm_rescans(self):
+        """Test a digest that was never computed forces a read"""
+        self.engine.scan(self.path, ['sha256'])
+        report = self.engine.scan(self.path, ['sha512'])
+        self.assertFalse(report.cached)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(report.digests['sha512'], hashlib.sha512(f.read()).hexdigest())
+
+    def test_xattr_mirror(self):
+        """Test digests survive losing the database when xattrs are available"""
+        cache = DigestCache(os.path.join(self.temp_dir, 'x.db'), use_xattr=True)
+        engine = VerificationEngine(cache=cache)
+        digest = engine.hash_file(self.path, ['sha256'])['sha256']
+        if not hasattr(os, 'getxattr'):
+            self.skipTest("No xattr support")
+        try:
+            os.getxattr(self.path, 'user.snapwiz.sha256')
+        except OSError:
+            self.skipTest("Filesystem has no user xattrs")
+        fresh = DigestCache(os.path.join(self.temp_dir, 'y.db'), use_xattr=True)
+        self.assertEqual(fresh.get(file_key(self.path), self.path)['digests']['sha256'], digest)
+        cache.close()
+        fresh.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Unit Tests for Flatpak Bundle Reader
+Tests GVariant superblock decoding and metadata extraction
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import flatpak_reader
+from src.exceptions import InvalidPackageError
+from test.test_utils import TestEnvironment, create_test_flatpak
+
+
+APP_METADATA = """[Application]
+name=org.example.Hello
+runtime=org.freedesktop.Platform/x86_64/23.08
+sdk=org.freedesktop.Sdk/x86_64/23.08
+command=hello
+
+[Context]
+shared=network;ipc;
+sockets=x11;wayland;
+filesystems=xdg-download;
+"""
+
+
+class TestReadBundle(unittest.TestCase):
+    """Test reading .flatpak bundles"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_metadata(self):
+        """Test ref, runtime, sdk and command are extracted"""
+        path = create_test_flatpak(self.temp_dir, 'app/org.example.Hello/x86_64/stable', APP_METADATA)
+        info = flatpak_reader.read_flatpak_bundle(path)
+        self.assertEqual(info.ref, 'app/org.example.Hello/x86_64/stable')
+        self.assertEqual(info.kind, 'app')
+        self.assertEqual(info.name, 'org.example.Hello')
+        self.assertEqual(info.branch, 'stable')
+        self.assertEqual(info.runtime, 'org.freedesktop.Platform/x86_64/23.08')
+        self.assertEqual(info.sdk, 'org.freedesktop.Sdk/x86_64/23.08')
+        self.assertEqual(info.command, 'hello')
+
+    def test_permissions_and_sizes(self):
+        """Test permissions and big-endian sizes"""
+        path = create_test_flatpak(
+            self.temp_dir, 'app/org.example.Hello/x86_64/stable', APP_METADATA,
+            installed_size=5 * 1024 * 1024, download_size=1234
+        )
+        info = flatpak_reader.read_flatpak_bundle(path)
+        self.assertEqual(info.permissions['shared'], ['network', 'ipc'])
+        self.assertEqual(info.permissions['sockets'], ['x11', 'wayland'])
+        self.assertEqual(info.installed_size, 5 * 1024 * 1024)
+        self.assertEqual(info.download_size, 1234)
+
+    def test_inline_payload_skipped(self):
+        """Test bundles with large inline delta parts (wider framing offsets)"""
+        path = create_test_flatpak(
+            self.temp_dir, 'app/org.example.Hello/x86_64/stable', APP_METADATA,
+            payload_size=100000
+        )
+        info = flatpak_reader.read_flatpak_bundle(path)
+        self.assertEqual(info.command, 'hello')
+        self.assertEqual(len(info.commit), 64)
+
+    def test_runtime_bundle(self):
+        """Test runtime bundles use the [Runtime] group"""
+        metadata = "[Runtime]\nname=org.example.Platform\nruntime=org.example.Platform/x86_64/1\n"
+        path = create_test_flatpak(self.temp_dir, 'runtime/org.example.Platform/x86_64/1', metadata)
+        info = flatpak_reader.read_flatpak_bundle(path)
+        self.assertEqual(info.kind, 'runtime')
+        self.assertEqual(info.runtime, 'org.example.Platform/x86_64/1')
+
+    def test_garbage_rejected(self):
+        """Test non-bundle file is rejected"""
+        path = self.env.create_test_file('bad.flatpak', size_bytes=4096)
+        with self.assertRaises(InvalidPackageError):
+            flatpak_reader.read_flatpak_bundle(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
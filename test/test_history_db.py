@@ -0,0 +1,186 @@
+"""
+Unit Tests for History Database
+Tests the SQLite history backend and its agreement with the journal
+"""
+
+import unittest
+import warnings
+import gc
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.history_db import HistoryDatabase
+from src.history_journal import HistoryJournal
+from src.logger import InstallLogger
+from test.test_utils import TestEnvironment
+
+
+ENTRIES = [
+    {'timestamp': '2025-12-30 10:00:00', 'package': '/tmp/firefox_120.deb', 'package_name': 'firefox_120.deb',
+     'success': True, 'message': 'Installed'},
+    {'timestamp': '2026-01-05 12:00:00', 'package': '/tmp/curl-8.5.rpm', 'package_name': 'curl-8.5.rpm',
+     'success': False, 'message': 'Dependency libssl missing'},
+    {'timestamp': '2026-01-10 09:30:00', 'package': '/home/u/Firefox_121.deb', 'package_name': 'Firefox_121.deb',
+     'success': False, 'message': 'dpkg lock held'},
+    {'timestamp': 'yesterday', 'package': 'vim', 'package_name': 'vim',
+     'success': True, 'message': 'Package uninstalled successfully'},
+    {'timestamp': '2026-02-01 08:00:00', 'package': '/tmp/100%_tool.rpm', 'package_name': '100%_tool.rpm',
+     'success': True, 'message': 'Installed'},
+]
+
+CRITERIA = [
+    {},
+    {'status': 'success'},
+    {'status': 'failed', 'package_type': 'deb'},
+    {'package_type': 'rpm'},
+    {'package_type': 'snap'},
+    {'package_type': 'flatpak'},
+    {'status': None, 'package_type': 'snap', 'query': None},
+    {'date_from': '2026-01-01'},
+    {'date_from': '2026-01-01', 'date_to': '2026-01-10'},
+    {'query': 'FIREFOX'},
+    {'query': 'fi'},
+    {'query': '%_'},
+    {'query': 'libssl'},
+    {'query': 'libssl', 'messages': True},
+    {'query': 'lock', 'messages': True, 'status': 'failed'},
+]
+
+
+class TestHistoryDatabase(unittest.TestCase):
+    """Test the SQLite history store"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        self.path = os.path.join(self.temp_dir, 'history.db')
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def names(self, entries):
+        return [e['package_name'] for e in entries]
+
+    def test_queries(self):
+        """Test filters, searches, limits, counts and statistics"""
+        db = HistoryDatabase(self.path)
+        db.extend(ENTRIES)
+
+        self.assertEqual(db.read(), ENTRIES)
+        self.assertEqual(self.names(db.query(status='failed')), ['curl-8.5.rpm', 'Firefox_121.deb'])
+        self.assertEqual(self.names(db.query(query='firefox')), ['firefox_120.deb', 'Firefox_121.deb'])
+        self.assertEqual(self.names(db.query(limit=2)), ['vim', '100%_tool.rpm'])
+        self.assertEqual(self.names(db.query(query='100%')), ['100%_tool.rpm'])
+        self.assertEqual(db.count(query='installed', messages=True), 3)
+        self.assertEqual(db.count(date_to='2026-01-10'), 2)
+        self.assertEqual(db.stats(), (5, 3))
+        db.close()
+
+    def test_search_without_fts(self):
+        """Test searches fall back to scanning when FTS5 is unavailable"""
+        db = HistoryDatabase(self.path)
+        db.extend(ENTRIES)
+        db.fts = False
+        self.assertEqual(self.names(db.query(query='FIREFOX')), ['firefox_120.deb', 'Firefox_121.deb'])
+        self.assertEqual(db.count(query='_tool'), 1)
+        db.close()
+
+    def test_imports_journal_once(self):
+        """Test a new database imports the journal and an existing one doesn't"""
+        journal_path = os.path.join(self.temp_dir, 'history.jsonl')
+        journal = HistoryJournal(journal_path, os.path.join(self.temp_dir, 'history.json'))
+        journal.extend(ENTRIES[:3])
+        journal.close()
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            db = HistoryDatabase(self.path, journal_path, os.path.join(self.temp_dir, 'history.json'))
+            gc.collect()
+        # The journal opened for the import is closed again
+        self.assertEqual([w for w in caught if issubclass(w.category, ResourceWarning)], [])
+        self.assertEqual(db.read(), ENTRIES[:3])
+        db.append(ENTRIES[3])
+        db.close()
+
+        db = HistoryDatabase(self.path, journal_path, os.path.join(self.temp_dir, 'history.json'))
+        self.assertEqual(db.read(), ENTRIES[:4])
+        db.close()
+
+    def test_replace_and_clear(self):
+        """Test the search index follows replace() and clear()"""
+        db = HistoryDatabase(self.path)
+        db.extend(ENTRIES)
+        db.replace(ENTRIES[1:2])
+        self.assertEqual(self.names(db.query(query='firefox')), [])
+        self.assertEqual(self.names(db.query(query='curl')), ['curl-8.5.rpm'])
+        db.clear()
+        self.assertEqual(db.stats(), (0, 0))
+        self.assertEqual(db.query(query='curl'), [])
+        db.close()
+
+    def test_daily_counters(self):
+        """Test the daily counters follow inserts and are backfilled for older databases"""
+        db = HistoryDatabase(self.path)
+        db.extend(ENTRIES)
+        daily = [('', '', 1, 0), ('2025-12-30', 'deb', 1, 0), ('2026-01-05', 'rpm', 0, 1),
+                 ('2026-01-10', 'deb', 0, 1), ('2026-02-01', 'rpm', 1, 0)]
+        self.assertEqual(db.daily(), daily)
+        db._conn.executescript('DROP TRIGGER history_daily_insert; DROP TABLE history_daily;')
+        db.close()
+
+        db = HistoryDatabase(self.path)
+        self.assertEqual(db.daily(), daily)
+        self.assertEqual(db.stats(), (5, 3))
+        db.close()
+
+    def test_batch_rolls_back(self):
+        """Test a failed batch leaves no entries behind"""
+        db = HistoryDatabase(self.path)
+        with self.assertRaises(RuntimeError):
+            with db.batch():
+                db.extend(ENTRIES)
+                raise RuntimeError('interrupted')
+        self.assertEqual(db.read(), [])
+        db.close()
+
+
+class TestLoggerBackends(unittest.TestCase):
+    """Test both InstallLogger backends answer the same"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_backends_agree(self):
+        """Test filters, counts and statistics match between backends, for any package type"""
+        journal = InstallLogger(os.path.join(self.temp_dir, 'journal'), backend='journal')
+        database = InstallLogger(os.path.join(self.temp_dir, 'sqlite'), backend='sqlite')
+        self.assertFalse(journal.indexed)
+        self.assertTrue(database.indexed)
+        snap = {'timestamp': '2026-02-02 08:00:00', 'package': '/tmp/hello.snap', 'package_name': 'hello.snap',
+                'success': True, 'message': 'Installed'}
+        for logger in (journal, database):
+            logger.store.extend(ENTRIES + [snap])
+
+        for criteria in CRITERIA:
+            self.assertEqual(database.filter_history(**criteria), journal.filter_history(**criteria), criteria)
+            self.assertEqual(database.count_history(**criteria), journal.count_history(**criteria), criteria)
+            self.assertEqual(database.filter_history(limit=1, **criteria),
+                             journal.filter_history(limit=1, **criteria), criteria)
+        self.assertEqual(journal.filter_history(package_type='snap'), [snap])
+        self.assertEqual(journal.count_history(package_type='flatpak'), 0)
+        self.assertEqual(database.search_history('curl'), journal.search_history('curl'))
+        self.assertEqual(database.get_stats(), journal.get_stats())
+        self.assertEqual(database.get_daily_stats(), journal.get_daily_stats())
+        database.close()
+        journal.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+Unit Tests for History Export
+Tests streaming exports in every format and their round trip through import
+"""
+
+import unittest
+import sys
+import os
+import csv
+import gzip
+import json
+import tracemalloc
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.history_export import export_entries, export_format, load_entries, PROGRESS_INTERVAL
+from src.logger import InstallLogger
+from test.test_utils import TestEnvironment
+
+
+def entry(i, success=True):
+    return {'timestamp': f'2026-01-{i % 28 + 1:02d} 10:00:00', 'package': f'/tmp/p{i}.deb',
+            'package_name': f'p{i}.deb', 'success': success, 'message': 'Installed, "ok"'}
+
+
+ENTRIES = [entry(i, i % 4 != 0) for i in range(10)]
+
+
+class TestExportEntries(unittest.TestCase):
+    """Test writing entries to files"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def path(self, name):
+        return os.path.join(self.temp_dir, name)
+
+    def test_formats_round_trip(self):
+        """Test JSON and NDJSON exports, plain and compressed, load back unchanged"""
+        for name in ('h.json', 'h.ndjson', 'h.json.gz', 'h.ndjson.xz'):
+            path = self.path(name)
+            self.assertEqual(export_entries(iter(ENTRIES), path, export_format(path)), 10)
+            self.assertEqual(load_entries(path), ENTRIES, name)
+
+        with gzip.open(self.path('h.json.gz'), 'rt') as f:
+            data = json.load(f)
+        self.assertEqual(data['total_entries'], 10)
+        self.assertIn('export_date', data)
+
+    def test_csv(self):
+        """Test the CSV layout and that an empty history gives an empty file"""
+        export_entries(iter(ENTRIES[:2]), self.path('h.csv'), 'csv')
+        with open(self.path('h.csv'), newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ['timestamp', 'package_name', 'success', 'message'])
+        self.assertEqual(rows[1], ['2026-01-01 10:00:00', 'p0.deb', 'Failed', 'Installed, "ok"'])
+
+        export_entries(iter([]), self.path('empty.csv'), 'csv')
+        self.assertEqual(os.path.getsize(self.path('empty.csv')), 0)
+        export_entries(iter([]), self.path('empty.json'), 'json')
+        self.assertEqual(load_entries(self.path('empty.json')), [])
+
+    def test_progress(self):
+        """Test progress is reported in entries and bytes"""
+        reports = []
+        count = PROGRESS_INTERVAL * 2 + 5
+        export_entries((entry(i) for i in range(count)), self.path('h.ndjson'), 'ndjson',
+                       lambda rows, written: reports.append((rows, written)))
+        self.assertEqual([rows for rows, _ in reports], [PROGRESS_INTERVAL, PROGRESS_INTERVAL * 2, count])
+        self.assertEqual(reports[-1][1], os.path.getsize(self.path('h.ndjson')))
+
+    def test_failure_leaves_no_file(self):
+        """Test an export that fails midway leaves neither the target nor a partial file"""
+        def broken():
+            yield ENTRIES[0]
+            raise OSError('disk full')
+
+        with self.assertRaises(OSError):
+            export_entries(broken(), self.path('h.json'), 'json')
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_constant_memory(self):
+        """Test memory use doesn't grow with the number of entries"""
+        tracemalloc.start()
+        try:
+            export_entries((entry(i) for i in range(50000)), self.path('h.json.gz'), 'json')
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, 2 * 1024 * 1024)
+
+
+class TestLoggerExport(unittest.TestCase):
+    """Test InstallLogger exports with filters on both backends"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_filtered_export(self):
+        """Test status and date filters select the exported entries"""
+        history = [entry(i, i % 4 != 0) for i in range(60)]
+        expected = [e for e in history if not e['success'] and e['timestamp'] >= '2026-01-10']
+        for backend in ('journal', 'sqlite'):
+            logger = InstallLogger(os.path.join(self.temp_dir, backend), backend=backend)
+            if backend == 'journal':
+                logger.store.max_entries = 25
+            logger.store.extend(history)
+
+            path = os.path.join(self.temp_dir, f'{backend}.ndjson.gz')
+            self.assertTrue(logger.export_history(path, 'ndjson', status='failed', date_from='2026-01-10'))
+            self.assertEqual(load_entries(path), expected, backend)
+            self.assertTrue(logger.export_history(path, 'ndjson'))
+            self.assertEqual(load_entries(path), history, backend)
+            logger.close()
+
+    def test_import_compressed(self):
+        """Test a compressed export imports back"""
+        logger = InstallLogger(os.path.join(self.temp_dir, 'a'))
+        logger.store.extend(ENTRIES)
+        path = os.path.join(self.temp_dir, 'backup.json.xz')
+        self.assertTrue(logger.export_history(path))
+
+        other = InstallLogger(os.path.join(self.temp_dir, 'b'))
+        self.assertTrue(other.import_history(path, merge=False))
+        self.assertEqual(other.get_history(), ENTRIES)
+        self.assertFalse(logger.export_history(os.path.join(self.temp_dir, 'missing', 'x.json')))
+
+
+if __name__ == '__main__':
+    unittest.main()
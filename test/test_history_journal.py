@@ -0,0 +1,314 @@
+"""
+Unit Tests for History Journal
+Tests the append-only installation history and its legacy migration
+"""
+
+import unittest
+import sys
+import os
+import json
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.history_journal import HistoryJournal
+from src.logger import InstallLogger
+from test.test_utils import TestEnvironment
+
+
+def entry(name, success=True):
+    return {'timestamp': '2024-01-01 00:00:00', 'package': name, 'package_name': name,
+            'success': success, 'message': 'ok' if success else 'failed'}
+
+
+class TestHistoryJournal(unittest.TestCase):
+    """Test the JSON-lines journal"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        self.path = os.path.join(self.temp_dir, 'history.jsonl')
+        self.legacy_path = os.path.join(self.temp_dir, 'history.json')
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def journal(self, **kwargs):
+        return HistoryJournal(self.path, self.legacy_path, **kwargs)
+
+    def test_append_and_read(self):
+        """Test entries are written one compact line each and read back in order"""
+        journal = self.journal()
+        journal.append(entry('a'))
+        journal.extend([entry('b'), entry('c', False)])
+        journal.close()
+
+        with open(self.path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertNotIn(': ', lines[0])
+        self.assertEqual([e['package'] for e in self.journal().read()], ['a', 'b', 'c'])
+
+    def test_migrates_legacy_history(self):
+        """Test a JSON array history is converted once and kept aside"""
+        with open(self.legacy_path, 'w', encoding='utf-8') as f:
+            json.dump([entry('old1'), entry('old2')], f, indent=2)
+
+        journal = self.journal()
+        journal.append(entry('new'))
+        self.assertEqual([e['package'] for e in journal.read()], ['old1', 'old2', 'new'])
+        self.assertFalse(os.path.exists(self.legacy_path))
+        self.assertTrue(os.path.exists(self.legacy_path + '.migrated'))
+
+    def test_torn_line(self):
+        """Test a line torn by a crash is skipped and the next entry starts cleanly"""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(entry('a')) + '\n{"package": "to')
+
+        journal = self.journal()
+        self.assertEqual([e['package'] for e in journal.read()], ['a'])
+        journal.append(entry('b'))
+        self.assertEqual([e['package'] for e in journal.read()], ['a', 'b'])
+
+    def test_fsync_batching(self):
+        """Test fsyncs happen per batch rather than per entry"""
+        journal = self.journal(fsync_batch=3, fsync_interval=3600)
+        with mock.patch('src.history_journal.os.fsync') as fsync:
+            for name in 'abcde':
+                journal.append(entry(name))
+            self.assertEqual(fsync.call_count, 1)
+
+            with journal.batch():
+                for name in 'fghij':
+                    journal.append(entry(name))
+            self.assertEqual(fsync.call_count, 2)
+
+            journal.close()
+            self.assertEqual(fsync.call_count, 2)
+        self.assertEqual(len(journal.read()), 10)
+
+    def test_replace_and_clear(self):
+        """Test the whole history can be replaced and cleared"""
+        journal = self.journal()
+        journal.extend([entry('a'), entry('b')])
+        journal.replace([entry('c')])
+        self.assertEqual([e['package'] for e in journal.read()], ['c'])
+        journal.append(entry('d'))
+        self.assertEqual([e['package'] for e in journal.read()], ['c', 'd'])
+        journal.clear()
+        self.assertEqual(journal.read(), [])
+
+
+class TestRotation(unittest.TestCase):
+    """Test archiving full segments"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        self.path = os.path.join(self.temp_dir, 'history.jsonl')
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def journal(self, **kwargs):
+        kwargs.setdefault('max_entries', 3)
+        kwargs.setdefault('backup_count', 2)
+        return HistoryJournal(self.path, os.path.join(self.temp_dir, 'history.json'), **kwargs)
+
+    def dated(self, day, name):
+        return dict(entry(name), timestamp=f'2026-01-{day:02d} 12:00:00')
+
+    def test_rotation_and_expiry(self):
+        """Test full segments are archived and only backup_count archives are kept"""
+        journal = self.journal()
+        for i in range(1, 11):
+            journal.append(self.dated(i, f'p{i}.deb'))
+
+        self.assertEqual([e['package'] for e in journal.read()], [f'p{i}.deb' for i in range(4, 11)])
+        self.assertEqual([r['file'] for r in journal.archived()],
+                         ['history.000002.jsonl.gz', 'history.000003.jsonl.gz'])
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), [
+            'history.000002.jsonl.gz', 'history.000003.jsonl.gz', 'history.jsonl', 'history.lock', 'history.manifest.json'
+        ])
+        record = journal.archived()[0]
+        self.assertEqual((record['earliest'], record['latest'], record['entries']),
+                         ('2026-01-04 12:00:00', '2026-01-06 12:00:00', 3))
+        self.assertEqual(journal.read_active(), [self.dated(10, 'p10.deb')])
+
+    def test_rotation_by_another_writer(self):
+        """Test a writer follows the active segment after another one rotates it"""
+        first = self.journal(backup_count=10)
+        second = self.journal(backup_count=10)
+        second.append(entry('p0.deb'))
+        first.extend(entry(f'p{i}.deb') for i in range(1, 5))  # Rotates the segment second has open
+        second.extend(entry(f'p{i}.deb') for i in range(5, 8))
+        first.append(entry('p8.deb'))
+
+        self.assertEqual([e['package'] for e in first.read()], [f'p{i}.deb' for i in range(9)])
+        self.assertEqual([r['entries'] for r in second.archived()], [3, 3, 3])
+        first.close()
+        second.close()
+
+    def test_concurrent_processes(self):
+        """Test no entry is lost while processes append and rotate at once"""
+        def write(prefix):
+            journal = self.journal(backup_count=1000)
+            for i in range(100):
+                journal.append(entry(f'{prefix}{i}.deb'))
+            journal.close()
+            os._exit(0)
+
+        children = []
+        for prefix in ('a', 'b', 'c'):
+            pid = os.fork()
+            if pid == 0:
+                write(prefix)
+            children.append(pid)
+        for pid in children:
+            os.waitpid(pid, 0)
+
+        names = sorted(e['package'] for e in self.journal(backup_count=1000).read())
+        self.assertEqual(names, sorted(f'{prefix}{i}.deb' for prefix in 'abc' for i in range(100)))
+
+    def test_size_rotation(self):
+        """Test the active segment is also archived once it reaches max_bytes"""
+        journal = self.journal(max_entries=1000, max_bytes=300)
+        journal.extend(entry(f'p{i}.deb') for i in range(5))
+        self.assertEqual(len(journal.archived()), 1)
+        self.assertEqual(len(journal.read()), 5)
+
+    def test_date_range_skips_segments(self):
+        """Test archived segments outside a date range are left out"""
+        journal = self.journal(backup_count=5)
+        for i in range(1, 10):
+            journal.append(self.dated(i, f'p{i}.deb'))
+        journal.append(entry('undated.deb', True) | {'timestamp': 'unknown'})
+
+        self.assertEqual(len(journal.archived(date_from='2026-01-04', date_to='2026-01-06')), 1)
+        self.assertEqual(len(journal.archived(date_from='2026-01-07')), 1)
+        self.assertEqual(len(journal.archived(date_to='2026-01-02')), 1)
+        self.assertEqual([e['package'] for e in journal.read(date_from='2026-01-07')],
+                         ['p7.deb', 'p8.deb', 'p9.deb', 'undated.deb'])
+
+    def test_recovery(self):
+        """Test an interrupted rotation is finished and a lost manifest is rebuilt"""
+        journal = self.journal()
+        journal.extend([self.dated(1, 'a.deb'), self.dated(2, 'b.deb')])
+        journal.close()
+        # Crash right after the active segment was renamed
+        os.replace(self.path, os.path.join(self.temp_dir, 'history.000007.jsonl'))
+
+        journal = self.journal()
+        self.assertEqual([r['file'] for r in journal.archived()], ['history.000007.jsonl.gz'])
+        self.assertEqual([e['package'] for e in journal.read()], ['a.deb', 'b.deb'])
+
+        with open(journal.manifest_path, 'w') as f:
+            f.write('{broken')
+        self.assertEqual(self.journal().archived()[0]['entries'], 2)
+
+    def test_replace_drops_archives(self):
+        """Test replace() removes archived segments and re-segments the entries"""
+        journal = self.journal(backup_count=5)
+        journal.extend(entry(f'old{i}.deb') for i in range(7))
+        journal.replace([entry(f'new{i}.deb') for i in range(4)])
+        self.assertEqual([e['package'] for e in journal.read()], [f'new{i}.deb' for i in range(4)])
+        self.assertEqual(len(journal.archived()), 1)
+
+
+class TestInstallLogger(unittest.TestCase):
+    """Test InstallLogger on top of the journal"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_history_api(self):
+        """Test logging, filtering, importing and clearing"""
+        with open(os.path.join(self.temp_dir, 'installation_history.json'), 'w', encoding='utf-8') as f:
+            json.dump([entry('old.deb')], f)
+
+        logger = InstallLogger(self.temp_dir)
+        with logger.batch():
+            logger.log_installation('/tmp/vim.deb', True, 'Installed')
+            logger.log_installation('/tmp/curl.rpm', False, 'Broken')
+        logger.close()
+
+        history = logger.get_history()
+        self.assertEqual([e['package_name'] for e in history], ['old.deb', 'vim.deb', 'curl.rpm'])
+        self.assertEqual(len(logger.filter_history(status='failed')), 1)
+
+        export_path = os.path.join(self.temp_dir, 'export.json')
+        self.assertTrue(logger.export_history(export_path, format='json'))
+        self.assertTrue(logger.import_history(export_path, merge=True))
+        self.assertEqual(len(logger.get_history()), 6)
+
+        self.assertTrue(logger.clear_history())
+        self.assertEqual(InstallLogger(self.temp_dir).get_history(), [])
+
+    def test_rotated_reads(self):
+        """Test recent entries, counts and statistics don't read archived segments"""
+        logger = InstallLogger(self.temp_dir)
+        logger.store.max_entries = 10
+        with logger.batch():
+            for i in range(35):
+                logger.log_installation(f'/tmp/p{i}.deb', i % 3 != 0, 'done')
+
+        with mock.patch.object(logger.store, 'read_segment', wraps=logger.store.read_segment) as read_segment:
+            self.assertEqual([e['package_name'] for e in logger.filter_history(limit=5)],
+                             [f'p{i}.deb' for i in range(30, 35)])
+            self.assertEqual(logger.count_history(), 35)
+            # The History tab passes every criterion, unset ones as None
+            self.assertEqual(logger.count_history(status=None, package_type=None, query=None), 35)
+            self.assertEqual(logger.count_history(status='failed', package_type='deb', query=None), 12)
+            self.assertEqual(logger.count_history(package_type='rpm'), 0)
+            self.assertEqual(logger.get_stats()['failed'], 12)
+            self.assertEqual(read_segment.call_count, 0)
+
+            self.assertEqual(len(logger.filter_history(limit=8)), 8)
+            self.assertEqual(read_segment.call_count, 1)
+            self.assertEqual(logger.count_history(query='p1'), 11)
+            self.assertEqual(len(logger.get_history()), 35)
+            # Archives are parsed once
+            self.assertEqual(read_segment.call_count, 3)
+
+    def test_cached_reads(self):
+        """Test the journal is parsed once until another writer changes it"""
+        logger = InstallLogger(self.temp_dir)
+        logger.log_installation('/tmp/vim.deb', True, 'Installed')
+        with mock.patch.object(logger.store, 'read_active', wraps=logger.store.read_active) as read:
+            logger.get_history()
+            logger.log_installation('/tmp/curl.rpm', False, 'Broken')
+            logger.get_history()
+            logger.get_stats()
+            self.assertEqual(logger.count_history(), 2)
+            self.assertEqual(read.call_count, 1)
+
+            # Another logger (or process) appending to the journal invalidates the cache
+            other = InstallLogger(self.temp_dir)
+            other.log_installation('/tmp/htop.deb', True, 'Installed')
+            other.close()
+            self.assertEqual([e['package_name'] for e in logger.get_history()], ['vim.deb', 'curl.rpm', 'htop.deb'])
+            self.assertEqual(read.call_count, 2)
+
+    def test_counters(self):
+        """Test running counters agree with a rescan of the history"""
+        logger = InstallLogger(self.temp_dir)
+        logger.get_stats()
+        for name, success in (('a.deb', True), ('b.rpm', False), ('c.deb', False), ('vim', True)):
+            logger.log_installation('/tmp/' + name, success, 'done')
+        logger.store.append(entry('old.deb'))  # Written behind the logger's back
+
+        stats = logger.get_stats()
+        self.assertEqual((stats['total'], stats['successful'], stats['failed']), (5, 3, 2))
+        today = logger.get_history()[1]['timestamp'][:10]
+        self.assertEqual(logger.get_daily_stats(), sorted([
+            ('2024-01-01', 'deb', 1, 0), (today, '', 1, 0), (today, 'deb', 1, 1), (today, 'rpm', 0, 1)
+        ]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Unit Tests for Install Planner
+Tests dependency ordering, cycles and external dependencies
+"""
+
+import unittest
+import time
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.install_planner import plan_installation, plan_entries, PlanEntry
+from src.capabilities import CapabilitySnapshot
+from src.digest_cache import DigestCache
+from src.package_handler import PackageHandler
+from test.test_utils import TestEnvironment, create_test_deb, create_test_rpm
+
+
+def deb(name, depends='', provides='', pre_depends=''):
+    control = {'Package': name, 'Version': '1'}
+    if depends:
+        control['Depends'] = depends
+    if pre_depends:
+        control['Pre-Depends'] = pre_depends
+    if provides:
+        control['Provides'] = provides
+    return {'format': 'deb', 'control': control}
+
+
+class TestPlanner(unittest.TestCase):
+    """Test ordering on synthetic metadata"""
+
+    def plan(self, packages):
+        metadata = dict(packages)
+        return plan_installation([path for path, _ in packages], metadata.get)
+
+    def test_dependency_first(self):
+        """Test a dependency queued later is moved first"""
+        plan = self.plan([
+            ('app.deb', deb('app', depends='libfoo (>= 1.0), libc6')),
+            ('libfoo.deb', deb('libfoo')),
+        ])
+        self.assertEqual(plan.order, ['libfoo.deb', 'app.deb'])
+        self.assertEqual(plan.external, {'app.deb': ['libc6']})
+        self.assertEqual(plan.edges, {'app.deb': ['libfoo.deb']})
+
+    def test_independent_keep_order(self):
+        """Test unrelated packages keep the user's order"""
+        plan = self.plan([('b.deb', deb('b')), ('a.deb', deb('a')), ('c.deb', deb('c'))])
+        self.assertEqual(plan.order, ['b.deb', 'a.deb', 'c.deb'])
+
+    def test_virtual_and_alternatives(self):
+        """Test Provides and '|' alternatives satisfy requirements"""
+        plan = self.plan([
+            ('client.deb', deb('client', depends='mail-transport-agent | nullmailer')),
+            ('mta.deb', deb('postfix', provides='mail-transport-agent')),
+            ('early.deb', deb('early')),
+            ('setup.deb', deb('setup', pre_depends='early')),
+        ])
+        self.assertLess(plan.order.index('mta.deb'), plan.order.index('client.deb'))
+        self.assertLess(plan.order.index('early.deb'), plan.order.index('setup.deb'))
+        self.assertEqual(plan.external, {})
+
+    def test_rpm_requires(self):
+        """Test rpm Requires/Provides"""
+        plan = self.plan([
+            ('tool.rpm', {'format': 'rpm', 'name': 'tool', 'requires': ['libbar.so.1()(64bit)', '/bin/sh'], 'provides': []}),
+            ('libbar.rpm', {'format': 'rpm', 'name': 'libbar', 'requires': [], 'provides': ['libbar.so.1()(64bit)']}),
+        ])
+        self.assertEqual(plan.order, ['libbar.rpm', 'tool.rpm'])
+        self.assertEqual(plan.external, {'tool.rpm': ['/bin/sh']})
+
+    def test_cycle_reported_and_broken(self):
+        """Test cycles are reported and every package is still planned"""
+        plan = self.plan([
+            ('x.deb', deb('x')),
+            ('a.deb', deb('a', depends='b')),
+            ('b.deb', deb('b', depends='a')),
+            ('c.deb', deb('c', depends='a')),
+        ])
+        self.assertEqual(len(plan.cycles), 1)
+        self.assertEqual(sorted(plan.cycles[0]), ['a.deb', 'b.deb'])
+        self.assertEqual(sorted(plan.order), ['a.deb', 'b.deb', 'c.deb', 'x.deb'])
+        self.assertLess(plan.order.index('a.deb'), plan.order.index('c.deb'))
+
+    def test_cycle_broken_inside_cycle(self):
+        """Test a package waiting on a cycle isn't released to break it"""
+        plan = self.plan([
+            ('c.deb', deb('c', depends='a')),
+            ('a.deb', deb('a', depends='b')),
+            ('b.deb', deb('b', depends='a')),
+        ])
+        self.assertEqual(plan.cycles, [['a.deb', 'b.deb']])
+        self.assertEqual(plan.order[0], 'a.deb')
+        self.assertEqual(sorted(plan.order), ['a.deb', 'b.deb', 'c.deb'])
+
+    def test_unreadable_kept(self):
+        """Test packages without metadata stay in place"""
+        plan = self.plan([('broken.deb', None), ('ok.deb', deb('ok'))])
+        self.assertEqual(plan.order, ['broken.deb', 'ok.deb'])
+        self.assertEqual(plan.unreadable, ['broken.deb'])
+
+    def test_large_batch_is_fast(self):
+        """Test a 500 package dependency chain plans in well under a second"""
+        entries = [
+            PlanEntry(f'p{i}.deb', i, f'p{i}', [f'p{i}'], [[f'p{i + 1}']] if i < 499 else [])
+            for i in range(500)
+        ]
+        start = time.perf_counter()
+        plan = plan_entries(entries)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(plan.order[0], 'p499.deb')
+        self.assertEqual(plan.order[-1], 'p0.deb')
+
+
+class TestPlannerWithFiles(unittest.TestCase):
+    """Test planning real package files through PackageHandler metadata"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        cache = DigestCache(os.path.join(self.temp_dir, 'cache.db'), use_xattr=False)
+        self.handler = PackageHandler(capabilities=CapabilitySnapshot({}, {}, ''), digest_cache=cache)
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_deb_files(self):
+        """Test Depends parsed from real .deb files"""
+        app = create_test_deb(self.temp_dir, {'Package': 'app', 'Version': '1', 'Depends': 'lib'})
+        lib = create_test_deb(self.temp_dir, {'Package': 'lib', 'Version': '1'})
+        plan = plan_installation([app, lib], self.handler.get_package_metadata)
+        self.assertEqual(plan.order, [lib, app])
+
+    def test_rpm_files(self):
+        """Test Requires parsed from real .rpm files"""
+        tool = create_test_rpm(self.temp_dir, name='tool', requires=['libbar'], filename='tool.rpm')
+        lib = create_test_rpm(self.temp_dir, name='libbar', filename='libbar.rpm')
+        plan = plan_installation([tool, lib], self.handler.get_package_metadata)
+        self.assertEqual(plan.order, [lib, tool])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+"""
+Unit Tests for Inventory
+Tests the dpkg status parser and its incremental re-parse
+"""
+
+import unittest
+import subprocess
+import sys
+import os
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sqlite3
+from src.inventory import DpkgStatusDatabase, RpmSqliteDatabase, parse_status_stanza, read_rpm_inventory
+from test.test_utils import TestEnvironment, create_test_rpmdb
+
+
+def stanza(name, version='1.0', status='install ok installed', extra=''):
+    return (
+        f"Package: {name}\n"
+        f"Status: {status}\n"
+        f"Installed-Size: 120\n"
+        f"Architecture: amd64\n"
+        f"Version: {version}\n"
+        f"{extra}"
+        f"Description: the {name} package\n"
+        f" Depends: this continuation line is not a field\n"
+        f" .\n"
+        f" more text\n"
+    )
+
+
+class TestParseStanza(unittest.TestCase):
+    """Test parsing a single stanza"""
+
+    def test_fields(self):
+        """Test the kept fields and that continuation lines are skipped"""
+        record = parse_status_stanza(stanza('foo', extra="Pre-Depends: libc6\nDepends: bar (>= 1)\n").encode())
+        self.assertEqual(record.name, 'foo')
+        self.assertEqual(record.arch, 'amd64')
+        self.assertEqual(record.version, '1.0')
+        self.assertEqual(record.status, 'installed')
+        self.assertEqual(record.installed_size, 120)
+        self.assertEqual(record.depends, 'libc6, bar (>= 1)')
+        self.assertEqual(record.summary, 'the foo package')
+
+    def test_removed_package(self):
+        """Test packages with only config files left are not installed"""
+        record = parse_status_stanza(stanza('gone', status='deinstall ok config-files').encode())
+        self.assertFalse(record.installed)
+
+
+class TestDpkgStatusDatabase(unittest.TestCase):
+    """Test loading and incremental reloads"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        self.path = os.path.join(self.temp_dir, 'status')
+        self.stanzas = [stanza(f"pkg{i}") for i in range(50)]
+        self.write()
+        self.db = DpkgStatusDatabase(self.path)
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def write(self):
+        with open(self.path, 'w') as f:
+            f.write('\n'.join(self.stanzas))
+        # Make sure the rewrite is seen even within the mtime granularity
+        os.utime(self.path, ns=(0, len(self.stanzas) + os.path.getsize(self.path)))
+
+    def names(self, records):
+        return [(record.name, record.version) for record in records]
+
+    def test_load(self):
+        """Test every installed package is listed"""
+        self.stanzas.append(stanza('old', status='deinstall ok config-files'))
+        self.write()
+        records = self.db.load()
+        self.assertEqual(len(records), 50)
+        self.assertEqual(self.db.last_parsed, 51)
+
+    def test_unchanged_file_not_reparsed(self):
+        """Test a second load of the same file parses nothing"""
+        self.db.load()
+        self.db.load()
+        self.assertEqual(self.db.last_parsed, 0)
+
+    def test_incremental_reload(self):
+        """Test only edited stanzas are parsed after a rewrite"""
+        self.db.load()
+        self.stanzas[10] = stanza('pkg10', version='2.0')
+        self.stanzas[40] = stanza('pkg40', version='2.0')
+        self.stanzas.insert(5, stanza('newpkg'))
+        del self.stanzas[30]
+        self.write()
+
+        records = self.db.load()
+        self.assertEqual(self.db.last_parsed, 3)
+        self.assertEqual(self.names(records), self.names(DpkgStatusDatabase(self.path).load()))
+        self.assertIn(('pkg10', '2.0'), self.names(records))
+
+
+
+class TestRpmInventory(unittest.TestCase):
+    """Test reading rpmdb.sqlite"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_sqlite_database(self):
+        """Test headers are decoded without running rpm"""
+        db_path = create_test_rpmdb(self.temp_dir, [
+            {'name': 'bash', 'version': '5.2', 'release': '1.fc39', 'arch': 'x86_64',
+             'size': 8 * 1024 * 1024, 'summary': 'The GNU Bourne Again shell', 'requires': ['glibc', 'libtinfo.so.6']},
+            {'name': 'shadow-utils', 'epoch': 2, 'version': '4.14', 'release': '2', 'arch': 'x86_64'},
+            {'name': 'gpg-pubkey', 'version': 'abc', 'release': '1', 'arch': '(none)'},
+            b'\0\0\0\x09garbage',
+        ])
+        with mock.patch('subprocess.run') as run:
+            records = read_rpm_inventory(db_path)
+        run.assert_not_called()
+
+        self.assertEqual([record.name for record in records], ['bash', 'shadow-utils'])
+        bash, shadow = records
+        self.assertEqual(bash.version, '5.2-1.fc39')
+        self.assertEqual(bash.installed_size, 8192)
+        self.assertEqual(bash.depends, 'glibc, libtinfo.so.6')
+        self.assertEqual(bash.summary, 'The GNU Bourne Again shell')
+        self.assertEqual(shadow.version, '2:4.14-2')
+
+    def test_incremental_reload(self):
+        """Test only headers added since the last load are decoded"""
+        db_path = create_test_rpmdb(self.temp_dir, [
+            {'name': 'bash', 'version': '5.2', 'release': '1', 'arch': 'x86_64'},
+            {'name': 'zsh', 'version': '5.9', 'release': '1', 'arch': 'x86_64'},
+        ])
+        update = create_test_rpmdb(self.temp_dir, [
+            {'name': 'bash', 'version': '5.3', 'release': '1', 'arch': 'x86_64'},
+        ], filename='update.sqlite')
+        db = RpmSqliteDatabase(db_path)
+        db.load()
+        self.assertEqual(db.last_parsed, 2)
+
+        # An upgrade stores the new header under a new number
+        conn = sqlite3.connect(db_path)
+        blob = sqlite3.connect(update).execute('SELECT blob FROM Packages').fetchone()[0]
+        conn.execute('DELETE FROM Packages WHERE hnum = 1')
+        conn.execute('INSERT INTO Packages (blob) VALUES (?)', (blob,))
+        conn.commit()
+        conn.close()
+
+        records = db.load()
+        self.assertEqual(db.last_parsed, 1)
+        self.assertEqual([(r.name, r.version) for r in records], [('zsh', '5.9-1'), ('bash', '5.3-1')])
+
+    def test_legacy_database_falls_back(self):
+        """Test a database that isn't sqlite is listed through rpm -qa"""
+        legacy = self.env.create_test_file('Packages', content=b'\x00\x06\x15\x61' * 64)
+        output = "bash\tx86_64\t5.2-1\t8388608\tshell\n"
+        completed = subprocess.CompletedProcess([], 0, output, '')
+        with mock.patch('subprocess.run', return_value=completed) as run:
+            records = read_rpm_inventory(legacy)
+        run.assert_called_once()
+        self.assertEqual(records[0].name, 'bash')
+        self.assertEqual(records[0].installed_size, 8192)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Unit Tests for Inventory Index
+Tests n-gram lookups and their incremental updates
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.inventory import InstalledPackage
+from src.inventory_index import InventoryIndex, trigrams
+from src.inventory_table import InventoryTable
+
+
+NAMES = ['libcurl4', 'curl', 'python3-curl', 'libc6', 'vim', 'vim-common', 'xcurl']
+
+
+class TestInventoryIndex(unittest.TestCase):
+    """Test the name index"""
+
+    def setUp(self):
+        self.index = InventoryIndex()
+        self.index.build(enumerate(NAMES))
+
+    def matches(self, query):
+        return sorted(NAMES[row] for row in self.index.candidates(query) if query in NAMES[row])
+
+    def test_trigrams(self):
+        """Test trigram extraction"""
+        self.assertEqual(trigrams('curl'), {'cur', 'url'})
+        self.assertEqual(trigrams('vi'), set())
+
+    def test_substring(self):
+        """Test candidates agree with a linear scan"""
+        for query in ('curl', 'cu', 'url', 'vim-', 'lib', 'zz', 'pyth', 'c6'):
+            expected = sorted(name for name in NAMES if query in name)
+            self.assertEqual(self.matches(query), expected, query)
+
+    def test_incremental(self):
+        """Test removed rows disappear from the index and added rows appear"""
+        self.index.remove(1, 'curl')
+        self.index.add(7, 'curl')
+        self.index.remove(0, 'libcurl4')
+        self.assertEqual(sorted(self.index.candidates('curl')), [2, 6, 7])
+        self.assertEqual(sorted(self.index.candidates('lib')), [3])
+        self.assertEqual(sorted(self.index.candidates('c6')), [3])
+
+
+class TestTableSearch(unittest.TestCase):
+    """Test the table answers searches through the index"""
+
+    def test_search_follows_changes(self):
+        """Test searches after adds, updates and removals"""
+        table = InventoryTable()
+        table.extend(InstalledPackage(name, 'rpm' if 'vim' in name else 'deb', 'amd64', '1.0') for name in NAMES)
+        table.add(InstalledPackage('curl', 'deb', 'i386', '1.0'))
+
+        def names(rows):
+            return [(table.names[row], table.arches[row]) for row in rows]
+
+        self.assertEqual(names(table.select('curl')), [
+            ('curl', 'amd64'), ('curl', 'i386'), ('libcurl4', 'amd64'), ('python3-curl', 'amd64'), ('xcurl', 'amd64')
+        ])
+        self.assertEqual(names(table.select('VI', 'rpm', descending=True)), [('vim-common', 'amd64'), ('vim', 'amd64')])
+
+        table.remove(('deb', 'curl', 'amd64'))
+        table.update(InstalledPackage('xcurl', 'deb', 'amd64', '2.0'))
+        self.assertEqual(names(table.select('curl', 'deb')), [
+            ('curl', 'i386'), ('libcurl4', 'amd64'), ('python3-curl', 'amd64'), ('xcurl', 'amd64')
+        ])
+        self.assertEqual(names(table.select('c')), names(sorted(
+            (row for row in range(table.row_count) if table.alive[row] and 'c' in table.folded[row]),
+            key=lambda row: table.folded[row]
+        )))
+
+
+if __name__ == '__main__':
+    unittest.main()
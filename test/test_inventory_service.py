@@ -0,0 +1,158 @@
+"""
+Unit Tests for Inventory Service
+Tests inventory diffs, the file watchers and background reloads
+"""
+
+import unittest
+import queue
+import sys
+import os
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.inventory import InstalledPackage
+from src.inventory_service import (InventoryService, InventoryDiff, InotifyWatcher, PollingWatcher,
+                                   diff_inventory, package_key)
+from test.test_utils import TestEnvironment
+from test.test_inventory import stanza
+
+
+def inventory(*packages):
+    return {package_key(package): package for package in packages}
+
+
+class TestDiffInventory(unittest.TestCase):
+    """Test comparing inventories"""
+
+    def test_diff(self):
+        """Test added, removed and updated packages are reported"""
+        kept = InstalledPackage('bash', 'deb', 'amd64', '5.2')
+        old = inventory(kept, InstalledPackage('vim', 'deb', 'amd64', '9.0'),
+                        InstalledPackage('zsh', 'deb', 'amd64', '5.8'))
+        new = inventory(kept, InstalledPackage('vim', 'deb', 'amd64', '9.1'),
+                        InstalledPackage('zsh', 'deb', 'amd64', '5.8'),
+                        InstalledPackage('curl', 'rpm', 'x86_64', '8.0'))
+        del new[package_key(kept)]
+        new[package_key(kept)] = kept
+
+        diff = diff_inventory(old, new)
+        self.assertEqual([p.name for p in diff.added], ['curl'])
+        self.assertEqual(diff.removed, [])
+        self.assertEqual([(p.name, p.version) for p in diff.updated], [('vim', '9.1')])
+
+        diff = diff_inventory(new, {})
+        self.assertEqual(len(diff.removed), 4)
+        self.assertFalse(InventoryDiff())
+
+    def test_architectures_are_distinct(self):
+        """Test multiarch packages are tracked separately"""
+        old = inventory(InstalledPackage('libc6', 'deb', 'amd64', '2.37'))
+        new = inventory(InstalledPackage('libc6', 'deb', 'amd64', '2.37'),
+                        InstalledPackage('libc6', 'deb', 'i386', '2.37'))
+        diff = diff_inventory(old, new)
+        self.assertEqual([p.arch for p in diff.added], ['i386'])
+        self.assertEqual(diff.updated, [])
+
+
+class TestWatchers(unittest.TestCase):
+    """Test change detection"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        self.path = self.env.create_test_file('status', content=b'one')
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def replace(self, content):
+        # Like dpkg: write a new file and rename it over the old one
+        new_path = self.path + '-new'
+        with open(new_path, 'wb') as f:
+            f.write(content)
+        os.replace(new_path, self.path)
+
+    def test_polling(self):
+        """Test the polling watcher sees replacements and wakes up"""
+        watcher = PollingWatcher([self.path], interval=0.01)
+        self.assertFalse(watcher.wait(0.05))
+        self.replace(b'two')
+        self.assertTrue(watcher.wait(1.0))
+        watcher.wake()
+        self.assertFalse(watcher.wait())
+
+    def test_inotify(self):
+        """Test the inotify watcher only reports watched files"""
+        try:
+            watcher = InotifyWatcher([self.path])
+        except OSError:
+            self.skipTest("inotify is not available")
+        try:
+            self.env.create_test_file('unrelated', content=b'x')
+            self.assertFalse(watcher.wait(0.1))
+            self.replace(b'two')
+            self.assertTrue(watcher.wait(1.0))
+            watcher.wake()
+            self.assertFalse(watcher.wait())
+        finally:
+            watcher.close()
+
+
+# No host RPM database in these tests
+@mock.patch('src.inventory_service.find_rpmdb_sqlite', return_value=None)
+@mock.patch('src.inventory_service.shutil.which', return_value=None)
+class TestInventoryService(unittest.TestCase):
+    """Test background reloads"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        self.path = os.path.join(self.temp_dir, 'status')
+        self.write(['bash', 'vim'])
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def write(self, names, version='1.0'):
+        with open(self.path, 'w') as f:
+            f.write('\n'.join(stanza(name, version if name == 'vim' else '1.0') for name in names))
+
+    def test_refresh(self, *_):
+        """Test refresh() reports what changed since the last refresh"""
+        service = InventoryService(lambda diff: None, dpkg_status_file=self.path)
+        diff = service.refresh()
+        self.assertEqual(sorted(p.name for p in diff.added), ['bash', 'vim'])
+
+        self.write(['bash', 'vim', 'zsh'], version='2.0')
+        diff = service.refresh()
+        self.assertEqual([p.name for p in diff.added], ['zsh'])
+        self.assertEqual([(p.name, p.version) for p in diff.updated], [('vim', '2.0')])
+        self.assertEqual(len(service.snapshot()), 3)
+
+        self.assertFalse(service.refresh())
+
+    def test_background_updates(self, *_):
+        """Test the worker thread loads the inventory and reports later changes"""
+        diffs = queue.Queue()
+        service = InventoryService(diffs.put, dpkg_status_file=self.path,
+                                   poll_interval=0.01, settle_time=0.05)
+        service.start()
+        try:
+            first = diffs.get(timeout=5)
+            self.assertEqual(len(first.added), 2)
+
+            self.write(['bash'])
+            diff = diffs.get(timeout=5)
+            self.assertEqual([p.name for p in diff.removed], ['vim'])
+
+            # A requested refresh is answered even if nothing changed
+            service.request_refresh()
+            self.assertFalse(diffs.get(timeout=5))
+        finally:
+            service.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
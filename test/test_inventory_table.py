@@ -0,0 +1,83 @@
+"""
+Unit Tests for Inventory Table
+Tests the columnar inventory behind the uninstall list
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.inventory import InstalledPackage
+from src.inventory_table import InventoryTable, COLUMN_NAME, COLUMN_SIZE, COLUMN_TYPE, COMPACT_THRESHOLD
+
+
+def package(name, package_type='deb', version='1.0', size=None, arch='amd64'):
+    return InstalledPackage(name, package_type, arch, version, installed_size=size)
+
+
+class TestInventoryTable(unittest.TestCase):
+    """Test the columnar inventory"""
+
+    def setUp(self):
+        self.table = InventoryTable()
+        for record in (package('Vim', size=3000), package('bash', size=1500),
+                       package('curl', 'rpm', size=500), package('libcurl4', version='8.5')):
+            self.table.add(record)
+
+    def names(self, rows):
+        return [self.table.names[row] for row in rows]
+
+    def test_columns(self):
+        """Test records round-trip and repeated strings are shared"""
+        row = self.table.row_of(('deb', 'bash', 'amd64'))
+        record = self.table.package(row)
+        self.assertEqual((record.name, record.type, record.version, record.installed_size),
+                         ('bash', 'deb', '1.0', 1500))
+        self.assertIsNone(self.table.package(self.table.row_of(('deb', 'libcurl4', 'amd64'))).installed_size)
+        self.assertIs(self.table.versions[0], self.table.versions[1])
+
+    def test_select(self):
+        """Test case-insensitive search, type filter and sorting"""
+        self.assertEqual(self.names(self.table.select()), ['bash', 'curl', 'libcurl4', 'Vim'])
+        self.assertEqual(self.names(self.table.select('CURL')), ['curl', 'libcurl4'])
+        self.assertEqual(self.names(self.table.select('curl', 'rpm')), ['curl'])
+        self.assertEqual(self.names(self.table.select(column=COLUMN_SIZE, descending=True)),
+                         ['Vim', 'bash', 'curl', 'libcurl4'])
+        self.assertEqual(self.names(self.table.select(column=COLUMN_TYPE)), ['bash', 'libcurl4', 'Vim', 'curl'])
+
+    def test_changes_keep_rows(self):
+        """Test removals leave tombstones and updates change the row in place"""
+        row = self.table.row_of(('deb', 'Vim', 'amd64'))
+        self.assertEqual(self.table.remove(('deb', 'bash', 'amd64')), 1)
+        self.assertIsNone(self.table.remove(('deb', 'bash', 'amd64')))
+        self.assertEqual(self.table.update(package('Vim', version='9.1', size=3100)), row)
+
+        self.assertEqual(len(self.table), 3)
+        self.assertEqual(self.table.row_count, 4)
+        self.assertEqual(self.names(self.table.select()), ['curl', 'libcurl4', 'Vim'])
+        self.assertEqual(self.names(self.table.select(column=COLUMN_SIZE)), ['libcurl4', 'curl', 'Vim'])
+        self.assertEqual(self.table.versions[row], '9.1')
+
+        # A reinstalled package gets a new row
+        self.assertEqual(self.table.add(package('bash')), 4)
+        self.assertEqual(self.names(self.table.select('bash')), ['bash'])
+
+    def test_compaction(self):
+        """Test compaction drops tombstones once they dominate"""
+        for i in range(COMPACT_THRESHOLD * 2):
+            self.table.add(package(f'pkg{i}'))
+        for i in range(COMPACT_THRESHOLD * 2):
+            self.table.remove(('deb', f'pkg{i}', 'amd64'))
+        self.assertTrue(self.table.needs_compaction())
+
+        self.table.compact()
+        self.assertEqual(self.table.row_count, 4)
+        self.assertFalse(self.table.needs_compaction())
+        self.assertEqual(self.names(self.table.select(column=COLUMN_NAME)), ['bash', 'curl', 'libcurl4', 'Vim'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Unit Tests for Privileged Helper
+Tests the command vocabulary, the socket protocol and PackageHandler routing
+"""
+
+import unittest
+import threading
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.capabilities import CapabilitySnapshot
+from src.digest_cache import DigestCache
+from src.exceptions import CommandNotAllowedError
+from src.package_handler import PackageHandler
+from src.privileged_helper import HelperServer, PrivilegedHelper, validate_command
+from src.process_runner import run_streaming
+from test.test_utils import TestEnvironment, FakeHelper, create_test_deb
+
+
+class TestValidateCommand(unittest.TestCase):
+    """Test the helper's command vocabulary"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        self.deb = create_test_deb(self.temp_dir, {'Package': 'hello', 'Version': '1.0'})
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_install_paths(self):
+        """Test installs accept absolute paths of existing package files"""
+        argv = ['apt', '-o', 'APT::Status-Fd=1', 'install', '-y', self.deb]
+        self.assertEqual(validate_command(argv), argv)
+
+    def test_rejected_commands(self):
+        """Test anything outside the vocabulary is rejected"""
+        rejected = [
+            ['sh', '-c', 'id'],
+            ['apt', 'install', '-y', self.deb],                       # Not a known prefix
+            ['dnf', 'install', '-y', 'relative.rpm'],                 # Not absolute
+            ['dnf', 'install', '-y', '/etc/passwd'],                  # Not a package
+            ['dpkg', '--status-fd', '1', '-i', '--force-all', self.deb],
+            ['apt', 'remove', '-y', 'foo;reboot'],
+            ['apt', 'remove', '-y'],                                  # Nothing to remove
+            ['apt-get', 'install', '-f', '-y', 'extra'],
+        ]
+        for argv in rejected:
+            with self.assertRaises(CommandNotAllowedError, msg=argv):
+                validate_command(argv)
+
+    def test_remove_names(self):
+        """Test removals accept package names"""
+        argv = ['dnf', 'remove', '-y', 'libfoo-devel', 'python3.11']
+        self.assertEqual(validate_command(argv), argv)
+
+
+class TestHelperProtocol(unittest.TestCase):
+    """Test client and server over a real Unix socket with a fake executor"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        self.deb = create_test_deb(self.temp_dir, {'Package': 'hello', 'Version': '1.0'})
+        self.socket_path = os.path.join(self.temp_dir, 'helper.sock')
+        self.executed = []
+        self.server = HelperServer(self.socket_path, os.getuid(), idle_timeout=5, executor=self.fake_executor)
+        self.thread = threading.Thread(target=self.server.serve, daemon=True)
+        self.thread.start()
+        self.helper = PrivilegedHelper(socket_path=self.socket_path, start_timeout=0)
+        for _ in range(100):
+            if self.helper.ping():
+                break
+            threading.Event().wait(0.02)
+
+    def tearDown(self):
+        self.helper.stop()
+        self.thread.join(5)
+        self.env.teardown()
+
+    def fake_executor(self, argv, **kwargs):
+        """Pretend to be apt: print status lines instead of installing"""
+        self.executed.append(argv)
+        code = (
+            "import sys\n"
+            "print('pmstatus:hello:50:Unpacking hello', flush=True)\n"
+            "print('Setting up hello (1.0)', flush=True)\n"
+            "sys.stderr.write('W: fake warning\\n')\n"
+        )
+        return run_streaming([sys.executable, '-c', code], **kwargs)
+
+    def test_command_streams_through_helper(self):
+        """Test output and progress arrive through the socket"""
+        events = []
+        command = ['pkexec', 'apt', '-o', 'APT::Status-Fd=1', 'install', '-y', self.deb]
+        result = self.helper.run(command, on_event=events.append, timeout=30)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(self.executed, [command[1:]])
+        self.assertEqual(result.stdout, 'Setting up hello (1.0)\n')
+        self.assertEqual(result.stderr, 'W: fake warning\n')
+        self.assertEqual([e.percent for e in events], [50.0])
+
+    def test_rejected_command(self):
+        """Test the server refuses commands outside the vocabulary"""
+        with self.assertRaises(CommandNotAllowedError):
+            self.helper.run(['pkexec', 'sh', '-c', 'id'], timeout=30)
+        self.assertEqual(self.executed, [])
+
+    def test_shutdown(self):
+        """Test stop() ends the server and removes its socket"""
+        self.helper.stop()
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+        self.assertFalse(os.path.exists(self.socket_path))
+
+
+class TestHandlerRouting(unittest.TestCase):
+    """Test PackageHandler sends privileged commands to its helper"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        capabilities = CapabilitySnapshot({'apt': '/usr/bin/apt', 'dpkg': '/usr/bin/dpkg'}, {}, '')
+        cache = DigestCache(os.path.join(self.temp_dir, 'cache.db'), use_xattr=False)
+        self.helper = FakeHelper(status_lines=['pmstatus:hello:100:Installed hello\n'])
+        self.handler = PackageHandler(capabilities=capabilities, digest_cache=cache, helper=self.helper)
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_install_and_uninstall(self):
+        """Test one install and one removal both go through the helper"""
+        deb = create_test_deb(self.temp_dir, {'Package': 'hello', 'Version': '1.0'})
+        events = []
+        success, _ = self.handler.install_package(deb, progress_callback=events.append)
+        self.assertTrue(success)
+        self.assertEqual(events[-1].percent, 100.0)
+        success, _ = self.handler.uninstall_package('hello', 'deb')
+        self.assertTrue(success)
+        self.assertEqual(self.helper.commands, [
+            ['pkexec', 'apt', '-o', 'APT::Status-Fd=1', 'install', '-y', os.path.abspath(deb)],
+            ['pkexec', 'apt', '-o', 'APT::Status-Fd=1', 'remove', '-y', 'hello'],
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
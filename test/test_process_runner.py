@@ -0,0 +1,168 @@
+"""
+Unit Tests for Process Runner
+Tests streaming execution, status parsers and bounded output capture
+"""
+
+import unittest
+import asyncio
+import errno
+import signal
+import subprocess
+import sys
+import os
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.process_runner import (
+    run_streaming, run_streaming_async, parser_for_command, BoundedCapture, UnstoppedTimeout,
+    AptStatusParser, DpkgStatusParser, DnfProgressParser, RpmPercentParser, PercentParser
+)
+
+
+def python_command(code):
+    return [sys.executable, '-c', code]
+
+
+class TestRunStreaming(unittest.TestCase):
+    """Test the Popen based runner"""
+
+    def test_events_arrive_in_order(self):
+        """Test status lines become events and stay out of the output"""
+        code = (
+            "import sys\n"
+            "print('pmstatus:foo:20.0:Preparing foo', flush=True)\n"
+            "print('Setting up foo', flush=True)\n"
+            "sys.stderr.write('warning\\n')\n"
+            "print('pmstatus:foo:100:Installed foo', end='')\n"
+        )
+        events = []
+        result = run_streaming(python_command(code), on_event=events.append, parser=AptStatusParser())
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual([e.percent for e in events], [20.0, 100.0])
+        self.assertEqual(events[-1].package, 'foo')
+        self.assertEqual(result.stdout, 'Setting up foo\n')
+        self.assertEqual(result.stderr, 'warning\n')
+
+    def test_carriage_return_progress(self):
+        """Test '\\r' separated progress bars are parsed per update"""
+        code = "import sys\nfor p in (10, 55, 100):\n    sys.stdout.write(f'Installing {p}%\\r')\n"
+        events = []
+        run_streaming(python_command(code), on_event=events.append, parser=PercentParser())
+        self.assertEqual([e.percent for e in events], [10.0, 55.0, 100.0])
+
+    def test_timeout(self):
+        """Test slow commands are killed"""
+        with self.assertRaises(subprocess.TimeoutExpired):
+            run_streaming(python_command("import time; time.sleep(10)"), timeout=0.3)
+
+    def test_unkillable_timeout(self):
+        """Test a child that can't be signalled is reported instead of ignored"""
+        denied = PermissionError(errno.EPERM, 'Operation not permitted')
+        with mock.patch.object(subprocess.Popen, 'kill', side_effect=denied), \
+                self.assertRaises(UnstoppedTimeout) as raised:
+            run_streaming(python_command("import time; time.sleep(10)"), timeout=0.3)
+        os.kill(raised.exception.pid, signal.SIGKILL)
+        os.waitpid(raised.exception.pid, 0)
+        self.assertIn('Operation not permitted', str(raised.exception))
+        self.assertIn(str(raised.exception.pid), str(raised.exception))
+
+    def test_async_timeout_reaps(self):
+        """Test the asyncio runner waits for the killed child"""
+        with self.assertRaises(subprocess.TimeoutExpired) as raised:
+            asyncio.run(run_streaming_async(python_command("import time; time.sleep(10)"), timeout=0.3))
+        self.assertNotIsInstance(raised.exception, UnstoppedTimeout)
+
+    def test_output_is_bounded(self):
+        """Test long outputs keep head and tail within the limit"""
+        code = "for i in range(20000):\n    print(f'line {i}')\n"
+        result = run_streaming(python_command(code), capture_limit=4096)
+        self.assertLess(len(result.stdout), 4096 + 100)
+        self.assertTrue(result.stdout.startswith('line 0\n'))
+        self.assertTrue(result.stdout.endswith('line 19999\n'))
+        self.assertIn('omitted', result.stdout)
+
+    def test_missing_command(self):
+        """Test a missing binary raises FileNotFoundError like subprocess.run"""
+        with self.assertRaises(FileNotFoundError):
+            run_streaming(['snapwiz-no-such-command'])
+
+
+class TestParsers(unittest.TestCase):
+    """Test package manager status parsers"""
+
+    def test_parser_selection(self):
+        """Test the parser follows the command behind pkexec"""
+        self.assertIsInstance(parser_for_command(['pkexec', 'apt', 'install']), AptStatusParser)
+        self.assertIsInstance(parser_for_command(['pkexec', 'dpkg', '-i']), DpkgStatusParser)
+        self.assertIsInstance(parser_for_command(['pkexec', 'zypper', 'install']), DnfProgressParser)
+        self.assertIsInstance(parser_for_command(['pkexec', 'rpm', '-ivh']), RpmPercentParser)
+        self.assertIsInstance(parser_for_command(['flatpak', 'install']), PercentParser)
+
+    def test_dpkg_steps(self):
+        """Test dpkg progress counts unpack and configure steps"""
+        parser = DpkgStatusParser(package_count=2)
+        percents = []
+        for line in ('status: a: half-installed\n', 'status: a: unpacked\n', 'status: b: unpacked\n',
+                     'processing: configure: a\n', 'status: a: installed\n', 'status: b: installed\n'):
+            events, keep = parser.feed(line)
+            self.assertFalse(keep)
+            percents.extend(e.percent for e in events if e.percent is not None)
+        self.assertEqual(percents, [0.0, 25.0, 50.0, 75.0, 100.0])
+
+    def test_dpkg_multiarch(self):
+        """Test dpkg lines with architecture-qualified package names"""
+        parser = DpkgStatusParser(package_count=1)
+        events, _ = parser.feed('processing: unpack: libc6:amd64\n')
+        self.assertEqual((events[0].phase, events[0].package), ('Unpack', 'libc6:amd64'))
+        events, _ = parser.feed('status: libc6:amd64: unpacked\n')
+        self.assertEqual((events[0].phase, events[0].package, events[0].percent), ('Unpacked', 'libc6:amd64', 50.0))
+
+    def test_apt_multiarch(self):
+        """Test apt status lines with architecture-qualified package names"""
+        parser = AptStatusParser()
+        events, keep = parser.feed('pmstatus:libc6:amd64:42.8571:Unpacking libc6:amd64 (2.35-0ubuntu3)\n')
+        self.assertFalse(keep)
+        self.assertEqual(events[0].percent, 42.8571)
+        self.assertEqual(events[0].phase, 'Unpacking')
+        self.assertEqual(events[0].package, 'libc6:amd64')
+        self.assertEqual(events[0].message, 'Unpacking libc6:amd64 (2.35-0ubuntu3)')
+        events, _ = parser.feed('pmstatus:vim:10:Installing vim\n')
+        self.assertEqual((events[0].package, events[0].percent), ('vim', 10.0))
+        events, keep = parser.feed('pmerror:libfoo:i386:60:dependency problems - leaving unconfigured\n')
+        self.assertTrue(keep)
+        self.assertEqual((events[0].phase, events[0].package), ('Error', 'libfoo:i386'))
+
+    def test_dnf_lines(self):
+        """Test dnf transaction and verify passes"""
+        parser = DnfProgressParser()
+        events, keep = parser.feed('  Installing       : foo-1.0-1.x86_64            1/2 \n')
+        self.assertTrue(keep)
+        self.assertEqual(events[0].percent, 40.0)
+        self.assertEqual(events[0].package, 'foo-1.0-1.x86_64')
+        events, _ = parser.feed('  Verifying        : foo-1.0-1.x86_64            2/2 \n')
+        self.assertEqual(events[0].percent, 100.0)
+        events, _ = parser.feed('(1/4) Installing: bar-2.0-1.noarch ...[done]\n')
+        self.assertEqual(events[0].percent, 25.0)
+
+    def test_rpm_percent(self):
+        """Test rpm --percent lines"""
+        events, keep = RpmPercentParser().feed('%% 37.500000\n')
+        self.assertFalse(keep)
+        self.assertEqual(events[0].percent, 37.5)
+
+
+class TestBoundedCapture(unittest.TestCase):
+    """Test output capture"""
+
+    def test_small_output_untouched(self):
+        """Test output under the limit is kept verbatim"""
+        capture = BoundedCapture(1024)
+        for line in ('a\n', 'b\n'):
+            capture.append(line)
+        self.assertEqual(capture.text(), 'a\nb\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
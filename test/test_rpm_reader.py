@@ -0,0 +1,102 @@
+"""
+Unit Tests for RPM Package Reader
+Tests lead/signature/header decoding and structural checks
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import rpm_reader
+from src.exceptions import InvalidPackageError
+from test.test_utils import TestEnvironment, create_test_rpm, build_rpm_header
+
+
+class TestReadRpm(unittest.TestCase):
+    """Test reading valid .rpm packages"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        self.rpm_path = create_test_rpm(
+            self.temp_dir, name='hello', version='2.10', release='3.fc40',
+            requires=['glibc', 'libfoo.so.1()(64bit)'], provides=['hello', 'hello(x86-64)']
+        )
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_nevra(self):
+        """Test name/version/release/arch are decoded"""
+        info = rpm_reader.read_rpm(self.rpm_path)
+        self.assertEqual(info.name, 'hello')
+        self.assertEqual(info.version, '2.10')
+        self.assertEqual(info.release, '3.fc40')
+        self.assertEqual(info.arch, 'x86_64')
+        self.assertEqual(info.nevra, 'hello-2.10-3.fc40.x86_64')
+
+    def test_requires_skip_rpmlib(self):
+        """Test rpmlib() feature requirements are filtered out"""
+        info = rpm_reader.read_rpm(self.rpm_path)
+        self.assertEqual(info.requires, ['glibc', 'libfoo.so.1()(64bit)'])
+        self.assertEqual(info.provides, ['hello', 'hello(x86-64)'])
+
+    def test_digests_and_sizes(self):
+        """Test payload digest and sizes are exposed"""
+        info = rpm_reader.read_rpm(self.rpm_path)
+        self.assertEqual(info.digests['payload sha256'], 'ab' * 32)
+        self.assertIn('header+payload md5', info.digests)
+        self.assertEqual(info.installed_size, 2048)
+        self.assertEqual(info.header_end + 2048, info.file_size)
+
+    def test_to_dict(self):
+        """Test dict view"""
+        data = rpm_reader.read_rpm(self.rpm_path).to_dict()
+        self.assertEqual(data['format'], 'rpm')
+        self.assertEqual(data['name'], 'hello')
+
+
+class TestInvalidRpm(unittest.TestCase):
+    """Test structural checks on broken packages"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_bad_lead(self):
+        """Test non-RPM file is rejected"""
+        path = self.env.create_test_file('bad.rpm', size_bytes=4096)
+        with self.assertRaises(InvalidPackageError):
+            rpm_reader.read_rpm(path)
+
+    def test_truncated_payload(self):
+        """Test truncation is detected from the signature size"""
+        path = create_test_rpm(self.temp_dir, payload_size=4096)
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(path, 'wb') as f:
+            f.write(data[:-1000])
+        with self.assertRaises(InvalidPackageError):
+            rpm_reader.read_rpm(path)
+
+
+class TestParseHeader(unittest.TestCase):
+    """Test the header decoder on its own"""
+
+    def test_header_without_magic(self):
+        """Test blobs stored without magic (as in rpmdb.sqlite)"""
+        blob = build_rpm_header([(1000, 6, 'bash'), (1003, 4, 1)], with_magic=False)
+        header, end = rpm_reader.parse_header(blob, with_magic=False)
+        self.assertEqual(header.get(rpm_reader.RPMTAG_NAME), 'bash')
+        self.assertEqual(header.get(rpm_reader.RPMTAG_EPOCH), 1)
+        self.assertEqual(end, len(blob))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Unit Tests for SquashFS Snap Reader
+Tests reading meta/snap.yaml directly from a squashfs image
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import squashfs_reader
+from src.exceptions import InvalidPackageError
+from test.test_utils import TestEnvironment, create_test_snap
+
+
+SNAP_YAML = """name: hello-snap
+version: '2.10'
+summary: GNU Hello, the snap
+description: |
+  Prints a friendly greeting.
+  Second line.
+base: core22
+grade: stable
+confinement: classic
+apps:
+  hello:
+    command: bin/hello
+  universe:
+    command: bin/universe
+    plugs: [network]
+"""
+
+
+class TestReadSnap(unittest.TestCase):
+    """Test reading snap metadata"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def _check(self, info):
+        self.assertEqual(info.name, 'hello-snap')
+        self.assertEqual(info.version, '2.10')
+        self.assertEqual(info.base, 'core22')
+        self.assertEqual(info.confinement, 'classic')
+        self.assertEqual(info.apps, ['hello', 'universe'])
+        self.assertEqual(info.compression, 'gzip')
+
+    def test_file_in_fragment(self):
+        """Test snap.yaml stored in a fragment block"""
+        path = create_test_snap(self.temp_dir, SNAP_YAML, use_fragment=True)
+        self._check(squashfs_reader.read_snap(path))
+
+    def test_file_in_data_block(self):
+        """Test snap.yaml stored in a full data block"""
+        path = create_test_snap(self.temp_dir, SNAP_YAML, use_fragment=False)
+        self._check(squashfs_reader.read_snap(path))
+
+    def test_lookup_missing(self):
+        """Test lookup of a missing path returns None"""
+        path = create_test_snap(self.temp_dir, SNAP_YAML)
+        with open(path, 'rb') as f:
+            image = squashfs_reader.SquashfsImage(f.read(), path)
+        self.assertIsNone(image.read_file('meta/gui/icon.png'))
+
+    def test_bad_magic(self):
+        """Test non-squashfs file is rejected"""
+        path = self.env.create_test_file('bad.snap', size_bytes=4096)
+        with self.assertRaises(InvalidPackageError):
+            squashfs_reader.read_snap(path)
+
+    def test_truncated(self):
+        """Test truncated image is rejected"""
+        path = create_test_snap(self.temp_dir, SNAP_YAML)
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(path, 'wb') as f:
+            f.write(data[:-20])
+        with self.assertRaises(InvalidPackageError):
+            squashfs_reader.read_snap(path)
+
+
+class TestMinimalYamlParser(unittest.TestCase):
+    """Test the fallback snap.yaml parser used without PyYAML"""
+
+    def setUp(self):
+        self._yaml = squashfs_reader.yaml
+        squashfs_reader.yaml = None
+
+    def tearDown(self):
+        squashfs_reader.yaml = self._yaml
+
+    def test_parse(self):
+        """Test scalars, block scalars and app names"""
+        data = squashfs_reader.parse_snap_yaml(SNAP_YAML)
+        self.assertEqual(data['name'], 'hello-snap')
+        self.assertEqual(data['version'], '2.10')
+        self.assertEqual(data['description'], 'Prints a friendly greeting.\nSecond line.')
+        self.assertEqual(sorted(data['apps']), ['hello', 'universe'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -89,6 +89,345 @@ def create_mock_package(package_type='deb', temp_dir=None):
     return filepath
 
 
+def _ar_member(name, data):
+    """Serialize one ar archive member"""
+    header = (
+        f"{name:<16}{0:<12}{0:<6}{0:<6}{100644:<8}{len(data):<10}".encode('ascii') + b'`\n'
+    )
+    return header + data + (b'\n' if len(data) % 2 else b'')
+
+
+def _tar_bytes(files, compression=''):
+    """Build a tar archive in memory from a dict of name -> bytes"""
+    import io
+    import tarfile
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode=f'w:{compression}') as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def create_test_deb(temp_dir, control_fields, filename=None, data_size=0):
+    """
+    Build a minimal but valid .deb package without dpkg-deb
+    
+    Args:
+        temp_dir: Directory to create file in
+        control_fields: Dict of control field -> value (multi-line values allowed)
+        filename: Output filename (defaults to <Package>.deb)
+        data_size: Extra bytes of payload to put in data.tar
+    
+    Returns:
+        Path to created file
+    """
+    lines = []
+    for key, value in control_fields.items():
+        value_lines = value.split('\n')
+        lines.append(f"{key}: {value_lines[0]}")
+        lines.extend(f" {line if line else '.'}" for line in value_lines[1:])
+    control = ('\n'.join(lines) + '\n').encode('utf-8')
+    
+    control_tar = _tar_bytes({'./control': control}, 'gz')
+    data_tar = _tar_bytes({'./usr/share/doc/payload': os.urandom(data_size)}, 'gz')
+    
+    filename = filename or f"{control_fields.get('Package', 'test')}.deb"
+    filepath = os.path.join(temp_dir, filename)
+    with open(filepath, 'wb') as f:
+        f.write(b'!<arch>\n')
+        f.write(_ar_member('debian-binary', b'2.0\n'))
+        f.write(_ar_member('control.tar.gz', control_tar))
+        f.write(_ar_member('data.tar.gz', data_tar))
+    
+    return filepath
+
+
+def build_rpm_header(tags, with_magic=True):
+    """
+    Serialize an RPM header structure
+    
+    Args:
+        tags: List of (tag, type, value) tuples. Types follow src.rpm_reader
+              (4 = INT32, 6 = STRING, 7 = BIN, 8 = STRING_ARRAY)
+        with_magic: Include the 8 byte magic/reserved preamble
+    
+    Returns:
+        bytes
+    """
+    import struct
+    alignment = {3: 2, 4: 4, 5: 8}
+    int_formats = {2: 'B', 3: 'H', 4: 'I', 5: 'Q'}
+    index = b''
+    store = b''
+    for tag, data_type, value in tags:
+        pad = (-len(store)) % alignment.get(data_type, 1)
+        store += b'\0' * pad
+        if data_type in int_formats:
+            values = value if isinstance(value, list) else [value]
+            data = struct.pack(f'>{len(values)}{int_formats[data_type]}', *values)
+            count = len(values)
+        elif data_type == 7:
+            data = value
+            count = len(value)
+        elif data_type == 8:
+            data = b''.join(v.encode('utf-8') + b'\0' for v in value)
+            count = len(value)
+        else:
+            data = value.encode('utf-8') + b'\0'
+            count = 1
+        index += struct.pack('>IIiI', tag, data_type, len(store), count)
+        store += data
+    body = struct.pack('>II', len(tags), len(store)) + index + store
+    return (b'\x8e\xad\xe8\x01\0\0\0\0' + body) if with_magic else body
+
+
+def create_test_rpm(temp_dir, name='test-package', version='1.0', release='1',
+                    arch='x86_64', requires=None, provides=None, payload_size=2048, filename=None):
+    """
+    Build a minimal but structurally valid .rpm package
+    
+    Returns:
+        Path to created file
+    """
+    requires = requires if requires is not None else ['glibc']
+    provides = provides if provides is not None else [name]
+    header = build_rpm_header([
+        (1000, 6, name),
+        (1001, 6, version),
+        (1002, 6, release),
+        (1004, 6, f'{name} summary'),
+        (1005, 6, f'{name} description'),
+        (1009, 4, payload_size),
+        (1022, 6, arch),
+        (1047, 8, provides),
+        (1048, 4, [0] * len(requires) + [1 << 24]),
+        (1049, 8, requires + ['rpmlib(PayloadIsXz)']),
+        (5092, 8, ['ab' * 32]),
+        (5093, 4, 8),
+    ])
+    payload = b'\xfd7zXZ\0' + b'\0' * max(payload_size - 6, 0)
+    signature = build_rpm_header([
+        (1000, 4, len(header) + len(payload)),
+        (1004, 7, b'\x01' * 16),
+    ])
+    signature += b'\0' * ((-len(signature)) % 8)
+    
+    lead = b'\xed\xab\xee\xdb\x03\x00' + b'\0' * 2 + b'\0\x01' + name.encode('ascii')[:65].ljust(66, b'\0')
+    lead += b'\0\x01' + b'\0\x05' + b'\0' * 16
+    
+    filename = filename or f'{name}-{version}-{release}.{arch}.rpm'
+    filepath = os.path.join(temp_dir, filename)
+    with open(filepath, 'wb') as f:
+        f.write(lead + signature + header + payload)
+    
+    return filepath
+
+
+def create_test_rpmdb(temp_dir, packages, filename='rpmdb.sqlite'):
+    """
+    Build an rpmdb.sqlite fixture
+    
+    Args:
+        packages: List of dicts with name, version, release, arch and optional
+                  epoch, size, summary and requires; raw bytes are stored as-is
+    
+    Returns:
+        Path to created database
+    """
+    import sqlite3
+    filepath = os.path.join(temp_dir, filename)
+    conn = sqlite3.connect(filepath)
+    conn.execute('CREATE TABLE Packages (hnum INTEGER PRIMARY KEY AUTOINCREMENT, blob BLOB NOT NULL)')
+    for package in packages:
+        if isinstance(package, bytes):
+            blob = package
+        else:
+            requires = package.get('requires', [])
+            tags = [
+                (1000, 6, package['name']),
+                (1001, 6, package['version']),
+                (1002, 6, package['release']),
+                (1004, 6, package.get('summary', '')),
+                (1009, 4, package.get('size', 0)),
+                (1022, 6, package['arch']),
+                (1048, 4, [0] * len(requires) + [1 << 24]),
+                (1049, 8, requires + ['rpmlib(CompressedFileNames)']),
+            ]
+            if 'epoch' in package:
+                tags.append((1003, 4, package['epoch']))
+            blob = build_rpm_header(tags, with_magic=False)
+        conn.execute('INSERT INTO Packages (blob) VALUES (?)', (blob,))
+    conn.commit()
+    conn.close()
+    return filepath
+
+
+def create_test_snap(temp_dir, snap_yaml, filename='test.snap', use_fragment=True):
+    """
+    Build a minimal gzip-compressed squashfs 4.0 image containing meta/snap.yaml
+    
+    Args:
+        temp_dir: Directory to create file in
+        snap_yaml: Contents of meta/snap.yaml
+        filename: Output filename
+        use_fragment: Store the file in a fragment block instead of a full data block
+    
+    Returns:
+        Path to created file
+    """
+    import struct
+    import zlib
+    
+    data = snap_yaml.encode('utf-8')
+    compressed = zlib.compress(data)
+    pos = 96
+    
+    if use_fragment:
+        blocks_start, fragment, block_sizes = 0, 0, []
+    else:
+        blocks_start, fragment, block_sizes = pos, 0xFFFFFFFF, [len(compressed)]
+    data_area = compressed
+    pos += len(data_area)
+    
+    def metadata_block(payload, compress):
+        if compress:
+            packed = zlib.compress(payload)
+            return struct.pack('<H', len(packed)) + packed
+        return struct.pack('<H', len(payload) | 0x8000) + payload
+    
+    def dir_listing(name, inode_offset, inode_number, entry_type):
+        header = struct.pack('<III', 0, 0, inode_number)
+        entry = struct.pack('<HhHH', inode_offset, 0, entry_type, len(name) - 1) + name.encode('ascii')
+        return header + entry
+    
+    # Inode table: snap.yaml (1), meta (2), root (3) in one metadata block
+    file_inode = struct.pack('<HHHHII', 2, 0o644, 0, 0, 0, 1)
+    file_inode += struct.pack('<IIII', blocks_start, fragment, 0, len(data))
+    file_inode += b''.join(struct.pack('<I', size) for size in block_sizes)
+    meta_listing = dir_listing('snap.yaml', 0, 1, 2)
+    meta_offset = len(file_inode)
+    root_listing = dir_listing('meta', meta_offset, 2, 1)
+    meta_inode = struct.pack('<HHHHII', 1, 0o755, 0, 0, 0, 2)
+    meta_inode += struct.pack('<IIHHI', 0, 2, len(meta_listing) + 3, 0, 3)
+    root_offset = meta_offset + len(meta_inode)
+    root_inode = struct.pack('<HHHHII', 1, 0o755, 0, 0, 0, 3)
+    root_inode += struct.pack('<IIHHI', 0, 3, len(root_listing) + 3, len(meta_listing), 4)
+    
+    inode_table_start = pos
+    inode_table = metadata_block(file_inode + meta_inode + root_inode, compress=True)
+    pos += len(inode_table)
+    
+    directory_table_start = pos
+    directory_table = metadata_block(meta_listing + root_listing, compress=False)
+    pos += len(directory_table)
+    
+    fragment_block_pos = pos
+    fragment_entries = struct.pack('<QII', 96, len(compressed), 0) if use_fragment else b''
+    fragment_table = metadata_block(fragment_entries, compress=False) if use_fragment else b''
+    pos += len(fragment_table)
+    fragment_table_start = pos
+    fragment_pointers = struct.pack('<Q', fragment_block_pos) if use_fragment else b''
+    pos += len(fragment_pointers)
+    
+    superblock = struct.pack(
+        '<IIIIIHHHHHHQQQQQQQQ',
+        0x73717368, 3, 0, 131072, 1 if use_fragment else 0, 1, 17, 0, 1, 4, 0,
+        root_offset, pos, pos, 0xFFFFFFFFFFFFFFFF, inode_table_start,
+        directory_table_start, fragment_table_start, 0xFFFFFFFFFFFFFFFF
+    )
+    
+    filepath = os.path.join(temp_dir, filename)
+    with open(filepath, 'wb') as f:
+        f.write(superblock + data_area + inode_table + directory_table + fragment_table + fragment_pointers)
+    
+    return filepath
+
+
+def _gvariant_offset_size(body_size, count):
+    """Pick the smallest framing offset size that fits the container"""
+    for size, limit in ((1, 0xFF), (2, 0xFFFF), (4, 0xFFFFFFFF)):
+        if body_size + count * size <= limit:
+            return size
+    return 8
+
+
+def build_gvariant_sv(entries):
+    """
+    Serialize an a{sv} dictionary
+    
+    Args:
+        entries: List of (key, type_string, value_bytes)
+    """
+    elements = []
+    for key, type_string, value in entries:
+        variant = value + b'\0' + type_string.encode('ascii')
+        key_bytes = key.encode('utf-8') + b'\0'
+        body = key_bytes + b'\0' * ((-len(key_bytes)) % 8) + variant
+        size = _gvariant_offset_size(len(body), 1)
+        elements.append(body + len(key_bytes).to_bytes(size, 'little'))
+    
+    body = b''
+    ends = []
+    for element in elements:
+        body += b'\0' * ((-len(body)) % 8)
+        body += element
+        ends.append(len(body))
+    if not ends:
+        return b''
+    size = _gvariant_offset_size(len(body), len(ends))
+    return body + b''.join(end.to_bytes(size, 'little') for end in ends)
+
+
+def create_test_flatpak(temp_dir, ref, metadata, installed_size=0, download_size=0,
+                        filename='test.flatpak', payload_size=0):
+    """
+    Build a single-file flatpak bundle (OSTree static delta superblock)
+    
+    Returns:
+        Path to created file
+    """
+    import struct
+    entries = [
+        ('ref', 's', ref.encode('utf-8') + b'\0'),
+        ('metadata', 's', metadata.encode('utf-8') + b'\0'),
+        ('installed-size', 't', struct.pack('>Q', installed_size)),
+        ('download-size', 't', struct.pack('>Q', download_size)),
+    ]
+    if payload_size:
+        entries.append(('deltas/AA/bb/0', 'ay', b'\x5a' * payload_size))
+    metadata_dict = build_gvariant_sv(entries)
+    
+    # Children: a{sv} t ay ay commit ay a(uayttay) a(yaytt)
+    children = [
+        (8, metadata_dict, True),
+        (8, struct.pack('<Q', 0), False),
+        (1, b'', True),
+        (1, bytes(range(32)), True),
+        (8, b'', True),
+        (1, b'', True),
+        (8, b'', True),
+        (8, b'', False),
+    ]
+    body = b''
+    ends = []
+    for alignment, data, framed in children:
+        body += b'\0' * ((-len(body)) % alignment)
+        body += data
+        if framed:
+            ends.append(len(body))
+    size = _gvariant_offset_size(len(body), len(ends))
+    # Tuple framing offsets are stored in reverse order
+    superblock = body + b''.join(end.to_bytes(size, 'little') for end in reversed(ends))
+    
+    filepath = os.path.join(temp_dir, filename)
+    with open(filepath, 'wb') as f:
+        f.write(superblock)
+    
+    return filepath
+
+
 def assert_exception_message_contains(exception, text):
     """Assert that exception message contains specific text"""
     message = str(exception)
@@ -146,6 +485,36 @@ class MockCallback:
         self.calls = []
 
 
+class FakeHelper:
+    """
+    Stand-in for PrivilegedHelper
+    
+    Records every command and answers with canned ProcessResults instead of
+    running anything.
+    """
+    
+    def __init__(self, returncode=0, stdout='', stderr='', status_lines=()):
+        self.commands = []
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.status_lines = list(status_lines)  # Fed to the parser like real output
+    
+    def run(self, command, on_event=None, parser=None, timeout=None, capture_limit=None):
+        """Record the command and return the canned result"""
+        from src.process_runner import ProcessResult
+        self.commands.append(list(command))
+        if parser is not None and on_event is not None:
+            for line in self.status_lines:
+                for event in parser.feed(line)[0]:
+                    on_event(event)
+        return ProcessResult(command, self.returncode, self.stdout, self.stderr, 0.0)
+    
+    def stop(self):
+        """Nothing to stop"""
+        pass
+
+
 def run_test_suite(test_modules):
     """
     Run a suite of test modules
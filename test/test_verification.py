@@ -0,0 +1,145 @@
+"""
+Unit Tests for Verification Engine
+Tests single-pass digests, streaming structural checks and verify_package
+"""
+
+import unittest
+import hashlib
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.verification import VerificationEngine
+from src.capabilities import CapabilitySnapshot
+from src.digest_cache import DigestCache
+from src.package_handler import PackageHandler
+from test.test_utils import TestEnvironment, create_test_deb, create_test_rpm, create_test_snap
+
+
+CONTROL = {
+    'Package': 'hello-test',
+    'Version': '1.0',
+    'Architecture': 'all',
+    'Description': 'test package',
+}
+
+
+class TestVerificationEngine(unittest.TestCase):
+    """Test the single-pass engine"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        # A tiny buffer forces headers and members to straddle chunk boundaries
+        self.engine = VerificationEngine(buffer_size=7)
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_all_digests_in_one_pass(self):
+        """Test every configured algorithm is computed from a single read"""
+        path = create_test_deb(self.temp_dir, CONTROL, data_size=5000)
+        with open(path, 'rb') as f:
+            data = f.read()
+        report = self.engine.scan(path, ['sha256', 'md5', 'sha1', 'sha512'])
+        for name in ('sha256', 'md5', 'sha1', 'sha512'):
+            self.assertEqual(report.digests[name], hashlib.new(name, data).hexdigest())
+        self.assertEqual(report.bytes_read, len(data))
+        self.assertEqual(report.file_size, len(data))
+
+    def test_unknown_algorithm_rejected(self):
+        """Test algorithms outside CHECKSUM_ALGORITHMS are rejected"""
+        path = create_test_deb(self.temp_dir, CONTROL)
+        with self.assertRaises(ValueError):
+            self.engine.scan(path, ['crc32'])
+
+    def test_deb_structure_streamed(self):
+        """Test the streaming ar checker yields the control stanza"""
+        path = create_test_deb(self.temp_dir, CONTROL, data_size=3001)
+        report = self.engine.scan(path, ['sha256'])
+        self.assertTrue(report.structure_ok)
+        self.assertEqual(report.metadata['control']['Package'], 'hello-test')
+        for stage in ('open', 'scan', 'structure', 'total'):
+            self.assertIn(stage, report.timings)
+
+    def test_truncated_deb_detected(self):
+        """Test a truncated download fails the streaming check"""
+        path = create_test_deb(self.temp_dir, CONTROL, data_size=5000)
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 100)
+        report = self.engine.scan(path)
+        self.assertFalse(report.structure_ok)
+        self.assertIn('truncated', report.structure_message)
+
+    def test_rpm_structure_streamed(self):
+        """Test the RPM header region is captured from the stream"""
+        path = create_test_rpm(self.temp_dir, name='streamed', payload_size=4096)
+        report = self.engine.scan(path, ['sha1'])
+        self.assertTrue(report.structure_ok)
+        self.assertEqual(report.metadata['name'], 'streamed')
+
+    def test_snap_structure(self):
+        """Test snaps are checked through the squashfs reader after the scan"""
+        path = create_test_snap(self.temp_dir, "name: hello\nversion: '2.0'\n")
+        report = self.engine.scan(path, ['sha256'])
+        self.assertTrue(report.structure_ok)
+        self.assertEqual(report.metadata['name'], 'hello')
+
+    def test_garbage_rejected(self):
+        """Test a non-package file fails the structural check"""
+        path = self.env.create_test_file('bad.deb', size_bytes=4096)
+        report = self.engine.scan(path)
+        self.assertFalse(report.structure_ok)
+
+
+class TestVerifyPackage(unittest.TestCase):
+    """Test PackageHandler.verify_package on top of the engine"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        cache = DigestCache(os.path.join(self.temp_dir, 'cache.db'), use_xattr=False)
+        self.handler = PackageHandler(capabilities=CapabilitySnapshot({}, {}, ''), digest_cache=cache)
+        self.deb_path = create_test_deb(self.temp_dir, CONTROL, data_size=4096)
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def test_checksum_match(self):
+        """Test a matching sha512 checksum passes with extra digests reported"""
+        with open(self.deb_path, 'rb') as f:
+            expected = hashlib.sha512(f.read()).hexdigest()
+        success, _, details = self.handler.verify_package(
+            self.deb_path, checksum=expected, checksum_type='sha512', algorithms=['md5']
+        )
+        self.assertTrue(success)
+        self.assertTrue(details['checksum_match'])
+        self.assertTrue(details['integrity_ok'])
+        self.assertEqual(set(details['checksums']), {'sha512', 'md5'})
+        self.assertIn('scan', details['report']['timings'])
+
+    def test_checksum_mismatch(self):
+        """Test a wrong checksum fails"""
+        success, message, details = self.handler.verify_package(self.deb_path, checksum='0' * 64)
+        self.assertFalse(success)
+        self.assertFalse(details['checksum_match'])
+        self.assertIn('mismatch', message)
+
+    def test_missing_signature(self):
+        """Test signature check fails without a detached signature"""
+        success, message, details = self.handler.verify_package(self.deb_path, check_signature=True)
+        self.assertFalse(success)
+        self.assertFalse(details['signature_valid'])
+        self.assertIn('No signature file', message)
+
+    def test_calculate_checksum_sha1(self):
+        """Test _calculate_checksum supports every configured algorithm"""
+        with open(self.deb_path, 'rb') as f:
+            expected = hashlib.sha1(f.read()).hexdigest()
+        self.assertEqual(self.handler._calculate_checksum(self.deb_path, 'sha1'), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
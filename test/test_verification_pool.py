@@ -0,0 +1,122 @@
+"""
+Unit Tests for Verification Pool
+Tests concurrent pre-verification of a batch queue
+"""
+
+import unittest
+import hashlib
+import threading
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.capabilities import CapabilitySnapshot
+from src.digest_cache import DigestCache
+from src.package_handler import PackageHandler
+from src.verification_pool import VerificationPool
+from test.test_utils import TestEnvironment, create_test_deb, create_test_rpm
+
+
+class TestVerificationPool(unittest.TestCase):
+    """Test batch pre-verification"""
+
+    def setUp(self):
+        self.env = TestEnvironment()
+        self.temp_dir = self.env.setup()
+        cache = DigestCache(os.path.join(self.temp_dir, 'cache.db'), use_xattr=False)
+        self.handler = PackageHandler(capabilities=CapabilitySnapshot({}, {}, ''), digest_cache=cache)
+        self.packages = [
+            create_test_deb(self.temp_dir, {'Package': f'pkg{i}', 'Version': '1'}, data_size=4096)
+            for i in range(3)
+        ]
+        self.packages.append(create_test_rpm(self.temp_dir, name='rpmpkg', payload_size=4096))
+
+    def tearDown(self):
+        self.env.teardown()
+
+    def _run_batch(self, pool, paths):
+        results = {}
+        done = threading.Event()
+
+        def callback(path, result):
+            results[path] = result
+            if len(results) == len(paths):
+                done.set()
+
+        futures = pool.submit_batch(paths, callback=callback)
+        self.assertTrue(done.wait(60))
+        return futures, results
+
+    def test_batch_in_threads(self):
+        """Test every package gets a verify_package style result"""
+        pool = VerificationPool(self.handler, workers=2, use_processes=False)
+        try:
+            futures, results = self._run_batch(pool, self.packages)
+        finally:
+            pool.shutdown(wait=True)
+        self.assertEqual(set(futures), set(self.packages))
+        for path in self.packages:
+            success, _, details = results[path]
+            self.assertTrue(success)
+            self.assertTrue(details['integrity_ok'])
+            with open(path, 'rb') as f:
+                self.assertEqual(details['checksums']['sha256'], hashlib.sha256(f.read()).hexdigest())
+
+    def test_batch_in_processes(self):
+        """Test hashing in worker processes gives the same digests"""
+        pool = VerificationPool(self.handler, workers=2, use_processes=True)
+        try:
+            _, results = self._run_batch(pool, self.packages[:2])
+        finally:
+            pool.shutdown(wait=True)
+        for path in self.packages[:2]:
+            with open(path, 'rb') as f:
+                self.assertEqual(results[path][2]['checksums']['sha256'], hashlib.sha256(f.read()).hexdigest())
+
+    def test_failure_reported(self):
+        """Test a corrupted package fails without affecting the others"""
+        bad = self.env.create_test_file('broken.deb', size_bytes=4096)
+        pool = VerificationPool(self.handler, workers=2, use_processes=False)
+        try:
+            _, results = self._run_batch(pool, [bad, self.packages[0]])
+        finally:
+            pool.shutdown(wait=True)
+        self.assertFalse(results[bad][0])
+        self.assertIn('integrity', results[bad][1])
+        self.assertTrue(results[self.packages[0]][0])
+
+    def test_second_batch_uses_cache(self):
+        """Test re-queued packages are answered from the digest cache"""
+        pool = VerificationPool(self.handler, workers=2, use_processes=False)
+        try:
+            self._run_batch(pool, self.packages[:1])
+            _, results = self._run_batch(pool, self.packages[:1])
+        finally:
+            pool.shutdown(wait=True)
+        self.assertTrue(results[self.packages[0]][2]['report']['cached'])
+
+    def test_shutdown_cancels_queued(self):
+        """Test shutdown drops queued verifications and lets the running one finish"""
+        pool = VerificationPool(self.handler, workers=1, use_processes=False)
+        started = threading.Event()
+        release = threading.Event()
+
+        def verify(*args):
+            started.set()
+            release.wait(10)
+            return True, "ok", {}
+
+        pool._verify = verify
+        running = pool.submit(self.packages[0])
+        self.assertTrue(started.wait(10))
+        queued = pool.submit(self.packages[1])
+        pool.shutdown(wait=False)
+        self.assertTrue(queued.cancelled())
+        release.set()
+        self.assertEqual(running.result(10), (True, "ok", {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
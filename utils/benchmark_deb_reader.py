@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark the native .deb reader against dpkg-deb
+Builds synthetic packages from 1 MB to 1 GB and times package info +
+integrity checking with both the in-process reader and the subprocess path.
+
+Usage:
+    python utils/benchmark_deb_reader.py [--sizes 1M,10M,100M,1G] [--rounds 5]
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import tarfile
+import argparse
+import tempfile
+import subprocess
+
+# Add parent directory to path to import src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import deb_reader
+
+UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+CONTROL = b"""Package: snapwiz-bench
+Version: 1.0-1
+Architecture: all
+Maintainer: SnapWiz <bench@example.com>
+Installed-Size: 1024
+Depends: libc6 (>= 2.17)
+Description: benchmark package
+ Synthetic package used to benchmark the deb reader.
+"""
+
+
+def parse_size(text):
+    """Parse sizes like 1M or 1G into bytes"""
+    text = text.strip().upper()
+    if text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def ar_header(name, size):
+    """Build an ar member header"""
+    return f"{name:<16}{0:<12}{0:<6}{0:<6}{100644:<8}{size:<10}".encode('ascii') + b'`\n'
+
+
+def build_package(path, total_size):
+    """Write a .deb whose data.tar member pads the file to total_size bytes"""
+    control_buf = io.BytesIO()
+    with tarfile.open(fileobj=control_buf, mode='w:gz') as tar:
+        info = tarfile.TarInfo('./control')
+        info.size = len(CONTROL)
+        tar.addfile(info, io.BytesIO(CONTROL))
+    control_tar = control_buf.getvalue()
+
+    with open(path, 'wb') as f:
+        f.write(b'!<arch>\n')
+        f.write(ar_header('debian-binary', 4) + b'2.0\n')
+        f.write(ar_header('control.tar.gz', len(control_tar)) + control_tar)
+        if len(control_tar) % 2:
+            f.write(b'\n')
+        data_size = max(total_size - f.tell() - 60, 512)
+        data_size -= data_size % 2
+        f.write(ar_header('data.tar', data_size))
+        # Sparse payload: neither reader should touch it
+        f.truncate(f.tell() + data_size)
+
+
+def time_call(func, rounds):
+    """Return the best wall-clock time of func over rounds"""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def native(path):
+    deb_reader.read_deb(path)
+
+
+def subprocess_path(path):
+    # The old code ran dpkg-deb twice: once for info, once for integrity
+    subprocess.run(['dpkg-deb', '-I', path], capture_output=True, check=True)
+    subprocess.run(['dpkg-deb', '--info', path], capture_output=True, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the native .deb reader')
+    parser.add_argument('--sizes', default='1M,10M,100M,1G', help='Comma separated package sizes')
+    parser.add_argument('--rounds', type=int, default=5, help='Rounds per measurement (best is kept)')
+    args = parser.parse_args()
+
+    has_dpkg = shutil.which('dpkg-deb') is not None
+    temp_dir = tempfile.mkdtemp(prefix='snapwiz_bench_')
+
+    print(f"{'size':>8}  {'native (ms)':>12}  {'dpkg-deb (ms)':>14}  {'speedup':>8}")
+    try:
+        for size_text in args.sizes.split(','):
+            size = parse_size(size_text)
+            path = os.path.join(temp_dir, f'bench-{size_text}.deb')
+            build_package(path, size)
+
+            native_time = time_call(lambda: native(path), args.rounds)
+            if has_dpkg:
+                dpkg_time = time_call(lambda: subprocess_path(path), args.rounds)
+                speedup = f"{dpkg_time / native_time:7.1f}x"
+                dpkg_text = f"{dpkg_time * 1000:14.2f}"
+            else:
+                speedup = '-'
+                dpkg_text = f"{'n/a':>14}"
+
+            print(f"{size_text:>8}  {native_time * 1000:12.2f}  {dpkg_text}  {speedup:>8}")
+            os.remove(path)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main()